@@ -0,0 +1,291 @@
+"""
+Benchmark suite of the moving average calculator, over synthetic inputs of several sizes.
+
+Each case runs in its own process, so that its peak RSS is measured alone:
+    main: the whole main.py pipeline, from the input file to a null sink.
+    calculator: a MovingAverageCalculator reading the input file, without the command line.
+    window: a Window alone, fed with events that are already parsed.
+
+The results are saved as JSON, and can be compared against a stored baseline: the cases whose
+throughput or peak RSS got worse by more than the tolerance are reported, and the exit status is 1.
+
+Usage:
+    python -m benchmarks.bench_suite [--scales SCALES [SCALES ...]] [--window_sizes SIZES [SIZES ...]]
+        [--targets TARGETS [TARGETS ...]] [--output_file OUTPUT_FILE] [--baseline BASELINE]
+        [--tolerance TOLERANCE] [--repeat REPEAT] [generator arguments, see benchmarks.generate_events]
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
+
+from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.event_reader import read_events_mmap
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.output_sink import NullOutputSink
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE
+from moving_average_calculator.models.window import Window
+
+from .generate_events import START_TIME, GeneratorSettings, add_generator_arguments, settings_from_arguments, \
+    write_events
+
+TARGETS = ('main', 'calculator', 'window')
+
+# the arguments of the shape of the generated events, saved with the results
+GENERATOR_ARGUMENTS = ('rate', 'span_minutes', 'idle_gap_fraction', 'idle_gap_minutes', 'burstiness',
+                       'out_of_order_fraction', 'max_lateness', 'malformed_fraction', 'seed')
+
+# the window target parses the events in batches of this size, outside of the measured time
+WINDOW_BATCH_SIZE = 1_000_000
+
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'moving_average_benchmarks')
+
+
+def prepare_input(settings: GeneratorSettings, data_dir: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Generates the input file of the given shape, unless it was already generated by a previous run.
+
+    Args:
+        settings (GeneratorSettings): The shape of the generated events.
+        data_dir (str): The folder of the generated files.
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: The path to the input file, and the summary of its events.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    key = hashlib.sha1(json.dumps(asdict(settings), sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    input_file = os.path.join(data_dir, f"events_{settings.events}_{key}.json")
+    summary_file = f"{input_file}.summary"
+    if os.path.exists(summary_file) and os.path.exists(input_file):
+        with open(summary_file, encoding='utf-8') as f:
+            return input_file, json.load(f)
+
+    summary = write_events(settings, input_file)
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f)
+    return input_file, summary
+
+
+def synthetic_events(count: int, rate: float) -> Iterator[List[Event]]:
+    """
+    Builds sorted events at a steady rate, in batches, for the window target.
+
+    Args:
+        count (int): The number of events.
+        rate (float): The number of events per minute.
+
+    Returns:
+        Iterator[List[Event]]: The batches of events.
+    """
+    interval = MICROSECONDS_PER_MINUTE / rate
+    for batch_start in range(0, count, WINDOW_BATCH_SIZE):
+        yield [Event.from_epoch(START_TIME + round(index * interval), index % 120)
+               for index in range(batch_start, min(batch_start + WINDOW_BATCH_SIZE, count))]
+
+
+def run_case_in_process(target: str, input_file: str, window_size: int, events: int, rate: float) -> float:
+    """
+    Runs a case of the calculator or the window target, in the current process.
+
+    Args:
+        target (str): Either 'calculator' or 'window'.
+        input_file (str): The path to the input file.
+        window_size (int): The size of the window, in minutes.
+        events (int): The number of events of the window target.
+        rate (float): The number of events per minute of the window target.
+
+    Returns:
+        float: The measured time, in seconds.
+    """
+    if target == 'calculator':
+        calculator = MovingAverageCalculator(Window(window_size), NullOutputSink(), reader=read_events_mmap)
+        started = time.perf_counter()
+        # the malformed lines print an error each
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            calculator.process_events(input_file)
+        return time.perf_counter() - started
+
+    window = Window(window_size)
+    elapsed = 0.0
+    for batch in synthetic_events(events, rate):
+        started = time.perf_counter()
+        for event in batch:
+            window.remove_old_events(event.timestamp)
+            window.add_event(event)
+            window.get_average_duration()
+        elapsed += time.perf_counter() - started
+    return elapsed
+
+
+def run_case(target: str, input_file: str, window_size: int, events: int, rate: float) -> Tuple[float, float]:
+    """
+    Runs a case in a child process, and measures its time and its peak RSS.
+
+    Args:
+        target (str): One of TARGETS.
+        input_file (str): The path to the input file.
+        window_size (int): The size of the window, in minutes.
+        events (int): The number of events of the window target.
+        rate (float): The number of events per minute of the window target.
+
+    Returns:
+        Tuple[float, float]: The time, in seconds, and the peak RSS, in MiB.
+
+    Raises:
+        RuntimeError: If the child process fails.
+    """
+    if target == 'main':
+        command = [sys.executable, '-m', 'moving_average_calculator.main', '--input_file', input_file,
+                   '--window_size', str(window_size), '--sink', 'null']
+    else:
+        command = [sys.executable, '-m', 'benchmarks.bench_suite', '--run_case', target, input_file,
+                   str(window_size), str(events), str(rate)]
+
+    started = time.perf_counter()
+    # the child is waited for with wait4, instead of communicate, to get its resource usage
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    with process.stdout:
+        output = process.stdout.read().splitlines()
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - started
+    if process.returncode != 0:
+        raise RuntimeError(f"The {target} case failed: {b' '.join(output[-5:]).decode('utf-8', 'replace')}")
+    if target != 'main':
+        # the child measures its own time, without the start of the interpreter
+        elapsed = float(output[-1])
+
+    # the peak RSS is in kilobytes on Linux, and in bytes on macOS
+    peak_rss = usage.ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+    return elapsed, peak_rss
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                          tolerance: float) -> List[str]:
+    """
+    Compares the results with the ones of a baseline, case by case.
+
+    Args:
+        results (List[Dict[str, Any]]): The results of this run.
+        baseline (List[Dict[str, Any]]): The results of the baseline run.
+        tolerance (float): The fraction by which a case can get worse before it is a regression.
+
+    Returns:
+        List[str]: The description of each regression.
+    """
+    def case_key(result):
+        return result["target"], result["events"], result["window_size"]
+
+    baseline_by_case = {case_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_case.get(case_key(result))
+        if previous is None:
+            continue
+        speed = result["events_per_second"] / previous["events_per_second"]
+        memory = result["peak_rss_mb"] / previous["peak_rss_mb"]
+        print(f"{result['target']:>10} {result['events']:>11,} events {result['window_size']:>5} min: "
+              f"{speed:6.2f}x throughput, {memory:6.2f}x peak RSS")
+        if speed < 1 - tolerance:
+            regressions.append(f"{case_key(result)}: throughput is {speed:.2f}x the baseline")
+        if memory > 1 + tolerance:
+            regressions.append(f"{case_key(result)}: peak RSS is {memory:.2f}x the baseline")
+    return regressions
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the moving average calculator.')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1e3, 1e4, 1e5],
+                        help='Numbers of lines of the inputs, like 1e3 1e6. Up to 1e8.')
+    parser.add_argument('--window_sizes', type=int, nargs='+', default=[1, 10, 1440],
+                        help='Sizes of the window, in minutes.')
+    parser.add_argument('--targets', type=str, nargs='+', choices=TARGETS, default=list(TARGETS),
+                        help='What to measure.')
+    parser.add_argument('--data_dir', type=str, default=DEFAULT_DATA_DIR,
+                        help='Folder of the generated inputs, which are reused by the next runs.')
+    parser.add_argument('--output_file', type=str, default='benchmark_results.json',
+                        help='Path to the JSON file where the results are saved.')
+    parser.add_argument('--baseline', type=str, default=None,
+                        help='Path to the results of a previous run, to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Fraction by which a case can get worse than the baseline before it is a regression.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of runs of each case; the fastest one is reported.')
+    parser.add_argument('--run_case', type=str, nargs=5, default=None, help=argparse.SUPPRESS)
+    add_generator_arguments(parser)
+    return parser.parse_args()
+
+
+def main():
+    """
+    Runs every case of the suite, prints and saves the results, and compares them with the baseline.
+    """
+    args = parse_arguments()
+    if args.run_case:
+        target, input_file, window_size, events, rate = args.run_case
+        print(run_case_in_process(target, input_file, int(window_size), int(events), float(rate)))
+        return
+
+    results = []
+    for scale in args.scales:
+        settings = settings_from_arguments(args, int(scale))
+        input_file, summary = prepare_input(settings, args.data_dir)
+        for window_size in args.window_sizes:
+            for target in args.targets:
+                runs = [run_case(target, input_file, window_size, settings.events, settings.rate)
+                        for _ in range(args.repeat)]
+                elapsed = min(seconds for seconds, _ in runs)
+                peak_rss = max(rss for _, rss in runs)
+                # the window target has no malformed lines, nor idle gaps
+                events = settings.events if target == 'window' else summary["valid_events"]
+                minutes = events / settings.rate if target == 'window' else summary["minutes"]
+                result = {
+                    "target": target,
+                    "events": settings.events,
+                    "window_size": window_size,
+                    "seconds": elapsed,
+                    "events_per_second": events / elapsed,
+                    "minutes_per_second": minutes / elapsed,
+                    "peak_rss_mb": peak_rss,
+                }
+                results.append(result)
+                print(f"{target:>10} {settings.events:>11,} events {window_size:>5} min: "
+                      f"{result['events_per_second']:>12,.0f} events/s {result['minutes_per_second']:>12,.0f} "
+                      f"minutes/s {peak_rss:>8.1f} MiB")
+
+    with open(args.output_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "generator": {name: getattr(args, name) for name in GENERATOR_ARGUMENTS},
+            "results": results,
+        }, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
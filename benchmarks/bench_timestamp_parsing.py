@@ -0,0 +1,71 @@
+"""
+Microbenchmark comparing the TimestampParser with the datetime.strptime path it replaces.
+
+Usage:
+    python -m benchmarks.bench_timestamp_parsing [--events EVENTS] [--repeat REPEAT]
+"""
+
+import argparse
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.timestamp import (
+    TIMESTAMP_FORMAT,
+    TimestampParser,
+    to_epoch_microseconds,
+)
+
+
+def generate_timestamps(count: int) -> List[str]:
+    """
+    Generates increasing timestamps, a few seconds apart, spanning several days.
+
+    Args:
+        count (int): The number of timestamps.
+
+    Returns:
+        List[str]: The formatted timestamps.
+    """
+    start = datetime(2018, 12, 26, 18, 11, 8, 509654)
+    return [
+        (start + timedelta(seconds=7 * i, microseconds=13 * i)).strftime(TIMESTAMP_FORMAT)
+        for i in range(count)
+    ]
+
+
+def main():
+    """
+    Runs both parsers over the same timestamps and prints their throughput.
+    """
+    parser = argparse.ArgumentParser(description='Compare the timestamp parsers.')
+    parser.add_argument('--events', type=int, default=100_000, help='Number of timestamps to parse.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs; the best one is reported.')
+    args = parser.parse_args()
+
+    timestamps = generate_timestamps(args.events)
+
+    def strptime_path():
+        for timestamp in timestamps:
+            to_epoch_microseconds(datetime.strptime(timestamp, TIMESTAMP_FORMAT))
+
+    def parser_path():
+        parse = TimestampParser().parse
+        for timestamp in timestamps:
+            parse(timestamp)
+
+    def event_path():
+        for timestamp in timestamps:
+            Event(timestamp, 1)
+
+    results = {}
+    for name, function in [('strptime', strptime_path), ('TimestampParser', parser_path), ('Event', event_path)]:
+        best = min(timeit.repeat(function, number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"{name:>16}: {args.events / best:>12,.0f} timestamps/s")
+
+    print(f"{'speedup':>16}: {results['strptime'] / results['TimestampParser']:.1f}x")
+
+if __name__ == '__main__':
+    main()
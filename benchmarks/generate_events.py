@@ -0,0 +1,211 @@
+"""
+Synthetic generator of translation_delivered events, in the NDJSON format of the input files.
+
+The events arrive at a given average rate, with optional idle gaps, bursts, out-of-order
+events and malformed lines, so that the calculators can be measured on inputs of any size.
+
+Usage:
+    python -m benchmarks.generate_events --events EVENTS --output_file OUTPUT_FILE [--rate RATE]
+        [--span_minutes SPAN_MINUTES] [--idle_gap_fraction FRACTION] [--idle_gap_minutes MINUTES]
+        [--burstiness BURSTINESS] [--out_of_order_fraction FRACTION] [--max_lateness SECONDS]
+        [--malformed_fraction FRACTION] [--seed SEED]
+"""
+
+import argparse
+import json
+import random
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+from moving_average_calculator.models.timestamp import (
+    MICROSECONDS_PER_MINUTE,
+    MICROSECONDS_PER_SECOND,
+    floor_to_minute,
+    format_timestamp,
+    to_epoch_microseconds,
+)
+
+START_TIME = to_epoch_microseconds(datetime(2018, 12, 26, 18, 11, 8, 509654))
+
+# how much closer together the events of a burst are, than the average
+BURST_SPEEDUP = 100
+
+CLIENTS = ('airliberty', 'taxi-eats', 'easyjet', 'booking')
+LANGUAGES = ('en', 'fr', 'pt', 'de', 'es')
+MALFORMED_LINES = ('{"timestamp": "2018-12-26 18:11:08.509654", "duration"', 'not json', '{"duration": 20}')
+
+
+@dataclass
+class GeneratorSettings:
+    """
+    The shape of the generated events.
+
+    Attributes:
+        events (int): The number of lines.
+        rate (float): The average number of events per minute.
+        idle_gap_fraction (float): The fraction of events that come after an idle gap.
+        idle_gap_minutes (float): The maximum length of an idle gap, in minutes.
+        burstiness (float): The fraction of events that arrive in bursts, BURST_SPEEDUP times closer
+            together than the average. The other events are spaced out to keep the average rate.
+        out_of_order_fraction (float): The fraction of events whose timestamp is older than the previous one.
+        max_lateness (float): The maximum delay of an out-of-order event, in seconds.
+        malformed_fraction (float): The fraction of lines that are not valid events.
+        seed (int): The seed of the random numbers, so that the same settings generate the same lines.
+    """
+    events: int = 100_000
+    rate: float = 60.0
+    idle_gap_fraction: float = 0.0
+    idle_gap_minutes: float = 60.0
+    burstiness: float = 0.0
+    out_of_order_fraction: float = 0.0
+    max_lateness: float = 30.0
+    malformed_fraction: float = 0.0
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.events < 0 or self.rate <= 0:
+            raise ValueError("The number of events must be >= 0, and the rate > 0")
+        for name in ('idle_gap_fraction', 'burstiness', 'out_of_order_fraction', 'malformed_fraction'):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"The {name} must be between 0 and 1")
+        if self.burstiness == 1:
+            raise ValueError("The burstiness must be < 1, so that some events keep the average rate")
+
+
+def generate_lines(settings: GeneratorSettings, summary: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """
+    Generates the lines of an input file, each ending with a newline.
+
+    Args:
+        settings (GeneratorSettings): The shape of the generated events.
+        summary (Optional[Dict[str, Any]]): Filled in, once every line is generated, with the number of
+            valid events and malformed lines, the first and the last timestamps, and the number of minutes
+            a calculator writes for them.
+
+    Returns:
+        Iterator[str]: The lines.
+    """
+    rng = random.Random(settings.seed)
+    mean_interval = MICROSECONDS_PER_MINUTE / settings.rate
+    burst_interval = mean_interval / BURST_SPEEDUP
+    # the events outside of the bursts are spaced out, so that the average rate stays the same
+    steady_interval = mean_interval * (1 - settings.burstiness / BURST_SPEEDUP) / (1 - settings.burstiness)
+    max_lateness = round(settings.max_lateness * MICROSECONDS_PER_SECOND)
+    idle_gap = settings.idle_gap_minutes * MICROSECONDS_PER_MINUTE
+
+    time = START_TIME
+    first_time = last_time = None
+    malformed = 0
+    for _ in range(settings.events):
+        if rng.random() < settings.malformed_fraction:
+            malformed += 1
+            yield rng.choice(MALFORMED_LINES) + '\n'
+            continue
+
+        interval = burst_interval if rng.random() < settings.burstiness else steady_interval
+        time += round(rng.expovariate(1 / interval))
+        if rng.random() < settings.idle_gap_fraction:
+            time += round(rng.uniform(0, idle_gap))
+        timestamp = time
+        if rng.random() < settings.out_of_order_fraction:
+            timestamp -= rng.randint(0, max_lateness)
+
+        if first_time is None:
+            first_time = timestamp
+        last_time = timestamp if last_time is None else max(last_time, timestamp)
+        yield (
+            f'{{"timestamp": "{format_timestamp(timestamp)}", "translation_id": "{rng.getrandbits(80):020x}", '
+            f'"source_language": "{rng.choice(LANGUAGES)}", "target_language": "{rng.choice(LANGUAGES)}", '
+            f'"client_name": "{rng.choice(CLIENTS)}", "event_name": "translation_delivered", '
+            f'"nr_words": {rng.randint(1, 500)}, "duration": {rng.randint(1, 120)}}}\n'
+        )
+
+    if summary is not None:
+        summary.update({
+            "valid_events": settings.events - malformed,
+            "malformed_lines": malformed,
+            "first_timestamp": first_time,
+            "last_timestamp": last_time,
+            # from the minute of the first event to the minute after the last one
+            "minutes": 0 if first_time is None else
+            (floor_to_minute(last_time) - floor_to_minute(first_time)) // MICROSECONDS_PER_MINUTE + 2,
+        })
+
+
+def write_events(settings: GeneratorSettings, output_file: str) -> Dict[str, Any]:
+    """
+    Writes the generated lines to a file.
+
+    Args:
+        settings (GeneratorSettings): The shape of the generated events.
+        output_file (str): The path to the file.
+
+    Returns:
+        Dict[str, Any]: The settings, along with the summary of the generated events.
+    """
+    summary: Dict[str, Any] = {}
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.writelines(generate_lines(settings, summary))
+    return {**asdict(settings), **summary}
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the arguments of the shape of the generated events to a parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser.
+    """
+    defaults = GeneratorSettings()
+    parser.add_argument('--rate', type=float, default=defaults.rate, help='Average number of events per minute.')
+    parser.add_argument('--span_minutes', type=float, default=None,
+                        help='Time span of the events, in minutes, before the idle gaps. Overrides --rate.')
+    parser.add_argument('--idle_gap_fraction', type=float, default=defaults.idle_gap_fraction,
+                        help='Fraction of events that come after an idle gap.')
+    parser.add_argument('--idle_gap_minutes', type=float, default=defaults.idle_gap_minutes,
+                        help='Maximum length of an idle gap, in minutes.')
+    parser.add_argument('--burstiness', type=float, default=defaults.burstiness,
+                        help=f'Fraction of events that arrive in bursts, {BURST_SPEEDUP} times faster.')
+    parser.add_argument('--out_of_order_fraction', type=float, default=defaults.out_of_order_fraction,
+                        help='Fraction of events older than the previous one.')
+    parser.add_argument('--max_lateness', type=float, default=defaults.max_lateness,
+                        help='Maximum delay of an out-of-order event, in seconds.')
+    parser.add_argument('--malformed_fraction', type=float, default=defaults.malformed_fraction,
+                        help='Fraction of lines that are not valid events.')
+    parser.add_argument('--seed', type=int, default=defaults.seed, help='Seed of the random numbers.')
+
+
+def settings_from_arguments(args: argparse.Namespace, events: int) -> GeneratorSettings:
+    """
+    Builds the shape of the generated events from the parsed arguments.
+
+    Args:
+        args (argparse.Namespace): The arguments added by add_generator_arguments.
+        events (int): The number of lines.
+
+    Returns:
+        GeneratorSettings: The shape of the generated events.
+    """
+    return GeneratorSettings(
+        events=events, rate=args.rate if args.span_minutes is None else events / args.span_minutes,
+        idle_gap_fraction=args.idle_gap_fraction, idle_gap_minutes=args.idle_gap_minutes,
+        burstiness=args.burstiness, out_of_order_fraction=args.out_of_order_fraction,
+        max_lateness=args.max_lateness, malformed_fraction=args.malformed_fraction, seed=args.seed,
+    )
+
+
+def main():
+    """
+    Writes an input file with the given shape, and prints the summary of its events.
+    """
+    parser = argparse.ArgumentParser(description='Generate synthetic translation_delivered events.')
+    parser.add_argument('--events', type=int, default=GeneratorSettings.events, help='Number of lines.')
+    parser.add_argument('--output_file', type=str, required=True, help='Path to the generated file.')
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    print(json.dumps(write_events(settings_from_arguments(args, args.events), args.output_file)))
+
+if __name__ == '__main__':
+    main()
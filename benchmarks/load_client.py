@@ -0,0 +1,234 @@
+"""
+Load-test client of the ingestion server: sends synthetic events over several connections at once,
+while querying the current average, and reports the ingestion throughput and the query latencies.
+
+Start the server first, like:
+    python -m moving_average_calculator.main serve --window_size 10 --allowed_lateness 60
+
+Usage:
+    python -m benchmarks.load_client [--host HOST] [--port PORT] [--events EVENTS] [--connections CONNECTIONS]
+        [--batch_size LINES] [--protocol {http,ndjson}] [--queries_per_second QPS] [--timeout SECONDS]
+        [generator arguments, like --rate RATE or --malformed_fraction FRACTION]
+
+The batches are taken in order by the connections, but they can still reach the server out of order,
+so give it an allowed lateness of about the time span of a few batches.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from benchmarks.generate_events import add_generator_arguments, generate_lines, settings_from_arguments
+from moving_average_calculator.models.ingestion_server import DEFAULT_HOST, DEFAULT_PORT
+
+
+async def http_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+                       body: bytes = b'') -> Tuple[int, Any]:
+    """
+    Sends an HTTP request over a persistent connection, and reads its response.
+
+    Args:
+        reader (asyncio.StreamReader): The incoming side of the connection.
+        writer (asyncio.StreamWriter): The outgoing side of the connection.
+        method (str): The method of the request.
+        path (str): The path of the request.
+        body (bytes): The body of the request.
+
+    Returns:
+        Tuple[int, Any]: The status, and the JSON response.
+    """
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n"
+                 .encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = (await reader.readline()).strip()
+        if not line:
+            break
+        name, value = line.decode('latin-1').split(':', 1)
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """
+    Gets a percentile of some values, by the nearest rank.
+
+    Args:
+        values (List[float]): The values, sorted.
+        fraction (float): The percentile, between 0 and 1.
+
+    Returns:
+        Optional[float]: The percentile, or None if there are no values.
+    """
+    if not values:
+        return None
+    return values[min(max(round(fraction * len(values)) - 1, 0), len(values) - 1)]
+
+
+class LoadTest:
+    """
+    Sends the batches of events over several connections, and queries the current average meanwhile.
+
+    Args:
+        host (str): The address of the server.
+        port (int): The port of the server.
+        batches (List[bytes]): The batches of NDJSON lines.
+        connections (int): The number of connections that send the batches.
+        protocol (str): Either 'http', to POST the batches, or 'ndjson', to stream them.
+        queries_per_second (float): The rate of the queries of the current average, or 0 for none.
+
+    Attributes:
+        latencies (List[float]): The latencies of the queries, in seconds.
+        accepted (int): The number of events accepted, as answered to the POSTs.
+        late (int): The number of events dropped as late, as answered to the POSTs.
+    """
+
+    def __init__(self, host: str, port: int, batches: List[bytes], connections: int, protocol: str,
+                 queries_per_second: float):
+        self.host: str = host
+        self.port: int = port
+        self.batches: Iterator[bytes] = iter(batches)
+        self.connections: int = connections
+        self.protocol: str = protocol
+        self.queries_per_second: float = queries_per_second
+        self.latencies: List[float] = []
+        self.accepted: int = 0
+        self.late: int = 0
+
+    async def send(self) -> None:
+        """
+        Sends the next batches over a connection, until there are none left.
+        """
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            # the connections share the iterator, so each batch is sent once, roughly in order
+            for batch in self.batches:
+                if self.protocol == 'http':
+                    status, response = await http_request(reader, writer, 'POST', '/events', batch)
+                    if status != 200:
+                        raise RuntimeError(f"The server answered {status}: {response}")
+                    self.accepted += response["accepted"]
+                    self.late += response["late"]
+                else:
+                    writer.write(batch)
+                    await writer.drain()
+        finally:
+            writer.close()
+
+    async def query(self, done: asyncio.Event) -> None:
+        """
+        Queries the current average at a steady rate, until the batches are sent.
+
+        Args:
+            done (asyncio.Event): Set once the batches are sent.
+        """
+        if self.queries_per_second <= 0:
+            return
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while not done.is_set():
+                started = time.perf_counter()
+                await http_request(reader, writer, 'GET', '/average')
+                self.latencies.append(time.perf_counter() - started)
+                try:
+                    await asyncio.wait_for(done.wait(), timeout=1 / self.queries_per_second)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            writer.close()
+
+    async def stats(self) -> Dict[str, Any]:
+        """
+        Gets the counters of the server.
+
+        Returns:
+            Dict[str, Any]: The counters.
+        """
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            return (await http_request(reader, writer, 'GET', '/stats'))[1]
+        finally:
+            writer.close()
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Runs the load test, and builds its summary.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        Dict[str, Any]: The throughput, the query latencies, and the counters of the server.
+    """
+    summary: Dict[str, Any] = {}
+    lines = list(generate_lines(settings_from_arguments(args, args.events), summary))
+    batches = [''.join(lines[start:start + args.batch_size]).encode('utf-8')
+               for start in range(0, len(lines), args.batch_size)]
+    load_test = LoadTest(args.host, args.port, batches, args.connections, args.protocol, args.queries_per_second)
+
+    events_before = (await load_test.stats())["events_accepted"]
+    done = asyncio.Event()
+    started = time.perf_counter()
+    querier = asyncio.ensure_future(load_test.query(done))
+    try:
+        await asyncio.gather(*(load_test.send() for _ in range(args.connections)))
+        # the NDJSON connections get no answer, so wait until the server has read every event
+        deadline = time.monotonic() + args.timeout
+        while (await load_test.stats())["events_accepted"] - events_before < summary["valid_events"]:
+            if time.monotonic() > deadline:
+                raise TimeoutError("The server did not receive every event in time")
+            await asyncio.sleep(0.01)
+        seconds = time.perf_counter() - started
+    finally:
+        done.set()
+        await querier
+
+    latencies = sorted(load_test.latencies)
+    milliseconds = {name: None if value is None else round(value * 1000, 3) for name, value in (
+        ("p50", percentile(latencies, 0.5)), ("p99", percentile(latencies, 0.99)),
+        ("max", latencies[-1] if latencies else None))}
+    return {
+        "protocol": args.protocol,
+        "connections": args.connections,
+        "batch_size": args.batch_size,
+        "lines": len(lines),
+        "valid_events": summary["valid_events"],
+        "seconds": round(seconds, 6),
+        "events_per_second": round(summary["valid_events"] / max(seconds, 1e-9), 1),
+        "queries": len(latencies),
+        "query_latency_ms": milliseconds,
+        "server": await load_test.stats(),
+    }
+
+
+def main():
+    """
+    Runs the load test against a running server, and prints its summary.
+    """
+    parser = argparse.ArgumentParser(description='Load-test the ingestion server.')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='Address of the server.')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port of the server.')
+    parser.add_argument('--events', type=int, default=100_000, help='Number of lines sent.')
+    parser.add_argument('--connections', type=int, default=4, help='Number of connections sending events at once.')
+    parser.add_argument('--batch_size', type=int, default=1000, help='Number of lines per POST, or per write.')
+    parser.add_argument('--protocol', type=str, choices=('http', 'ndjson'), default='http',
+                        help='http POSTs the batches. ndjson streams them over persistent TCP connections.')
+    parser.add_argument('--queries_per_second', type=float, default=50.0,
+                        help='Rate of the queries of the current average, while the events are sent. 0 for none.')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='Number of seconds to wait for the server to receive every event, once they are sent.')
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+    if args.connections < 1 or args.batch_size < 1:
+        parser.error("The number of connections and the batch size must be >= 1")
+
+    print(json.dumps(asyncio.run(run_load_test(args)), indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+from .models.moving_averages import minute_results, moving_averages
+
+__all__ = ['minute_results', 'moving_averages']
@@ -1,10 +1,54 @@
 #!/usr/bin/env python3
 import argparse
+import cProfile
+import json
 import os
+import pstats
 import sys
+from contextlib import ExitStack
+from datetime import datetime
+from functools import partial
+from typing import List, Optional, Tuple
 
-from .models.window import Window
+from .models.batch_runner import MEGABYTE, BatchOptions, find_input_files, run_batch
+from .models.checkpoint import DEFAULT_CHECKPOINT_INTERVAL, CheckpointError
+from .models.compressed_input import detect_compression, strip_compressed_extension
+from .models.decaying_window import DecayingWindow
+from .models.event_reader import read_events, read_events_mmap
+from .models.grouped_moving_average_calculator import GroupedMovingAverageCalculator
+from .models.ingestion_server import DEFAULT_HISTORY_MINUTES, DEFAULT_HOST, DEFAULT_PORT, IngestionServer
+from .models.instrumented_moving_average_calculator import InstrumentedMovingAverageCalculator
+from .models.interfaces.i_moving_average_calculator import IMovingAverageCalculator
+from .models.interfaces.i_output_sink import IOutputSink
+from .models.multi_window import create_window
 from .models.moving_average_calculator import MovingAverageCalculator
+from .models.numpy_moving_average_calculator import NumpyMovingAverageCalculator
+from .models.parallel_moving_average_calculator import ParallelMovingAverageCalculator
+from .models.range_moving_average_calculator import RangeMovingAverageCalculator
+from .models.output_sink import DEFAULT_BATCH_SIZE, SINK_KINDS, FileOutputSink, NullOutputSink, create_output_sink
+from .models.reorder_buffer import LateEventWriter, ReorderBuffer
+from .models.resumable_moving_average_calculator import ResumableMovingAverageCalculator
+from .models.rollups import RollupWindow, Rollups
+from .models.result_encoders import OUTPUT_EXTENSIONS, OUTPUT_FORMATS, create_encoder
+from .models.result_writer import OUTPUT_MODES
+from .models.streaming_moving_average_calculator import STDIN, StreamingMovingAverageCalculator
+from .models.time_index import TimeIndex, default_index_file
+from .models.window_aggregates import parse_aggregate
+from .models.timestamp import (
+    MICROSECONDS_PER_MINUTE,
+    MICROSECONDS_PER_SECOND,
+    TIME_UNITS,
+    ceil_to_minute,
+    parse_duration,
+    to_epoch_microseconds,
+)
+
+
+# the file name that stands for the stderr, for the stats and the profile
+STDERR = '-'
+
+# the number of functions printed from the profile
+PROFILE_LINES = 30
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -15,29 +59,763 @@ def parse_arguments() -> argparse.Namespace:
         argparse.Namespace: Parsed command line arguments.
     """
     parser = argparse.ArgumentParser(description='Calculate moving average of translation delivery times.')
-    parser.add_argument('--input_file', type=str, required=True, help='Path to the input JSON file.')
-    parser.add_argument('--window_size', type=int, required=True, help='Size of the time window in minutes.')
+    parser.add_argument('--input_file', type=str, required=True,
+                        help='Path to the input JSON file. With --follow, "-" reads the events from the stdin.')
+    parser.add_argument('--window_size', type=int, nargs='+', default=None,
+                        help='Size of the time window in minutes. Several sizes can be given, '
+                             'to calculate the moving average of each of them in a single pass.')
+    parser.add_argument('--bucketed', action='store_true',
+                        help='Keep the count and the sum of the durations of each minute in the window, '
+                             'instead of the events, so the memory depends on the window size, not on the traffic.')
+    parser.add_argument('--half_life', type=float, default=None,
+                        help='Calculate an exponentially decayed moving average instead, where the weight of '
+                             'each event halves every this many minutes. It keeps no events, so its memory is '
+                             'constant. Replaces --window_size.')
+    parser.add_argument('--window_unit', type=str, choices=tuple(TIME_UNITS), default='m',
+                        help='Unit of --window_size and --half_life: s, m, h or d. Defaults to minutes.')
+    parser.add_argument('--step', type=parse_duration_argument, default=MICROSECONDS_PER_MINUTE,
+                        help='Time between two results, like 10s for alerting, or 1h for reporting. '
+                             'Defaults to 1m.')
+    parser.add_argument('--rollups', type=parse_duration_argument, nargs='+', default=None, metavar='PERIOD',
+                        help='Also write the number of events and their average for coarser periods, like 1h 1d, '
+                             'each built from the finer one in the same pass. Each must be a multiple of the step.')
+    parser.add_argument('--rollup_file', type=str, default=None,
+                        help='Path to the file of the rollups. Defaults to the input file name with the '
+                             '"_rollups_result" suffix. The rollups are always written as NDJSON, '
+                             'whatever the output format of the results.')
+    parser.add_argument('--output_file', type=str, default=None,
+                        help='Path to the output file. Defaults to the input file name with the "_result" suffix.')
+    parser.add_argument('--sink', type=str, choices=SINK_KINDS, default='file',
+                        help='Where to write the results: the output file, the stdout, both, or nowhere.')
+    parser.add_argument('--batch_size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Number of results buffered in memory before they are written.')
+    parser.add_argument('--output_mode', type=str, choices=OUTPUT_MODES, default='dense',
+                        help='dense writes one result per minute. runs merges consecutive minutes '
+                             'with the same average into {"from", "to", "average_delivery_time"} results.')
+    parser.add_argument('--output_format', type=str, choices=OUTPUT_FORMATS, default='ndjson',
+                        help='ndjson writes a JSON object per line. csv writes a header, and a line per result. '
+                             'binary writes a 16 bytes record per minute, an int64 minute since the Unix epoch and '
+                             'a float64 average, which can be memory-mapped; it requires a single average.')
+    parser.add_argument('--aggregates', type=parse_aggregate_argument, nargs='+', default=[],
+                        metavar='AGGREGATE',
+                        help='Other aggregates of the durations in the window, written along with the average: '
+                             'max, min, or percentiles like p50 p95 p99. Requires a single window size.')
+    parser.add_argument('--group_by', type=parse_fields, nargs='+', default=None,
+                        help='Calculate the moving average of each group of events instead. Each grouping '
+                             'is a comma separated list of fields, like: client_name source_language,target_language')
+    parser.add_argument('--max_groups', type=int, default=None,
+                        help='Maximum number of groups kept in memory. When reached, the least recently '
+                             'updated group is dropped.')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes used to calculate the moving average. With more than one, '
+                             'the input file is split into chunks that are processed in parallel.')
+    parser.add_argument('--reader', type=str, choices=('mmap', 'text'), default='mmap',
+                        help='mmap scans the memory-mapped file, extracting only the timestamp and the duration '
+                             'of the lines with the expected shape. text parses every line with json.loads.')
+    parser.add_argument('--allowed_lateness', type=float, default=None,
+                        help='Accept events that arrive out of order, up to this many seconds older than '
+                             'the newest event, by holding them in a reorder buffer. Older events are skipped.')
+    parser.add_argument('--late_events_file', type=str, default=None,
+                        help='Path to the file where the events that arrive too late are written, '
+                             'instead of being discarded. Requires --allowed_lateness.')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep reading the events appended to the input file, writing each minute as soon as '
+                             'it is complete, until the process gets a SIGTERM.')
+    parser.add_argument('--idle_timeout', type=float, default=60.0,
+                        help='With --follow, the number of seconds without events after which the minutes '
+                             'that passed since the last event are written.')
+    parser.add_argument('--checkpoint_interval', type=int, default=None,
+                        help='Save a checkpoint of the run every this many bytes of input, so that it can be '
+                             f'resumed with --resume. Defaults to {DEFAULT_CHECKPOINT_INTERVAL} with --resume.')
+    parser.add_argument('--checkpoint_file', type=str, default=None,
+                        help='Path to the checkpoint file. Defaults to the output file name with the '
+                             '".checkpoint" suffix.')
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume the run from its checkpoint, dropping the results written after it.')
+    parser.add_argument('--from', dest='from_time', type=parse_minute, default=None,
+                        help='Only write the minutes from this time, like 2018-12-26T18:00, reading the input '
+                             'from its time index. Requires --to.')
+    parser.add_argument('--to', dest='to_time', type=parse_minute, default=None,
+                        help='Only write the minutes before this time. Requires --from.')
+    parser.add_argument('--index_file', type=str, default=None,
+                        help='Path to the time index of the input file, used with --from and --to. '
+                             'Defaults to the input file name with the ".index" suffix.')
+    parser.add_argument('--stats', type=str, nargs='?', const=STDERR, default=None, metavar='STATS_FILE',
+                        help='Time and count each stage of the run, and write a JSON summary of them at the end, '
+                             'to this file or, by default, to the stderr.')
+    parser.add_argument('--profile', type=str, nargs='?', const=STDERR, default=None, metavar='PROFILE_FILE',
+                        help='Run under cProfile, and dump the profile to this file, which can be read with pstats, '
+                             'or, by default, print the slowest functions to the stderr.')
+    parser.add_argument('--engine', type=str, choices=('streaming', 'numpy'), default='streaming',
+                        help='The streaming engine reads the events line by line. The numpy engine '
+                             'loads the whole file in memory and calculates every minute at once.')
     return parser.parse_args()
 
+def parse_index_arguments(argv: List[str]) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the index command.
+
+    Args:
+        argv (List[str]): The command line arguments, after the command name.
+
+    Returns:
+        argparse.Namespace: Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(prog='index', description='Build the time index of an input JSON file.')
+    parser.add_argument('--input_file', type=str, required=True,
+                        help='Path to the input JSON file.')
+    parser.add_argument('--index_file', type=str, default=None,
+                        help='Path to the index file. Defaults to the input file name with the ".index" suffix.')
+    return parser.parse_args(argv)
+
+def parse_batch_arguments(argv: List[str]) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the batch command.
+
+    Args:
+        argv (List[str]): The command line arguments, after the command name.
+
+    Returns:
+        argparse.Namespace: Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(prog='batch', description='Calculate the moving average of many input files '
+                                                               'at once, with a pool of processes.')
+    parser.add_argument('--inputs', type=str, nargs='+', required=True,
+                        help='Directories, whose files are all inputs, or globs of input files, like "shards/*.json.gz".')
+    parser.add_argument('--output_dir', type=str, default=None,
+                        help='Directory of the output files, named like the input files with the "_result" suffix. '
+                             'Defaults to the directory of each input file.')
+    parser.add_argument('--window_size', type=int, nargs='+', default=None,
+                        help='Size of the time window in minutes. Several sizes can be given.')
+    parser.add_argument('--bucketed', action='store_true',
+                        help='Keep the count and the sum of the durations of each minute in the window.')
+    parser.add_argument('--half_life', type=float, default=None,
+                        help='Calculate an exponentially decayed moving average instead. Replaces --window_size.')
+    parser.add_argument('--aggregates', type=parse_aggregate_argument, nargs='+', default=[], metavar='AGGREGATE',
+                        help='Other aggregates of the durations in the window, like max, min or p95.')
+    parser.add_argument('--output_mode', type=str, choices=OUTPUT_MODES, default='dense',
+                        help='dense writes one result per minute. runs merges consecutive minutes with the same average.')
+    parser.add_argument('--output_format', type=str, choices=OUTPUT_FORMATS, default='ndjson',
+                        help='The format of the output files.')
+    parser.add_argument('--reader', type=str, choices=('mmap', 'text'), default='mmap',
+                        help='How the events of the input files are read.')
+    parser.add_argument('--batch_size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Number of results buffered in memory before they are written.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Number of processes, each calculating a file at a time. Defaults to the number of CPUs.')
+    parser.add_argument('--max_memory', type=int, default=None,
+                        help='Memory limit of each worker, in megabytes. A file that needs more fails, '
+                             'without stopping the others.')
+    parser.add_argument('--summary_file', type=str, default=STDERR,
+                        help='Path to the file where the JSON summary of the batch is written. Defaults to the stderr.')
+    return parser.parse_args(argv)
+
+def parse_serve_arguments(argv: List[str]) -> argparse.Namespace:
+    """
+    Parse the command line arguments of the serve command.
+
+    Args:
+        argv (List[str]): The command line arguments, after the command name.
+
+    Returns:
+        argparse.Namespace: Parsed command line arguments.
+    """
+    parser = argparse.ArgumentParser(prog='serve', description='Receive the events over the network, and answer '
+                                                               'queries for the live moving average.')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST,
+                        help='Address to listen on.')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help='Port to listen on, for both the NDJSON connections and the HTTP requests.')
+    parser.add_argument('--window_size', type=int, nargs='+', default=None,
+                        help='Size of the time window in minutes. Several sizes can be given.')
+    parser.add_argument('--bucketed', action='store_true',
+                        help='Keep the count and the sum of the durations of each minute in the window.')
+    parser.add_argument('--half_life', type=float, default=None,
+                        help='Calculate an exponentially decayed moving average instead. Replaces --window_size.')
+    parser.add_argument('--aggregates', type=parse_aggregate_argument, nargs='+', default=[], metavar='AGGREGATE',
+                        help='Other aggregates of the durations in the window, like max, min or p95.')
+    parser.add_argument('--history_minutes', type=int, default=DEFAULT_HISTORY_MINUTES,
+                        help='Number of minutes kept in memory, for the history queries.')
+    parser.add_argument('--allowed_lateness', type=float, default=0.0,
+                        help='Accept events up to this many seconds older than the newest event, since the '
+                             'connections are not in sync. Older events are dropped.')
+    parser.add_argument('--idle_timeout', type=float, default=60.0,
+                        help='Number of seconds without events after which the minutes that passed since '
+                             'the last event are calculated.')
+    return parser.parse_args(argv)
+
+def parse_minute(value: str) -> int:
+    """
+    Parses an ISO 8601 time, like 2018-12-26T18:00, rounding it up to the start of a minute.
+
+    Args:
+        value (str): The time.
+
+    Returns:
+        int: The minute, in microseconds since the Unix epoch.
+    """
+    try:
+        return ceil_to_minute(to_epoch_microseconds(datetime.fromisoformat(value)))
+    except (ValueError, TypeError) as error:
+        raise argparse.ArgumentTypeError(f"Expected a time like 2018-12-26T18:00: {error}") from error
+
+def parse_duration_argument(value: str) -> int:
+    """
+    Parses a duration, like 10s, 5m, 1h or 1d.
+
+    Args:
+        value (str): The duration.
+
+    Returns:
+        int: The duration, in microseconds.
+    """
+    try:
+        return parse_duration(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error)) from error
+
+def parse_aggregate_argument(value: str) -> str:
+    """
+    Parses the name of an aggregate.
+
+    Args:
+        value (str): The name, like "max" or "p95".
+
+    Returns:
+        str: The name.
+    """
+    try:
+        return parse_aggregate(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error)) from error
+
+def parse_fields(value: str) -> Tuple[str, ...]:
+    """
+    Parses a comma separated list of fields.
+
+    Args:
+        value (str): The fields, like "source_language,target_language".
+
+    Returns:
+        Tuple[str, ...]: The fields.
+    """
+    fields = tuple(field.strip() for field in value.split(',') if field.strip())
+    if not fields:
+        raise argparse.ArgumentTypeError("Expected a comma separated list of fields")
+    return fields
+
+def default_output_file(input_file: str, output_format: str = 'ndjson') -> str:
+    """
+    Builds the default output file name, by appending the "_result" suffix to the input file name.
+    The results are not compressed, so the extension of a compressed input, like ".gz", is dropped:
+    "events.json.gz" gives "events_result.json". The other output formats have their own extension,
+    like "events_result.csv".
+
+    Args:
+        input_file (str): Path to the input file.
+        output_format (str): The output format.
+
+    Returns:
+        str: Path to the output file.
+    """
+    root, extension = os.path.splitext(strip_compressed_extension(input_file))
+    return f"{root}_result{OUTPUT_EXTENSIONS.get(output_format, extension)}"
+
+def default_rollup_file(input_file: str) -> str:
+    """
+    Builds the default rollup file name, by appending the "_rollups_result" suffix to the input file name,
+    like "events_rollups_result.json".
+
+    Args:
+        input_file (str): Path to the input file.
+
+    Returns:
+        str: Path to the rollup file.
+    """
+    root, _ = os.path.splitext(strip_compressed_extension(input_file))
+    return f"{root}_rollups_result.json"
+
+def create_reorder_buffer(args: argparse.Namespace, late_sink: IOutputSink) -> Optional[ReorderBuffer]:
+    """
+    Creates the reorder buffer for the events that arrive out of order, if there is an allowed lateness.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+        late_sink (IOutputSink): The sink where the events that arrive too late will be written.
+
+    Returns:
+        Optional[ReorderBuffer]: The reorder buffer, or None if the events are expected to be sorted.
+    """
+    if args.allowed_lateness is None:
+        return None
+    return ReorderBuffer(round(args.allowed_lateness * MICROSECONDS_PER_SECOND), LateEventWriter(late_sink))
+
+def create_calculator(args: argparse.Namespace, output_sink: IOutputSink, late_sink: IOutputSink,
+                      rollups: Optional[Rollups] = None) -> IMovingAverageCalculator:
+    """
+    Creates the calculator selected by the command line arguments.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+        output_sink (IOutputSink): The sink where the results will be written.
+        late_sink (IOutputSink): The sink where the events that arrive too late will be written.
+        rollups (Optional[Rollups]): The rollups fed with the events of the window, or None.
+
+    Returns:
+        IMovingAverageCalculator: The calculator.
+    """
+    unit = TIME_UNITS[args.window_unit]
+    if args.half_life is not None:
+        window_factory = partial(DecayingWindow, args.half_life, unit)
+    else:
+        window_factory = partial(create_window, args.window_size, args.aggregates, args.bucketed, unit, args.step)
+    if rollups is not None:
+        window_factory = partial(RollupWindow, window_factory(), rollups)
+    if args.resume or args.checkpoint_interval is not None:
+        return ResumableMovingAverageCalculator(
+            window_factory(), output_sink, args.output_mode,
+            args.checkpoint_file or f"{output_sink.output_file}.checkpoint",
+            args.checkpoint_interval or DEFAULT_CHECKPOINT_INTERVAL, args.resume
+        )
+    if args.follow:
+        return StreamingMovingAverageCalculator(window_factory(), output_sink, args.output_mode,
+                                                args.idle_timeout)
+    if args.from_time is not None:
+        return RangeMovingAverageCalculator(
+            window_factory(), output_sink, args.output_mode, args.from_time, args.to_time,
+            max(args.window_size), args.index_file or default_index_file(args.input_file)
+        )
+    reader = read_events_mmap if args.reader == 'mmap' else read_events
+    reorder_buffer = create_reorder_buffer(args, late_sink)
+    if args.engine == 'numpy':
+        return NumpyMovingAverageCalculator(args.window_size[0], output_sink, args.output_mode, reader,
+                                            reorder_buffer)
+    if args.workers > 1:
+        return ParallelMovingAverageCalculator(args.window_size, output_sink, args.output_mode, args.workers,
+                                               aggregates=args.aggregates)
+    if args.group_by:
+        return GroupedMovingAverageCalculator(
+            window_factory, output_sink, args.group_by,
+            args.output_mode, args.max_groups, reorder_buffer
+        )
+    if args.stats is not None:
+        return InstrumentedMovingAverageCalculator(window_factory(), output_sink, args.output_mode,
+                                                   reader, reorder_buffer, args.step)
+    return MovingAverageCalculator(window_factory(), output_sink, args.output_mode, reader,
+                                   reorder_buffer, args.step)
+
+def set_output_format(calculator: IMovingAverageCalculator, output_format: str) -> None:
+    """
+    Makes the calculator encode its results in another output format than NDJSON.
+
+    Args:
+        calculator (IMovingAverageCalculator): The calculator.
+        output_format (str): The output format.
+    """
+    if output_format == 'ndjson':
+        return
+    if isinstance(calculator, StreamingMovingAverageCalculator):
+        calculator = calculator.calculator
+    calculator.result_writer.encoder = create_encoder(output_format, step=calculator.result_writer.step)
+
+def run_calculator(calculator: IMovingAverageCalculator, args: argparse.Namespace) -> None:
+    """
+    Processes the events of the input file, under cProfile if asked to, and writes the stats of the run.
+
+    Args:
+        calculator (IMovingAverageCalculator): The calculator.
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    if args.profile is None:
+        calculator.process_events(args.input_file)
+    else:
+        profile = cProfile.Profile()
+        try:
+            profile.runcall(calculator.process_events, args.input_file)
+        finally:
+            if args.profile == STDERR:
+                pstats.Stats(profile, stream=sys.stderr).sort_stats('cumulative').print_stats(PROFILE_LINES)
+            else:
+                profile.dump_stats(args.profile)
+
+    if isinstance(calculator, InstrumentedMovingAverageCalculator):
+        summary = json.dumps(calculator.stats.to_dict(), indent=2)
+        if args.stats == STDERR:
+            print(summary, file=sys.stderr)
+        else:
+            with open(args.stats, 'w', encoding='utf-8') as f:
+                f.write(summary + '\n')
+
+def build_index(argv: List[str]) -> None:
+    """
+    Entry point of the index command, which builds the time index of an input file ahead of the range queries.
+
+    Args:
+        argv (List[str]): The command line arguments, after the command name.
+    """
+    args: argparse.Namespace = parse_index_arguments(argv)
+
+    if not os.path.isfile(args.input_file):
+        sys.exit("The input file does not exist. Exiting...")
+
+    if detect_compression(args.input_file) is not None:
+        sys.exit("A compressed input file cannot be indexed. Exiting...")
+
+    index = TimeIndex.build(args.input_file)
+    if index is None:
+        sys.exit("The events of the input file are not sorted, so it cannot be indexed. Exiting...")
+    index.save(args.index_file or default_index_file(args.input_file))
+
+def check_window_arguments(args: argparse.Namespace) -> None:
+    """
+    Checks the arguments of the window of the batch and serve commands, exiting if they are invalid.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    if (args.window_size is None) == (args.half_life is None):
+        sys.exit("Either a window size or a half-life is required. Exiting...")
+
+    if args.window_size is not None and min(args.window_size) < 0:
+        sys.exit("The window size must be >= 0. Exiting...")
+
+    if args.half_life is not None and (args.half_life <= 0 or args.aggregates or args.bucketed):
+        sys.exit("The half-life must be > 0, without other aggregates or a bucketed window. Exiting...")
+
+    if args.aggregates and len(args.window_size) > 1:
+        sys.exit("The aggregates support a single window size. Exiting...")
+
+    if args.bucketed and (len(args.window_size) > 1 or args.aggregates):
+        sys.exit("The bucketed window supports a single window size, without other aggregates. Exiting...")
+
+def batch(argv: List[str]) -> None:
+    """
+    Entry point of the batch command, which calculates the moving average of many input files at once,
+    and writes a summary of the files that succeeded and failed, and of the throughput.
+
+    Args:
+        argv (List[str]): The command line arguments, after the command name.
+    """
+    args: argparse.Namespace = parse_batch_arguments(argv)
+
+    check_window_arguments(args)
+
+    if args.output_format == 'binary' and (args.aggregates or (args.window_size is not None
+                                                               and len(args.window_size) > 1)):
+        sys.exit("The binary output format supports a single average per minute, without several window sizes "
+                 "or other aggregates. Exiting...")
+
+    if args.batch_size < 1:
+        sys.exit("The batch size must be >= 1. Exiting...")
+
+    if args.workers < 1:
+        sys.exit("The number of workers must be >= 1. Exiting...")
+
+    if args.max_memory is not None and args.max_memory < 1:
+        sys.exit("The memory limit must be >= 1 megabyte. Exiting...")
+
+    input_files = find_input_files(args.inputs)
+    if not input_files:
+        sys.exit("No input files found. Exiting...")
+
+    jobs = []
+    for input_file in input_files:
+        output_file = default_output_file(input_file, args.output_format)
+        if args.output_dir is not None:
+            output_file = os.path.join(args.output_dir, os.path.basename(output_file))
+        jobs.append((input_file, output_file))
+    if len({output_file for _, output_file in jobs}) < len(jobs):
+        sys.exit("Several input files have the same name, so their output files would collide. Exiting...")
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    options = BatchOptions(args.window_size, args.half_life, args.aggregates, args.bucketed, args.output_mode,
+                           args.output_format, args.reader, args.batch_size)
+    try:
+        summary = run_batch(jobs, options, args.workers,
+                            None if args.max_memory is None else args.max_memory * MEGABYTE)
+    except ImportError as error:
+        sys.exit(f"{error} Exiting...")
+
+    encoded_summary = json.dumps(summary.to_dict(), indent=2)
+    if args.summary_file == STDERR:
+        print(encoded_summary, file=sys.stderr)
+    else:
+        with open(args.summary_file, 'w', encoding='utf-8') as f:
+            f.write(encoded_summary + '\n')
+
+    if summary.failures:
+        sys.exit(f"{len(summary.failures)} of {len(summary.results)} files failed. Exiting...")
+
+def serve(argv: List[str]) -> None:
+    """
+    Entry point of the serve command, which runs the ingestion and query server until it gets a SIGTERM.
+
+    Args:
+        argv (List[str]): The command line arguments, after the command name.
+    """
+    args: argparse.Namespace = parse_serve_arguments(argv)
+
+    check_window_arguments(args)
+
+    if args.history_minutes < 1:
+        sys.exit("The history must keep at least one minute. Exiting...")
+
+    if args.allowed_lateness < 0:
+        sys.exit("The allowed lateness must be >= 0. Exiting...")
+
+    if args.idle_timeout <= 0:
+        sys.exit("The idle timeout must be > 0. Exiting...")
+
+    if args.half_life is not None:
+        window = DecayingWindow(args.half_life)
+    else:
+        window = create_window(args.window_size, args.aggregates, args.bucketed)
+    server = IngestionServer(window, args.history_minutes, args.allowed_lateness, args.idle_timeout)
+    try:
+        server.serve(args.host, args.port)
+    except OSError as error:
+        sys.exit(f"The server cannot listen on {args.host}:{args.port}: {error.strerror}. Exiting...")
+
+def uses_checkpoints(args: argparse.Namespace) -> bool:
+    """
+    Tells whether the run saves checkpoints, or resumes from one.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        bool: True if the run has checkpoints.
+    """
+    return args.resume or args.checkpoint_interval is not None
+
+def check_engine_arguments(args: argparse.Namespace) -> None:
+    """
+    Checks the arguments of the window and of the engine, exiting if they are invalid.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    if (args.window_size is None) == (args.half_life is None):
+        sys.exit("Either a window size or a half-life is required. Exiting...")
+
+    if args.window_size is not None and min(args.window_size) < 0:
+        sys.exit("The window size must be >= 0. Exiting...")
+
+    if args.half_life is not None and args.half_life <= 0:
+        sys.exit("The half-life must be > 0. Exiting...")
+
+    if args.half_life is not None and (args.engine == 'numpy' or args.workers > 1 or args.group_by
+                                       or args.aggregates):
+        # the decayed windows never drain, so the groups would never be dropped
+        sys.exit("The decayed moving average supports the streaming engine, without workers, groups "
+                 "or other aggregates. Exiting...")
+
+    if args.batch_size < 1:
+        sys.exit("The batch size must be >= 1. Exiting...")
+
+    if args.max_groups is not None and args.max_groups < 1:
+        sys.exit("The maximum number of groups must be >= 1. Exiting...")
+
+    if args.workers < 1:
+        sys.exit("The number of workers must be >= 1. Exiting...")
+
+    if args.workers > 1 and (args.engine == 'numpy' or args.group_by):
+        sys.exit("The parallel mode supports the streaming engine, without groups. Exiting...")
+
+    if args.engine == 'numpy' and (len(args.window_size) > 1 or args.group_by):
+        sys.exit("The numpy engine supports a single window size, without groups. Exiting...")
+
+    if args.aggregates and (len(args.window_size) > 1 or args.engine == 'numpy'):
+        sys.exit("The aggregates support a single window size, with the streaming engine. Exiting...")
+
+    if args.bucketed and (args.window_size is None or len(args.window_size) > 1 or args.aggregates
+                          or args.engine == 'numpy' or args.workers > 1):
+        sys.exit("The bucketed window supports a single window size, with the streaming engine, "
+                 "without workers or other aggregates. Exiting...")
+
+def check_input_arguments(args: argparse.Namespace) -> None:
+    """
+    Checks the arguments of how the input is read: the late events, the follow mode and the stdin,
+    exiting if they are invalid.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    if not (args.follow and args.input_file == STDIN) and not os.path.isfile(args.input_file):
+        sys.exit("The input file does not exist. Exiting...")
+
+    if args.allowed_lateness is not None and args.allowed_lateness < 0:
+        sys.exit("The allowed lateness must be >= 0. Exiting...")
+
+    if args.late_events_file is not None and args.allowed_lateness is None:
+        sys.exit("The late events file requires an allowed lateness. Exiting...")
+
+    if args.workers > 1 and args.allowed_lateness is not None:
+        sys.exit("The parallel mode expects the events to be sorted, without an allowed lateness. Exiting...")
+
+    if args.follow and (args.engine == 'numpy' or args.workers > 1 or args.group_by
+                        or args.allowed_lateness is not None):
+        sys.exit("The follow mode supports the streaming engine, without groups or an allowed lateness. Exiting...")
+
+    if args.follow and args.idle_timeout <= 0:
+        sys.exit("The idle timeout must be > 0. Exiting...")
+
+    if args.input_file == STDIN and args.output_file is None and args.sink in ('file', 'both'):
+        sys.exit("An output file is required when reading from the stdin. Exiting...")
+
+def check_run_arguments(args: argparse.Namespace) -> None:
+    """
+    Checks the arguments of the checkpoints, of the range queries, of the stats and of the compressed inputs,
+    exiting if they are invalid.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    checkpoints = uses_checkpoints(args)
+    if checkpoints and (args.engine == 'numpy' or args.workers > 1 or args.group_by or args.follow
+                        or args.allowed_lateness is not None):
+        sys.exit("The checkpoints support the streaming engine, without groups, "
+                 "follow mode or an allowed lateness. Exiting...")
+
+    if checkpoints and args.rollups:
+        # the buckets of the rollups are not saved with the window
+        sys.exit("The checkpoints do not support the rollups. Exiting...")
+
+    if checkpoints and args.sink != 'file':
+        sys.exit("The checkpoints require the file sink. Exiting...")
+
+    if args.checkpoint_interval is not None and args.checkpoint_interval < 1:
+        sys.exit("The checkpoint interval must be >= 1. Exiting...")
+
+    if (args.from_time is None) != (args.to_time is None):
+        sys.exit("A range requires both --from and --to. Exiting...")
+
+    if args.from_time is not None and args.from_time >= args.to_time:
+        sys.exit("The start of the range must be before its end. Exiting...")
+
+    if args.from_time is not None and args.half_life is not None:
+        # every event before the range still has some weight, so the whole file would be read anyway
+        sys.exit("The range queries require a window size, instead of a half-life. Exiting...")
+
+    if args.from_time is not None and (args.engine == 'numpy' or args.workers > 1 or args.group_by or args.follow
+                                       or args.allowed_lateness is not None or checkpoints):
+        sys.exit("The range queries support the streaming engine, without groups, follow mode, "
+                 "an allowed lateness or checkpoints. Exiting...")
+
+    if args.stats is not None and (args.engine == 'numpy' or args.workers > 1 or args.group_by or args.follow
+                                   or checkpoints or args.from_time is not None):
+        sys.exit("The stats support the streaming engine, without groups, follow mode, "
+                 "checkpoints or a range. Exiting...")
+
+    compressed = not (args.follow and args.input_file == STDIN) and detect_compression(args.input_file) is not None
+    if compressed and (args.workers > 1 or args.follow or checkpoints or args.from_time is not None):
+        # those need to seek through the input, or to tail it
+        sys.exit("The compressed inputs do not support --workers, follow mode, checkpoints "
+                 "or a range. Exiting...")
+
+def check_output_arguments(args: argparse.Namespace) -> None:
+    """
+    Checks the arguments of the output format, of the step and of the rollups, exiting if they are invalid.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    checkpoints = uses_checkpoints(args)
+    if args.output_format != 'ndjson' and (args.group_by or args.follow or checkpoints):
+        # a single header, or a single average per record, for the whole output file
+        sys.exit("The csv and binary output formats do not support groups, follow mode "
+                 "or checkpoints. Exiting...")
+
+    if args.output_format == 'binary' and (args.aggregates or (args.window_size is not None
+                                                               and len(args.window_size) > 1)):
+        sys.exit("The binary output format supports a single average per minute, without several window sizes "
+                 "or other aggregates. Exiting...")
+
+    if args.output_format == 'binary' and args.sink in ('stdout', 'both'):
+        sys.exit("The binary output format requires the file or the null sink. Exiting...")
+
+    if (args.step != MICROSECONDS_PER_MINUTE or args.window_unit != 'm' or args.rollups) and \
+            (args.engine == 'numpy' or args.workers > 1 or args.group_by or args.follow or checkpoints
+             or args.from_time is not None):
+        # those count in minutes
+        sys.exit("The steps other than a minute, the window units and the rollups support the streaming engine, "
+                 "without workers, groups, follow mode, checkpoints or a range. Exiting...")
+
+    if args.output_format == 'binary' and args.step % MICROSECONDS_PER_MINUTE:
+        sys.exit("The binary output format requires a step of whole minutes. Exiting...")
+
+    if args.bucketed and args.window_size[0] * TIME_UNITS[args.window_unit] % args.step:
+        sys.exit("The size of a bucketed window must be a whole number of steps. Exiting...")
+
+    periods = sorted(set(args.rollups or []))
+    if any(period % finer for finer, period in zip([args.step, *periods], periods)):
+        sys.exit("Each rollup period must be a multiple of the step, and of the shorter periods. Exiting...")
+
+    if args.rollup_file is not None and not args.rollups:
+        sys.exit("The rollup file requires --rollups. Exiting...")
+
+def calculate(args: argparse.Namespace) -> None:
+    """
+    Opens the sinks, creates the calculator, and processes the events of the input file.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments, already checked.
+    """
+    output_file = args.output_file or default_output_file(args.input_file, args.output_format)
+    binary = args.output_format == 'binary'
+    with ExitStack() as stack:
+        # a second CSV header, or binary records after other ones, would break the output file
+        output_sink = stack.enter_context(create_output_sink(args.sink, output_file, args.batch_size, binary,
+                                                             append=args.output_format == 'ndjson'))
+        if args.late_events_file is not None:
+            late_sink: IOutputSink = stack.enter_context(FileOutputSink(args.late_events_file,
+                                                                        batch_size=args.batch_size))
+        else:
+            late_sink = NullOutputSink()
+        rollups = None
+        if args.rollups:
+            rollup_sink = stack.enter_context(FileOutputSink(args.rollup_file or default_rollup_file(args.input_file),
+                                                             batch_size=args.batch_size))
+            rollups = Rollups(args.step, args.rollups, rollup_sink)
+        try:
+            calculator = create_calculator(args, output_sink, late_sink, rollups)
+        except ImportError as error:
+            sys.exit(f"{error} Exiting...")
+        set_output_format(calculator, args.output_format)
+        try:
+            run_calculator(calculator, args)
+        except (CheckpointError, ImportError) as error:
+            # the zstandard module is only needed once a .zst input is read
+            sys.exit(f"{error} Exiting...")
+        if rollups is not None:
+            rollups.finish()
+
 def main():
     """
     Entry point of the moving average calculator program.
     Parses command line arguments, checks input file existence and window size,
     creates a window object, a calculator object, and processes events from the input file.
     """
-    args: argparse.Namespace = parse_arguments()
+    if sys.argv[1:2] == ['index']:
+        build_index(sys.argv[2:])
+        return
 
-    # Ensure that the input file exists and the window size is >= 0
-    if not os.path.isfile(args.input_file):
-        sys.exit("The input file does not exist. Exiting...")
+    if sys.argv[1:2] == ['batch']:
+        batch(sys.argv[2:])
+        return
 
-    if args.window_size < 0:
-        sys.exit("The window size must be >= 0. Exiting...")
+    if sys.argv[1:2] == ['serve']:
+        serve(sys.argv[2:])
+        return
+
+    args: argparse.Namespace = parse_arguments()
 
-    output_file = args.input_file.replace('.json', '_result.json')
-    window = Window(args.window_size)
-    calculator = MovingAverageCalculator(window, output_file)
-    calculator.process_events(args.input_file)
+    check_input_arguments(args)
+    check_engine_arguments(args)
+    check_run_arguments(args)
+    check_output_arguments(args)
+    calculate(args)
 
 if __name__ == '__main__':
     main()
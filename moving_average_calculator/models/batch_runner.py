@@ -0,0 +1,335 @@
+"""
+This module runs the moving average of many input files at once, like the daily event files of
+every shard, with a bounded pool of processes: the interpreter starts once per worker, instead of
+once per file.
+
+Every file gets its own MovingAverageCalculator and its own output file. A file that fails, even
+by running out of memory or by crashing its worker, does not stop the others: it is reported in
+the summary of the batch.
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - the resource module is only available on Unix
+    resource = None
+
+from .decaying_window import DecayingWindow
+from .event_reader import read_events, read_events_mmap
+from .moving_average_calculator import MovingAverageCalculator
+from .multi_window import create_window
+from .output_sink import create_output_sink
+from .result_encoders import create_encoder
+from .timestamp import MICROSECONDS_PER_MINUTE
+
+# the files of a directory that are written by the calculator itself, and are not inputs
+_SIDECAR_EXTENSIONS = ('.index', '.checkpoint')
+_RESULT_SUFFIX = '_result'
+
+MEGABYTE = 1 << 20
+
+
+class BatchOptions:
+    """
+    The options of the calculator of every file of a batch.
+
+    Args:
+        window_sizes (Optional[Sequence[int]]): The sizes of the windows in minutes, or None with a half-life.
+        half_life (Optional[float]): The half-life of a decayed moving average, in minutes, or None.
+        aggregates (Sequence[str]): The names of the other aggregates of the window, like ["max", "p95"].
+        bucketed (bool): Whether the window keeps a bucket per minute, instead of the events.
+        output_mode (str): Either 'dense' or 'runs'.
+        output_format (str): One of the OUTPUT_FORMATS.
+        reader (str): Either 'mmap' or 'text'.
+        batch_size (int): The number of results buffered in memory before they are written.
+
+    Attributes:
+        The same as the arguments.
+    """
+
+    def __init__(self, window_sizes: Optional[Sequence[int]] = None, half_life: Optional[float] = None,
+                 aggregates: Sequence[str] = (), bucketed: bool = False, output_mode: str = 'dense',
+                 output_format: str = 'ndjson', reader: str = 'mmap', batch_size: int = 1000):
+        if (window_sizes is None) == (half_life is None):
+            raise ValueError("Either a window size or a half-life is required")
+        self.window_sizes: Optional[List[int]] = None if window_sizes is None else list(window_sizes)
+        self.half_life: Optional[float] = half_life
+        self.aggregates: List[str] = list(aggregates)
+        self.bucketed: bool = bucketed
+        self.output_mode: str = output_mode
+        self.output_format: str = output_format
+        self.reader: str = reader
+        self.batch_size: int = batch_size
+
+
+class FileResult:
+    """
+    The outcome of a file of a batch.
+
+    Args:
+        input_file (str): The path to the input file.
+        output_file (str): The path to the output file.
+
+    Attributes:
+        input_file (str): The path to the input file.
+        output_file (str): The path to the output file.
+        input_bytes (int): The size of the input file.
+        minutes (int): The number of minutes calculated.
+        seconds (float): The time the file took.
+        error (Optional[str]): Why the file failed, or None if it succeeded.
+    """
+
+    def __init__(self, input_file: str, output_file: str):
+        self.input_file: str = input_file
+        self.output_file: str = output_file
+        self.input_bytes: int = 0
+        self.minutes: int = 0
+        self.seconds: float = 0.0
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Builds the JSON summary of the file.
+
+        Returns:
+            Dict[str, Any]: The outcome of the file.
+        """
+        summary = {
+            "input_file": self.input_file,
+            "output_file": self.output_file,
+            "input_bytes": self.input_bytes,
+            "minutes": self.minutes,
+            "seconds": round(self.seconds, 6),
+        }
+        if self.error is not None:
+            summary["error"] = self.error
+        return summary
+
+
+class BatchSummary:
+    """
+    The outcome of a whole batch.
+
+    Args:
+        results (List[FileResult]): The outcome of every file, in the order of the inputs.
+        seconds (float): The time of the whole batch.
+        workers (int): The number of worker processes.
+
+    Attributes:
+        results (List[FileResult]): The outcome of every file, in the order of the inputs.
+        seconds (float): The time of the whole batch.
+        workers (int): The number of worker processes.
+    """
+
+    def __init__(self, results: List[FileResult], seconds: float, workers: int):
+        self.results: List[FileResult] = results
+        self.seconds: float = seconds
+        self.workers: int = workers
+
+    @property
+    def failures(self) -> List[FileResult]:
+        """
+        Gets the files that failed.
+
+        Returns:
+            List[FileResult]: The outcome of those files.
+        """
+        return [result for result in self.results if result.error is not None]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Builds the JSON summary of the batch: the number of files that succeeded and failed,
+        the throughput, and the outcome of every file.
+
+        Returns:
+            Dict[str, Any]: The summary.
+        """
+        input_bytes = sum(result.input_bytes for result in self.results)
+        seconds = max(self.seconds, 1e-9)
+        return {
+            "files": len(self.results),
+            "succeeded": len(self.results) - len(self.failures),
+            "failed": len(self.failures),
+            "workers": self.workers,
+            "input_bytes": input_bytes,
+            "minutes": sum(result.minutes for result in self.results),
+            "seconds": round(self.seconds, 6),
+            "throughput": {
+                "files_per_second": round(len(self.results) / seconds, 3),
+                "megabytes_per_second": round(input_bytes / MEGABYTE / seconds, 3),
+            },
+            "results": [result.to_dict() for result in self.results],
+        }
+
+
+def find_input_files(patterns: Sequence[str]) -> List[str]:
+    """
+    Finds the input files of a batch: every file of a directory, or the files that match a glob,
+    like "shards/*.json.gz". In a directory, the outputs of previous runs, whose names end with
+    "_result", and the index and checkpoint files are left out.
+
+    Args:
+        patterns (Sequence[str]): The directories or the globs.
+
+    Returns:
+        List[str]: The paths to the input files, sorted, without duplicates.
+    """
+    input_files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for entry in os.scandir(pattern):
+                if entry.is_file() and not _is_output_file(entry.name):
+                    input_files.add(entry.path)
+        else:
+            input_files.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(input_files)
+
+
+def _is_output_file(name: str) -> bool:
+    """
+    Checks whether a file of an input directory was written by the calculator.
+
+    Args:
+        name (str): The name of the file.
+
+    Returns:
+        bool: Whether it is a result, an index or a checkpoint.
+    """
+    root, extension = os.path.splitext(name)
+    return extension in _SIDECAR_EXTENSIONS or root.endswith(_RESULT_SUFFIX)
+
+
+def limit_memory(max_bytes: Optional[int]) -> None:
+    """
+    Limits the data segment of the current process, so that a file too large for its worker
+    raises a MemoryError, instead of taking the memory of the other workers.
+
+    The data segment has the memory allocated by the process, without the read-only memory maps,
+    so the limit does not count the memory-mapped input file, which can be larger than the limit
+    without using that much memory.
+
+    Args:
+        max_bytes (Optional[int]): The limit, in bytes, or None for no limit.
+
+    Raises:
+        ImportError: If there is a limit, and the resource module is not available.
+    """
+    if max_bytes is None:
+        return
+    if resource is None:
+        raise ImportError("The memory limit requires the resource module, which is only available on Unix.")
+    resource.setrlimit(resource.RLIMIT_DATA, (max_bytes, max_bytes))
+
+
+def process_file(input_file: str, output_file: str, options: BatchOptions) -> FileResult:
+    """
+    Calculates the moving average of a single file of a batch. Any error is reported in the result,
+    instead of being raised, so that it does not stop the other files.
+
+    Args:
+        input_file (str): The path to the input file.
+        output_file (str): The path to the output file.
+        options (BatchOptions): The options of the calculator.
+
+    Returns:
+        FileResult: The outcome of the file.
+    """
+    result = FileResult(input_file, output_file)
+    started = time.perf_counter()
+    try:
+        result.input_bytes = os.path.getsize(input_file)
+        # the output files are appended to, so a file processed again starts from scratch
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        if options.half_life is not None:
+            window = DecayingWindow(options.half_life)
+        else:
+            window = create_window(options.window_sizes, options.aggregates, options.bucketed)
+        reader = read_events_mmap if options.reader == 'mmap' else read_events
+        binary = options.output_format == 'binary'
+        with create_output_sink('file', output_file, options.batch_size, binary) as output_sink:
+            calculator = MovingAverageCalculator(window, output_sink, options.output_mode, reader)
+            if options.output_format != 'ndjson':
+                calculator.result_writer.encoder = create_encoder(options.output_format)
+            calculator.process_events(input_file)
+        if calculator.start_time is not None:
+            result.minutes = (calculator.current_time - calculator.start_time) // MICROSECONDS_PER_MINUTE
+    except MemoryError:
+        result.error = "MemoryError: the file does not fit in the memory limit of the worker"
+    except Exception as error:  # pylint: disable=broad-except
+        result.error = f"{type(error).__name__}: {error}"
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def run_batch(jobs: Sequence[Tuple[str, str]], options: BatchOptions, workers: int,
+              max_memory: Optional[int] = None) -> BatchSummary:
+    """
+    Calculates the moving average of every file of a batch, with a bounded pool of processes.
+
+    A worker that dies, like when it is killed by the system, breaks the whole pool, so the files
+    that were still running are retried one at a time, each in a fresh worker. A file that kills
+    its worker again fails, and the others succeed.
+
+    Args:
+        jobs (Sequence[Tuple[str, str]]): The input file and the output file of every file of the batch.
+        options (BatchOptions): The options of the calculator.
+        workers (int): The number of worker processes.
+        max_memory (Optional[int]): The memory limit of each worker, in bytes, or None for no limit.
+
+    Returns:
+        BatchSummary: The outcome of every file, in the order of the jobs.
+
+    Raises:
+        ValueError: If the number of workers is < 1.
+        ImportError: If there is a memory limit, and the resource module is not available.
+    """
+    if workers < 1:
+        raise ValueError("The number of workers must be >= 1")
+    if max_memory is not None and resource is None:
+        raise ImportError("The memory limit requires the resource module, which is only available on Unix.")
+    started = time.perf_counter()
+    results: Dict[int, FileResult] = {}
+
+    broken = _run_jobs(dict(enumerate(jobs)), options, min(workers, max(len(jobs), 1)), max_memory, results)
+    for index in broken:
+        # alone in its worker, a file that breaks the pool is the one that killed it
+        if _run_jobs({index: jobs[index]}, options, 1, max_memory, results):
+            result = FileResult(*jobs[index])
+            result.error = "The worker process died while processing the file"
+            results[index] = result
+
+    return BatchSummary([results[index] for index in range(len(jobs))], time.perf_counter() - started, workers)
+
+
+def _run_jobs(jobs: Dict[int, Tuple[str, str]], options: BatchOptions, workers: int,
+              max_memory: Optional[int], results: Dict[int, FileResult]) -> List[int]:
+    """
+    Runs some files of a batch in a pool of processes, keeping their outcome.
+
+    Args:
+        jobs (Dict[int, Tuple[str, str]]): The input file and the output file, by index in the batch.
+        options (BatchOptions): The options of the calculator.
+        workers (int): The number of worker processes.
+        max_memory (Optional[int]): The memory limit of each worker, in bytes, or None for no limit.
+        results (Dict[int, FileResult]): Where the outcome of every file is kept, by index.
+
+    Returns:
+        List[int]: The indexes of the files that were running when the pool broke, sorted.
+    """
+    broken = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=limit_memory, initargs=(max_memory,)) as executor:
+        futures = {executor.submit(process_file, input_file, output_file, options): index
+                   for index, (input_file, output_file) in jobs.items()}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except BrokenProcessPool:
+                broken.append(futures[future])
+    return sorted(broken)
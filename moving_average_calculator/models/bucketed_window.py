@@ -0,0 +1,267 @@
+from array import array
+from typing import Optional
+
+from .interfaces.i_checkpointable_window import ICheckpointableWindow
+from .event import Event
+from .snapshot import SnapshotReader, SnapshotWriter
+from .timestamp import MICROSECONDS_PER_MINUTE
+
+
+class BucketedWindow(ICheckpointableWindow):
+    """
+    Represents a window of events as one (count, sum of durations) bucket per minute, instead of the events.
+    With another step than a minute, like 10 seconds, the buckets are of that step instead, and
+    "minute" below stands for the step.
+
+    The buckets live in a ring buffer of two arrays, so the memory depends on the size of the window
+    in minutes, not on the number of events, and a minute of events leaves the window at once.
+
+    It gives the same results as a Window (up to the rounding of float durations), as long as the
+    window is moved a whole minute at a time, like the calculators do. The events of the minute m
+    are in [m, m + 1 minute), and an event leaves the window once timestamp < current_time - size.
+    For a current_time that is a whole minute, that first happens at m + size + 1 minute, for every
+    event of the minute: a bucket then leaves exactly when all of its events would. For any other current_time, a bucket only leaves when all
+    of its events are out, so the events of the minute at the edge can stay a little longer.
+
+    Args:
+        size (int): The size of the window, in units.
+        unit (int): The unit of the size, in microseconds. Defaults to a minute.
+        step (int): The width of a bucket, which is the step of the calculator, in microseconds.
+            Defaults to a minute.
+
+    Attributes:
+        size (int): The size of the window in microseconds.
+        step (int): The width of a bucket, in microseconds.
+        counts (array): The number of events of each minute, in a ring.
+        sums (array): The sum of the durations of each minute, in a ring. They are integers,
+            until a duration is not.
+        first_minute (Optional[int]): The minute of the oldest bucket, or None if the window is empty.
+        start (int): The position of the oldest bucket in the ring.
+        length (int): The number of minutes from the oldest bucket to the newest one.
+        count (int): The number of events in the window.
+        total_duration (int): The total duration of all events in the window.
+        expiration_time (Optional[int]): The first time at which the oldest bucket leaves the window, or None.
+        last_minute (Optional[int]): The minute of the last event added, or None.
+        last_position (int): The position of the bucket of that minute in the ring.
+        flushed_count (int): The number of events in the buckets of the ring. The newer events,
+            all of the last minute, are not added to its bucket yet.
+        flushed_duration (int): The total duration of the events in the buckets of the ring.
+
+    Methods:
+        add_event(event: Event) -> None: Adds an event to the bucket of its minute.
+        remove_old_events(current_time: int) -> None: Removes the buckets whose events are out of the window.
+        get_average_duration() -> float: Calculates the average duration of events in the window.
+        next_expiration_time() -> Optional[int]: Gets the first time at which the oldest bucket leaves the window.
+        event_count() -> int: Gets the number of events in the window.
+        save_state(writer: SnapshotWriter) -> None: Writes the contents of the window to a snapshot.
+        load_state(reader: SnapshotReader) -> None: Reads the contents of the window from a snapshot.
+    """
+
+    def __init__(self, size: int, unit: int = MICROSECONDS_PER_MINUTE, step: int = MICROSECONDS_PER_MINUTE):
+        if size * unit % step:
+            raise ValueError("The size of a bucketed window must be a whole number of steps")
+        self.size: int = size * unit
+        self.step: int = step
+        # room for the size + 1 minutes of the window, and the minute of the event being added
+        capacity = self.size // step + 2
+        self.counts: array = array('q', bytes(8 * capacity))
+        self.sums: array = array('q', bytes(8 * capacity))
+        self.first_minute: Optional[int] = None
+        self.start: int = 0
+        self.length: int = 0
+        self.count: int = 0
+        self.total_duration: int = 0
+        self.expiration_time: Optional[int] = None
+        self.last_minute: Optional[int] = None
+        self.last_position: int = 0
+        self.flushed_count: int = 0
+        self.flushed_duration: int = 0
+
+    def add_event(self, event: Event) -> None:
+        """
+        Adds an event to the bucket of its minute.
+
+        The events are expected in order. An event older than the oldest bucket is added to it.
+
+        Args:
+            event (Event): The event to add.
+        """
+        minute = event.timestamp - event.timestamp % self.step
+        if minute != self.last_minute:
+            self._flush()
+            self.last_position = self._find_bucket(minute)
+            self.last_minute = minute
+        # most events go to the same bucket as the previous one, which is only written to the ring
+        # once the minute changes, instead of boxing two array items per event
+        self.count += 1
+        self.total_duration += event.duration
+
+    def remove_old_events(self, current_time: int) -> None:
+        """
+        Removes the buckets whose events are all out of the window, that is, older than current_time - size.
+
+        Args:
+            current_time (int): The current time, in microseconds since the Unix epoch.
+        """
+        if self.expiration_time is None or current_time < self.expiration_time:
+            return
+        self._flush()
+        oldest_time = current_time - self.size
+        counts = self.counts
+        sums = self.sums
+        capacity = len(counts)
+        while self.length and (self.first_minute + self.step <= oldest_time
+                               or not counts[self.start]):
+            # the empty buckets are dropped too, so that the oldest bucket always has events
+            position = self.start
+            self.count -= counts[position]
+            self.total_duration -= sums[position]
+            counts[position] = 0
+            sums[position] = 0
+            if position == self.last_position:
+                self.last_minute = None
+            self.start = (position + 1) % capacity
+            self.first_minute += self.step
+            self.length -= 1
+        if self.length:
+            self.expiration_time = self.first_minute + self.step + self.size
+        else:
+            self.first_minute = self.expiration_time = self.last_minute = None
+            # a float total can be left with a rounding error
+            self.total_duration = 0
+        self.flushed_count = self.count
+        self.flushed_duration = self.total_duration
+
+    def get_average_duration(self) -> float:
+        """
+        Calculates the average duration of events in the window.
+
+        Returns:
+            float: The average duration of events in the window.
+        """
+        if not self.count:
+            return 0.0
+        return self.total_duration / self.count
+
+    def next_expiration_time(self) -> Optional[int]:
+        """
+        Gets the first time at which the oldest bucket is no longer in the window.
+
+        Returns:
+            Optional[int]: The time, in microseconds since the Unix epoch, or None if the window is empty.
+        """
+        return self.expiration_time
+
+    def event_count(self) -> int:
+        """
+        Gets the number of events in the window.
+
+        Returns:
+            int: The number of events.
+        """
+        return self.count
+
+    def save_state(self, writer: SnapshotWriter) -> None:
+        """
+        Writes the contents of the window to a snapshot: its size, the minute of the oldest bucket,
+        and the buckets, from the oldest one.
+
+        Args:
+            writer (SnapshotWriter): The snapshot.
+        """
+        self._flush()
+        positions = [(self.start + offset) % len(self.counts) for offset in range(self.length)]
+        writer.write_ints([self.size])
+        writer.write_optional_int(self.first_minute)
+        writer.write_number(self.total_duration)
+        writer.write_array(array('q', [self.counts[position] for position in positions]))
+        writer.write_array(array(self.sums.typecode, [self.sums[position] for position in positions]))
+
+    def load_state(self, reader: SnapshotReader) -> None:
+        """
+        Reads the contents of the window from a snapshot.
+
+        Args:
+            reader (SnapshotReader): The snapshot.
+
+        Raises:
+            ValueError: If the snapshot is of a window of another size.
+        """
+        if reader.read_ints() != [self.size]:
+            raise ValueError("The snapshot is of a window of another size")
+        self.first_minute = reader.read_optional_int()
+        self.total_duration = reader.read_number()
+        counts = array('q', reader.read_ints())
+        sums = reader.read_array()
+        if len(sums) != len(counts):
+            raise ValueError("The snapshot has a different number of counts and sums")
+        capacity = max(len(self.counts), len(counts))
+        self.counts = counts + array('q', bytes(8 * (capacity - len(counts))))
+        self.sums = sums + array(sums.typecode, bytes(8 * (capacity - len(sums))))
+        self.start = 0
+        self.length = len(counts)
+        self.count = sum(counts)
+        self.expiration_time = None if self.first_minute is None else \
+            self.first_minute + self.step + self.size
+        self.last_minute = None
+        self.flushed_count = self.count
+        self.flushed_duration = self.total_duration
+
+    def _flush(self) -> None:
+        """
+        Adds the pending events of the last minute to its bucket.
+        """
+        if self.count == self.flushed_count:
+            return
+        position = self.last_position
+        pending_duration = self.total_duration - self.flushed_duration
+        self.counts[position] += self.count - self.flushed_count
+        try:
+            self.sums[position] += pending_duration
+        except TypeError:
+            # a float duration, so the sums become floats too
+            self.sums = array('d', self.sums)
+            self.sums[position] += pending_duration
+        self.flushed_count = self.count
+        self.flushed_duration = self.total_duration
+
+    def _find_bucket(self, minute: int) -> int:
+        """
+        Finds the position of the bucket of a minute in the ring, adding the buckets up to it.
+
+        Args:
+            minute (int): The minute, in microseconds since the Unix epoch.
+
+        Returns:
+            int: The position.
+        """
+        if self.first_minute is None:
+            self.first_minute = minute
+            self.expiration_time = minute + self.step + self.size
+            self.start = 0
+            self.length = 1
+            return 0
+
+        offset = max((minute - self.first_minute) // self.step, 0)
+        if offset >= len(self.counts):
+            # the window was not moved along with the events
+            self._grow(offset + 1)
+        if offset >= self.length:
+            self.length = offset + 1
+        return (self.start + offset) % len(self.counts)
+
+    def _grow(self, capacity: int) -> None:
+        """
+        Makes room in the ring for at least the given number of minutes, keeping the buckets in order.
+
+        Args:
+            capacity (int): The number of minutes.
+        """
+        capacity = max(capacity, 2 * len(self.counts))
+        positions = [(self.start + offset) % len(self.counts) for offset in range(self.length)]
+        self.counts = array('q', [self.counts[position] for position in positions]) + \
+            array('q', bytes(8 * (capacity - self.length)))
+        self.sums = array(self.sums.typecode, [self.sums[position] for position in positions]) + \
+            array(self.sums.typecode, bytes(8 * (capacity - self.length)))
+        self.start = 0
+        self.last_minute = None
@@ -0,0 +1,160 @@
+"""
+This module contains the Checkpoint class, which holds the state of a run of the
+MovingAverageCalculator, so that a long run can be resumed after a crash or a redeploy.
+"""
+
+import os
+from typing import Optional
+
+from .snapshot import SnapshotReader, SnapshotWriter
+
+# the first bytes of a checkpoint file, followed by the version of its format
+CHECKPOINT_MAGIC = b'MACKPT'
+CHECKPOINT_VERSION = 2
+
+# the default number of bytes of input read between two checkpoints
+DEFAULT_CHECKPOINT_INTERVAL = 64 << 20
+
+
+class CheckpointError(Exception):
+    """
+    Raised when a run can not be resumed from its checkpoint.
+    """
+
+
+class Checkpoint:
+    """
+    The state of a run, at a line boundary of the input file.
+
+    Everything before the input offset has been processed, and everything before the output offset
+    has been written. The rest of the state is what is needed to go on from there: the times of the
+    calculator, the run of minutes that has not been written yet (in the 'runs' output mode),
+    and the contents of the window, which is encoded by the window itself.
+
+    Args:
+        settings (str): The settings of the run, like the window sizes, which must not change when resuming.
+        input_offset (int): The offset of the first line of the input that has not been processed.
+        output_offset (int): The size of the output file, with every record written so far.
+        start_time (Optional[int]): The start time of the calculator.
+        current_time (Optional[int]): The current time of the calculator.
+        last_event_time (Optional[int]): The timestamp of the last event processed.
+        run_start (Optional[int]): The first minute of the run that has not been written yet.
+        run_end (Optional[int]): The last minute of that run.
+        run_average (str): The average delivery time of that run, encoded as JSON.
+        window_state (bytes): The contents of the window.
+        finished (bool): Whether the run processed the whole input.
+
+    All the times are in microseconds since the Unix epoch.
+    """
+
+    def __init__(self, settings: str, input_offset: int, output_offset: int, start_time: Optional[int],
+                 current_time: Optional[int], last_event_time: Optional[int], run_start: Optional[int],
+                 run_end: Optional[int], run_average: str, window_state: bytes, finished: bool = False):
+        self.settings: str = settings
+        self.input_offset: int = input_offset
+        self.output_offset: int = output_offset
+        self.start_time: Optional[int] = start_time
+        self.current_time: Optional[int] = current_time
+        self.last_event_time: Optional[int] = last_event_time
+        self.run_start: Optional[int] = run_start
+        self.run_end: Optional[int] = run_end
+        self.run_average: str = run_average
+        self.window_state: bytes = window_state
+        self.finished: bool = finished
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the checkpoint.
+
+        Returns:
+            bytes: The encoded checkpoint.
+        """
+        writer = SnapshotWriter()
+        writer.parts.append(CHECKPOINT_MAGIC)
+        writer.write_int(CHECKPOINT_VERSION)
+        writer.write_str(self.settings)
+        writer.write_int(self.input_offset)
+        writer.write_int(self.output_offset)
+        writer.write_optional_int(self.start_time)
+        writer.write_optional_int(self.current_time)
+        writer.write_optional_int(self.last_event_time)
+        writer.write_optional_int(self.run_start)
+        writer.write_optional_int(self.run_end)
+        writer.write_str(self.run_average)
+        writer.write_bytes(self.window_state)
+        writer.write_int(int(self.finished))
+        return writer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Checkpoint':
+        """
+        Decodes a checkpoint.
+
+        Args:
+            data (bytes): The encoded checkpoint.
+
+        Returns:
+            Checkpoint: The checkpoint.
+
+        Raises:
+            CheckpointError: If the data is not a valid checkpoint.
+        """
+        if not data.startswith(CHECKPOINT_MAGIC):
+            raise CheckpointError("The checkpoint file is not valid.")
+        reader = SnapshotReader(data)
+        reader.offset = len(CHECKPOINT_MAGIC)
+        try:
+            if reader.read_int() != CHECKPOINT_VERSION:
+                raise CheckpointError("The checkpoint file was written by another version.")
+            checkpoint = cls(
+                settings=reader.read_str(),
+                input_offset=reader.read_int(),
+                output_offset=reader.read_int(),
+                start_time=reader.read_optional_int(),
+                current_time=reader.read_optional_int(),
+                last_event_time=reader.read_optional_int(),
+                run_start=reader.read_optional_int(),
+                run_end=reader.read_optional_int(),
+                run_average=reader.read_str(),
+                window_state=reader.read_bytes(),
+                finished=bool(reader.read_int()),
+            )
+            reader.read_end()
+        except (ValueError, UnicodeDecodeError) as error:
+            raise CheckpointError(f"The checkpoint file is not valid: {error}.") from error
+        return checkpoint
+
+    def save(self, checkpoint_file: str) -> None:
+        """
+        Writes the checkpoint to a file, replacing the previous one at once, so that
+        a crash while writing it leaves the previous checkpoint in place.
+
+        Args:
+            checkpoint_file (str): The path to the checkpoint file.
+        """
+        temporary_file = f"{checkpoint_file}.tmp"
+        with open(temporary_file, 'wb') as f:
+            f.write(self.to_bytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_file, checkpoint_file)
+
+    @classmethod
+    def load(cls, checkpoint_file: str) -> Optional['Checkpoint']:
+        """
+        Reads the checkpoint from a file.
+
+        Args:
+            checkpoint_file (str): The path to the checkpoint file.
+
+        Returns:
+            Optional[Checkpoint]: The checkpoint, or None if there is no checkpoint file.
+
+        Raises:
+            CheckpointError: If the file is not a valid checkpoint.
+        """
+        try:
+            with open(checkpoint_file, 'rb') as f:
+                return cls.from_bytes(f.read())
+        except FileNotFoundError:
+            return None
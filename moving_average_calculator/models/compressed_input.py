@@ -0,0 +1,172 @@
+"""
+This module reads compressed input files, like the .gz and .zst event archives, without
+decompressing them to disk first.
+
+The decompression runs in a background thread, which fills a bounded queue with blocks of
+whole lines, so it overlaps with the parsing of the events and the updates of the window.
+Both zlib and zstandard release the GIL while they decompress, so the two really run at once.
+"""
+
+import gzip
+import os
+import queue
+import threading
+from typing import BinaryIO, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is an optional dependency
+    zstandard = None
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+
+# the extensions of the compressed files, and the magic bytes they start with
+COMPRESSED_EXTENSIONS = {'.gz': GZIP, '.zst': ZSTD}
+_MAGIC_BYTES = {b'\x1f\x8b': GZIP, b'\x28\xb5\x2f\xfd': ZSTD}
+
+# the size of the decompressed blocks, and how many of them can wait in the queue
+DECOMPRESSED_BLOCK_SIZE = 1 << 20
+DEFAULT_QUEUE_SIZE = 8
+
+# how often the background thread checks whether the reader is gone, while the queue is full
+_PUT_TIMEOUT = 0.1
+
+
+def detect_compression(input_file: str) -> Optional[str]:
+    """
+    Detects the compression of a file, by its extension or, otherwise, by its first bytes.
+
+    Args:
+        input_file (str): The path to the file.
+
+    Returns:
+        Optional[str]: Either GZIP or ZSTD, or None if the file is not compressed.
+    """
+    extension = os.path.splitext(input_file)[1].lower()
+    if extension in COMPRESSED_EXTENSIONS:
+        return COMPRESSED_EXTENSIONS[extension]
+    try:
+        descriptor = os.open(input_file, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        header = os.read(descriptor, 4)
+    finally:
+        os.close(descriptor)
+    for magic, compression in _MAGIC_BYTES.items():
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+def strip_compressed_extension(path: str) -> str:
+    """
+    Removes the extension of the compression from a path, like "events.json.gz" to "events.json".
+
+    Args:
+        path (str): The path.
+
+    Returns:
+        str: The path without the extension, or the same path if it has none.
+    """
+    root, extension = os.path.splitext(path)
+    return root if extension.lower() in COMPRESSED_EXTENSIONS else path
+
+
+def open_decompressed(input_file: str, compression: str) -> BinaryIO:
+    """
+    Opens a compressed file, to read its decompressed contents.
+
+    Args:
+        input_file (str): The path to the file.
+        compression (str): Either GZIP or ZSTD.
+
+    Returns:
+        BinaryIO: The decompressed stream.
+
+    Raises:
+        ImportError: If the file is compressed with zstd, and zstandard is not installed.
+    """
+    if compression == GZIP:
+        return gzip.open(input_file, 'rb')
+    if zstandard is None:
+        raise ImportError("The .zst inputs require zstandard. Install it with `pip install zstandard`.")
+    return zstandard.ZstdDecompressor().stream_reader(open(input_file, 'rb'), closefd=True)
+
+
+class _Failure:
+    """
+    Carries an error of the background thread to the reader.
+
+    Attributes:
+        error (BaseException): The error.
+    """
+
+    def __init__(self, error: BaseException):
+        self.error: BaseException = error
+
+
+def read_line_blocks(input_file: str, compression: str, queue_size: int = DEFAULT_QUEUE_SIZE) -> Iterator[bytes]:
+    """
+    Reads the decompressed contents of a file in blocks of whole lines, decompressed by a background thread.
+
+    Each block ends right after a newline, except the last one, if the file does not end with a newline.
+    At most queue_size blocks are decompressed ahead of the reader, so the memory stays bounded.
+    If the reader stops early, the thread stops too.
+
+    Args:
+        input_file (str): The path to the file.
+        compression (str): Either GZIP or ZSTD.
+        queue_size (int): The number of blocks that can wait in the queue.
+
+    Yields:
+        bytes: The blocks, in order.
+
+    Raises:
+        OSError: If the file cannot be read. The errors of the decompression, like a corrupt file,
+            are raised here too.
+    """
+    blocks: 'queue.Queue' = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # wait for room in the queue, unless the reader is gone
+        while not stopped.is_set():
+            try:
+                blocks.put(item, timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decompress() -> None:
+        try:
+            with open_decompressed(input_file, compression) as f:
+                remainder = b''
+                for block in iter(lambda: f.read(DECOMPRESSED_BLOCK_SIZE), b''):
+                    block = remainder + block
+                    # only whole lines are handed over
+                    last_newline = block.rfind(b'\n') + 1
+                    remainder = block[last_newline:]
+                    if last_newline and not put(block[:last_newline]):
+                        return
+                if remainder and not put(remainder):
+                    return
+            put(None)
+        except BaseException as error:  # pylint: disable=broad-except
+            put(_Failure(error))
+
+    thread = threading.Thread(target=decompress, name='decompression', daemon=True)
+    thread.start()
+    try:
+        while True:
+            block = blocks.get()
+            if block is None:
+                return
+            if isinstance(block, _Failure):
+                raise block.error
+            yield block
+    finally:
+        stopped.set()
+        thread.join()
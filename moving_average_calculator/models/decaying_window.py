@@ -0,0 +1,141 @@
+from typing import Optional
+
+from .interfaces.i_checkpointable_window import ICheckpointableWindow
+from .event import Event
+from .snapshot import SnapshotReader, SnapshotWriter
+from .timestamp import MICROSECONDS_PER_MINUTE
+
+
+class DecayingWindow(ICheckpointableWindow):
+    """
+    Represents an exponentially decayed window of events, for very long horizons in constant memory.
+
+    Instead of keeping the events, the window keeps the decayed sum of their durations and the
+    decayed number of events. The weight of an event halves every half-life after its timestamp:
+        weight = 2 ** (-(current_time - timestamp) / half_life)
+    and the average is the weighted average of the durations. Both sums are decayed by the exact
+    time between an event and the previous one, so events that are unevenly spaced are weighed
+    correctly, and events with the same timestamp have the same weight.
+
+    Since every weight decays at the same rate, the average does not change between events, so
+    no event ever expires. The events are expected in order; an older event is weighed as of the
+    newest one, instead of rewinding the window.
+
+    Args:
+        half_life (float): The half-life of the weights, in units.
+        unit (int): The unit of the half-life, in microseconds. Defaults to a minute.
+
+    Attributes:
+        half_life (int): The half-life of the weights, in microseconds.
+        weighted_sum (float): The decayed sum of the durations, as of the last event time.
+        weight (float): The decayed number of events, as of the last event time.
+        last_time (Optional[int]): The timestamp of the newest event, or None if there are no events.
+
+    Methods:
+        add_event(event: Event) -> None: Decays the window to the event, and adds it.
+        remove_old_events(current_time: int) -> None: Does nothing, since the average does not change.
+        get_average_duration() -> float: Calculates the weighted average duration.
+        next_expiration_time() -> Optional[int]: Always None, since no event expires.
+        event_count() -> int: Always 0, since the events are not kept.
+        save_state(writer: SnapshotWriter) -> None: Writes the contents of the window to a snapshot.
+        load_state(reader: SnapshotReader) -> None: Reads the contents of the window from a snapshot.
+    """
+
+    def __init__(self, half_life: float, unit: int = MICROSECONDS_PER_MINUTE):
+        if half_life <= 0:
+            raise ValueError("The half-life must be > 0")
+        self.half_life: int = max(round(half_life * unit), 1)
+        self.weighted_sum: float = 0.0
+        self.weight: float = 0.0
+        self.last_time: Optional[int] = None
+
+    def add_event(self, event: Event) -> None:
+        """
+        Decays the window to the timestamp of the event, and adds it with a weight of 1.
+
+        Args:
+            event (Event): The event to add.
+        """
+        if self.last_time is None:
+            self.last_time = event.timestamp
+        elapsed = event.timestamp - self.last_time
+        if elapsed > 0:
+            decay = 2.0 ** (-elapsed / self.half_life)
+            self.weighted_sum *= decay
+            self.weight *= decay
+            self.last_time = event.timestamp
+            self.weighted_sum += event.duration
+            self.weight += 1.0
+        elif elapsed == 0:
+            self.weighted_sum += event.duration
+            self.weight += 1.0
+        else:
+            # an older event is weighed as of the newest one
+            weight = 2.0 ** (elapsed / self.half_life)
+            self.weighted_sum += weight * event.duration
+            self.weight += weight
+
+    def remove_old_events(self, current_time: int) -> None:
+        """
+        Does nothing: decaying both sums to the current time would not change their ratio.
+
+        Args:
+            current_time (int): The current time, in microseconds since the Unix epoch.
+        """
+
+    def get_average_duration(self) -> float:
+        """
+        Calculates the weighted average duration of the events in the window.
+
+        Returns:
+            float: The weighted average duration, or 0.0 if there are no events.
+        """
+        if not self.weight:
+            return 0.0
+        return self.weighted_sum / self.weight
+
+    def next_expiration_time(self) -> Optional[int]:
+        """
+        Gets the first time at which the contents of the window change, without new events.
+
+        Returns:
+            Optional[int]: Always None, since the average only changes when an event is added.
+        """
+        return None
+
+    def event_count(self) -> int:
+        """
+        Gets the number of events kept in the window.
+
+        Returns:
+            int: Always 0, since only the decayed sums are kept.
+        """
+        return 0
+
+    def save_state(self, writer: SnapshotWriter) -> None:
+        """
+        Writes the contents of the window to a snapshot.
+
+        Args:
+            writer (SnapshotWriter): The snapshot.
+        """
+        writer.write_ints([self.half_life])
+        writer.write_number(float(self.weighted_sum))
+        writer.write_number(float(self.weight))
+        writer.write_optional_int(self.last_time)
+
+    def load_state(self, reader: SnapshotReader) -> None:
+        """
+        Reads the contents of the window from a snapshot.
+
+        Args:
+            reader (SnapshotReader): The snapshot.
+
+        Raises:
+            ValueError: If the snapshot is of a window with another half-life.
+        """
+        if reader.read_ints() != [self.half_life]:
+            raise ValueError("The snapshot is of a window with another half-life")
+        self.weighted_sum = reader.read_number()
+        self.weight = reader.read_number()
+        self.last_time = reader.read_optional_int()
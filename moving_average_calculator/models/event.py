@@ -1,14 +1,22 @@
-from datetime import datetime
+from .timestamp import TimestampParser
+
+_parser = TimestampParser()
+
 
 class Event:
     """
     Represents an event with a timestamp and duration.
 
+    The timestamp is kept as an integer number of microseconds since the Unix epoch,
+    and the instances use __slots__, so each event is as small and cheap to build as possible.
+
     Attributes:
-        timestamp (datetime): The timestamp of the event.
+        timestamp (int): The timestamp of the event, in microseconds since the Unix epoch.
         duration (int): The duration of the event in seconds.
     """
 
+    __slots__ = ('_timestamp', '_duration')
+
     def __init__(self, timestamp: str, duration: int):
         """
         Initializes a new instance of the Event class.
@@ -17,16 +25,33 @@ class Event:
             timestamp (str): The timestamp of the event in the format "%Y-%m-%d %H:%M:%S.%f".
             duration (int): The duration of the event in seconds.
         """
-        self._timestamp: datetime = datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S.%f")
+        self._timestamp: int = _parser.parse(timestamp)
         self._duration: int = duration
 
+    @classmethod
+    def from_epoch(cls, timestamp: int, duration: int) -> 'Event':
+        """
+        Creates an event from an already parsed timestamp.
+
+        Args:
+            timestamp (int): The timestamp of the event, in microseconds since the Unix epoch.
+            duration (int): The duration of the event in seconds.
+
+        Returns:
+            Event: The new event.
+        """
+        event = cls.__new__(cls)
+        event._timestamp = timestamp
+        event._duration = duration
+        return event
+
     @property
-    def timestamp(self) -> datetime:
+    def timestamp(self) -> int:
         """
         Gets the timestamp of the event.
 
         Returns:
-            datetime: The timestamp of the event.
+            int: The timestamp of the event, in microseconds since the Unix epoch.
         """
         return self._timestamp
 
@@ -38,4 +63,4 @@ class Event:
         Returns:
             int: The duration of the event in seconds.
         """
-        return self._duration
\ No newline at end of file
+        return self._duration
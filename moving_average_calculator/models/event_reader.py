@@ -0,0 +1,390 @@
+"""
+This module contains the functions that read the events from the input files.
+
+The lines can either be decoded as text and parsed with json.loads (read_events),
+or scanned straight from a memory map, extracting only the timestamp and the
+duration (read_events_mmap), which is much cheaper for large files.
+
+Compressed input files (.gz or .zst) are read by both, through blocks of whole lines
+decompressed by a background thread, instead of the file itself or its memory map.
+"""
+
+import io
+import json
+import mmap
+import os
+import re
+import sys
+from operator import itemgetter
+from typing import Any, BinaryIO, Callable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from .compressed_input import detect_compression, read_line_blocks
+from .event import Event
+
+T = TypeVar('T')
+
+# the size of the blocks read when looking for newlines, or going backwards through the file
+BLOCK_SIZE = 1 << 16
+
+# the expected shape of a line: a flat JSON object that starts with the timestamp and ends with
+# the duration, like the lines written by the translation service. Only those two fields are extracted,
+# but the fields in between must be well-formed, with an ASCII string, a number, a boolean or null as
+# values. The lines of any other shape, like the ones with other whitespace, are still valid JSON,
+# and are left to json.loads.
+_STRING = rb'"[^"\\\x00-\x1f\x80-\xff]*"'
+_NUMBER = rb'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?'
+_EVENT_LINE = re.compile(
+    rb'\{"timestamp": ?"([^"\\\x00-\x1f]*)"'
+    rb'(?:, ?' + _STRING + rb': ?(?:' + _STRING + rb'|' + _NUMBER + rb'|true|false|null))*'
+    rb', ?"duration": ?(-?(?:0|[1-9][0-9]*))\}\r?(?:\n|\Z)'
+)
+
+# the errors of a line that is not a valid event: json.JSONDecodeError, UnicodeDecodeError and
+# an invalid date are all ValueErrors
+INVALID_LINE_ERRORS = (ValueError, KeyError, TypeError)
+
+# the key of a group: the names of the fields it is grouped by, and their values
+GroupKey = Tuple[Tuple[str, ...], Tuple[Any, ...]]
+
+# the event of an (offset, event) pair yielded by scan_event_offsets
+_event_of_offset = itemgetter(1)
+
+
+def report_invalid_line() -> None:
+    """
+    Reports a line with invalid data, which is skipped, on the stderr, so that it does not mix with the results
+    written to the stdout. The readers call it for each such line by default.
+    """
+    print("Error: Invalid data in line, skipping...", file=sys.stderr)
+
+
+def ignore_invalid_line() -> None:
+    """
+    Skips a line with invalid data without reporting it.
+    """
+
+
+def check_duration(duration: Any) -> Any:
+    """
+    Checks that a duration is a number, since a string or a boolean would only fail once it is added
+    to a window, or be taken as 1.
+
+    Args:
+        duration (Any): The duration of an event.
+
+    Returns:
+        Any: The duration.
+
+    Raises:
+        TypeError: If the duration is not an integer or a float.
+    """
+    if isinstance(duration, bool) or not isinstance(duration, (int, float)):
+        raise TypeError(f"The duration is not a number: {duration!r}")
+    return duration
+
+
+def parse_event(line: str) -> Event:
+    """
+    Parses a line of the input file into an Event.
+
+    Args:
+        line (str): A JSON object with, at least, the "timestamp" and "duration" fields.
+
+    Returns:
+        Event: The parsed event.
+
+    Raises:
+        ValueError: If the line is not valid JSON, or the timestamp is not a valid date.
+        KeyError: If the line is missing one of the fields.
+        TypeError: If the line is not a JSON object, the timestamp is not a string, or the duration is not a number.
+    """
+    event_data = json.loads(line)
+    return Event(
+        event_data['timestamp'],
+        check_duration(event_data['duration'])
+    )
+
+
+def parse_grouped_event(line: str, group_by: Sequence[Tuple[str, ...]]) -> Tuple[Event, List[GroupKey]]:
+    """
+    Parses a line of the input file into an Event, and the keys of the groups it belongs to.
+
+    Args:
+        line (str): A JSON object with the "timestamp" and "duration" fields, and the fields to group by.
+        group_by (Sequence[Tuple[str, ...]]): The fields of each grouping, like ("client_name",)
+            or ("source_language", "target_language").
+
+    Returns:
+        Tuple[Event, List[GroupKey]]: The parsed event, and its key in each grouping.
+
+    Raises:
+        ValueError: If the line is not valid JSON, or the timestamp is not a valid date.
+        KeyError: If the line is missing one of the fields.
+        TypeError: If the line is not a JSON object, the timestamp is not a string, the duration is not
+            a number, or the value of a grouped field is not hashable.
+    """
+    event_data = json.loads(line)
+    event = Event(
+        event_data['timestamp'],
+        check_duration(event_data['duration'])
+    )
+    keys = []
+    for fields in group_by:
+        key = (fields, tuple(event_data[field] for field in fields))
+        hash(key)
+        keys.append(key)
+    return event, keys
+
+
+def read_events(input_file: str, parse: Callable[[str], T] = parse_event,
+                on_invalid: Callable[[], None] = report_invalid_line) -> Iterator[T]:
+    """
+    Reads the events from the input file, one per line.
+
+    Lines with invalid data are skipped, and an error is printed for each of them.
+
+    Args:
+        input_file (str): The path to the input file containing the events.
+        parse (Callable[[str], T]): The function that parses each line. Defaults to parse_event.
+        on_invalid (Callable[[], None]): Called for each line with invalid data. Defaults to report_invalid_line.
+
+    Yields:
+        T: The parsed events, in the order they appear in the file.
+    """
+    for line in read_lines(input_file):
+        try:
+            event = parse(line)
+        except INVALID_LINE_ERRORS:
+            on_invalid()
+            continue
+        yield event
+
+
+def read_lines(input_file: str) -> Iterator[str]:
+    """
+    Reads the lines of the input file, which can be compressed.
+
+    Args:
+        input_file (str): The path to the input file.
+
+    Yields:
+        str: The lines, with their newlines.
+    """
+    compression = detect_compression(input_file)
+    if compression is None:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            yield from f
+        return
+    for block in read_line_blocks(input_file, compression):
+        # only split at the newlines, like a file does, since str.splitlines also splits at \u2028
+        yield from io.StringIO(block.decode('utf-8'))
+
+
+def split_file(input_file: str, chunks: int) -> List[Tuple[int, int]]:
+    """
+    Splits the input file into byte ranges of about the same size, each one starting
+    at the beginning of a line and ending right after a newline (or at the end of the file).
+
+    Args:
+        input_file (str): The path to the input file.
+        chunks (int): The number of ranges wanted. Fewer are returned for small files.
+
+    Returns:
+        List[Tuple[int, int]]: The (start, end) offsets of each range, in order.
+    """
+    file_size = os.path.getsize(input_file)
+    boundaries = [0]
+    with open(input_file, 'rb') as f:
+        for chunk in range(1, chunks):
+            offset = max(file_size * chunk // chunks, boundaries[-1])
+            f.seek(offset)
+            # move the boundary to the start of the next line
+            f.readline()
+            offset = f.tell()
+            if offset >= file_size:
+                break
+            if offset > boundaries[-1]:
+                boundaries.append(offset)
+    boundaries.append(file_size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def read_lines_in_range(f: BinaryIO, start: int, end: int) -> Iterator[str]:
+    """
+    Reads the lines that start within a byte range of the file.
+
+    Args:
+        f (BinaryIO): The input file, opened in binary mode.
+        start (int): The offset of the first line.
+        end (int): The offset where the range ends.
+
+    Yields:
+        str: The lines, in order.
+    """
+    f.seek(start)
+    position = start
+    while position < end:
+        line = f.readline()
+        if not line:
+            return
+        position += len(line)
+        yield line.decode('utf-8')
+
+
+def read_lines_backwards(f: BinaryIO, end: int) -> Iterator[str]:
+    """
+    Reads the lines before an offset of the file, from the last one to the first one.
+
+    Args:
+        f (BinaryIO): The input file, opened in binary mode.
+        end (int): The offset where the reading starts, which must be the start of a line.
+
+    Yields:
+        str: The lines, in reverse order.
+    """
+    position = end
+    remainder = b''
+    while position > 0:
+        size = min(BLOCK_SIZE, position)
+        position -= size
+        f.seek(position)
+        lines = (f.read(size) + remainder).split(b'\n')
+        # the first piece may be the end of a line that starts in an earlier block
+        remainder = lines[0]
+        for line in reversed(lines[1:]):
+            if line:
+                yield line.decode('utf-8')
+    if remainder:
+        yield remainder.decode('utf-8')
+
+
+def scan_events(buffer: bytes, start: int = 0, end: Optional[int] = None,
+                on_invalid: Callable[[], None] = report_invalid_line) -> Iterator[Event]:
+    """
+    Scans the events of a buffer, like a memory-mapped input file, one per line.
+
+    Instead of decoding every line with json.loads, which builds a dict with all of its fields,
+    the lines with the expected shape (a flat JSON object that starts with the timestamp and
+    ends with an integer duration) only have those two fields extracted. The fields in between
+    are only checked to be well-formed, with scalar values, without being decoded. Every other line, and every line with
+    an invalid date, goes through json.loads, so the lines are accepted and skipped exactly like
+    read_events does, with an error printed for each invalid one.
+
+    Args:
+        buffer (bytes): The contents of the input file, or any object that supports the buffer protocol.
+        start (int): The offset of the first line.
+        end (Optional[int]): The offset where the scan stops. Defaults to the end of the buffer.
+        on_invalid (Callable[[], None]): Called for each invalid line. Defaults to report_invalid_line.
+
+    Returns:
+        Iterator[Event]: The events, in the order they appear in the buffer.
+    """
+    return map(_event_of_offset, scan_event_offsets(buffer, start, end, on_invalid))
+
+
+def scan_events_backwards(buffer: bytes, end: int) -> Iterator[Event]:
+    """
+    Scans the events of the lines before an offset of a buffer, from the last one to the first one,
+    with the same parsing as scan_events. The invalid lines are skipped without an error, since they
+    are expected to be reported by the scan that reads them forwards.
+
+    Args:
+        buffer (bytes): The contents of the input file, or any object that supports the buffer protocol.
+        end (int): The offset where the scan starts, which must be the start of a line.
+
+    Yields:
+        Event: The events, in reverse order.
+    """
+    line_end = end
+    while line_end > 0:
+        # the newline of the line before ends at line_end
+        line_start = buffer.rfind(b'\n', 0, line_end - 1) + 1
+        yield from scan_events(buffer, line_start, line_end, ignore_invalid_line)
+        line_end = line_start
+
+
+def scan_event_offsets(buffer: bytes, start: int = 0, end: Optional[int] = None,
+                       on_invalid: Callable[[], None] = report_invalid_line) -> Iterator[Tuple[int, Event]]:
+    """
+    Scans the events of a buffer like scan_events, along with the offset of the line of each of them.
+
+    Args:
+        buffer (bytes): The contents of the input file, or any object that supports the buffer protocol.
+        start (int): The offset of the first line.
+        end (Optional[int]): The offset where the scan stops. Defaults to the end of the buffer.
+        on_invalid (Callable[[], None]): Called for each invalid line. Defaults to report_invalid_line.
+
+    Yields:
+        Tuple[int, Event]: The offset of the line, and its event, in the order they appear in the buffer.
+    """
+    if end is None:
+        end = len(buffer)
+    match = _EVENT_LINE.match
+    find = buffer.find
+    position = start
+    while position < end:
+        line = match(buffer, position, end)
+        # json.loads keeps the last value of a repeated key, so only trust a single timestamp
+        if line is not None and find(b'"timestamp"', line.end(1), line.end()) < 0:
+            try:
+                event = Event(line.group(1).decode('utf-8'), int(line.group(2)))
+            except ValueError:
+                event = None
+            if event is not None:
+                yield position, event
+                position = line.end()
+                continue
+
+        line_start = position
+        event, position = _parse_line_at(buffer, position, end, on_invalid)
+        if event is not None:
+            yield line_start, event
+
+
+def _parse_line_at(buffer: bytes, position: int, end: int,
+                   on_invalid: Callable[[], None] = report_invalid_line) -> Tuple[Optional[Event], int]:
+    """
+    Parses the line at an offset of a buffer with json.loads.
+
+    Args:
+        buffer (bytes): The contents of the input file.
+        position (int): The offset of the line.
+        end (int): The offset where the scan stops.
+        on_invalid (Callable[[], None]): Called if the line is invalid. Defaults to report_invalid_line.
+
+    Returns:
+        Tuple[Optional[Event], int]: The event, or None if the line is invalid, and the offset of the next line.
+    """
+    line_end = buffer.find(b'\n', position, end)
+    line_end = end if line_end < 0 else line_end + 1
+    try:
+        return parse_event(buffer[position:line_end].decode('utf-8')), line_end
+    except INVALID_LINE_ERRORS:
+        on_invalid()
+        return None, line_end
+
+
+def read_events_mmap(input_file: str, on_invalid: Callable[[], None] = report_invalid_line) -> Iterator[Event]:
+    """
+    Reads the events from the input file, one per line, through a memory map or,
+    for a compressed file, through its decompressed blocks.
+
+    Args:
+        input_file (str): The path to the input file containing the events.
+        on_invalid (Callable[[], None]): Called for each line with invalid data. Defaults to report_invalid_line.
+
+    Yields:
+        Event: The events, in the order they appear in the file.
+    """
+    compression = detect_compression(input_file)
+    if compression is not None:
+        # a compressed file cannot be memory-mapped, so its decompressed blocks are scanned instead
+        for block in read_line_blocks(input_file, compression):
+            yield from scan_events(block, on_invalid=on_invalid)
+        return
+    with open(input_file, 'rb') as f:
+        # an empty file cannot be memory-mapped
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from scan_events(buffer, on_invalid=on_invalid)
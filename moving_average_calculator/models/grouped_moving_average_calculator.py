@@ -0,0 +1,208 @@
+"""
+This module contains the GroupedMovingAverageCalculator class which calculates
+the moving average delivery time of each group of events, like each client or
+each language pair, in a single pass.
+"""
+
+import sys
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, Optional, Sequence, Tuple
+
+from .interfaces.i_moving_average_calculator import IMovingAverageCalculator
+from .interfaces.i_output_sink import IOutputSink
+from .interfaces.i_window import IWindow
+
+from .event_reader import GroupKey, parse_grouped_event, read_events
+from .reorder_buffer import ReorderBuffer, grouped_event_timestamp
+from .result_writer import MinuteResultWriter
+from .timestamp import MICROSECONDS_PER_MINUTE, floor_to_minute
+
+
+class GroupState:
+    """
+    Holds the window and the result writer of a group.
+
+    Attributes:
+        window (IWindow): The window with the events of the group.
+        result_writer (MinuteResultWriter): Writes the results of the group, with its key.
+    """
+
+    __slots__ = ('window', 'result_writer')
+
+    def __init__(self, window: IWindow, result_writer: MinuteResultWriter):
+        self.window: IWindow = window
+        self.result_writer: MinuteResultWriter = result_writer
+
+
+class GroupedMovingAverageCalculator(IMovingAverageCalculator):
+    """
+    A class that calculates and prints the moving average delivery time of each group of events.
+
+    Each group has its own window, created when its first event arrives. A group is only kept
+    while its window has events: once they all expire, the group is dropped, and it starts
+    again from an empty window if more of its events arrive. The number of live groups can
+    also be capped, in which case the least recently updated group is dropped to make room.
+
+    Every minute, each live group writes a record with its key:
+        {"date": "2018-12-26 18:12:00", "client_name": "airliberty", "average_delivery_time": 20.0}
+
+    Args:
+        window_factory (Callable[[], IWindow]): Creates the window of a new group.
+        output_sink (IOutputSink): The sink where the results will be written.
+        group_by (Sequence[Tuple[str, ...]]): The fields of each grouping, like ("client_name",)
+            or ("source_language", "target_language"). Every event belongs to one group of each grouping.
+        output_mode (str): 'dense' to write one result per minute, or 'runs' to merge
+            consecutive minutes with the same average into a single result.
+        max_groups (Optional[int]): The maximum number of live groups, or None for no limit.
+        reorder_buffer (Optional[ReorderBuffer]): Puts the events back in order, if they can arrive
+            out of order. Defaults to None, for events that are already sorted.
+
+    Attributes:
+        window_factory (Callable[[], IWindow]): Creates the window of a new group.
+        output_sink (IOutputSink): The sink where the results will be written.
+        group_by (Sequence[Tuple[str, ...]]): The fields of each grouping.
+        output_mode (str): Either 'dense' or 'runs'.
+        max_groups (Optional[int]): The maximum number of live groups, or None for no limit.
+        groups (OrderedDict[GroupKey, GroupState]): The live groups, from the least to the most recently updated.
+        evicted_groups (int): The number of groups dropped because of the max_groups limit.
+        reorder_buffer (Optional[ReorderBuffer]): Puts the events back in order, or None.
+        start_time (Optional[int]): The start time of the event window.
+        current_time (Optional[int]): The current time being processed.
+        last_event_time (Optional[int]): The timestamp of the last event processed.
+
+    All the times are in microseconds since the Unix epoch.
+
+    """
+
+    def __init__(self, window_factory: Callable[[], IWindow], output_sink: IOutputSink,
+                 group_by: Sequence[Tuple[str, ...]], output_mode: str = 'dense',
+                 max_groups: Optional[int] = None, reorder_buffer: Optional[ReorderBuffer] = None):
+        if not group_by:
+            raise ValueError("At least one grouping is required")
+        if max_groups is not None and max_groups < 1:
+            raise ValueError("The maximum number of groups must be >= 1")
+        self.window_factory: Callable[[], IWindow] = window_factory
+        self.output_sink: IOutputSink = output_sink
+        self.group_by: Sequence[Tuple[str, ...]] = group_by
+        self.output_mode: str = output_mode
+        self.max_groups: Optional[int] = max_groups
+        self.groups: 'OrderedDict[GroupKey, GroupState]' = OrderedDict()
+        self.evicted_groups: int = 0
+        self.reorder_buffer: Optional[ReorderBuffer] = reorder_buffer
+        self.start_time: Optional[int] = None
+        self.current_time: Optional[int] = None
+        self.last_event_time: Optional[int] = None
+
+    def process_and_print_event(self) -> None:
+        """
+        Process the events in the window of each group, and print their average delivery time
+        for the current time. Groups whose window is now empty are dropped.
+
+        Returns:
+            None
+
+        """
+        for key, group in list(self.groups.items()):
+            group.window.remove_old_events(self.current_time)
+            if group.window.next_expiration_time() is None:
+                # the window has drained, so the group has nothing more to say
+                group.result_writer.end_run()
+                del self.groups[key]
+                continue
+            group.result_writer.write(self.current_time, group.window.get_result())
+
+        # move the current time forward by 1 minute
+        self.current_time += MICROSECONDS_PER_MINUTE
+
+    def process_events(self, input_file: str) -> None:
+        """
+        Process the events from the input file and calculate the moving average delivery time of each group.
+        The number of groups dropped because of the max_groups limit is reported at the end, since their
+        results restart from an empty window.
+
+        Args:
+            input_file (str): The path to the input file containing the events.
+
+        Returns:
+            None
+
+        """
+        try:
+            self._read_events(input_file)
+            if self.evicted_groups:
+                print(f"Error: {self.evicted_groups} groups were dropped to stay within "
+                      f"{self.max_groups} groups, so their windows restarted", file=sys.stderr)
+        finally:
+            # whatever happens, do not lose the results that are still buffered
+            for group in self.groups.values():
+                group.result_writer.end_run()
+            self.output_sink.flush()
+
+    def _read_events(self, input_file: str) -> None:
+        """
+        Reads the events from the input file and feeds them to the window of their groups, minute by minute.
+
+        Args:
+            input_file (str): The path to the input file containing the events.
+        """
+        grouped_events = read_events(input_file, partial(parse_grouped_event, group_by=self.group_by))
+        if self.reorder_buffer is not None:
+            grouped_events = self.reorder_buffer.reorder(grouped_events, grouped_event_timestamp)
+        for event, keys in grouped_events:
+            # set the start time if it is not set
+            if self.start_time is None:
+                self.start_time = floor_to_minute(event.timestamp)
+                self.current_time = self.start_time
+
+            # process the events until the current time reaches the event timestamp
+            while self.current_time < event.timestamp:
+                if not self.groups:
+                    # nothing to write until the event arrives: jump to its minute
+                    minutes = -((self.current_time - event.timestamp) // MICROSECONDS_PER_MINUTE)
+                    self.current_time += minutes * MICROSECONDS_PER_MINUTE
+                    break
+                self.process_and_print_event()
+
+            for key in keys:
+                self._get_group(key).window.add_event(event)
+            self.last_event_time = event.timestamp
+
+        # if the file has no events, the last_event_time would be None.
+        # Gotta check for that
+        if (self.last_event_time is not None) and \
+           (self.current_time is not None):
+            while self.groups and self.current_time <= self.last_event_time \
+                    + MICROSECONDS_PER_MINUTE:
+                self.process_and_print_event()
+        else:
+            print("Error: No events found in file")
+            return
+
+    def _get_group(self, key: GroupKey) -> GroupState:
+        """
+        Gets the live group of a key, creating it if needed, and marks it as the most recently updated.
+
+        Args:
+            key (GroupKey): The key of the group.
+
+        Returns:
+            GroupState: The group.
+        """
+        group = self.groups.get(key)
+        if group is not None:
+            self.groups.move_to_end(key)
+            return group
+
+        if self.max_groups is not None and len(self.groups) >= self.max_groups:
+            _, evicted = self.groups.popitem(last=False)
+            evicted.result_writer.end_run()
+            self.evicted_groups += 1
+
+        fields, values = key
+        group = GroupState(
+            self.window_factory(),
+            MinuteResultWriter(self.output_sink, self.output_mode, dict(zip(fields, values)))
+        )
+        self.groups[key] = group
+        return group
@@ -0,0 +1,538 @@
+"""
+This module contains the IngestionServer class, a long-running service that receives the events
+over the network, instead of reading them from a file, and answers queries for the current
+moving average and the averages of the recent minutes.
+
+A single port speaks two protocols, told apart by the first line of each connection:
+
+    NDJSON over TCP: a persistent connection that streams events, one JSON object per line,
+        like the lines of an input file. Nothing is sent back.
+    HTTP/1.1, with keep-alive:
+        POST /events: a bulk of events, one per line, answered with {"accepted": 2, "late": 0, "invalid": 0}
+        GET /average: the current moving average, of the events up to the newest one
+        GET /history?minutes=60: the averages of the last minutes, oldest first, like the output records
+        GET /stats: the counters of the server
+
+Everything runs in a single event loop, so every connection feeds the same window, without locks.
+"""
+
+import asyncio
+import json
+import signal
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .interfaces.i_window import IWindow
+from .event_reader import scan_events
+from .moving_average_calculator import MovingAverageCalculator
+from .output_sink import NullOutputSink
+from .reorder_buffer import ReorderBuffer
+from .result_encoders import result_fields
+from .timestamp import MICROSECONDS_PER_MINUTE, MICROSECONDS_PER_SECOND, format_minute, format_timestamp
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_HISTORY_MINUTES = 1440
+DEFAULT_HISTORY_QUERY_MINUTES = 60
+
+# how often an idle feed is checked for, in seconds
+IDLE_CHECK_INTERVAL = 1.0
+
+# the size of the blocks read from an NDJSON connection, and the largest body of a POST
+READ_BLOCK_SIZE = 1 << 16
+MAX_BODY_SIZE = 64 << 20
+
+# the size of the slices of a block ingested at once, before the other connections get their turn,
+# so that a large batch does not hold up the queries
+INGEST_SLICE_SIZE = 1 << 14
+
+_HTTP_METHODS = (b'GET ', b'POST ', b'HEAD ', b'PUT ', b'DELETE ', b'OPTIONS ', b'PATCH ')
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            411: 'Length Required', 413: 'Payload Too Large'}
+
+
+class HttpError(Exception):
+    """
+    An error answered to an HTTP request, with its status.
+
+    Args:
+        status (int): The HTTP status.
+        message (str): The description of the error.
+
+    Attributes:
+        status (int): The HTTP status.
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status: int = status
+
+
+class MinuteHistory:
+    """
+    Keeps the averages of the last minutes in a ring buffer, standing in for the MinuteResultWriter
+    of the calculator of the server. The oldest minutes are dropped once it is full.
+
+    Args:
+        capacity (int): The number of minutes kept.
+
+    Attributes:
+        minutes (Deque[Tuple[int, Any]]): The minutes, in microseconds since the Unix epoch, and their averages,
+            oldest first.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("The history must keep at least one minute")
+        self.minutes: Deque[Tuple[int, Any]] = deque(maxlen=capacity)
+
+    def write(self, minute: int, average_duration: Any, count: int = 1) -> None:
+        """
+        Adds the same average for `count` consecutive minutes, keeping only the ones that fit.
+
+        Args:
+            minute (int): The first minute, in microseconds since the Unix epoch.
+            average_duration (Any): The average delivery time of those minutes.
+            count (int): The number of minutes.
+        """
+        skipped = max(count - self.minutes.maxlen, 0)
+        first = minute + skipped * MICROSECONDS_PER_MINUTE
+        self.minutes.extend((first + offset * MICROSECONDS_PER_MINUTE, average_duration)
+                            for offset in range(count - skipped))
+
+    def end_run(self) -> None:
+        """
+        Does nothing, since the minutes are kept one by one, without runs to end.
+        """
+
+    def flush(self) -> None:
+        """
+        Does nothing, since the minutes are kept in memory.
+        """
+
+    def latest(self, count: int) -> List[Tuple[int, Any]]:
+        """
+        Gets the last minutes.
+
+        Args:
+            count (int): The number of minutes.
+
+        Returns:
+            List[Tuple[int, Any]]: Up to `count` minutes, and their averages, oldest first.
+        """
+        latest = list(islice(reversed(self.minutes), count))
+        latest.reverse()
+        return latest
+
+
+class IngestionServer:
+    """
+    Receives the events over NDJSON connections and HTTP bulk POSTs, feeds them to a shared window,
+    and answers the queries for the current average and the recent minutes.
+
+    The events are put back in order by a reorder buffer, since the connections are not in sync:
+    an event up to allowed_lateness older than the newest one is still added in order, and an older
+    one is dropped, and counted as late. The minutes are calculated by a MovingAverageCalculator,
+    so a minute is added to the history as soon as an event arrives after it. When no events arrive
+    for idle_timeout seconds, the held events are released, and the event time is assumed to go on
+    with the wall clock, so the history keeps up with an idle feed.
+
+    Args:
+        window (IWindow): The window object that holds the events.
+        history_minutes (int): The number of minutes kept in the history.
+        allowed_lateness (float): How much older than the newest event an event can be, in seconds.
+        idle_timeout (float): The number of seconds without events after which the idle minutes are calculated.
+
+    Attributes:
+        calculator (MovingAverageCalculator): Calculates the minutes, writing them to the history.
+        history (MinuteHistory): The averages of the last minutes.
+        reorder_buffer (ReorderBuffer): Puts the events of all connections back in order.
+        idle_timeout (float): The number of seconds without events after which the idle minutes are calculated.
+        events_accepted (int): The number of events received, without the invalid lines.
+        invalid_lines (int): The number of lines received that are not valid events.
+        connections (int): The number of connections accepted.
+        requests (int): The number of HTTP requests answered.
+        last_arrival (Optional[float]): The monotonic time when the last event arrived.
+        server (Optional[asyncio.AbstractServer]): The listening server, once started.
+        open_connections (Set[asyncio.Task]): The tasks serving the open connections.
+        stopping (Optional[asyncio.Event]): Set when the server is asked to shut down.
+    """
+
+    def __init__(self, window: IWindow, history_minutes: int = DEFAULT_HISTORY_MINUTES,
+                 allowed_lateness: float = 0.0, idle_timeout: float = 60.0):
+        if idle_timeout <= 0:
+            raise ValueError("The idle timeout must be > 0")
+        self.calculator: MovingAverageCalculator = MovingAverageCalculator(window, NullOutputSink())
+        self.history: MinuteHistory = MinuteHistory(history_minutes)
+        self.calculator.result_writer = self.history
+        self.reorder_buffer: ReorderBuffer = ReorderBuffer(round(allowed_lateness * MICROSECONDS_PER_SECOND))
+        self.idle_timeout: float = idle_timeout
+        self.events_accepted: int = 0
+        self.invalid_lines: int = 0
+        self.connections: int = 0
+        self.requests: int = 0
+        self.last_arrival: Optional[float] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.open_connections: Set[asyncio.Task] = set()
+        self.stopping: Optional[asyncio.Event] = None
+
+    def ingest(self, buffer: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        """
+        Feeds the events of a block of NDJSON lines to the window. The invalid lines are skipped,
+        and counted instead of printed, one by one, so that they do not stop the other lines of the block.
+
+        Args:
+            buffer (bytes): The lines.
+            start (int): The offset of the first line.
+            end (Optional[int]): The offset where the block ends. Defaults to the end of the buffer.
+
+        Returns:
+            int: The number of events in the block.
+        """
+        if end is None:
+            end = len(buffer)
+        push = self.reorder_buffer.push
+        process_event = self.calculator.process_event
+        accepted = 0
+        # counted as they go, so that the counters match the window even if a later line fails
+        for event in scan_events(buffer, start, end, self._count_invalid_line):
+            accepted += 1
+            self.events_accepted += 1
+            self.last_arrival = time.monotonic()
+            for released in push(event.timestamp, event):
+                process_event(released)
+        return accepted
+
+    def _count_invalid_line(self) -> None:
+        """
+        Counts a skipped line with invalid data.
+        """
+        self.invalid_lines += 1
+
+    async def ingest_in_slices(self, buffer: bytes) -> int:
+        """
+        Feeds the events of a block of NDJSON lines to the window, a slice of whole lines at a time,
+        letting the other connections and the queries run in between.
+
+        Args:
+            buffer (bytes): The lines.
+
+        Returns:
+            int: The number of events in the block.
+        """
+        accepted = 0
+        start = 0
+        while start < len(buffer):
+            end = buffer.find(b'\n', start + INGEST_SLICE_SIZE)
+            end = len(buffer) if end < 0 else end + 1
+            accepted += self.ingest(buffer, start, end)
+            start = end
+            if start < len(buffer):
+                await asyncio.sleep(0)
+        return accepted
+
+    def current(self) -> Dict[str, Any]:
+        """
+        Gets the current moving average: the average of the window, with the events up to the newest one.
+
+        Returns:
+            Dict[str, Any]: The time of the newest event in the window, or None if there are none yet,
+            and the average, like {"time": "2018-12-26 18:23:19.903159", "average_delivery_time": 42.5}.
+        """
+        last_event_time = self.calculator.last_event_time
+        return {
+            "time": None if last_event_time is None else format_timestamp(last_event_time),
+            **result_fields(self.calculator.window.get_result()),
+        }
+
+    def recent_minutes(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Gets the averages of the last minutes, like the records of the output files.
+
+        Args:
+            count (int): The number of minutes.
+
+        Returns:
+            List[Dict[str, Any]]: Up to `count` records, oldest first.
+        """
+        return [{"date": format_minute(minute), **result_fields(average)}
+                for minute, average in self.history.latest(count)]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Gets the counters of the server.
+
+        Returns:
+            Dict[str, Any]: The counters.
+        """
+        return {
+            "events_accepted": self.events_accepted,
+            "invalid_lines": self.invalid_lines,
+            "late_events": self.reorder_buffer.late_events,
+            "held_events": len(self.reorder_buffer.heap),
+            "minutes": len(self.history.minutes),
+            "connections": self.connections,
+            "requests": self.requests,
+        }
+
+    def process_idle_minutes(self) -> None:
+        """
+        Releases the held events and calculates the minutes that have passed since the last event,
+        going by the wall clock, once no events have arrived for the idle timeout.
+        """
+        if self.last_arrival is None or time.monotonic() - self.last_arrival < self.idle_timeout:
+            return
+        for event in self.reorder_buffer.drain():
+            self.calculator.process_event(event)
+        if self.calculator.last_event_time is None:
+            return
+        idle_time = round((time.monotonic() - self.last_arrival) * MICROSECONDS_PER_SECOND)
+        self.calculator.process_and_print_events_until(self.calculator.last_event_time + idle_time)
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> int:
+        """
+        Starts listening for connections.
+
+        Args:
+            host (str): The address to listen on.
+            port (int): The port to listen on, or 0 for any free port.
+
+        Returns:
+            int: The port the server listens on.
+        """
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """
+        Stops listening, closes the open connections, and closes the server.
+        """
+        if self.server is not None:
+            self.server.close()
+            for task in self.open_connections:
+                task.cancel()
+            await asyncio.gather(*self.open_connections, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+
+    def stop(self) -> None:
+        """
+        Asks the server to shut down.
+        """
+        if self.stopping is not None:
+            self.stopping.set()
+
+    def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """
+        Runs the server until the process gets a SIGTERM (or a SIGINT).
+
+        Args:
+            host (str): The address to listen on.
+            port (int): The port to listen on.
+        """
+        asyncio.run(self.run(host, port))
+
+    async def run(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """
+        Serves the connections, checking for an idle feed, until the server is stopped.
+
+        Args:
+            host (str): The address to listen on.
+            port (int): The port to listen on.
+        """
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        handled_signals = []
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+                handled_signals.append(signum)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # there are no signal handlers on Windows, nor outside of the main thread
+                pass
+
+        port = await self.start(host, port)
+        print(f"Listening on {host}:{port}", flush=True)
+        try:
+            while not self.stopping.is_set():
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=min(self.idle_timeout, IDLE_CHECK_INTERVAL))
+                except asyncio.TimeoutError:
+                    self.process_idle_minutes()
+        finally:
+            for signum in handled_signals:
+                loop.remove_signal_handler(signum)
+            await self.close()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves a connection, as HTTP or as a stream of NDJSON events, depending on its first line.
+
+        Args:
+            reader (asyncio.StreamReader): The incoming side of the connection.
+            writer (asyncio.StreamWriter): The outgoing side of the connection.
+        """
+        self.connections += 1
+        task = asyncio.current_task()
+        self.open_connections.add(task)
+        try:
+            first_line = await reader.readline()
+            if first_line.startswith(_HTTP_METHODS):
+                await self._serve_http(first_line, reader, writer)
+            else:
+                await self._serve_ndjson(first_line, reader)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            # the client went away, or sent a line longer than the limit of the stream
+            pass
+        except asyncio.CancelledError:
+            # the server is closing; the task ends normally, since the streams report a cancelled one as an error
+            pass
+        finally:
+            self.open_connections.discard(task)
+            writer.close()
+
+    async def _serve_ndjson(self, pending: bytes, reader: asyncio.StreamReader) -> None:
+        """
+        Feeds the events of an NDJSON connection to the window, a block of whole lines at a time,
+        until the client closes it.
+
+        Args:
+            pending (bytes): The data read before, which does not have to end with a newline.
+            reader (asyncio.StreamReader): The incoming side of the connection.
+        """
+        while True:
+            block = await reader.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            pending += block
+            last_newline = pending.rfind(b'\n') + 1
+            if last_newline:
+                await self.ingest_in_slices(pending[:last_newline])
+                pending = pending[last_newline:]
+        if pending:
+            self.ingest(pending)
+
+    async def _serve_http(self, request_line: bytes, reader: asyncio.StreamReader,
+                          writer: asyncio.StreamWriter) -> None:
+        """
+        Answers the HTTP requests of a connection, until the client closes it or asks to.
+
+        Args:
+            request_line (bytes): The first line of the first request.
+            reader (asyncio.StreamReader): The incoming side of the connection.
+            writer (asyncio.StreamWriter): The outgoing side of the connection.
+        """
+        while request_line:
+            keep_alive = True
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+                headers = await self._read_headers(reader)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                body = await self._read_body(reader, headers)
+                status, response = 200, await self._route(method, target, body)
+            except HttpError as error:
+                status, response = error.status, {"error": str(error)}
+                # the body may not have been read, so the next request cannot be found
+                keep_alive = False
+            except ValueError:
+                status, response, keep_alive = 400, {"error": "Malformed request"}, False
+            self.requests += 1
+
+            payload = json.dumps(response).encode('utf-8')
+            writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                         f"Content-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\n"
+                         f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + payload)
+            await writer.drain()
+            if not keep_alive:
+                return
+            request_line = await reader.readline()
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        """
+        Reads the headers of a request, up to the empty line.
+
+        Args:
+            reader (asyncio.StreamReader): The incoming side of the connection.
+
+        Returns:
+            Dict[str, str]: The headers, by lowercase name.
+
+        Raises:
+            ValueError: If a header is malformed, or the connection ends before the empty line.
+        """
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if not line.endswith(b'\n'):
+                raise ValueError("The connection ended within the headers")
+            line = line.strip()
+            if not line:
+                return headers
+            name, value = line.decode('latin-1').split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        """
+        Reads the body of a request, whose size is given by its Content-Length.
+
+        Args:
+            reader (asyncio.StreamReader): The incoming side of the connection.
+            headers (Dict[str, str]): The headers of the request.
+
+        Returns:
+            bytes: The body, empty if there is none.
+
+        Raises:
+            HttpError: If the body is chunked, or too large.
+        """
+        if 'transfer-encoding' in headers:
+            raise HttpError(411, "The body requires a Content-Length")
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413, f"The body is larger than {MAX_BODY_SIZE} bytes")
+        return await reader.readexactly(length) if length > 0 else b''
+
+    async def _route(self, method: str, target: str, body: bytes) -> Any:
+        """
+        Answers a request.
+
+        Args:
+            method (str): The method of the request.
+            target (str): The path of the request, with its query.
+            body (bytes): The body of the request.
+
+        Returns:
+            Any: The JSON response.
+
+        Raises:
+            HttpError: If there is no such path, or it does not take the method.
+        """
+        url = urlsplit(target)
+        routes = {'/events': 'POST', '/average': 'GET', '/history': 'GET', '/stats': 'GET'}
+        if url.path not in routes:
+            raise HttpError(404, f"No such path: {url.path}")
+        if method != routes[url.path]:
+            raise HttpError(405, f"{url.path} only takes {routes[url.path]}")
+
+        if url.path == '/events':
+            late_events = self.reorder_buffer.late_events
+            invalid_lines = self.invalid_lines
+            accepted = await self.ingest_in_slices(body)
+            return {"accepted": accepted, "late": self.reorder_buffer.late_events - late_events,
+                    "invalid": self.invalid_lines - invalid_lines}
+        if url.path == '/average':
+            return self.current()
+        if url.path == '/history':
+            minutes = parse_qs(url.query).get('minutes', [DEFAULT_HISTORY_QUERY_MINUTES])[-1]
+            try:
+                minutes = int(minutes)
+            except ValueError as error:
+                raise HttpError(400, "The number of minutes must be an integer") from error
+            return self.recent_minutes(max(minutes, 0))
+        return self.stats()
@@ -0,0 +1,275 @@
+"""
+This module contains the InstrumentedMovingAverageCalculator class, which calculates the moving
+average delivery time like the MovingAverageCalculator, while timing and counting each stage of
+the pipeline, to find out where the time of a slow run goes.
+
+The instrumentation lives in wrappers of the window, the result writer and the output sink,
+so the MovingAverageCalculator itself does not pay for it when the stats are not wanted.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from .interfaces.i_output_sink import IOutputSink
+from .interfaces.i_window import IWindow
+
+from .event import Event
+from .event_reader import read_events, report_invalid_line
+from .moving_average_calculator import MovingAverageCalculator
+from .reorder_buffer import ReorderBuffer
+from .result_writer import MinuteResultWriter
+from .timestamp import MICROSECONDS_PER_MINUTE
+
+_perf_counter = time.perf_counter
+
+
+class PipelineStats:
+    """
+    The timers and counters of a run.
+
+    Attributes:
+        lines_read (int): The number of lines of the input: the events read and the invalid lines.
+        invalid_lines (int): The number of lines skipped because they are not valid events.
+        events_read (int): The number of events parsed from the input.
+        events_added (int): The number of events added to the window.
+        events_evicted (int): The number of events that left the window.
+        max_window_events (int): The largest number of events in the window at once.
+        steps_emitted (int): The number of steps calculated, which are minutes with the default step.
+        records_written (int): The number of records written to the output sink.
+        bytes_written (int): The size of those records, with their newlines.
+        read_seconds (float): The time spent reading and parsing the input, including building the events.
+        window_seconds (float): The time spent in the window.
+        output_seconds (float): The time spent formatting and writing the results.
+        total_seconds (float): The time of the whole run.
+    """
+
+    def __init__(self):
+        self.lines_read: int = 0
+        self.invalid_lines: int = 0
+        self.events_read: int = 0
+        self.events_added: int = 0
+        self.events_evicted: int = 0
+        self.max_window_events: int = 0
+        self.steps_emitted: int = 0
+        self.records_written: int = 0
+        self.bytes_written: int = 0
+        self.read_seconds: float = 0.0
+        self.window_seconds: float = 0.0
+        self.output_seconds: float = 0.0
+        self.total_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Builds the JSON summary of the run.
+
+        Returns:
+            Dict[str, Any]: The counters, and the time of each stage, in seconds.
+        """
+        other_seconds = self.total_seconds - self.read_seconds - self.window_seconds - self.output_seconds
+        return {
+            "counters": {
+                "lines_read": self.lines_read,
+                "invalid_lines": self.invalid_lines,
+                "events_read": self.events_read,
+                "events_added": self.events_added,
+                "events_evicted": self.events_evicted,
+                "max_window_events": self.max_window_events,
+                "steps_emitted": self.steps_emitted,
+                "records_written": self.records_written,
+                "bytes_written": self.bytes_written,
+            },
+            "seconds": {
+                "read": self.read_seconds,
+                "window": self.window_seconds,
+                "output": self.output_seconds,
+                # the calculator itself, and the reordering of the events, if any
+                "other": max(other_seconds, 0.0),
+                "total": self.total_seconds,
+            },
+            "events_per_second": self.events_read / self.total_seconds if self.total_seconds else 0.0,
+        }
+
+
+class InstrumentedWindow(IWindow):
+    """
+    Wraps a window, timing its methods and counting the events that enter and leave it.
+
+    Args:
+        window (IWindow): The window.
+        stats (PipelineStats): Where the timers and counters are kept.
+    """
+
+    def __init__(self, window: IWindow, stats: PipelineStats):
+        self.window: IWindow = window
+        self.stats: PipelineStats = stats
+
+    def add_event(self, event: Event) -> None:
+        started = _perf_counter()
+        self.window.add_event(event)
+        count = self.window.event_count()
+        self.stats.window_seconds += _perf_counter() - started
+        self.stats.events_added += 1
+        if count > self.stats.max_window_events:
+            self.stats.max_window_events = count
+
+    def remove_old_events(self, current_time: int) -> None:
+        started = _perf_counter()
+        count = self.window.event_count()
+        self.window.remove_old_events(current_time)
+        self.stats.events_evicted += count - self.window.event_count()
+        self.stats.window_seconds += _perf_counter() - started
+
+    def get_average_duration(self) -> float:
+        started = _perf_counter()
+        average_duration = self.window.get_average_duration()
+        self.stats.window_seconds += _perf_counter() - started
+        return average_duration
+
+    def get_result(self) -> Any:
+        started = _perf_counter()
+        result = self.window.get_result()
+        self.stats.window_seconds += _perf_counter() - started
+        return result
+
+    def next_expiration_time(self) -> Optional[int]:
+        started = _perf_counter()
+        expiration_time = self.window.next_expiration_time()
+        self.stats.window_seconds += _perf_counter() - started
+        return expiration_time
+
+    def event_count(self) -> int:
+        return self.window.event_count()
+
+
+class CountingOutputSink(IOutputSink):
+    """
+    Wraps an output sink, counting the records written to it and their size.
+
+    Args:
+        output_sink (IOutputSink): The output sink.
+        stats (PipelineStats): Where the counters are kept.
+    """
+
+    def __init__(self, output_sink: IOutputSink, stats: PipelineStats):
+        self.output_sink: IOutputSink = output_sink
+        self.stats: PipelineStats = stats
+
+    def write(self, record: str) -> None:
+        self.stats.records_written += 1
+        # the text records are JSON or CSV with ASCII escapes, so each character is a byte, and they end
+        # with a newline, while the binary records are written as they are
+        self.stats.bytes_written += len(record) + isinstance(record, str)
+        self.output_sink.write(record)
+
+    def flush(self) -> None:
+        self.output_sink.flush()
+
+    def close(self) -> None:
+        self.output_sink.close()
+
+
+class InstrumentedResultWriter(MinuteResultWriter):
+    """
+    A MinuteResultWriter that times the formatting and the writing of the results, and counts the steps.
+
+    Args:
+        output_sink (IOutputSink): The sink where the records will be written.
+        output_mode (str): Either 'dense' or 'runs'.
+        stats (PipelineStats): Where the timers and counters are kept.
+        step (int): The step between two consecutive results, in microseconds. Defaults to a minute.
+    """
+
+    def __init__(self, output_sink: IOutputSink, output_mode: str, stats: PipelineStats,
+                 step: int = MICROSECONDS_PER_MINUTE):
+        super().__init__(CountingOutputSink(output_sink, stats), output_mode, step=step)
+        self.stats: PipelineStats = stats
+
+    def write(self, minute: int, average_duration: Any, count: int = 1) -> None:
+        started = _perf_counter()
+        super().write(minute, average_duration, count)
+        self.stats.output_seconds += _perf_counter() - started
+        self.stats.steps_emitted += count
+
+    def flush(self) -> None:
+        started = _perf_counter()
+        super().flush()
+        self.stats.output_seconds += _perf_counter() - started
+
+
+class InstrumentedMovingAverageCalculator(MovingAverageCalculator):
+    """
+    A MovingAverageCalculator that times and counts each stage of the pipeline: reading and parsing
+    the input, the window, and the output. The stats are kept in the stats attribute.
+
+    Args:
+        window (IWindow): The window object that holds the events.
+        output_sink (IOutputSink): The sink where the results will be written.
+        output_mode (str): 'dense' to write one result per minute, or 'runs' to merge
+            consecutive minutes with the same average into a single result.
+        reader (Callable[..., Iterable[Event]]): Reads the events from the input file, calling
+            its on_invalid argument for each invalid line, like read_events, which is the default.
+        reorder_buffer (Optional[ReorderBuffer]): Puts the events back in order, if they can arrive
+            out of order. Defaults to None, for events that are already sorted.
+        step (int): The time between two results, in microseconds. Defaults to a minute.
+
+    Attributes:
+        stats (PipelineStats): The timers and counters of the run.
+    """
+
+    def __init__(self, window: IWindow, output_sink: IOutputSink, output_mode: str = 'dense',
+                 reader: Callable[..., Iterable[Event]] = read_events,
+                 reorder_buffer: Optional[ReorderBuffer] = None, step: int = MICROSECONDS_PER_MINUTE):
+        self.stats: PipelineStats = PipelineStats()
+        super().__init__(InstrumentedWindow(window, self.stats), output_sink, output_mode,
+                         self._timed_reader(reader), reorder_buffer, step)
+        self.result_writer = InstrumentedResultWriter(output_sink, output_mode, self.stats, step)
+
+    def process_events(self, input_file: str) -> None:
+        """
+        Process the events from the input file and calculate the moving average delivery time,
+        timing the whole run.
+
+        Args:
+            input_file (str): The path to the input file containing the events.
+
+        Returns:
+            None
+
+        """
+        started = _perf_counter()
+        try:
+            super().process_events(input_file)
+        finally:
+            self.stats.total_seconds += _perf_counter() - started
+
+    def _timed_reader(self, reader: Callable[..., Iterable[Event]]) -> Callable[[str], Iterator[Event]]:
+        """
+        Wraps a reader, timing the reading and the parsing of each event, and counting them
+        along with the invalid lines, as they are read.
+
+        Args:
+            reader (Callable[..., Iterable[Event]]): Reads the events from the input file.
+
+        Returns:
+            Callable[[str], Iterator[Event]]: The wrapped reader.
+        """
+        stats = self.stats
+
+        def count_invalid_line() -> None:
+            report_invalid_line()
+            stats.lines_read += 1
+            stats.invalid_lines += 1
+
+        def read(input_file: str) -> Iterator[Event]:
+            events = iter(reader(input_file, on_invalid=count_invalid_line))
+            while True:
+                started = _perf_counter()
+                event = next(events, None)
+                stats.read_seconds += _perf_counter() - started
+                if event is None:
+                    return
+                stats.lines_read += 1
+                stats.events_read += 1
+                yield event
+
+        return read
@@ -0,0 +1,14 @@
+from abc import abstractmethod
+
+from moving_average_calculator.models.interfaces.i_window import IWindow
+from moving_average_calculator.models.snapshot import SnapshotReader, SnapshotWriter
+
+# a window that can write its contents to the snapshot of a checkpoint, and read them back
+class ICheckpointableWindow(IWindow):
+    @abstractmethod
+    def save_state(self, writer: SnapshotWriter) -> None:
+        pass
+
+    @abstractmethod
+    def load_state(self, reader: SnapshotReader) -> None:
+        pass
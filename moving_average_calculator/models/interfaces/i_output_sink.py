@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+
+class IOutputSink(ABC):
+    @abstractmethod
+    def write(self, record: str) -> None:
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> 'IOutputSink':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
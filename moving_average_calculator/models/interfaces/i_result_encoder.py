@@ -0,0 +1,14 @@
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Union
+
+# the records are lines of text, without the trailing newline, or fixed-width binary records
+Record = Union[str, bytes]
+
+class IResultEncoder(ABC):
+    @abstractmethod
+    def encode_minutes(self, minute: int, result: Any, count: int) -> Iterable[Record]:
+        pass
+
+    @abstractmethod
+    def encode_run(self, first_minute: int, last_minute: int, result: Any) -> Iterable[Record]:
+        pass
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from datetime import datetime
+from typing import Any, Optional
 
 from moving_average_calculator.models.event import Event
 
@@ -9,9 +9,20 @@ class IWindow(ABC):
         pass
 
     @abstractmethod
-    def remove_old_events(self, current_time: datetime) -> None:
+    def remove_old_events(self, current_time: int) -> None:
         pass
 
     @abstractmethod
     def get_average_duration(self) -> float:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def next_expiration_time(self) -> Optional[int]:
+        pass
+
+    def get_result(self) -> Any:
+        return self.get_average_duration()
+
+    @abstractmethod
+    def event_count(self) -> int:
+        pass
@@ -1,16 +1,19 @@
 """
-This module contains the MovingAverageCalculator class which calculates 
+This module contains the MovingAverageCalculator class which calculates
 and prints the moving average delivery time based on a window of events.
 """
 
-import json
-from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional
 
 from .interfaces.i_moving_average_calculator import IMovingAverageCalculator
+from .interfaces.i_output_sink import IOutputSink
 from .interfaces.i_window import IWindow
 
 from .event import Event
+from .event_reader import read_events
+from .reorder_buffer import ReorderBuffer
+from .result_writer import MinuteResult, MinuteResultCollector, MinuteResultWriter
+from .timestamp import MICROSECONDS_PER_MINUTE, floor_to_step
 
 class MovingAverageCalculator(IMovingAverageCalculator):
     """
@@ -18,49 +21,91 @@ class MovingAverageCalculator(IMovingAverageCalculator):
 
     Args:
         window (IWindow): The window object that holds the events.
-        output_file (str): The path to the output file where the results will be written.
+        output_sink (IOutputSink): The sink where the results will be written.
+        output_mode (str): 'dense' to write one result per minute, or 'runs' to merge
+            consecutive minutes with the same average into a single result.
+        reader (Callable[[str], Iterable[Event]]): Reads the events from the input file.
+            Defaults to read_events.
+        reorder_buffer (Optional[ReorderBuffer]): Puts the events back in order, if they can arrive
+            out of order. Defaults to None, for events that are already sorted.
+        step (int): The time between two results, in microseconds, like 10 seconds for alerting,
+            or an hour for reporting. Defaults to a minute, and "minute" stands for the step otherwise.
 
     Attributes:
         window (IWindow): The window object that holds the events.
-        start_time (Optional[datetime]): The start time of the event window.
-        current_time (Optional[datetime]): The current time being processed.
-        last_event_time (Optional[datetime]): The timestamp of the last event processed.
-        output_file (str): The path to the output file where the results will be written.
+        start_time (Optional[int]): The start time of the event window.
+        current_time (Optional[int]): The current time being processed.
+        last_event_time (Optional[int]): The timestamp of the last event processed.
+        output_sink (IOutputSink): The sink where the results will be written.
+        result_writer (MinuteResultWriter): Formats the results and writes them to the output sink.
+        reader (Callable[[str], Iterable[Event]]): Reads the events from the input file.
+        reorder_buffer (Optional[ReorderBuffer]): Puts the events back in order, or None.
+        step (int): The time between two results, in microseconds.
+
+    All the times are in microseconds since the Unix epoch.
 
     """
 
-    def __init__(self, window: IWindow, output_file: str):
+    def __init__(self, window: IWindow, output_sink: IOutputSink, output_mode: str = 'dense',
+                 reader: Callable[[str], Iterable[Event]] = read_events,
+                 reorder_buffer: Optional[ReorderBuffer] = None, step: int = MICROSECONDS_PER_MINUTE):
         self.window: IWindow = window
-        self.start_time: Optional[datetime] = None
-        self.current_time: Optional[datetime] = None
-        self.last_event_time: Optional[datetime] = None
-        self.output_file: str = output_file
+        self.start_time: Optional[int] = None
+        self.current_time: Optional[int] = None
+        self.last_event_time: Optional[int] = None
+        self.output_sink: IOutputSink = output_sink
+        self.result_writer: MinuteResultWriter = MinuteResultWriter(output_sink, output_mode, step=step)
+        self.reader: Callable[[str], Iterable[Event]] = reader
+        self.reorder_buffer: Optional[ReorderBuffer] = reorder_buffer
+        self.step: int = step
 
     def process_and_print_event(self) -> None:
         """
         Process the events in the window and print the average delivery time for the current time.
 
         This method removes old events from the window, calculates the average delivery time,
-        and prints the result in JSON format.
+        and writes the result in JSON format to the output sink.
+
+        Returns:
+            None
+
+        """
+        self.process_and_print_events_until(self.current_time + 1)
+
+    def process_and_print_events_until(self, end_time: int) -> None:
+        """
+        Process and print the average delivery time of every minute before the end time.
+
+        Instead of going through the minutes one by one, this method jumps straight to the next
+        minute where the contents of the window change: either the oldest event expires,
+        or the end time is reached (which is where the next event will be added).
+        All the minutes in between have the same average, and are written at once.
+
+        Args:
+            end_time (int): The time, in microseconds since the Unix epoch, where the processing stops.
 
         Returns:
             None
 
         """
-        # remove old events from the window and calculate the average delivery time
-        self.window.remove_old_events(self.current_time)
-        average_duration = self.window.get_average_duration()
-        result = {
-            "date": self.current_time.strftime('%Y-%m-%d %H:%M:00'),
-            "average_delivery_time": average_duration
-        }
-        # printing and writting to file for ease of use.
-        print(json.dumps(result))
-        with open(self.output_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(result) + '\n')
-
-        # move the current time forward by 1 minute
-        self.current_time += timedelta(minutes=1)
+        step = self.step
+        while self.current_time < end_time:
+            # remove old events from the window and calculate the average delivery time
+            self.window.remove_old_events(self.current_time)
+            average_duration = self.window.get_result()
+
+            # the window stays the same until its oldest event expires
+            expiration_time = self.window.next_expiration_time()
+            if expiration_time is not None and expiration_time < end_time:
+                run_end_time = expiration_time
+            else:
+                run_end_time = end_time
+            minutes = -((self.current_time - run_end_time) // step)
+
+            self.result_writer.write(self.current_time, average_duration, minutes)
+
+            # move the current time forward by the processed minutes
+            self.current_time += minutes * step
 
     def process_events(self, input_file: str) -> None:
         """
@@ -68,7 +113,7 @@ class MovingAverageCalculator(IMovingAverageCalculator):
 
         This method reads events from the input file, creates Event objects from the event data,
         and adds them to the window. It also handles the time progression and calls the
-        `process_and_print_event` method to calculate and print the average delivery time.
+        `process_and_print_events_until` method to calculate and print the average delivery time.
 
         Args:
             input_file (str): The path to the input file containing the events.
@@ -77,42 +122,93 @@ class MovingAverageCalculator(IMovingAverageCalculator):
             None
 
         """
-        with open(input_file, 'r', encoding='utf-8') as f:
-            # read each line from the file
-            for line in f:
-                try:
-                    event_data = json.loads(line)
-                    event = Event(
-                        event_data['timestamp'],
-                        event_data['duration']
-                    )
-                except (json.JSONDecodeError, KeyError, TypeError):
-                    print("Error: Invalid data in line, skipping...")
-                    continue
-                
-                # set the start time if it is not set
-                if self.start_time is None:
-                    self.start_time = event.timestamp.replace(
-                        second=0,
-                        microsecond=0
-                    )
-                    self.current_time = self.start_time
-
-                # process the events until the current time reaches the event timestamp
-                while self.current_time < event.timestamp:
-                    self.process_and_print_event()
-
-                # add the event to the window, and update the last event time
-                self.window.add_event(event)
-                self.last_event_time = event.timestamp
-
-            # if the file has no events, the last_event_time would be None.
-            # Gotta check for that
-            if (self.last_event_time is not None) and \
-               (self.current_time is not None):
-                while self.current_time <= self.last_event_time \
-                        + timedelta(minutes=1):
-                    self.process_and_print_event()
-            else:
-                print("Error: No events found in file")
-                return
+        try:
+            self._read_events(input_file)
+        finally:
+            # whatever happens, do not lose the results that are still buffered
+            self.result_writer.flush()
+
+    def _read_events(self, input_file: str) -> None:
+        """
+        Reads the events from the input file and feeds them to the window, minute by minute.
+
+        Args:
+            input_file (str): The path to the input file containing the events.
+        """
+        events = self.reader(input_file)
+        if self.reorder_buffer is not None:
+            events = self.reorder_buffer.reorder(events)
+        write = self.result_writer.write
+        for minute, average_duration, count in self.iter_results(events):
+            write(minute, average_duration, count)
+
+    def iter_results(self, events: Iterable[Event]) -> Iterator[MinuteResult]:
+        """
+        Feeds the events to the window, and yields the results of the minutes as soon as they are known,
+        instead of writing them: the results of the minutes before an event are yielded before the next
+        event is taken, and the last minutes once the events run out. The events can come from anywhere,
+        like a socket or another generator, and only the events in the window are kept in memory.
+
+        While the results are iterated over, the result writer is replaced by a MinuteResultCollector.
+
+        Args:
+            events (Iterable[Event]): The events, which must be sorted by timestamp.
+
+        Yields:
+            MinuteResult: The first minute, the average, and the number of consecutive minutes with it.
+        """
+        result_writer, collector = self.result_writer, MinuteResultCollector()
+        results = collector.results
+        self.result_writer = collector
+        try:
+            for event in events:
+                self.process_event(event)
+                if results:
+                    yield from results
+                    results.clear()
+            self.finish()
+            yield from results
+        finally:
+            self.result_writer = result_writer
+
+    def process_event(self, event: Event) -> None:
+        """
+        Process the minutes before the event, and add it to the window.
+
+        Args:
+            event (Event): The event, which must not be older than the previous ones.
+
+        Returns:
+            None
+
+        """
+        # set the start time if it is not set
+        if self.start_time is None:
+            self.start_time = floor_to_step(event.timestamp, self.step)
+            self.current_time = self.start_time
+
+        # process the events until the current time reaches the event timestamp
+        if self.current_time < event.timestamp:
+            self.process_and_print_events_until(event.timestamp)
+
+        # add the event to the window, and update the last event time
+        self.window.add_event(event)
+        self.last_event_time = event.timestamp
+
+    def finish(self) -> None:
+        """
+        Process the remaining minutes, up to the minute after the last event.
+
+        Returns:
+            None
+
+        """
+        # if the file has no events, the last_event_time would be None.
+        # Gotta check for that
+        if (self.last_event_time is not None) and \
+           (self.current_time is not None):
+            # the last minute to process is the one after the last event
+            self.process_and_print_events_until(self.last_event_time + self.step + 1)
+        else:
+            print("Error: No events found in file")
+            return
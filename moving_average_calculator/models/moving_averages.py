@@ -0,0 +1,151 @@
+"""
+This module contains the library API of the calculator: generators that take the events from any
+iterable, like a list, a socket or a Kafka consumer, instead of an input file, and yield the
+averages of the minutes lazily.
+
+    from moving_average_calculator import moving_averages
+
+    for record in moving_averages(lines, window_size=10):
+        print(record["date"], record["average_delivery_time"])
+
+Only the events in the window are kept in memory, whatever the length of the input, and the minutes
+of an idle gap are yielded one by one, instead of all at once.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Union
+
+from .interfaces.i_window import IWindow
+
+from .decaying_window import DecayingWindow
+from .event import Event
+from .event_reader import INVALID_LINE_ERRORS, check_duration, report_invalid_line
+from .moving_average_calculator import MovingAverageCalculator
+from .multi_window import create_window
+from .output_sink import NullOutputSink
+from .reorder_buffer import ReorderBuffer
+from .result_encoders import result_fields
+from .result_writer import MinuteResult
+from .timestamp import (
+    MICROSECONDS_PER_MINUTE,
+    MICROSECONDS_PER_SECOND,
+    TIME_UNITS,
+    create_step_formatter,
+    parse_duration,
+)
+
+# what the generators take: parsed events, decoded JSON objects, or raw lines, as text or bytes
+EventLike = Union[Event, Mapping[str, Any], str, bytes]
+
+
+def to_events(items: Iterable[EventLike]) -> Iterator[Event]:
+    """
+    Turns the items of an iterable into events: the events are taken as they are, and the lines and
+    the decoded JSON objects are parsed. Like the lines of an input file, the items with invalid data
+    are skipped, and an error is printed on the stderr for each of them.
+
+    Args:
+        items (Iterable[EventLike]): The events, the JSON objects with the "timestamp" and "duration"
+            fields, or the lines with those objects.
+
+    Yields:
+        Event: The events, in the order of the items.
+    """
+    for item in items:
+        if isinstance(item, Event):
+            yield item
+            continue
+        try:
+            event_data = item if isinstance(item, Mapping) else json.loads(item)
+            event = Event(event_data['timestamp'], check_duration(event_data['duration']))
+        except INVALID_LINE_ERRORS:
+            report_invalid_line()
+            continue
+        yield event
+
+
+def minute_results(items: Iterable[EventLike], window: IWindow,
+                   allowed_lateness: float = 0.0, step: int = MICROSECONDS_PER_MINUTE) -> Iterator[MinuteResult]:
+    """
+    Calculates the moving average of the items with a window, and yields the results as soon as they
+    are known, with the consecutive minutes that have the same average together.
+
+    Args:
+        items (Iterable[EventLike]): The events, or the lines with them.
+        window (IWindow): The window object that holds the events.
+        allowed_lateness (float): How many seconds an event can be older than the newest one, and still be
+            put back in order. Defaults to 0, for events that are already sorted.
+        step (int): The time between two results, in microseconds. Defaults to a minute.
+
+    Yields:
+        MinuteResult: The first minute, the average, and the number of consecutive minutes with it.
+    """
+    events = to_events(items)
+    if allowed_lateness > 0:
+        events = ReorderBuffer(round(allowed_lateness * MICROSECONDS_PER_SECOND)).reorder(events)
+    calculator = MovingAverageCalculator(window, NullOutputSink(), step=step)
+    yield from calculator.iter_results(events)
+
+
+def moving_averages(items: Iterable[EventLike], window_size: Union[int, Sequence[int], None] = None,
+                    half_life: Optional[float] = None, aggregates: Sequence[str] = (), bucketed: bool = False,
+                    allowed_lateness: float = 0.0, step: str = '1m',
+                    window_unit: str = 'm') -> Iterator[Dict[str, Any]]:
+    """
+    Calculates the moving average of the items, and yields a record per minute, like the records
+    of the output file:
+        {"date": "2018-12-26 18:11:00", "average_delivery_time": 20.0}
+
+    Args:
+        items (Iterable[EventLike]): The events, the JSON objects with the "timestamp" and "duration"
+            fields, or the lines with those objects.
+        window_size (Union[int, Sequence[int], None]): The size of the window in minutes, or several sizes,
+            or None with a half-life.
+        half_life (Optional[float]): The half-life of a decayed moving average, in minutes, or None.
+        aggregates (Sequence[str]): The names of the other aggregates of the window, like ["max", "p95"].
+        bucketed (bool): Whether the window keeps a bucket per minute, instead of the events.
+        allowed_lateness (float): How many seconds an event can be older than the newest one, and still be
+            put back in order. Defaults to 0, for events that are already sorted.
+        step (str): The time between two records, like "10s" or "1h". Defaults to a minute.
+        window_unit (str): The unit of the window size and of the half-life: "s", "m", "h" or "d".
+            Defaults to minutes.
+
+    Returns:
+        Iterator[Dict[str, Any]]: The record of each minute, in order.
+
+    Raises:
+        ValueError: If there is neither a window size nor a half-life, or both, the step or the unit is invalid,
+            or the options of the window do not go together.
+    """
+    if (window_size is None) == (half_life is None):
+        raise ValueError("Either a window size or a half-life is required")
+    if window_unit not in TIME_UNITS:
+        raise ValueError(f"Invalid window unit: {window_unit}")
+    unit = TIME_UNITS[window_unit]
+    step_length = parse_duration(step)
+    if half_life is not None:
+        window: IWindow = DecayingWindow(half_life, unit)
+    else:
+        window_sizes = [window_size] if isinstance(window_size, int) else list(window_size)
+        window = create_window(window_sizes, aggregates, bucketed, unit, step_length)
+    return _minute_records(minute_results(items, window, allowed_lateness, step_length), step_length)
+
+
+def _minute_records(results: Iterator[MinuteResult], step: int) -> Iterator[Dict[str, Any]]:
+    """
+    Expands the results into one record per step.
+
+    Args:
+        results (Iterator[MinuteResult]): The results, with the consecutive steps that have
+            the same average together.
+        step (int): The time between two records, in microseconds.
+
+    Yields:
+        Dict[str, Any]: The record of each step, in order.
+    """
+    formatter = create_step_formatter(step)
+    for minute, average_duration, count in results:
+        fields = result_fields(average_duration)
+        for _ in range(count):
+            yield {"date": formatter.format(minute), **fields}
+            minute += step
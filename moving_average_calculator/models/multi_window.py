@@ -0,0 +1,220 @@
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+
+from .interfaces.i_checkpointable_window import ICheckpointableWindow
+from .bucketed_window import BucketedWindow
+from .event import Event
+from .snapshot import SnapshotReader, SnapshotWriter
+from .timestamp import MICROSECONDS_PER_MINUTE
+from .window import Window
+
+
+class WindowView:
+    """
+    Represents one window size over the events shared by a MultiWindow.
+
+    Attributes:
+        size (int): The size of the window in microseconds.
+        start (int): The position, counted since the first event ever added, of the oldest event in the view.
+        count (int): The number of events in the view.
+        total_duration (int): The total duration of the events in the view.
+    """
+
+    __slots__ = ('size', 'start', 'count', 'total_duration')
+
+    def __init__(self, size: int, unit: int = MICROSECONDS_PER_MINUTE):
+        self.size: int = size * unit
+        self.start: int = 0
+        self.count: int = 0
+        self.total_duration: int = 0
+
+    def get_average_duration(self) -> float:
+        """
+        Calculates the average duration of events in the view.
+
+        Returns:
+            float: The average duration.
+        """
+        if not self.count:
+            return 0.0
+        return self.total_duration / self.count
+
+
+class MultiWindow(ICheckpointableWindow):
+    """
+    Represents several windows of different sizes over the same events, for calculating
+    the moving averages of all of them in a single pass.
+
+    The events are stored once, in a deque that only holds the events of the largest window.
+    Each size has a view over the end of that deque, with its own running total.
+
+    Args:
+        sizes (Sequence[int]): The sizes of the windows, in units.
+        unit (int): The unit of the sizes, in microseconds. Defaults to a minute.
+
+    Attributes:
+        sizes (List[int]): The sizes of the windows, in units, in ascending order.
+        events (Deque[Event]): The events of the largest window.
+        first_position (int): The position, counted since the first event ever added, of the first event in the deque.
+        views (List[WindowView]): The views of each window size, in ascending order.
+
+    Methods:
+        add_event(event: Event) -> None: Adds an event to every window.
+        remove_old_events(current_time: int) -> None: Removes old events from every window.
+        get_average_duration() -> float: Calculates the average duration of events in the largest window.
+        get_result() -> Dict[str, float]: Calculates the average duration of events in each window.
+        next_expiration_time() -> Optional[int]: Gets the first time at which an event leaves any of the windows.
+        event_count() -> int: Gets the number of events stored for the largest window.
+        save_state(writer: SnapshotWriter) -> None: Writes the contents of the windows to a snapshot.
+        load_state(reader: SnapshotReader) -> None: Reads the contents of the windows from a snapshot.
+    """
+
+    def __init__(self, sizes: Sequence[int], unit: int = MICROSECONDS_PER_MINUTE):
+        if not sizes:
+            raise ValueError("At least one window size is required")
+        self.sizes: List[int] = sorted(set(sizes))
+        self.events: Deque[Event] = deque()
+        self.first_position: int = 0
+        self.views: List[WindowView] = [WindowView(size, unit) for size in self.sizes]
+
+    def add_event(self, event: Event) -> None:
+        """
+        Adds an event to every window.
+
+        Args:
+            event (Event): The event to be added.
+        """
+        self.events.append(event)
+        for view in self.views:
+            view.count += 1
+            view.total_duration += event.duration
+
+    def remove_old_events(self, current_time: int) -> None:
+        """
+        Removes old events from every window, and drops the events that left the largest one.
+
+        Args:
+            current_time (int): The current time, in microseconds since the Unix epoch.
+        """
+        events = self.events
+        for view in self.views:
+            oldest_time = current_time - view.size
+            index = view.start - self.first_position
+            while view.count and events[index].timestamp < oldest_time:
+                view.count -= 1
+                view.total_duration -= events[index].duration
+                index += 1
+            view.start = index + self.first_position
+
+        # the largest window holds the oldest events, so nothing before its start is needed
+        while self.first_position < self.views[-1].start:
+            events.popleft()
+            self.first_position += 1
+
+    def get_average_duration(self) -> float:
+        """
+        Calculates the average duration of events in the largest window.
+
+        Returns:
+            float: The average duration.
+        """
+        return self.views[-1].get_average_duration()
+
+    def get_result(self) -> Dict[str, float]:
+        """
+        Calculates the average duration of events in each window.
+
+        Returns:
+            Dict[str, float]: The average durations, by window size in units.
+        """
+        return {str(size): view.get_average_duration() for size, view in zip(self.sizes, self.views)}
+
+    def next_expiration_time(self) -> Optional[int]:
+        """
+        Gets the first time at which the oldest event of any of the windows is no longer in it.
+
+        Returns:
+            Optional[int]: The time, in microseconds since the Unix epoch, or None if every window is empty.
+        """
+        expiration_times = [
+            self.events[view.start - self.first_position].timestamp + view.size + 1
+            for view in self.views if view.count
+        ]
+        return min(expiration_times, default=None)
+
+    def event_count(self) -> int:
+        """
+        Gets the number of events stored, which are the ones of the largest window.
+
+        Returns:
+            int: The number of events.
+        """
+        return len(self.events)
+
+    def save_state(self, writer: SnapshotWriter) -> None:
+        """
+        Writes the sizes, the views and the events of the windows to a snapshot.
+
+        Args:
+            writer (SnapshotWriter): The snapshot.
+        """
+        writer.write_ints(self.sizes)
+        writer.write_int(self.first_position)
+        for view in self.views:
+            writer.write_int(view.start)
+            writer.write_int(view.count)
+            writer.write_number(view.total_duration)
+        writer.write_events(self.events)
+
+    def load_state(self, reader: SnapshotReader) -> None:
+        """
+        Reads the views and the events of the windows from a snapshot.
+
+        Args:
+            reader (SnapshotReader): The snapshot.
+
+        Raises:
+            ValueError: If the snapshot is of windows of other sizes.
+        """
+        if reader.read_ints() != self.sizes:
+            raise ValueError("The snapshot is of windows of other sizes")
+        self.first_position = reader.read_int()
+        for view in self.views:
+            view.start = reader.read_int()
+            view.count = reader.read_int()
+            view.total_duration = reader.read_number()
+        self.events = deque(reader.read_events())
+
+
+def create_window(window_sizes: Sequence[int], aggregates: Sequence[str] = (), bucketed: bool = False,
+                  unit: int = MICROSECONDS_PER_MINUTE, step: int = MICROSECONDS_PER_MINUTE) -> ICheckpointableWindow:
+    """
+    Creates the window for the given sizes: a plain window for a single size,
+    or a window over the same events for each size.
+
+    Args:
+        window_sizes (Sequence[int]): The sizes of the windows, in units.
+        aggregates (Sequence[str]): The names of the other aggregates of the window, like ["max", "p95"].
+            Only supported with a single size.
+        bucketed (bool): Keep one bucket per step instead of the events. Only supported with
+            a single size, without other aggregates.
+        unit (int): The unit of the sizes, in microseconds. Defaults to a minute.
+        step (int): The step of the calculator, in microseconds, which is the width of the buckets
+            of a bucketed window. Defaults to a minute.
+
+    Returns:
+        ICheckpointableWindow: The window.
+
+    Raises:
+        ValueError: If there are aggregates and several sizes, or a bucketed window is asked for
+            with several sizes or with aggregates.
+    """
+    if bucketed:
+        if len(window_sizes) > 1 or aggregates:
+            raise ValueError("The bucketed window is only supported with a single size, without other aggregates")
+        return BucketedWindow(window_sizes[0], unit, step)
+    if len(window_sizes) == 1:
+        return Window(window_sizes[0], aggregates, unit)
+    if aggregates:
+        raise ValueError("The other aggregates are only supported with a single window size")
+    return MultiWindow(window_sizes, unit)
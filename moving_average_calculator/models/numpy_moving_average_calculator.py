@@ -0,0 +1,132 @@
+"""
+This module contains the NumpyMovingAverageCalculator class, a batch engine that
+loads every event in memory and calculates the moving average of all the minutes at once.
+"""
+
+from typing import Callable, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+from .interfaces.i_moving_average_calculator import IMovingAverageCalculator
+from .interfaces.i_output_sink import IOutputSink
+from .event import Event
+from .event_reader import read_events
+from .reorder_buffer import ReorderBuffer
+from .result_writer import MinuteResultWriter
+from .timestamp import MICROSECONDS_PER_MINUTE, floor_to_minute
+
+
+class NumpyMovingAverageCalculator(IMovingAverageCalculator):
+    """
+    A class that calculates the moving average delivery time with vectorized NumPy operations.
+
+    Instead of walking the timeline minute by minute, the timestamps and durations are loaded
+    into arrays. The window boundaries of every minute are found with searchsorted, and the
+    sum of the durations inside each window comes from the difference of two cumulative sums.
+    It produces the same results as the MovingAverageCalculator, as long as the input
+    fits in memory and, like for the streaming engine, the events are sorted by timestamp.
+
+    Args:
+        window_size (int): The size of the window in minutes.
+        output_sink (IOutputSink): The sink where the results will be written.
+        output_mode (str): 'dense' to write one result per minute, or 'runs' to merge
+            consecutive minutes with the same average into a single result.
+        reader (Callable[[str], Iterable[Event]]): Reads the events from the input file.
+            Defaults to read_events.
+        reorder_buffer (Optional[ReorderBuffer]): Puts the events back in order, if they can arrive
+            out of order. Defaults to None, for events that are already sorted.
+
+    Attributes:
+        size (int): The size of the window in microseconds.
+        minutes (Optional[np.ndarray]): The minutes of the results, in microseconds since the Unix epoch.
+        averages (Optional[np.ndarray]): The average delivery time of each minute.
+        output_sink (IOutputSink): The sink where the results will be written.
+        result_writer (MinuteResultWriter): Formats the results and writes them to the output sink.
+        reader (Callable[[str], Iterable[Event]]): Reads the events from the input file.
+        reorder_buffer (Optional[ReorderBuffer]): Puts the events back in order, or None.
+    """
+
+    def __init__(self, window_size: int, output_sink: IOutputSink, output_mode: str = 'dense',
+                 reader: Callable[[str], Iterable[Event]] = read_events,
+                 reorder_buffer: Optional[ReorderBuffer] = None):
+        if np is None:
+            raise ImportError("The numpy engine requires numpy. Install it with `pip install numpy`.")
+        self.size: int = window_size * MICROSECONDS_PER_MINUTE
+        self.minutes: Optional['np.ndarray'] = None
+        self.averages: Optional['np.ndarray'] = None
+        self.output_sink: IOutputSink = output_sink
+        self.result_writer: MinuteResultWriter = MinuteResultWriter(output_sink, output_mode)
+        self.reader: Callable[[str], Iterable[Event]] = reader
+        self.reorder_buffer: Optional[ReorderBuffer] = reorder_buffer
+
+    def calculate(self, timestamps: 'np.ndarray', durations: 'np.ndarray') -> None:
+        """
+        Calculates the average delivery time of every minute between the first event
+        and the minute after the last one.
+
+        Args:
+            timestamps (np.ndarray): The sorted timestamps of the events, in microseconds since the Unix epoch.
+            durations (np.ndarray): The durations of the events.
+        """
+        start_time = floor_to_minute(int(timestamps[0]))
+        end_time = int(timestamps[-1]) + MICROSECONDS_PER_MINUTE
+        count = (end_time - start_time) // MICROSECONDS_PER_MINUTE + 1
+        self.minutes = start_time + np.arange(count, dtype=np.int64) * MICROSECONDS_PER_MINUTE
+
+        # a minute sees every event up to (and including) itself,
+        # except the ones older than the window size
+        newest = np.searchsorted(timestamps, self.minutes, side='right')
+        oldest = np.searchsorted(timestamps, self.minutes - self.size, side='left')
+
+        cumulative_durations = np.zeros(len(durations) + 1, dtype=durations.dtype)
+        np.cumsum(durations, out=cumulative_durations[1:])
+        totals = cumulative_durations[newest] - cumulative_durations[oldest]
+        counts = newest - oldest
+
+        self.averages = np.zeros(count, dtype=np.float64)
+        np.divide(totals, counts, out=self.averages, where=counts > 0)
+
+    def process_and_print_event(self) -> None:
+        """
+        Writes the average delivery time of every calculated minute to the output sink.
+
+        Returns:
+            None
+
+        """
+        for minute, average_duration in zip(self.minutes.tolist(), self.averages.tolist()):
+            self.result_writer.write(minute, average_duration)
+
+    def process_events(self, input_file: str) -> None:
+        """
+        Loads the events from the input file and writes the moving average delivery time
+        of every minute to the output sink.
+
+        Args:
+            input_file (str): The path to the input file containing the events.
+
+        Returns:
+            None
+
+        """
+        timestamps: List[int] = []
+        durations: List[int] = []
+        events = self.reader(input_file)
+        if self.reorder_buffer is not None:
+            events = self.reorder_buffer.reorder(events)
+        for event in events:
+            timestamps.append(event.timestamp)
+            durations.append(event.duration)
+
+        if not timestamps:
+            print("Error: No events found in file")
+            return
+
+        try:
+            self.calculate(np.array(timestamps, dtype=np.int64), np.array(durations))
+            self.process_and_print_event()
+        finally:
+            self.result_writer.flush()
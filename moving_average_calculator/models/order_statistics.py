@@ -0,0 +1,207 @@
+"""
+This module contains the data structures behind the windowed max, min and percentiles:
+a monotonic deque for the max and the min, and a sorted multiset with indexed access
+for the percentiles.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from typing import Any, Deque, List, Tuple
+
+
+class MonotonicDeque:
+    """
+    Keeps the max (or the min) of a sliding window of values, which leave it in the order they entered.
+
+    Only the values that can still become the max are kept: a value is dropped as soon as
+    a larger one enters, since it leaves the window before it. Each value is added and
+    removed at most once, so every operation is O(1), amortized.
+
+    Args:
+        largest (bool): True to keep the max, False to keep the min.
+
+    Attributes:
+        largest (bool): True to keep the max, False to keep the min.
+        values (Deque[Tuple[int, Any]]): The candidates, with their position in the window, from the best one.
+        added (int): The number of values added so far, which is the position of the next one.
+        removed (int): The number of values removed so far, which is the position of the oldest one.
+    """
+
+    __slots__ = ('largest', 'values', 'added', 'removed')
+
+    def __init__(self, largest: bool = True):
+        self.largest: bool = largest
+        self.values: Deque[Tuple[int, Any]] = deque()
+        self.added: int = 0
+        self.removed: int = 0
+
+    def add(self, value: Any) -> None:
+        """
+        Adds a value, at the end of the window.
+
+        Args:
+            value (Any): The value.
+        """
+        values = self.values
+        if self.largest:
+            while values and values[-1][1] <= value:
+                values.pop()
+        else:
+            while values and values[-1][1] >= value:
+                values.pop()
+        values.append((self.added, value))
+        self.added += 1
+
+    def remove_oldest(self) -> None:
+        """
+        Removes the oldest value of the window.
+        """
+        if self.values and self.values[0][0] == self.removed:
+            self.values.popleft()
+        self.removed += 1
+
+    def get(self) -> Any:
+        """
+        Gets the max (or the min) of the window.
+
+        Returns:
+            Any: The value, or None if the window is empty.
+        """
+        return self.values[0][1] if self.values else None
+
+
+class SortedMultiset:
+    """
+    A sorted collection of values, with duplicates, that supports adding, removing and
+    getting the value at a rank in O(log n).
+
+    The values are kept in sorted sublists of at most 2 * LOAD values, with the last value of
+    each sublist in a separate list, to find the sublist of a value with a binary search, and
+    the sizes of the sublists in a Fenwick tree, to find the sublist of a rank. Inserting into
+    or deleting from a sublist moves at most 2 * LOAD references, which is a bounded memmove.
+    The Fenwick tree is only rebuilt when a sublist is split or dropped, once every LOAD
+    operations at most.
+
+    Attributes:
+        lists (List[List[Any]]): The sorted sublists.
+        maxes (List[Any]): The last value of each sublist.
+        tree (List[int]): The Fenwick tree of the sizes of the sublists, indexed from 1.
+        size (int): The number of values.
+    """
+
+    LOAD = 500
+
+    __slots__ = ('lists', 'maxes', 'tree', 'size')
+
+    def __init__(self):
+        self.lists: List[List[Any]] = []
+        self.maxes: List[Any] = []
+        self.tree: List[int] = [0]
+        self.size: int = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, value: Any) -> None:
+        """
+        Adds a value.
+
+        Args:
+            value (Any): The value.
+        """
+        self.size += 1
+        if not self.lists:
+            self.lists.append([value])
+            self.maxes.append(value)
+            self._build_tree()
+            return
+
+        position = bisect_right(self.maxes, value)
+        if position == len(self.lists):
+            # larger than every value, so it goes at the end of the last sublist
+            position -= 1
+            self.lists[position].append(value)
+            self.maxes[position] = value
+        else:
+            insort(self.lists[position], value)
+
+        values = self.lists[position]
+        if len(values) > 2 * self.LOAD:
+            self.lists[position:position + 1] = [values[:self.LOAD], values[self.LOAD:]]
+            self.maxes[position:position + 1] = [values[self.LOAD - 1], values[-1]]
+            self._build_tree()
+        else:
+            self._update_tree(position, 1)
+
+    def remove(self, value: Any) -> None:
+        """
+        Removes one occurrence of a value.
+
+        Args:
+            value (Any): The value.
+
+        Raises:
+            ValueError: If the value is not in the multiset.
+        """
+        position = bisect_left(self.maxes, value)
+        if position == len(self.lists):
+            raise ValueError(f"{value!r} is not in the multiset")
+        values = self.lists[position]
+        index = bisect_left(values, value)
+        if values[index] != value:
+            raise ValueError(f"{value!r} is not in the multiset")
+
+        del values[index]
+        self.size -= 1
+        if not values:
+            del self.lists[position]
+            del self.maxes[position]
+            self._build_tree()
+            return
+        self.maxes[position] = values[-1]
+        self._update_tree(position, -1)
+
+    def __getitem__(self, rank: int) -> Any:
+        """
+        Gets the value at a rank, counted from 0, in ascending order.
+
+        Args:
+            rank (int): The rank, which can be negative to count from the end.
+
+        Returns:
+            Any: The value.
+
+        Raises:
+            IndexError: If the rank is out of range.
+        """
+        if rank < 0:
+            rank += self.size
+        if not 0 <= rank < self.size:
+            raise IndexError("The rank is out of range")
+
+        # find the sublist of the rank, by going down the Fenwick tree
+        tree = self.tree
+        position = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            next_position = position + step
+            if next_position < len(tree) and tree[next_position] <= rank:
+                position = next_position
+                rank -= tree[next_position]
+            step >>= 1
+        return self.lists[position][rank]
+
+    def _update_tree(self, position: int, delta: int) -> None:
+        tree = self.tree
+        position += 1
+        while position < len(tree):
+            tree[position] += delta
+            position += position & -position
+
+    def _build_tree(self) -> None:
+        tree = [0] + [len(values) for values in self.lists]
+        for position in range(1, len(tree)):
+            parent = position + (position & -position)
+            if parent < len(tree):
+                tree[parent] += tree[position]
+        self.tree = tree
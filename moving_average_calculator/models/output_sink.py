@@ -0,0 +1,256 @@
+"""
+This module contains the output sinks used by the calculators to emit their results.
+
+Every sink buffers records in memory and writes them in batches, so a run with
+millions of minutes performs a handful of large writes instead of one open/write
+per minute.
+"""
+
+import os
+import sys
+from abc import abstractmethod
+from typing import IO, List, Optional
+
+from .interfaces.i_output_sink import IOutputSink
+
+DEFAULT_BATCH_SIZE = 1000
+
+SINK_KINDS = ('file', 'stdout', 'both', 'null')
+
+
+class BufferedOutputSink(IOutputSink):
+    """
+    Base class for sinks that accumulate records and write them in batches.
+
+    Args:
+        batch_size (int): The number of records kept in memory before they are written.
+
+    Attributes:
+        batch_size (int): The number of records kept in memory before they are written.
+        buffer (List[str]): The records waiting to be written.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        if batch_size < 1:
+            raise ValueError("The batch size must be >= 1")
+        self.batch_size: int = batch_size
+        self.buffer: List[str] = []
+
+    def write(self, record: str) -> None:
+        """
+        Adds a record to the buffer, writing the whole batch once it is full.
+
+        Args:
+            record (str): The record to be written, without the trailing newline.
+        """
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes every buffered record to the underlying destination.
+        """
+        if self.buffer:
+            self._write_chunk('\n'.join(self.buffer) + '\n')
+            self.buffer.clear()
+
+    def close(self) -> None:
+        """
+        Flushes the pending records and releases the underlying destination.
+        """
+        self.flush()
+
+    @abstractmethod
+    def _write_chunk(self, chunk: str) -> None:
+        """
+        Writes a batch of records, with their newlines, to the underlying destination.
+
+        Args:
+            chunk (str): The records.
+        """
+
+
+class FileOutputSink(BufferedOutputSink):
+    """
+    Writes the records to a file, keeping a single handle open for the whole run.
+
+    The file is only opened on the first write, so a run without results
+    does not create an empty output file.
+
+    Args:
+        output_file (str): The path to the output file.
+        mode (str): The mode used to open the output file.
+        batch_size (int): The number of records kept in memory before they are written.
+    """
+
+    def __init__(self, output_file: str, mode: str = 'a', batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(batch_size)
+        self.output_file: str = output_file
+        self.mode: str = mode
+        self._handle: Optional[IO[str]] = None
+
+    def _write_chunk(self, chunk: str) -> None:
+        if self._handle is None:
+            self._handle = open(self.output_file, self.mode, encoding='utf-8')
+        self._handle.write(chunk)
+
+    def flush(self) -> None:
+        super().flush()
+        if self._handle is not None:
+            self._handle.flush()
+
+    def close(self) -> None:
+        super().close()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def sync(self) -> int:
+        """
+        Writes the buffered records, and waits until the output file is on disk.
+
+        Returns:
+            int: The size of the output file, in bytes.
+        """
+        self.flush()
+        if self._handle is not None:
+            os.fsync(self._handle.fileno())
+        try:
+            return os.path.getsize(self.output_file)
+        except FileNotFoundError:
+            return 0
+
+    def truncate(self, size: int) -> None:
+        """
+        Drops the end of the output file, after the given size, like the records written
+        after a checkpoint. The buffered records are dropped too.
+
+        Args:
+            size (int): The size to keep, in bytes.
+
+        Raises:
+            ValueError: If the output file is smaller than the given size.
+        """
+        self.buffer.clear()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        current_size = os.path.getsize(self.output_file) if os.path.exists(self.output_file) else 0
+        if current_size < size:
+            raise ValueError(f"The output file has {current_size} bytes, fewer than {size}")
+        if current_size > size:
+            os.truncate(self.output_file, size)
+
+
+class BinaryFileOutputSink(FileOutputSink):
+    """
+    Writes fixed-width binary records to a file, as they are, without newlines between them.
+
+    Args:
+        output_file (str): The path to the output file.
+        mode (str): 'wb' to overwrite the output file, or 'ab' to append to it.
+        batch_size (int): The number of records kept in memory before they are written.
+    """
+
+    def __init__(self, output_file: str, mode: str = 'ab', batch_size: int = DEFAULT_BATCH_SIZE):
+        super().__init__(output_file, mode, batch_size)
+
+    def flush(self) -> None:
+        if self.buffer:
+            self._write_chunk(b''.join(self.buffer))
+            self.buffer.clear()
+        if self._handle is not None:
+            self._handle.flush()
+
+    def _write_chunk(self, chunk: bytes) -> None:
+        if self._handle is None:
+            self._handle = open(self.output_file, 'wb' if self.mode.startswith('w') else 'ab')
+        self._handle.write(chunk)
+
+
+class StdoutOutputSink(BufferedOutputSink):
+    """
+    Writes the records to the standard output.
+    """
+
+    def _write_chunk(self, chunk: str) -> None:
+        sys.stdout.write(chunk)
+
+    def flush(self) -> None:
+        super().flush()
+        sys.stdout.flush()
+
+
+class NullOutputSink(IOutputSink):
+    """
+    Discards every record. Useful for benchmarking the calculation alone.
+    """
+
+    def write(self, record: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TeeOutputSink(IOutputSink):
+    """
+    Forwards every record to several sinks.
+
+    Args:
+        sinks (IOutputSink): The sinks that receive the records.
+    """
+
+    def __init__(self, *sinks: IOutputSink):
+        self.sinks = sinks
+
+    def write(self, record: str) -> None:
+        for sink in self.sinks:
+            sink.write(record)
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+def create_output_sink(kind: str, output_file: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                       binary: bool = False, append: bool = True) -> IOutputSink:
+    """
+    Creates the output sink selected on the command line.
+
+    Args:
+        kind (str): One of 'file', 'stdout', 'both' or 'null'.
+        output_file (str): The path to the output file, used by the 'file' and 'both' sinks.
+        batch_size (int): The number of records kept in memory before they are written.
+        binary (bool): Whether the records are binary, which only the 'file' and 'null' sinks support.
+        append (bool): Whether the output file is appended to, like the NDJSON records can be, instead of
+            overwritten, which the CSV header and the binary records need. Defaults to True.
+
+    Returns:
+        IOutputSink: The requested sink.
+
+    Raises:
+        ValueError: If the sink does not support binary records.
+    """
+    if binary and kind in ('stdout', 'both'):
+        raise ValueError(f"The {kind} sink does not support binary records")
+    mode = 'a' if append else 'w'
+    if kind == 'file' and binary:
+        return BinaryFileOutputSink(output_file, mode + 'b', batch_size)
+    if kind == 'file':
+        return FileOutputSink(output_file, mode, batch_size)
+    if kind == 'stdout':
+        return StdoutOutputSink(batch_size)
+    if kind == 'both':
+        return TeeOutputSink(FileOutputSink(output_file, mode, batch_size), StdoutOutputSink(batch_size))
+    if kind == 'null':
+        return NullOutputSink()
+    raise ValueError(f"Unknown output sink: {kind}")
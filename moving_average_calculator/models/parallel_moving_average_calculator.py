@@ -0,0 +1,188 @@
+"""
+This module contains the ParallelMovingAverageCalculator class which splits a large input
+file into chunks, and calculates the moving average of each chunk in a separate process.
+"""
+
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from .interfaces.i_moving_average_calculator import IMovingAverageCalculator
+from .interfaces.i_output_sink import IOutputSink
+
+from .event import Event
+from .event_reader import scan_events, scan_events_backwards, split_file
+from .moving_average_calculator import MovingAverageCalculator
+from .multi_window import create_window
+from .output_sink import NullOutputSink
+from .result_writer import MinuteResult, MinuteResultCollector, MinuteResultWriter
+from .timestamp import MICROSECONDS_PER_MINUTE, ceil_to_minute
+
+
+def read_halo(buffer: bytes, start: int, window_size: int) -> Tuple[Optional[Event], List[Event]]:
+    """
+    Reads the events before a chunk that are still in the window when the chunk starts.
+
+    The chunk starts at the first minute that is not before the last event of the previous
+    chunks, so its window holds the events that are not older than that minute minus the window size.
+    The lines are parsed like the chunks parse them, so that the halo holds the same events as
+    the window of a sequential run.
+
+    Args:
+        buffer (bytes): The memory-mapped input file.
+        start (int): The offset where the chunk starts.
+        window_size (int): The size of the largest window, in microseconds.
+
+    Returns:
+        Tuple[Optional[Event], List[Event]]: The last event before the chunk, or None if there is none,
+        and the events of the halo, in order.
+    """
+    last_event: Optional[Event] = None
+    halo: List[Event] = []
+    oldest_time = 0
+    # the chunk that holds an invalid line reports it
+    for event in scan_events_backwards(buffer, start):
+        if last_event is None:
+            last_event = event
+            oldest_time = ceil_to_minute(event.timestamp) - window_size
+        if event.timestamp < oldest_time:
+            break
+        halo.append(event)
+    halo.reverse()
+    return last_event, halo
+
+
+def process_chunk(input_file: str, start: int, end: int, window_sizes: Sequence[int],
+                  is_last: bool, aggregates: Sequence[str] = ()) -> List[MinuteResult]:
+    """
+    Calculates the moving average of the minutes that belong to a chunk of the input file.
+
+    A chunk owns the minutes that the sequential calculator processes while reading its lines:
+    from the first minute that is not before the last event of the previous chunks, to the
+    first minute that is not before its own last event. The last chunk also processes the
+    minutes up to the minute after the last event.
+
+    Args:
+        input_file (str): The path to the input file containing the events.
+        start (int): The offset where the chunk starts.
+        end (int): The offset where the chunk ends.
+        window_sizes (Sequence[int]): The sizes of the windows in minutes.
+        is_last (bool): Whether this is the last chunk of the file.
+        aggregates (Sequence[str]): The names of the other aggregates of the window, like ["max", "p95"].
+
+    Returns:
+        List[MinuteResult]: The results of the minutes of the chunk, in order.
+    """
+    collector = MinuteResultCollector()
+    calculator = MovingAverageCalculator(create_window(window_sizes, aggregates), NullOutputSink())
+    calculator.result_writer = collector
+
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        last_event, halo = read_halo(buffer, start, max(window_sizes) * MICROSECONDS_PER_MINUTE)
+        if last_event is not None:
+            # resume the calculator where the previous chunk left it
+            calculator.start_time = calculator.current_time = ceil_to_minute(last_event.timestamp)
+            calculator.last_event_time = last_event.timestamp
+            for event in halo:
+                calculator.window.add_event(event)
+
+        for event in scan_events(buffer, start, end):
+            calculator.process_event(event)
+
+    if is_last:
+        calculator.finish()
+    return collector.results
+
+
+class ParallelMovingAverageCalculator(IMovingAverageCalculator):
+    """
+    A class that calculates the moving average delivery time of a large input file with a pool of processes.
+
+    The file is split into chunks at line boundaries. Each chunk is processed by a worker,
+    which seeds its window with the events just before the chunk (the halo), so that
+    the minutes that straddle two chunks get the same average as in a sequential run.
+    The results of the chunks are then written in order. Like the MovingAverageCalculator,
+    it expects the events to be sorted by timestamp.
+
+    Args:
+        window_sizes (Sequence[int]): The sizes of the windows in minutes.
+        output_sink (IOutputSink): The sink where the results will be written.
+        output_mode (str): 'dense' to write one result per minute, or 'runs' to merge
+            consecutive minutes with the same average into a single result.
+        workers (int): The number of worker processes.
+        chunks_per_worker (int): The number of chunks per worker, so that the work stays balanced.
+        aggregates (Sequence[str]): The names of the other aggregates of the window, like ["max", "p95"].
+
+    Attributes:
+        window_sizes (Sequence[int]): The sizes of the windows in minutes.
+        aggregates (Sequence[str]): The names of the other aggregates of the window.
+        output_sink (IOutputSink): The sink where the results will be written.
+        result_writer (MinuteResultWriter): Formats the results and writes them to the output sink.
+        workers (int): The number of worker processes.
+        chunks_per_worker (int): The number of chunks per worker.
+    """
+
+    def __init__(self, window_sizes: Sequence[int], output_sink: IOutputSink, output_mode: str = 'dense',
+                 workers: int = 2, chunks_per_worker: int = 4, aggregates: Sequence[str] = ()):
+        if workers < 1 or chunks_per_worker < 1:
+            raise ValueError("The number of workers and of chunks per worker must be >= 1")
+        self.window_sizes: Sequence[int] = list(window_sizes)
+        self.aggregates: Sequence[str] = list(aggregates)
+        self.output_sink: IOutputSink = output_sink
+        self.result_writer: MinuteResultWriter = MinuteResultWriter(output_sink, output_mode)
+        self.workers: int = workers
+        self.chunks_per_worker: int = chunks_per_worker
+
+    def process_and_print_event(self) -> None:
+        """
+        Not supported: the minutes are processed by the workers, a chunk at a time, so there is
+        no current minute to process. Use process_events instead.
+
+        Raises:
+            NotImplementedError: Always.
+
+        """
+        raise NotImplementedError("The parallel calculator processes whole chunks, use process_events instead")
+
+    def process_events(self, input_file: str) -> None:
+        """
+        Process the chunks of the input file in parallel, and write their results in order.
+
+        Args:
+            input_file (str): The path to the input file containing the events.
+
+        Returns:
+            None
+
+        """
+        ranges = split_file(input_file, self.workers * self.chunks_per_worker)
+        if not ranges:
+            print("Error: No events found in file")
+            return
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [
+                    executor.submit(process_chunk, input_file, start, end, self.window_sizes,
+                                    index == len(ranges) - 1, self.aggregates)
+                    for index, (start, end) in enumerate(ranges)
+                ]
+                for future in futures:
+                    self._write_results(future.result())
+        finally:
+            # whatever happens, do not lose the results that are still buffered
+            self.result_writer.flush()
+
+    def _write_results(self, results: List[MinuteResult]) -> None:
+        """
+        Writes the results of a chunk to the output sink.
+
+        Args:
+            results (List[MinuteResult]): The results of the minutes of the chunk, in order.
+
+        Returns:
+            None
+
+        """
+        for minute, average_duration, count in results:
+            self.result_writer.write(minute, average_duration, count)
@@ -0,0 +1,100 @@
+"""
+This module contains the RangeMovingAverageCalculator class, which calculates the moving
+average delivery time of a range of minutes, reading only the part of the input it needs.
+"""
+
+import mmap
+
+from .interfaces.i_output_sink import IOutputSink
+from .interfaces.i_window import IWindow
+
+from .event_reader import scan_events
+from .moving_average_calculator import MovingAverageCalculator
+from .result_writer import ClippedResultWriter
+from .time_index import TimeIndex
+from .timestamp import MICROSECONDS_PER_MINUTE
+
+
+class RangeMovingAverageCalculator(MovingAverageCalculator):
+    """
+    A MovingAverageCalculator that only writes the minutes from the start time, included,
+    to the end time, excluded.
+
+    The input is looked up in its time index, which is built on the first run and built again
+    whenever the input changes. Only the lines from the start time minus the largest window size,
+    which is the oldest event that can be in the window of the first minute, up to the end time
+    are read, along with the minute before them. When the events of the input are not sorted,
+    there is no index, and the whole input is read instead.
+
+    The minutes of the range are the same as the ones of a run over the whole input, up to the
+    rounding of float durations, which are summed in another order. In the 'runs' output mode,
+    the runs are cut at the start and the end of the range.
+
+    Args:
+        window (IWindow): The window object that holds the events.
+        output_sink (IOutputSink): The sink where the results will be written.
+        output_mode (str): 'dense' to write one result per minute, or 'runs' to merge
+            consecutive minutes with the same average into a single result.
+        from_time (int): The first minute written.
+        to_time (int): The minute after the last one written.
+        lookback (int): The size of the largest window, in minutes.
+        index_file (str): The path to the index file.
+
+    Attributes:
+        from_time (int): The first minute written.
+        to_time (int): The minute after the last one written.
+        lookback (int): The size of the largest window, in microseconds.
+        index_file (str): The path to the index file.
+
+    All the times are in microseconds since the Unix epoch.
+    """
+
+    def __init__(self, window: IWindow, output_sink: IOutputSink, output_mode: str = 'dense',
+                 from_time: int = 0, to_time: int = 0, lookback: int = 0, index_file: str = ''):
+        if from_time % MICROSECONDS_PER_MINUTE or to_time % MICROSECONDS_PER_MINUTE:
+            raise ValueError("The range must start and end at the start of a minute")
+        if from_time >= to_time:
+            raise ValueError("The start of the range must be before its end")
+        super().__init__(window, output_sink, output_mode)
+        self.result_writer = ClippedResultWriter(output_sink, output_mode, from_time, to_time)
+        self.from_time: int = from_time
+        self.to_time: int = to_time
+        self.lookback: int = lookback * MICROSECONDS_PER_MINUTE
+        self.index_file: str = index_file
+
+    def _read_events(self, input_file: str) -> None:
+        """
+        Reads the events of the range from the input file, and feeds them to the window, minute by minute.
+
+        Args:
+            input_file (str): The path to the input file containing the events.
+        """
+        index = TimeIndex.load_or_build(self.index_file, input_file)
+        if index is None:
+            print("Error: The events of the input file are not sorted, reading the whole file")
+            super()._read_events(input_file)
+            return
+
+        # one more minute, since the minute after the last event is written too, and it can be in the range
+        start = index.find(self.from_time - self.lookback - MICROSECONDS_PER_MINUTE)
+        end = index.find(self.to_time)
+        if start > 0:
+            # the skipped events are older than the window of the first minute, which starts
+            # at the start of the range, like in a run over the whole input
+            self.start_time = self.current_time = self.from_time
+
+        if start < end:
+            with open(input_file, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for event in scan_events(buffer, start, end):
+                    self.process_event(event)
+
+        if self.current_time is None:
+            # nothing was read from the start of the file: either it has no events, or they are all after the range
+            if end == index.input_size:
+                self.finish()
+        elif end < index.input_size:
+            # there are events after the range, so every minute of the range is written
+            self.process_and_print_events_until(self.to_time)
+        elif self.last_event_time is not None:
+            self.finish()
@@ -0,0 +1,167 @@
+"""
+This module contains the ReorderBuffer class, which puts back in order the events
+that arrive out of order, as long as they are not later than the allowed lateness.
+"""
+
+import heapq
+import json
+import sys
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from .interfaces.i_output_sink import IOutputSink
+
+from .event import Event
+from .timestamp import format_timestamp
+
+T = TypeVar('T')
+
+
+def event_timestamp(event: Event) -> int:
+    """
+    Gets the timestamp of an event, which is the order of the events.
+    """
+    return event.timestamp
+
+
+def grouped_event_timestamp(item: Tuple[Event, Any]) -> int:
+    """
+    Gets the timestamp of an event read along with the keys of its groups.
+    """
+    return item[0].timestamp
+
+
+class ReorderBuffer:
+    """
+    A bounded-lateness reorder buffer for events that arrive out of order.
+
+    The events are held in a heap, ordered by timestamp, until the watermark passes them.
+    The watermark is the newest timestamp seen so far minus the allowed lateness: no event
+    older than that is expected anymore, so the events up to the watermark are released, in order.
+    An event older than one that was already released cannot be put back in order: it is too late,
+    so it is counted and handed to the on_late callback, instead of being released.
+
+    Since the calculators only write the minutes before the events they are given,
+    a minute is only written once the watermark has passed it. The memory is bounded
+    by the number of events that arrive within the allowed lateness.
+
+    Args:
+        allowed_lateness (int): How much older than the newest event an event can be, in microseconds.
+        on_late (Optional[Callable[[Any], None]]): Called with each event that arrives too late.
+
+    Attributes:
+        allowed_lateness (int): How much older than the newest event an event can be, in microseconds.
+        on_late (Optional[Callable[[Any], None]]): Called with each event that arrives too late.
+        heap (List[Tuple[int, int, Any]]): The held events, with their timestamp and arrival order.
+        newest_time (Optional[int]): The newest timestamp seen so far.
+        released_time (Optional[int]): The timestamp of the last event released.
+        late_events (int): The number of events that arrived too late.
+        arrivals (int): The number of events pushed, which keeps the events with the same timestamp in order.
+    """
+
+    def __init__(self, allowed_lateness: int, on_late: Optional[Callable[[Any], None]] = None):
+        if allowed_lateness < 0:
+            raise ValueError("The allowed lateness must be >= 0")
+        self.allowed_lateness: int = allowed_lateness
+        self.on_late: Optional[Callable[[Any], None]] = on_late
+        self.heap: List[Tuple[int, int, Any]] = []
+        self.newest_time: Optional[int] = None
+        self.released_time: Optional[int] = None
+        self.late_events: int = 0
+        self.arrivals: int = 0
+
+    def push(self, timestamp: int, item: T) -> Iterator[T]:
+        """
+        Adds an event to the buffer, and releases the events that the watermark has passed.
+
+        Args:
+            timestamp (int): The timestamp of the event, in microseconds since the Unix epoch.
+            item (T): The event.
+
+        Yields:
+            T: The released events, in order.
+        """
+        if self.released_time is not None and timestamp < self.released_time:
+            self.late_events += 1
+            if self.on_late is not None:
+                self.on_late(item)
+            return
+
+        if self.newest_time is None or timestamp > self.newest_time:
+            self.newest_time = timestamp
+        watermark = self.newest_time - self.allowed_lateness
+
+        heap = self.heap
+        if not heap and timestamp <= watermark:
+            # the event is already in order, so there is no need to go through the heap
+            self.released_time = timestamp
+            yield item
+            return
+
+        heapq.heappush(heap, (timestamp, self.arrivals, item))
+        self.arrivals += 1
+        while heap and heap[0][0] <= watermark:
+            self.released_time, _, released = heapq.heappop(heap)
+            yield released
+
+    def drain(self) -> Iterator[Any]:
+        """
+        Releases all the held events, in order, once there are no more events to come.
+
+        Yields:
+            Any: The released events, in order.
+        """
+        heap = self.heap
+        while heap:
+            self.released_time, _, released = heapq.heappop(heap)
+            yield released
+
+    def reorder(self, items: Iterable[T], key: Callable[[T], int] = event_timestamp) -> Iterator[T]:
+        """
+        Puts a stream of events back in order, dropping the ones that arrive too late.
+
+        Args:
+            items (Iterable[T]): The events, roughly in order.
+            key (Callable[[T], int]): Gets the timestamp of an event. Defaults to event_timestamp.
+
+        Yields:
+            T: The events that are not too late, in order.
+        """
+        push = self.push
+        for item in items:
+            yield from push(key(item), item)
+        yield from self.drain()
+
+        if self.late_events:
+            print(f"Error: {self.late_events} events arrived too late, skipped", file=sys.stderr)
+
+
+class LateEventWriter:
+    """
+    Routes the events that arrive too late to an output sink, as lines of the input format,
+    so that they can be processed later.
+
+    Args:
+        output_sink (IOutputSink): The sink where the late events will be written.
+
+    Attributes:
+        output_sink (IOutputSink): The sink where the late events will be written.
+    """
+
+    def __init__(self, output_sink: IOutputSink):
+        self.output_sink: IOutputSink = output_sink
+
+    def __call__(self, item: Any) -> None:
+        """
+        Writes a late event, along with the keys of its groups, if it was read with them.
+
+        Args:
+            item (Any): Either an Event, or a tuple with an Event and the keys of its groups.
+        """
+        if isinstance(item, tuple):
+            event, keys = item
+        else:
+            event, keys = item, ()
+        record = {"timestamp": format_timestamp(event.timestamp), "duration": event.duration}
+        for fields, values in keys:
+            record.update(zip(fields, values))
+        self.output_sink.write(json.dumps(record))
@@ -0,0 +1,434 @@
+"""
+This module contains the encoders of the results, which turn the average of each minute into
+the records of an output format, and the readers of those formats:
+
+    ndjson: one JSON object per line, like {"date": "2018-12-26 18:11:00", "average_delivery_time": 20.0}
+    csv: a header, and one line per minute, like 2018-12-26 18:11:00,20.0
+    binary: one fixed-width record per minute, an int64 minute since the Unix epoch and a float64
+        average, in little-endian, which can be memory-mapped without parsing, like with
+        numpy.memmap(path, dtype=BINARY_DTYPE)
+"""
+
+import csv
+import io
+import json
+import mmap
+import os
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .interfaces.i_result_encoder import IResultEncoder
+from .timestamp import MICROSECONDS_PER_MINUTE, MinuteFormatter, create_step_formatter
+
+OUTPUT_FORMATS = ('ndjson', 'csv', 'binary')
+
+# the extension of the default output file of each format
+OUTPUT_EXTENSIONS = {'csv': '.csv', 'binary': '.bin'}
+
+# the field of the average, which is also in the result of a window with other aggregates
+AVERAGE_FIELD = 'average_delivery_time'
+
+# the binary record: the minute since the Unix epoch, and the average
+BINARY_RECORD = struct.Struct('<qd')
+BINARY_DTYPE = [('minute', '<i8'), ('average_delivery_time', '<f8')]
+
+
+def result_fields(average_duration: Any) -> Dict[str, Any]:
+    """
+    Gets the fields of a result: the average, or the fields of a window with other aggregates.
+
+    Args:
+        average_duration (Any): The result of the window.
+
+    Returns:
+        Dict[str, Any]: The fields, by name.
+    """
+    if isinstance(average_duration, dict) and AVERAGE_FIELD in average_duration:
+        return average_duration
+    return {AVERAGE_FIELD: average_duration}
+
+
+def encode_result(average_duration: Any) -> str:
+    """
+    Encodes the fields of a result, like json.dumps encodes them inside of an object.
+
+    Args:
+        average_duration (Any): The result of the window.
+
+    Returns:
+        str: The fields, like '"average_delivery_time": 20.0'.
+    """
+    if isinstance(average_duration, float) and average_duration - average_duration == 0:
+        # a finite float, which json.dumps encodes with its repr
+        return f'"{AVERAGE_FIELD}": {float.__repr__(average_duration)}'
+    return ', '.join(f'{json.dumps(name)}: {json.dumps(value)}'
+                     for name, value in result_fields(average_duration).items())
+
+
+class NdjsonEncoder(IResultEncoder):
+    """
+    Encodes the results as JSON objects, one per line, exactly like json.dumps would, but from a template:
+    the fields are encoded once per call, instead of once per minute, and the dates come from a MinuteFormatter.
+
+    Args:
+        fields (Optional[Dict[str, Any]]): The extra fields added to every record, like the key of a group.
+        step (int): The step between two consecutive results, in microseconds. Defaults to a minute.
+            The results of a step shorter than a minute are dated with their seconds.
+
+    Attributes:
+        fields (Dict[str, Any]): The extra fields added to every record.
+        step (int): The step between two consecutive results, in microseconds.
+        formatter (MinuteFormatter): Formats the dates.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, Any]] = None, step: int = MICROSECONDS_PER_MINUTE):
+        self.fields: Dict[str, Any] = fields or {}
+        self._encoded_fields: str = ''.join(
+            f', {json.dumps(name)}: {json.dumps(value)}' for name, value in self.fields.items()
+        )
+        self.step: int = step
+        self.formatter: MinuteFormatter = create_step_formatter(step)
+
+    def encode_minutes(self, minute: int, result: Any, count: int) -> List[str]:
+        """
+        Encodes the same result for `count` consecutive minutes.
+
+        Args:
+            minute (int): The first minute, in microseconds since the Unix epoch.
+            result (Any): The result of those minutes.
+            count (int): The number of minutes.
+
+        Returns:
+            List[str]: The records, like '{"date": "2018-12-26 18:11:00", "average_delivery_time": 20.0}'.
+        """
+        suffix = f'"{self._encoded_fields}, {encode_result(result)}}}'
+        format_minute = self.formatter.format
+        step = self.step
+        return ['{"date": "' + format_minute(current_minute) + suffix
+                for current_minute in range(minute, minute + count * step, step)]
+
+    def encode_run(self, first_minute: int, last_minute: int, result: Any) -> List[str]:
+        """
+        Encodes a run of consecutive minutes with the same result.
+
+        Args:
+            first_minute (int): The first minute of the run, in microseconds since the Unix epoch.
+            last_minute (int): The last minute of the run.
+            result (Any): The result of the run.
+
+        Returns:
+            List[str]: The record, like '{"from": "2018-12-26 18:11:00", "to": "2018-12-26 18:15:00", ...}'.
+        """
+        format_minute = self.formatter.format
+        return [f'{{"from": "{format_minute(first_minute)}", "to": "{format_minute(last_minute)}"'
+                f'{self._encoded_fields}, {encode_result(result)}}}']
+
+
+class CsvEncoder(IResultEncoder):
+    """
+    Encodes the results as CSV, with a header before the first record:
+        date,average_delivery_time
+        2018-12-26 18:11:00,20.0
+    The columns of the result depend on the window: the averages by size of a MultiWindow are in
+    columns like average_delivery_time_10, and the other aggregates of a window in their own columns.
+
+    Args:
+        fields (Optional[Dict[str, Any]]): The extra fields added to every record, like the key of a group.
+        step (int): The step between two consecutive results, in microseconds. Defaults to a minute.
+
+    Attributes:
+        fields (Dict[str, Any]): The extra fields added to every record.
+        step (int): The step between two consecutive results, in microseconds.
+        formatter (MinuteFormatter): Formats the dates.
+        columns (Optional[List[str]]): The columns of the results, once the first one is encoded.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, Any]] = None, step: int = MICROSECONDS_PER_MINUTE):
+        self.fields: Dict[str, Any] = fields or {}
+        self._encoded_fields: str = ''.join(',' + _csv_line(value) for value in self.fields.values())
+        self.step: int = step
+        self.formatter: MinuteFormatter = create_step_formatter(step)
+        self.columns: Optional[List[str]] = None
+
+    def encode_minutes(self, minute: int, result: Any, count: int) -> List[str]:
+        """
+        Encodes the same result for `count` consecutive minutes, after the header if they are the first ones.
+
+        Args:
+            minute (int): The first minute, in microseconds since the Unix epoch.
+            result (Any): The result of those minutes.
+            count (int): The number of minutes.
+
+        Returns:
+            List[str]: The records.
+        """
+        records = self._header('date', result)
+        suffix = self._encoded_fields + self._encode_values(result)
+        format_minute = self.formatter.format
+        records.extend(format_minute(current_minute) + suffix for current_minute in
+                       range(minute, minute + count * self.step, self.step))
+        return records
+
+    def encode_run(self, first_minute: int, last_minute: int, result: Any) -> List[str]:
+        """
+        Encodes a run of consecutive minutes with the same result, after the header if it is the first one.
+
+        Args:
+            first_minute (int): The first minute of the run, in microseconds since the Unix epoch.
+            last_minute (int): The last minute of the run.
+            result (Any): The result of the run.
+
+        Returns:
+            List[str]: The records.
+        """
+        records = self._header('from,to', result)
+        records.append(f'{self.formatter.format(first_minute)},{self.formatter.format(last_minute)}'
+                       f'{self._encoded_fields}{self._encode_values(result)}')
+        return records
+
+    def _header(self, time_columns: str, result: Any) -> List[str]:
+        """
+        Builds the header, if nothing was encoded yet.
+
+        Args:
+            time_columns (str): The columns of the time of a record.
+            result (Any): The first result, which gives the columns of the results.
+
+        Returns:
+            List[str]: The header, or nothing if it was already written.
+        """
+        if self.columns is not None:
+            return []
+        self.columns = list(_csv_values(result))
+        return [','.join([time_columns, *(_csv_line(name) for name in [*self.fields, *self.columns])])]
+
+    def _encode_values(self, result: Any) -> str:
+        """
+        Encodes the values of a result, after a comma each.
+
+        Args:
+            result (Any): The result.
+
+        Returns:
+            str: The values, like ",20.0".
+
+        Raises:
+            ValueError: If the result has other columns than the first one.
+        """
+        if isinstance(result, float):
+            return ',' + float.__repr__(result)
+        values = _csv_values(result)
+        if list(values) != self.columns:
+            raise ValueError(f"The result has other columns than the header: {list(values)}")
+        return ''.join(',' + _csv_line(value) for value in values.values())
+
+
+def _csv_values(result: Any) -> Dict[str, Any]:
+    """
+    Flattens a result into the values of its CSV columns.
+
+    Args:
+        result (Any): The result of a window.
+
+    Returns:
+        Dict[str, Any]: The values, by column.
+    """
+    if isinstance(result, dict) and AVERAGE_FIELD not in result:
+        # the averages by window size
+        return {f"{AVERAGE_FIELD}_{size}": value for size, value in result.items()}
+    return result_fields(result)
+
+
+def _csv_line(value: Any) -> str:
+    """
+    Encodes a single CSV value, quoting it if needed.
+
+    Args:
+        value (Any): The value.
+
+    Returns:
+        str: The encoded value.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return json.dumps(value)
+    if isinstance(value, float):
+        return float.__repr__(value)
+    if isinstance(value, int):
+        return str(value)
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='').writerow([value])
+    return buffer.getvalue()
+
+
+class BinaryEncoder(IResultEncoder):
+    """
+    Encodes the results as fixed-width binary records of 16 bytes: the minute, as an int64 number of
+    minutes since the Unix epoch, and the average, as a float64, both in little-endian.
+
+    There are no headers nor separators, so the records can be memory-mapped and read as an array,
+    like with numpy.memmap(path, dtype=BINARY_DTYPE). Only a single average per minute can be encoded.
+
+    Args:
+        step (int): The step between two consecutive results, in microseconds: a whole number of minutes,
+            since the records are dated by minute. Defaults to a minute.
+
+    Attributes:
+        step (int): The step between two consecutive results, in microseconds.
+
+    Raises:
+        ValueError: If the step is not a whole number of minutes.
+    """
+
+    def __init__(self, step: int = MICROSECONDS_PER_MINUTE):
+        if step % MICROSECONDS_PER_MINUTE:
+            raise ValueError("The binary format only supports steps of whole minutes")
+        self.step: int = step
+
+    def encode_minutes(self, minute: int, result: Any, count: int) -> List[bytes]:
+        """
+        Encodes the same average for `count` consecutive minutes.
+
+        Args:
+            minute (int): The first minute, in microseconds since the Unix epoch.
+            result (Any): The average of those minutes.
+            count (int): The number of minutes.
+
+        Returns:
+            List[bytes]: The records.
+
+        Raises:
+            ValueError: If the result is not a single average.
+        """
+        if isinstance(result, (dict, list)):
+            raise ValueError("The binary format only supports a single average per minute")
+        pack = BINARY_RECORD.pack
+        average = float(result)
+        first = minute // MICROSECONDS_PER_MINUTE
+        minutes = self.step // MICROSECONDS_PER_MINUTE
+        return [pack(current, average) for current in range(first, first + count * minutes, minutes)]
+
+    def encode_run(self, first_minute: int, last_minute: int, result: Any) -> List[bytes]:
+        """
+        Encodes a run of consecutive minutes with the same average, as a record per minute,
+        since the records have a fixed width.
+
+        Args:
+            first_minute (int): The first minute of the run, in microseconds since the Unix epoch.
+            last_minute (int): The last minute of the run.
+            result (Any): The average of the run.
+
+        Returns:
+            List[bytes]: The records.
+        """
+        return self.encode_minutes(first_minute, result, (last_minute - first_minute) // self.step + 1)
+
+
+def create_encoder(output_format: str, fields: Optional[Dict[str, Any]] = None,
+                   step: int = MICROSECONDS_PER_MINUTE) -> IResultEncoder:
+    """
+    Creates the encoder of an output format.
+
+    Args:
+        output_format (str): One of OUTPUT_FORMATS.
+        fields (Optional[Dict[str, Any]]): The extra fields added to every record. Not supported by the binary format.
+        step (int): The step between two consecutive results, in microseconds. Defaults to a minute.
+
+    Returns:
+        IResultEncoder: The encoder.
+
+    Raises:
+        ValueError: If the format is unknown, or the binary format is given extra fields
+            or a step shorter than a minute.
+    """
+    if output_format == 'ndjson':
+        return NdjsonEncoder(fields, step)
+    if output_format == 'csv':
+        return CsvEncoder(fields, step)
+    if output_format == 'binary':
+        if fields:
+            raise ValueError("The binary format does not support extra fields")
+        return BinaryEncoder(step)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+def read_ndjson_results(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Reads the records of an NDJSON output file.
+
+    Args:
+        path (str): The path to the file.
+
+    Yields:
+        Dict[str, Any]: The records, in order.
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_csv_results(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Reads the records of a CSV output file, with the numbers of the columns of the results as numbers.
+
+    Args:
+        path (str): The path to the file.
+
+    Yields:
+        Dict[str, Any]: The records, in order, by column.
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        for row in reader:
+            yield {column: _parse_csv_value(column, value) for column, value in zip(header, row)}
+
+
+def _parse_csv_value(column: str, value: str) -> Any:
+    """
+    Parses a CSV value: the columns of the results, which end with "_delivery_time" or a window size,
+    are numbers, or None if empty, and the others are strings.
+
+    Args:
+        column (str): The name of the column.
+        value (str): The value.
+
+    Returns:
+        Any: The parsed value.
+    """
+    if not column.startswith(AVERAGE_FIELD) and not column.endswith('_delivery_time'):
+        return value
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def read_binary_results(path: str) -> Iterator[Tuple[int, float]]:
+    """
+    Reads the records of a binary output file, through a memory map.
+
+    Args:
+        path (str): The path to the file.
+
+    Yields:
+        Tuple[int, float]: The minute, in microseconds since the Unix epoch, and its average, in order.
+
+    Raises:
+        ValueError: If the size of the file is not a multiple of the size of a record.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size % BINARY_RECORD.size:
+            raise ValueError(f"The size of {path} is not a multiple of {BINARY_RECORD.size} bytes")
+        if not size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for minute, average in BINARY_RECORD.iter_unpack(buffer):
+                yield minute * MICROSECONDS_PER_MINUTE, average
@@ -0,0 +1,166 @@
+"""
+This module contains the MinuteResultWriter class, which turns the average of each
+minute into the records written to the output sink, through an encoder of the output format.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .interfaces.i_output_sink import IOutputSink
+from .interfaces.i_result_encoder import IResultEncoder
+from .result_encoders import NdjsonEncoder
+from .timestamp import MICROSECONDS_PER_MINUTE
+
+OUTPUT_MODES = ('dense', 'runs')
+
+# a result of the calculator: the first minute, the average, and the number of consecutive minutes with it
+MinuteResult = Tuple[int, Any, int]
+
+
+class MinuteResultWriter:
+    """
+    Writes the average delivery time of each minute to an output sink.
+
+    In the 'dense' mode, there is one record per minute:
+        {"date": "2018-12-26 18:11:00", "average_delivery_time": 20.0}
+    In the 'runs' mode, consecutive minutes with the same average are merged into one record:
+        {"from": "2018-12-26 18:11:00", "to": "2018-12-26 18:15:00", "average_delivery_time": 20.0}
+    The average can also be any other JSON value, like the averages by window size of a MultiWindow:
+        {"date": "2018-12-26 18:11:00", "average_delivery_time": {"1": 20.0, "10": 25.5}}
+    The average can also come with other aggregates of the window, as a dict of fields that
+    includes the average, which are written at the top level of the record:
+        {"date": "2018-12-26 18:11:00", "average_delivery_time": 20.0, "max_delivery_time": 31}
+    Extra fields, like the key of a group, are added to every record, before the average:
+        {"date": "2018-12-26 18:11:00", "client_name": "airliberty", "average_delivery_time": 20.0}
+    Those are the records of the default NdjsonEncoder. Another encoder, like a CsvEncoder,
+    writes the same results in another format.
+
+    Args:
+        output_sink (IOutputSink): The sink where the records will be written.
+        output_mode (str): Either 'dense' or 'runs'.
+        fields (Optional[Dict[str, Any]]): The extra fields added to every record.
+        encoder (Optional[IResultEncoder]): Encodes the records. Defaults to an NdjsonEncoder of the fields.
+        step (int): The step between two consecutive results, in microseconds. Defaults to a minute,
+            and "minute" stands for the step otherwise.
+
+    Attributes:
+        output_sink (IOutputSink): The sink where the records will be written.
+        output_mode (str): Either 'dense' or 'runs'.
+        fields (Dict[str, Any]): The extra fields added to every record.
+        encoder (IResultEncoder): Encodes the records.
+        step (int): The step between two consecutive results, in microseconds.
+        run_start (Optional[int]): The first minute of the run that has not been written yet.
+        run_end (Optional[int]): The last minute of that run.
+        run_average (Any): The average delivery time of that run.
+    """
+
+    def __init__(self, output_sink: IOutputSink, output_mode: str = 'dense',
+                 fields: Optional[Dict[str, Any]] = None, encoder: Optional[IResultEncoder] = None,
+                 step: int = MICROSECONDS_PER_MINUTE):
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode: {output_mode}")
+        self.output_sink: IOutputSink = output_sink
+        self.output_mode: str = output_mode
+        self.fields: Dict[str, Any] = fields or {}
+        self.encoder: IResultEncoder = encoder or NdjsonEncoder(self.fields, step)
+        self.step: int = step
+        self.run_start: Optional[int] = None
+        self.run_end: Optional[int] = None
+        self.run_average: Any = 0.0
+
+    def write(self, minute: int, average_duration: Any, count: int = 1) -> None:
+        """
+        Writes the same average for `count` consecutive minutes.
+
+        Args:
+            minute (int): The first minute, in microseconds since the Unix epoch.
+            average_duration (Any): The average delivery time of those minutes.
+            count (int): The number of minutes.
+        """
+        last_minute = minute + (count - 1) * self.step
+        if self.output_mode == 'runs':
+            if self.run_start is not None and average_duration == self.run_average \
+                    and minute == self.run_end + self.step:
+                self.run_end = last_minute
+                return
+            self.end_run()
+            self.run_start, self.run_end, self.run_average = minute, last_minute, average_duration
+            return
+
+        write = self.output_sink.write
+        for record in self.encoder.encode_minutes(minute, average_duration, count):
+            write(record)
+
+    def flush(self) -> None:
+        """
+        Writes the pending run, if any, and flushes the output sink.
+        """
+        self.end_run()
+        self.output_sink.flush()
+
+    def end_run(self) -> None:
+        """
+        Writes the pending run, if any, so that the next minute starts a new one.
+        """
+        if self.run_start is None:
+            return
+        for record in self.encoder.encode_run(self.run_start, self.run_end, self.run_average):
+            self.output_sink.write(record)
+        self.run_start = self.run_end = None
+
+
+class ClippedResultWriter(MinuteResultWriter):
+    """
+    A MinuteResultWriter that only writes the minutes within a range, and drops the others.
+
+    Args:
+        output_sink (IOutputSink): The sink where the records will be written.
+        output_mode (str): Either 'dense' or 'runs'.
+        first_minute (int): The first minute written.
+        end_minute (int): The minute after the last one written.
+
+    Attributes:
+        first_minute (int): The first minute written.
+        end_minute (int): The minute after the last one written.
+    """
+
+    def __init__(self, output_sink: IOutputSink, output_mode: str, first_minute: int, end_minute: int):
+        super().__init__(output_sink, output_mode)
+        self.first_minute: int = first_minute
+        self.end_minute: int = end_minute
+
+    def write(self, minute: int, average_duration: Any, count: int = 1) -> None:
+        """
+        Writes the same average for the minutes within the range, out of `count` consecutive minutes.
+
+        Args:
+            minute (int): The first minute, in microseconds since the Unix epoch.
+            average_duration (Any): The average delivery time of those minutes.
+            count (int): The number of minutes.
+        """
+        end_minute = min(minute + count * MICROSECONDS_PER_MINUTE, self.end_minute)
+        minute = max(minute, self.first_minute)
+        if minute < end_minute:
+            super().write(minute, average_duration, (end_minute - minute) // MICROSECONDS_PER_MINUTE)
+
+
+class MinuteResultCollector:
+    """
+    Stands in for the MinuteResultWriter of a calculator, keeping the results in memory,
+    like the results of a chunk, sent back to the main process, or the results handed out
+    by MovingAverageCalculator.iter_results.
+
+    Attributes:
+        results (List[MinuteResult]): The results, in order.
+    """
+
+    def __init__(self):
+        self.results: List[MinuteResult] = []
+
+    def write(self, minute: int, average_duration: Any, count: int = 1) -> None:
+        self.results.append((minute, average_duration, count))
+
+    def end_run(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
@@ -0,0 +1,155 @@
+"""
+This module contains the ResumableMovingAverageCalculator class, which calculates the moving
+average delivery time like the MovingAverageCalculator, while taking checkpoints of its state,
+so that a long run can be resumed where it stopped.
+"""
+
+import json
+import mmap
+import os
+
+from .interfaces.i_checkpointable_window import ICheckpointableWindow
+
+from .checkpoint import DEFAULT_CHECKPOINT_INTERVAL, Checkpoint, CheckpointError
+from .event_reader import scan_events
+from .moving_average_calculator import MovingAverageCalculator
+from .output_sink import FileOutputSink
+from .snapshot import SnapshotReader, SnapshotWriter
+
+
+class ResumableMovingAverageCalculator(MovingAverageCalculator):
+    """
+    A MovingAverageCalculator that takes a checkpoint of its state every checkpoint_interval
+    bytes of input, at a line boundary, and can resume from the last one.
+
+    The output file is synced before each checkpoint, and its size is saved with it. When resuming,
+    the records written after the checkpoint are truncated from the output file, and the input is
+    read from the checkpoint offset, so the output is the same as the one of an uninterrupted run.
+
+    Args:
+        window (ICheckpointableWindow): The window object that holds the events, which must be able
+            to save its state.
+        output_sink (FileOutputSink): The sink where the results will be written.
+        output_mode (str): 'dense' to write one result per minute, or 'runs' to merge
+            consecutive minutes with the same average into a single result.
+        checkpoint_file (str): The path to the checkpoint file.
+        checkpoint_interval (int): The number of bytes of input read between two checkpoints.
+        resume (bool): Whether to resume from the checkpoint file, if there is one.
+
+    Attributes:
+        checkpoint_file (str): The path to the checkpoint file.
+        checkpoint_interval (int): The number of bytes of input read between two checkpoints.
+        resume (bool): Whether to resume from the checkpoint file, if there is one.
+        settings (str): The kind of window and the output mode, which must be the same when resuming.
+            The window checks its own sizes.
+
+    Raises:
+        TypeError: If the window cannot save its state, like a window with rollups.
+        ValueError: If the checkpoint interval is < 1.
+    """
+
+    def __init__(self, window: ICheckpointableWindow, output_sink: FileOutputSink, output_mode: str = 'dense',
+                 checkpoint_file: str = '', checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+                 resume: bool = False):
+        if not isinstance(window, ICheckpointableWindow):
+            raise TypeError(f"{type(window).__name__} does not support checkpoints")
+        if checkpoint_interval < 1:
+            raise ValueError("The checkpoint interval must be >= 1")
+        super().__init__(window, output_sink, output_mode)
+        self.checkpoint_file: str = checkpoint_file
+        self.checkpoint_interval: int = checkpoint_interval
+        self.resume: bool = resume
+        self.settings: str = json.dumps({"window": type(window).__name__, "output_mode": output_mode})
+
+    def _read_events(self, input_file: str) -> None:
+        """
+        Reads the events from the input file, from the last checkpoint if resuming,
+        and takes a checkpoint every checkpoint_interval bytes.
+
+        Args:
+            input_file (str): The path to the input file containing the events.
+
+        Raises:
+            CheckpointError: If the checkpoint does not match the run or its files.
+        """
+        offset = 0
+        checkpoint = Checkpoint.load(self.checkpoint_file) if self.resume else None
+        if checkpoint is not None:
+            if checkpoint.finished:
+                print("The run has already finished, there is nothing to resume")
+                return
+            self.restore_checkpoint(checkpoint, input_file)
+            offset = checkpoint.input_offset
+        else:
+            self.save_checkpoint(offset)
+
+        with open(input_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            # an empty file cannot be memory-mapped
+            if size > offset:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    while offset < size:
+                        end = buffer.find(b'\n', offset + self.checkpoint_interval - 1)
+                        end = size if end < 0 else end + 1
+                        for event in scan_events(buffer, offset, end):
+                            self.process_event(event)
+                        offset = end
+                        self.save_checkpoint(offset)
+
+        self.finish()
+        self.result_writer.flush()
+        self.save_checkpoint(offset, finished=True)
+
+    def save_checkpoint(self, input_offset: int, finished: bool = False) -> None:
+        """
+        Syncs the output file, and saves the state of the calculator to the checkpoint file.
+
+        Args:
+            input_offset (int): The offset of the first line of the input that has not been processed.
+            finished (bool): Whether the whole input has been processed.
+        """
+        writer = SnapshotWriter()
+        self.window.save_state(writer)
+        Checkpoint(
+            settings=self.settings,
+            input_offset=input_offset,
+            output_offset=self.output_sink.sync(),
+            start_time=self.start_time,
+            current_time=self.current_time,
+            last_event_time=self.last_event_time,
+            run_start=self.result_writer.run_start,
+            run_end=self.result_writer.run_end,
+            run_average=json.dumps(self.result_writer.run_average),
+            window_state=writer.getvalue(),
+            finished=finished,
+        ).save(self.checkpoint_file)
+
+    def restore_checkpoint(self, checkpoint: Checkpoint, input_file: str) -> None:
+        """
+        Restores the state of the calculator from a checkpoint, and truncates the output file to its size.
+
+        Args:
+            checkpoint (Checkpoint): The checkpoint.
+            input_file (str): The path to the input file containing the events.
+
+        Raises:
+            CheckpointError: If the checkpoint does not match the run or its files.
+        """
+        if checkpoint.settings != self.settings:
+            raise CheckpointError("The checkpoint was taken with other settings.")
+        if os.path.getsize(input_file) < checkpoint.input_offset:
+            raise CheckpointError("The input file is smaller than when the checkpoint was taken.")
+        try:
+            reader = SnapshotReader(checkpoint.window_state)
+            self.window.load_state(reader)
+            reader.read_end()
+            self.output_sink.truncate(checkpoint.output_offset)
+        except ValueError as error:
+            raise CheckpointError(f"The checkpoint does not match the run: {error}.") from error
+
+        self.start_time = checkpoint.start_time
+        self.current_time = checkpoint.current_time
+        self.last_event_time = checkpoint.last_event_time
+        self.result_writer.run_start = checkpoint.run_start
+        self.result_writer.run_end = checkpoint.run_end
+        self.result_writer.run_average = json.loads(checkpoint.run_average)
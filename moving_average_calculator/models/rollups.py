@@ -0,0 +1,215 @@
+"""
+This module contains the rollups, which aggregate the events into coarser periods than the step
+of the calculator, like hourly or daily averages for reporting, in the same pass as the moving average.
+
+The events are only added to the bucket of their step, a count and a sum of durations. Once a step
+ends, its bucket is added to the first rollup, once a period of that rollup ends, it is added to
+the next one, and so on: each resolution is built from the aggregates of the finer one, so the
+events are never scanned again, and the memory is a bucket per resolution.
+"""
+
+import json
+from typing import Any, List, Optional, Sequence
+
+from .interfaces.i_output_sink import IOutputSink
+from .interfaces.i_window import IWindow
+
+from .event import Event
+from .timestamp import MinuteFormatter, create_step_formatter, format_duration
+
+
+class RollupPeriod:
+    """
+    The current period of a resolution of the rollups.
+
+    Args:
+        period (int): The length of the periods, in microseconds.
+
+    Attributes:
+        period (int): The length of the periods, in microseconds.
+        resolution (str): That length, formatted like "1h".
+        formatter (MinuteFormatter): Formats the start of the periods.
+        start (Optional[int]): The start of the current period, or None before the first event.
+        count (int): The number of events of the current period.
+        total_duration (int): The total duration of the events of the current period.
+    """
+
+    __slots__ = ('period', 'resolution', 'formatter', 'start', 'count', 'total_duration')
+
+    def __init__(self, period: int):
+        self.period: int = period
+        self.resolution: str = format_duration(period)
+        self.formatter: MinuteFormatter = create_step_formatter(period)
+        self.start: Optional[int] = None
+        self.count: int = 0
+        self.total_duration: int = 0
+
+
+class Rollups:
+    """
+    Aggregates the events into periods of several resolutions, each built from the finer one,
+    and writes a record per period once it has ended, with the number of events and their average:
+        {"date": "2018-12-26 18:00:00", "resolution": "1h", "events": 3, "average_delivery_time": 35.0}
+
+    The periods of each resolution are written in order, without gaps: a period without events has
+    an average of 0, like an empty window. The events are expected in order; an older event is
+    added to the current step, like the BucketedWindow does.
+
+    Args:
+        step (int): The step of the calculator, in microseconds, which is the finest bucket.
+        periods (Sequence[int]): The lengths of the periods of each resolution, in microseconds, like an hour
+            and a day. Each must be a multiple of the step, and of the shorter ones.
+        output_sink (IOutputSink): The sink where the records will be written.
+
+    Attributes:
+        step (int): The step of the calculator, in microseconds.
+        periods (List[RollupPeriod]): The current period of each resolution, from the finest one.
+        output_sink (IOutputSink): The sink where the records will be written.
+        step_start (Optional[int]): The start of the current step, or None before the first event.
+        step_end (Optional[int]): The end of the current step, or None before the first event.
+        count (int): The number of events of the current step.
+        total_duration (int): The total duration of the events of the current step.
+
+    Raises:
+        ValueError: If there are no periods, or a period is not a multiple of the step and of the shorter ones.
+    """
+
+    def __init__(self, step: int, periods: Sequence[int], output_sink: IOutputSink):
+        periods = sorted(set(periods))
+        if not periods:
+            raise ValueError("At least one rollup period is required")
+        for finer, period in zip([step, *periods], periods):
+            if period % finer:
+                raise ValueError(f"The rollup period {format_duration(period)} is not a multiple "
+                                 f"of {format_duration(finer)}")
+        self.step: int = step
+        self.periods: List[RollupPeriod] = [RollupPeriod(period) for period in periods]
+        self.output_sink: IOutputSink = output_sink
+        self.step_start: Optional[int] = None
+        self.step_end: Optional[int] = None
+        self.count: int = 0
+        self.total_duration: int = 0
+
+    def add_event(self, event: Event) -> None:
+        """
+        Adds an event to the bucket of its step, rolling the previous step up if it has ended.
+
+        Args:
+            event (Event): The event.
+        """
+        timestamp = event.timestamp
+        if self.step_end is None or timestamp >= self.step_end:
+            if self.step_start is not None:
+                self._add(0, self.step_start, self.count, self.total_duration)
+            self.step_start = timestamp - timestamp % self.step
+            self.step_end = self.step_start + self.step
+            self.count = 0
+            self.total_duration = 0
+        self.count += 1
+        self.total_duration += event.duration
+
+    def finish(self) -> None:
+        """
+        Rolls up the last step, writes the last period of every resolution, and flushes the output sink.
+        """
+        if self.step_start is not None:
+            self._add(0, self.step_start, self.count, self.total_duration)
+            self.step_start = self.step_end = None
+            for level in range(len(self.periods)):
+                self._close(level, None)
+        self.output_sink.flush()
+
+    def _add(self, level: int, start: int, count: int, total_duration: int) -> None:
+        """
+        Adds the aggregates of a finer bucket to the period of a resolution, closing the current period
+        if the bucket is in a later one.
+
+        Args:
+            level (int): The index of the resolution.
+            start (int): The start of the finer bucket, in microseconds since the Unix epoch.
+            count (int): The number of events of the bucket.
+            total_duration (int): The total duration of the events of the bucket.
+        """
+        rollup = self.periods[level]
+        period_start = start - start % rollup.period
+        if rollup.start is None:
+            rollup.start = period_start
+        elif period_start > rollup.start:
+            self._close(level, period_start)
+        rollup.count += count
+        rollup.total_duration += total_duration
+
+    def _close(self, level: int, next_start: Optional[int]) -> None:
+        """
+        Writes the current period of a resolution, and the empty ones up to the next period,
+        and adds it to the coarser resolution.
+
+        Args:
+            level (int): The index of the resolution.
+            next_start (Optional[int]): The start of the next period with events, or None at the end.
+        """
+        rollup = self.periods[level]
+        self._write(rollup, rollup.start, rollup.count, rollup.total_duration)
+        coarser = level + 1 < len(self.periods)
+        if coarser:
+            self._add(level + 1, rollup.start, rollup.count, rollup.total_duration)
+        if next_start is not None:
+            for start in range(rollup.start + rollup.period, next_start, rollup.period):
+                self._write(rollup, start, 0, 0)
+            if coarser:
+                # the coarser periods before the next one have ended too
+                self._add(level + 1, next_start, 0, 0)
+        rollup.start = next_start
+        rollup.count = 0
+        rollup.total_duration = 0
+
+    def _write(self, rollup: RollupPeriod, start: int, count: int, total_duration: int) -> None:
+        """
+        Writes the record of a period.
+
+        Args:
+            rollup (RollupPeriod): The resolution.
+            start (int): The start of the period, in microseconds since the Unix epoch.
+            count (int): The number of events of the period.
+            total_duration (int): The total duration of those events.
+        """
+        self.output_sink.write(json.dumps({
+            "date": rollup.formatter.format(start),
+            "resolution": rollup.resolution,
+            "events": count,
+            "average_delivery_time": total_duration / count if count else 0.0,
+        }))
+
+
+class RollupWindow(IWindow):
+    """
+    Wraps a window, adding its events to the rollups too, so that the calculator computes both
+    in the same pass, and does not pay for the rollups when there are none.
+
+    Args:
+        window (IWindow): The window.
+        rollups (Rollups): The rollups.
+    """
+
+    def __init__(self, window: IWindow, rollups: Rollups):
+        self.window: IWindow = window
+        self.rollups: Rollups = rollups
+
+    def add_event(self, event: Event) -> None:
+        self.window.add_event(event)
+        self.rollups.add_event(event)
+
+    def remove_old_events(self, current_time: int) -> None:
+        self.window.remove_old_events(current_time)
+
+    def get_average_duration(self) -> float:
+        return self.window.get_average_duration()
+
+    def get_result(self) -> Any:
+        return self.window.get_result()
+
+    def next_expiration_time(self) -> Optional[int]:
+        return self.window.next_expiration_time()
+
+    def event_count(self) -> int:
+        return self.window.event_count()
@@ -0,0 +1,279 @@
+"""
+This module contains the SnapshotWriter and SnapshotReader classes, which encode the state
+of the calculators into a compact binary format, for the checkpoints of long runs.
+
+Integers are stored as little-endian int64, and the events of a window as two packed
+arrays, one with the timestamps and one with the durations, so that even a large
+window is written with a couple of bulk copies.
+"""
+
+import struct
+import sys
+from array import array
+from operator import attrgetter
+from typing import Any, Iterable, List, Optional, Sequence
+
+from .event import Event
+
+_INT = struct.Struct('<q')
+_FLOAT = struct.Struct('<d')
+_LENGTH = struct.Struct('<Q')
+
+# read the slots of the events directly, which is about three times faster than through their properties
+_timestamp = attrgetter('_timestamp')
+_duration = attrgetter('_duration')
+
+# the arrays are stored in little-endian order, like the other values
+_SWAP_BYTES = sys.byteorder == 'big'
+
+# the type codes of the numbers, which can either be integers or floats, like the durations in the input
+_INT_CODE = b'q'
+_FLOAT_CODE = b'd'
+
+
+class SnapshotWriter:
+    """
+    Encodes values into a binary snapshot.
+
+    Attributes:
+        parts (List[bytes]): The encoded values, in order.
+    """
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+
+    def write_int(self, value: int) -> None:
+        """
+        Encodes an int64.
+
+        Args:
+            value (int): The integer.
+        """
+        self.parts.append(_INT.pack(value))
+
+    def write_optional_int(self, value: Optional[int]) -> None:
+        """
+        Encodes an integer that can be None, with a flag before it.
+
+        Args:
+            value (Optional[int]): The integer, or None.
+        """
+        if value is None:
+            self.parts.append(b'\x00')
+        else:
+            self.parts.append(b'\x01')
+            self.write_int(value)
+
+    def write_number(self, value: Any) -> None:
+        """
+        Encodes an integer or a float, keeping its type.
+
+        Args:
+            value (Any): The number. An integer too large for an int64 is stored as a float.
+        """
+        if isinstance(value, int):
+            try:
+                self.parts.append(_INT_CODE + _INT.pack(value))
+                return
+            except struct.error:
+                # too large for an int64
+                pass
+        self.parts.append(_FLOAT_CODE + _FLOAT.pack(value))
+
+    def write_bytes(self, value: bytes) -> None:
+        """
+        Encodes a sequence of bytes, with its length before it.
+
+        Args:
+            value (bytes): The bytes.
+        """
+        self.parts.append(_LENGTH.pack(len(value)))
+        self.parts.append(value)
+
+    def write_str(self, value: str) -> None:
+        """
+        Encodes a string, as its UTF-8 bytes.
+
+        Args:
+            value (str): The string.
+        """
+        self.write_bytes(value.encode('utf-8'))
+
+    def write_ints(self, values: Sequence[int]) -> None:
+        """
+        Encodes integers, as an array of int64.
+
+        Args:
+            values (Sequence[int]): The integers.
+        """
+        self.write_array(array('q', values))
+
+    def write_array(self, values: array) -> None:
+        """
+        Encodes an array of numbers, with its type code before it.
+
+        Args:
+            values (array): An array of type 'q' or 'd'.
+        """
+        if _SWAP_BYTES:
+            values = array(values.typecode, values)
+            values.byteswap()
+        self.parts.append(values.typecode.encode('ascii'))
+        self.write_bytes(values.tobytes())
+
+    def write_events(self, events: Iterable[Event]) -> None:
+        """
+        Encodes events, as an array of timestamps and an array of durations.
+        The durations are stored as integers when they all are, and as floats otherwise.
+
+        Args:
+            events (Iterable[Event]): The events.
+        """
+        events = list(events)
+        self.write_ints(list(map(_timestamp, events)))
+        durations = list(map(_duration, events))
+        try:
+            packed = array('q', durations)
+        except (TypeError, OverflowError):
+            packed = array('d', durations)
+        self.write_array(packed)
+
+    def getvalue(self) -> bytes:
+        """
+        Gets the snapshot.
+
+        Returns:
+            bytes: The encoded values.
+        """
+        return b''.join(self.parts)
+
+
+class SnapshotReader:
+    """
+    Decodes the values of a binary snapshot, in the order they were written.
+
+    Args:
+        data (bytes): The snapshot.
+
+    Attributes:
+        data (memoryview): The snapshot.
+        offset (int): The position of the next value.
+
+    Raises:
+        ValueError: When reading past the end of the snapshot, or an unknown type code.
+    """
+
+    def __init__(self, data: bytes):
+        self.data: memoryview = memoryview(data)
+        self.offset: int = 0
+
+    def _take(self, size: int) -> memoryview:
+        if self.offset + size > len(self.data):
+            raise ValueError("The snapshot is truncated")
+        value = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return value
+
+    def read_int(self) -> int:
+        """
+        Decodes an int64.
+
+        Returns:
+            int: The integer.
+        """
+        return _INT.unpack(self._take(_INT.size))[0]
+
+    def read_optional_int(self) -> Optional[int]:
+        """
+        Decodes an integer that can be None.
+
+        Returns:
+            Optional[int]: The integer, or None.
+        """
+        if self._take(1)[0]:
+            return self.read_int()
+        return None
+
+    def read_number(self) -> Any:
+        """
+        Decodes an integer or a float.
+
+        Returns:
+            Any: The number, with the type it was written with.
+        """
+        code = bytes(self._take(1))
+        if code == _INT_CODE:
+            return self.read_int()
+        if code == _FLOAT_CODE:
+            return _FLOAT.unpack(self._take(_FLOAT.size))[0]
+        raise ValueError(f"Unknown number type in the snapshot: {code!r}")
+
+    def read_bytes(self) -> bytes:
+        """
+        Decodes a sequence of bytes.
+
+        Returns:
+            bytes: The bytes.
+        """
+        length = _LENGTH.unpack(self._take(_LENGTH.size))[0]
+        return bytes(self._take(length))
+
+    def read_str(self) -> str:
+        """
+        Decodes a string.
+
+        Returns:
+            str: The string.
+        """
+        return self.read_bytes().decode('utf-8')
+
+    def read_ints(self) -> List[int]:
+        """
+        Decodes an array of integers.
+
+        Returns:
+            List[int]: The integers.
+        """
+        values = self.read_array()
+        if values.typecode != 'q':
+            raise ValueError("Expected an array of integers in the snapshot")
+        return values.tolist()
+
+    def read_array(self) -> array:
+        """
+        Decodes an array of numbers.
+
+        Returns:
+            array: The array, of type 'q' or 'd'.
+        """
+        typecode = bytes(self._take(1)).decode('ascii')
+        if typecode not in ('q', 'd'):
+            raise ValueError(f"Unknown array type in the snapshot: {typecode!r}")
+        values = array(typecode)
+        values.frombytes(self.read_bytes())
+        if _SWAP_BYTES:
+            values.byteswap()
+        return values
+
+    def read_events(self) -> List[Event]:
+        """
+        Decodes events.
+
+        Returns:
+            List[Event]: The events.
+        """
+        timestamps = self.read_ints()
+        durations = self.read_array()
+        if len(durations) != len(timestamps):
+            raise ValueError("The snapshot has a different number of timestamps and durations")
+        return list(map(Event.from_epoch, timestamps, durations.tolist()))
+
+    def read_end(self) -> None:
+        """
+        Checks that every value of the snapshot was read.
+
+        Raises:
+            ValueError: If there is data left.
+        """
+        if self.offset != len(self.data):
+            raise ValueError("The snapshot has unexpected data at its end")
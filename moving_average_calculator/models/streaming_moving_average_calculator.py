@@ -0,0 +1,353 @@
+"""
+This module contains the StreamingMovingAverageCalculator class, which calculates the moving
+average delivery time of a live feed of events, like a growing log file or the stdin.
+"""
+
+import asyncio
+import os
+import signal
+import stat
+import sys
+import time
+from typing import BinaryIO, List, Optional
+
+from .interfaces.i_moving_average_calculator import IMovingAverageCalculator
+from .interfaces.i_output_sink import IOutputSink
+from .interfaces.i_window import IWindow
+
+from .event_reader import INVALID_LINE_ERRORS, parse_event, report_invalid_line
+from .moving_average_calculator import MovingAverageCalculator
+from .timestamp import MICROSECONDS_PER_SECOND
+
+# the input file name that stands for the stdin
+STDIN = '-'
+
+# the maximum number of lines read ahead of the calculator
+LINE_QUEUE_SIZE = 1000
+
+
+class PendingOutputSink(IOutputSink):
+    """
+    Keeps the records written by the calculator in memory, until they are handed to the writer task.
+
+    Attributes:
+        records (List[str]): The records that have not been handed over yet.
+    """
+
+    def __init__(self):
+        self.records: List[str] = []
+
+    def write(self, record: str) -> None:
+        self.records.append(record)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def take(self) -> List[str]:
+        """
+        Takes the pending records, leaving the sink empty.
+
+        Returns:
+            List[str]: The pending records, in order.
+        """
+        records, self.records = self.records, []
+        return records
+
+
+class StreamingMovingAverageCalculator(IMovingAverageCalculator):
+    """
+    A class that calculates the moving average delivery time of a live feed of events.
+
+    The input is tailed, so the lines appended to the file are processed as they arrive,
+    until the process gets a SIGTERM (or a SIGINT). The stdin is read until it is closed.
+    The minutes are calculated by a MovingAverageCalculator, so they are written as soon
+    as they are complete, that is, once an event arrives after them. When the feed is idle
+    for more than the idle timeout, the event time is assumed to go on with the wall clock
+    since the last event, and the minutes before it are written too. The events older than
+    the previous one are skipped, since they would break the order of the window.
+
+    The records are written by a separate task, in a thread, so that a slow output does not
+    block the event loop. At most max_pending_batches batches of records wait for it: when
+    they are all taken, the calculator waits too, which stops the reading of the input.
+
+    On shutdown, the remaining minutes, up to the minute after the last event, are written
+    and the output sink is flushed.
+
+    Args:
+        window (IWindow): The window object that holds the events.
+        output_sink (IOutputSink): The sink where the results will be written.
+        output_mode (str): 'dense' to write one result per minute, or 'runs' to merge
+            consecutive minutes with the same average into a single result.
+        idle_timeout (float): The number of seconds without events after which the idle minutes are written.
+        poll_interval (float): The number of seconds to wait before checking for new lines at the end of the file.
+        max_pending_batches (int): The maximum number of batches of records waiting to be written.
+        follow (bool): Whether to wait for new lines at the end of the input file, instead of stopping.
+
+    Attributes:
+        calculator (MovingAverageCalculator): Calculates the minutes, writing them to the pending records.
+        pending (PendingOutputSink): The records written by the calculator that have not been handed over yet.
+        output_sink (IOutputSink): The sink where the results will be written.
+        idle_timeout (float): The number of seconds without events after which the idle minutes are written.
+        poll_interval (float): The number of seconds to wait before checking for new lines.
+        max_pending_batches (int): The maximum number of batches of records waiting to be written.
+        follow (bool): Whether to wait for new lines at the end of the input file.
+        last_arrival (Optional[float]): The monotonic time when the last event arrived.
+        stopping (Optional[asyncio.Event]): Set when the calculator is asked to shut down.
+    """
+
+    def __init__(self, window: IWindow, output_sink: IOutputSink, output_mode: str = 'dense',
+                 idle_timeout: float = 60.0, poll_interval: float = 0.5, max_pending_batches: int = 16,
+                 follow: bool = True):
+        if idle_timeout <= 0 or poll_interval <= 0:
+            raise ValueError("The idle timeout and the poll interval must be > 0")
+        if max_pending_batches < 1:
+            raise ValueError("The maximum number of pending batches must be >= 1")
+        self.pending: PendingOutputSink = PendingOutputSink()
+        self.calculator: MovingAverageCalculator = MovingAverageCalculator(window, self.pending, output_mode)
+        self.output_sink: IOutputSink = output_sink
+        self.idle_timeout: float = idle_timeout
+        self.poll_interval: float = poll_interval
+        self.max_pending_batches: int = max_pending_batches
+        self.follow: bool = follow
+        self.last_arrival: Optional[float] = None
+        self.stopping: Optional[asyncio.Event] = None
+
+    def process_and_print_event(self) -> None:
+        """
+        Process the events in the window and print the average delivery time for the current time.
+
+        Returns:
+            None
+
+        """
+        self.calculator.process_and_print_event()
+
+    def process_events(self, input_file: str) -> None:
+        """
+        Process the events of the input file as they arrive, until it is closed or the process is stopped.
+
+        Args:
+            input_file (str): The path to the input file containing the events, or "-" for the stdin.
+
+        Returns:
+            None
+
+        """
+        asyncio.run(self.run(input_file))
+
+    def stop(self) -> None:
+        """
+        Asks the calculator to shut down, writing the remaining minutes.
+
+        Returns:
+            None
+
+        """
+        if self.stopping is not None:
+            self.stopping.set()
+
+    async def run(self, input_file: str) -> None:
+        """
+        Reads, processes and writes the events of the input file, until it is closed or the calculator is stopped.
+
+        Args:
+            input_file (str): The path to the input file containing the events, or "-" for the stdin.
+        """
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        handled_signals = []
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, self.stop)
+                handled_signals.append(signum)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # there are no signal handlers on Windows, nor outside of the main thread
+                pass
+
+        lines: 'asyncio.Queue[Optional[bytes]]' = asyncio.Queue(LINE_QUEUE_SIZE)
+        batches: 'asyncio.Queue[Optional[List[str]]]' = asyncio.Queue(self.max_pending_batches)
+        reader = asyncio.ensure_future(self._read_lines(input_file, lines))
+        writer = asyncio.ensure_future(self._write_batches(batches))
+        stopping = asyncio.ensure_future(self.stopping.wait())
+        try:
+            while not stopping.done():
+                next_line = asyncio.ensure_future(lines.get())
+                await asyncio.wait({next_line, stopping, reader}, timeout=self.idle_timeout,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if not next_line.done():
+                    next_line.cancel()
+                    if reader.done():
+                        # the reader ends after putting the last None, unless it fails
+                        reader.result()
+                    elif not stopping.done():
+                        self._process_idle_minutes()
+                else:
+                    line = next_line.result()
+                    if line is None:
+                        break
+                    self._process_line(line)
+                await self._hand_over(batches, writer)
+        finally:
+            reader.cancel()
+            stopping.cancel()
+            for signum in handled_signals:
+                loop.remove_signal_handler(signum)
+            try:
+                self.calculator.finish()
+                self.calculator.result_writer.flush()
+            finally:
+                # whatever happens, do not lose the results that are still pending
+                if not writer.done():
+                    await self._hand_over(batches, writer)
+                    await self._put_batch(batches, writer, None)
+                await writer
+
+    def _process_line(self, line: bytes) -> None:
+        """
+        Parses a line and feeds its event to the calculator.
+
+        Args:
+            line (bytes): The line read from the input.
+        """
+        try:
+            event = parse_event(line.decode('utf-8'))
+        except INVALID_LINE_ERRORS:
+            report_invalid_line()
+            return
+
+        last_event_time = self.calculator.last_event_time
+        if last_event_time is not None and event.timestamp < last_event_time:
+            print("Error: Event older than the previous one, skipping...", file=sys.stderr)
+            return
+
+        self.calculator.process_event(event)
+        self.last_arrival = time.monotonic()
+
+    def _process_idle_minutes(self) -> None:
+        """
+        Writes the minutes that have passed since the last event, going by the wall clock.
+        """
+        if self.calculator.last_event_time is None:
+            return
+        idle_time = round((time.monotonic() - self.last_arrival) * MICROSECONDS_PER_SECOND)
+        self.calculator.process_and_print_events_until(self.calculator.last_event_time + idle_time)
+
+    async def _hand_over(self, batches: 'asyncio.Queue[Optional[List[str]]]', writer: 'asyncio.Future') -> None:
+        """
+        Hands the pending records over to the writer task, waiting while too many batches are pending.
+
+        Args:
+            batches (asyncio.Queue[Optional[List[str]]]): The batches of records waiting to be written.
+            writer (asyncio.Future): The writer task.
+        """
+        records = self.pending.take()
+        if records:
+            await self._put_batch(batches, writer, records)
+
+    @staticmethod
+    async def _put_batch(batches: 'asyncio.Queue[Optional[List[str]]]', writer: 'asyncio.Future',
+                         batch: Optional[List[str]]) -> None:
+        """
+        Puts a batch in the queue of the writer task, unless the writer task fails while waiting for room.
+
+        Args:
+            batches (asyncio.Queue[Optional[List[str]]]): The batches of records waiting to be written.
+            writer (asyncio.Future): The writer task.
+            batch (Optional[List[str]]): The batch of records, or None to stop the writer task.
+
+        Raises:
+            Exception: The error of the writer task, if it failed.
+        """
+        put = asyncio.ensure_future(batches.put(batch))
+        await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            writer.result()
+
+    async def _write_batches(self, batches: 'asyncio.Queue[Optional[List[str]]]') -> None:
+        """
+        Writes the batches of records to the output sink, in a thread, until it gets None.
+
+        Args:
+            batches (asyncio.Queue[Optional[List[str]]]): The batches of records waiting to be written.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            records = await batches.get()
+            if records is None:
+                return
+            await loop.run_in_executor(None, self._write_records, records)
+
+    def _write_records(self, records: List[str]) -> None:
+        """
+        Writes a batch of records to the output sink, and flushes it, so that they are seen right away.
+
+        Args:
+            records (List[str]): The records, in order.
+        """
+        for record in records:
+            self.output_sink.write(record)
+        self.output_sink.flush()
+
+    async def _read_lines(self, input_file: str, lines: 'asyncio.Queue[Optional[bytes]]') -> None:
+        """
+        Reads the lines of the input, and puts them in the queue, followed by None once the input ends.
+
+        Args:
+            input_file (str): The path to the input file, or "-" for the stdin.
+            lines (asyncio.Queue[Optional[bytes]]): The lines waiting to be processed.
+        """
+        if input_file != STDIN:
+            with open(input_file, 'rb') as f:
+                await self._tail_file(f, self.follow, lines)
+        elif stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode):
+            # a regular file redirected to the stdin cannot be read as a pipe, and does not grow
+            with open(sys.stdin.fileno(), 'rb', closefd=False) as f:
+                await self._tail_file(f, False, lines)
+        else:
+            await self._read_pipe(lines)
+        await lines.put(None)
+
+    async def _tail_file(self, f: BinaryIO, follow: bool, lines: 'asyncio.Queue[Optional[bytes]]') -> None:
+        """
+        Reads the lines of a file, waiting for more at its end if it is followed.
+
+        Args:
+            f (BinaryIO): The input file, opened in binary mode.
+            follow (bool): Whether to wait for new lines at the end of the file, instead of stopping.
+            lines (asyncio.Queue[Optional[bytes]]): The lines waiting to be processed.
+        """
+        partial_line = b''
+        while True:
+            line = f.readline()
+            if not line.endswith(b'\n') and follow:
+                # the rest of the line has not been written yet
+                partial_line += line
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if not line:
+                break
+            await lines.put(partial_line + line)
+            partial_line = b''
+        if partial_line:
+            await lines.put(partial_line)
+
+    async def _read_pipe(self, lines: 'asyncio.Queue[Optional[bytes]]') -> None:
+        """
+        Reads the lines of the stdin, until it is closed. While the queue is full, the stdin
+        is not read, so the process writing to it is slowed down too.
+
+        Args:
+            lines (asyncio.Queue[Optional[bytes]]): The lines waiting to be processed.
+        """
+        loop = asyncio.get_running_loop()
+        stream = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(stream), sys.stdin)
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            await lines.put(line)
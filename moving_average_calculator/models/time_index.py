@@ -0,0 +1,190 @@
+"""
+This module contains the TimeIndex class, a sidecar index of an input file that maps
+each minute to the offset of its first event, so that a range of minutes can be
+calculated without reading the whole file.
+"""
+
+import mmap
+import os
+from bisect import bisect_left
+from typing import List, Optional
+
+from .event_reader import scan_event_offsets
+from .snapshot import SnapshotReader, SnapshotWriter
+from .timestamp import floor_to_minute
+
+# the first bytes of an index file, followed by the version of its format
+INDEX_MAGIC = b'MAIDX'
+INDEX_VERSION = 1
+
+
+def default_index_file(input_file: str) -> str:
+    """
+    Builds the default index file name, by appending the ".index" suffix to the input file name.
+
+    Args:
+        input_file (str): Path to the input file.
+
+    Returns:
+        str: Path to the index file.
+    """
+    return f"{input_file}.index"
+
+
+class TimeIndex:
+    """
+    Maps the minutes of a sorted input file to the offset of the line of their first event.
+
+    The index keeps the size and the modification time of the input file it was built from,
+    so that it is ignored, and built again, once the file changes.
+
+    Args:
+        minutes (List[int]): The minutes with events, in ascending order.
+        offsets (List[int]): The offset of the first event of each of those minutes.
+        input_size (int): The size of the input file, in bytes.
+        input_mtime (int): The modification time of the input file, in nanoseconds.
+
+    Attributes:
+        minutes (List[int]): The minutes with events, in ascending order.
+        offsets (List[int]): The offset of the first event of each of those minutes.
+        input_size (int): The size of the input file, in bytes.
+        input_mtime (int): The modification time of the input file, in nanoseconds.
+
+    All the times are in microseconds since the Unix epoch.
+    """
+
+    def __init__(self, minutes: List[int], offsets: List[int], input_size: int, input_mtime: int):
+        self.minutes: List[int] = minutes
+        self.offsets: List[int] = offsets
+        self.input_size: int = input_size
+        self.input_mtime: int = input_mtime
+
+    @classmethod
+    def build(cls, input_file: str) -> Optional['TimeIndex']:
+        """
+        Builds the index of an input file, reading it once.
+
+        Args:
+            input_file (str): The path to the input file.
+
+        Returns:
+            Optional[TimeIndex]: The index, or None if the events of the file are not sorted.
+        """
+        minutes: List[int] = []
+        offsets: List[int] = []
+        with open(input_file, 'rb') as f:
+            status = os.fstat(f.fileno())
+            # an empty file cannot be memory-mapped
+            if status.st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    last_minute = None
+                    for offset, event in scan_event_offsets(buffer):
+                        minute = floor_to_minute(event.timestamp)
+                        if minute == last_minute:
+                            continue
+                        if last_minute is not None and minute < last_minute:
+                            return None
+                        minutes.append(minute)
+                        offsets.append(offset)
+                        last_minute = minute
+        return cls(minutes, offsets, status.st_size, status.st_mtime_ns)
+
+    def is_valid_for(self, input_file: str) -> bool:
+        """
+        Checks whether the input file is still the one the index was built from.
+
+        Args:
+            input_file (str): The path to the input file.
+
+        Returns:
+            bool: Whether the index can be used.
+        """
+        status = os.stat(input_file)
+        return (status.st_size, status.st_mtime_ns) == (self.input_size, self.input_mtime)
+
+    def find(self, time: int) -> int:
+        """
+        Finds the offset of the first event that is not older than the minute of a time.
+
+        Args:
+            time (int): The time, in microseconds since the Unix epoch.
+
+        Returns:
+            int: The offset, or the size of the input file if every event is older.
+        """
+        position = bisect_left(self.minutes, floor_to_minute(time))
+        if position == len(self.offsets):
+            return self.input_size
+        return self.offsets[position]
+
+    def save(self, index_file: str) -> None:
+        """
+        Writes the index to a file.
+
+        Args:
+            index_file (str): The path to the index file.
+        """
+        writer = SnapshotWriter()
+        writer.parts.append(INDEX_MAGIC)
+        writer.write_int(INDEX_VERSION)
+        writer.write_int(self.input_size)
+        writer.write_int(self.input_mtime)
+        writer.write_ints(self.minutes)
+        writer.write_ints(self.offsets)
+        temporary_file = f"{index_file}.tmp"
+        with open(temporary_file, 'wb') as f:
+            f.write(writer.getvalue())
+        os.replace(temporary_file, index_file)
+
+    @classmethod
+    def load(cls, index_file: str, input_file: str) -> Optional['TimeIndex']:
+        """
+        Reads the index from a file, if it is still valid for the input file.
+
+        Args:
+            index_file (str): The path to the index file.
+            input_file (str): The path to the input file.
+
+        Returns:
+            Optional[TimeIndex]: The index, or None if there is no valid index file.
+        """
+        try:
+            with open(index_file, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if not data.startswith(INDEX_MAGIC):
+            return None
+        reader = SnapshotReader(data)
+        reader.offset = len(INDEX_MAGIC)
+        try:
+            if reader.read_int() != INDEX_VERSION:
+                return None
+            input_size = reader.read_int()
+            input_mtime = reader.read_int()
+            index = cls(reader.read_ints(), reader.read_ints(), input_size, input_mtime)
+            reader.read_end()
+        except ValueError:
+            return None
+        if len(index.minutes) != len(index.offsets) or not index.is_valid_for(input_file):
+            return None
+        return index
+
+    @classmethod
+    def load_or_build(cls, index_file: str, input_file: str) -> Optional['TimeIndex']:
+        """
+        Reads the index from a file, or builds it and writes it to the file if it is missing or stale.
+
+        Args:
+            index_file (str): The path to the index file.
+            input_file (str): The path to the input file.
+
+        Returns:
+            Optional[TimeIndex]: The index, or None if the events of the file are not sorted.
+        """
+        index = cls.load(index_file, input_file)
+        if index is None:
+            index = cls.build(input_file)
+            if index is not None:
+                index.save(index_file)
+        return index
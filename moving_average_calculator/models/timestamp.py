@@ -0,0 +1,327 @@
+"""
+This module contains the helpers used to represent timestamps as integer
+microseconds since the Unix epoch, instead of datetime objects.
+
+Integers are cheaper to build, compare and subtract than datetimes, which matters
+because every event is compared against the window boundary at least once.
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional, Union
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+MICROSECONDS_PER_SECOND = 1_000_000
+MICROSECONDS_PER_MINUTE = 60 * MICROSECONDS_PER_SECOND
+MICROSECONDS_PER_HOUR = 60 * MICROSECONDS_PER_MINUTE
+MICROSECONDS_PER_DAY = 24 * MICROSECONDS_PER_HOUR
+
+# the units of the steps, of the window sizes and of the rollups, from the largest one
+TIME_UNITS = {
+    'd': MICROSECONDS_PER_DAY,
+    'h': MICROSECONDS_PER_HOUR,
+    'm': MICROSECONDS_PER_MINUTE,
+    's': MICROSECONDS_PER_SECOND,
+}
+
+_DURATION = re.compile(r'([1-9][0-9]*)([dhms])')
+
+EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+
+# scale of the fractional part of the seconds, by number of digits
+_FRACTION_SCALE = (0, 100_000, 10_000, 1_000, 100, 10, 1)
+
+
+def to_epoch_microseconds(timestamp: datetime) -> int:
+    """
+    Converts a naive datetime to microseconds since the Unix epoch.
+
+    Args:
+        timestamp (datetime): The datetime to convert.
+
+    Returns:
+        int: The number of microseconds since the Unix epoch.
+    """
+    return (timestamp - EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_microseconds(timestamp: int) -> datetime:
+    """
+    Converts microseconds since the Unix epoch to a naive datetime.
+
+    Args:
+        timestamp (int): The number of microseconds since the Unix epoch.
+
+    Returns:
+        datetime: The corresponding datetime.
+    """
+    return EPOCH + timedelta(microseconds=timestamp)
+
+
+def floor_to_minute(timestamp: int) -> int:
+    """
+    Truncates a timestamp to the start of its minute.
+
+    Args:
+        timestamp (int): The number of microseconds since the Unix epoch.
+
+    Returns:
+        int: The timestamp with the seconds and microseconds set to zero.
+    """
+    return timestamp - timestamp % MICROSECONDS_PER_MINUTE
+
+
+def ceil_to_minute(timestamp: int) -> int:
+    """
+    Rounds a timestamp up to the start of the next minute, unless it already is the start of a minute.
+
+    Args:
+        timestamp (int): The number of microseconds since the Unix epoch.
+
+    Returns:
+        int: The first minute that is not before the timestamp.
+    """
+    return -((-timestamp) // MICROSECONDS_PER_MINUTE) * MICROSECONDS_PER_MINUTE
+
+
+def floor_to_step(timestamp: int, step: int) -> int:
+    """
+    Truncates a timestamp to the start of its step, counted from the Unix epoch.
+
+    Args:
+        timestamp (int): The number of microseconds since the Unix epoch.
+        step (int): The step, in microseconds, like MICROSECONDS_PER_MINUTE.
+
+    Returns:
+        int: The start of the step of the timestamp.
+    """
+    return timestamp - timestamp % step
+
+
+def parse_duration(value: str) -> int:
+    """
+    Parses a duration of a whole number of seconds, minutes, hours or days, like "10s", "5m", "1h" or "1d".
+
+    Args:
+        value (str): The duration.
+
+    Returns:
+        int: The duration, in microseconds.
+
+    Raises:
+        ValueError: If the duration does not have the expected shape.
+    """
+    match = _DURATION.fullmatch(value.strip())
+    if match is None:
+        raise ValueError(f"Expected a duration like 10s, 5m, 1h or 1d: {value}")
+    return int(match.group(1)) * TIME_UNITS[match.group(2)]
+
+
+def format_duration(duration: int) -> str:
+    """
+    Formats a duration with the largest unit that divides it, like parse_duration parses it.
+
+    Args:
+        duration (int): The duration, in microseconds, a whole number of seconds.
+
+    Returns:
+        str: The duration, like "1h" or "90s".
+    """
+    for unit, microseconds in TIME_UNITS.items():
+        if duration % microseconds == 0:
+            return f"{duration // microseconds}{unit}"
+    raise ValueError(f"The duration is not a whole number of seconds: {duration}")
+
+
+class TimestampParser:
+    """
+    Parses "%Y-%m-%d %H:%M:%S.%f" timestamps into microseconds since the Unix epoch.
+
+    The fixed-width fields are sliced directly, and the date and minute prefixes of the
+    last timestamp are remembered, so consecutive events of the same minute only pay for
+    their seconds, and events of the same day only pay for their time of day. Anything
+    that does not have the expected shape is handed over to datetime.strptime, so the
+    accepted inputs and the raised errors are the same as before.
+
+    Attributes:
+        date_prefix (Optional[str]): The date part of the last parsed timestamp.
+        date_microseconds (int): The microseconds since the Unix epoch at the start of that date.
+        minute_prefix (Optional[str]): The date, hours and minutes of the last parsed timestamp.
+        minute_microseconds (int): The microseconds since the Unix epoch at the start of that minute.
+    """
+
+    __slots__ = ('date_prefix', 'date_microseconds', 'minute_prefix', 'minute_microseconds')
+
+    def __init__(self):
+        self.date_prefix: Optional[str] = None
+        self.date_microseconds: int = 0
+        self.minute_prefix: Optional[str] = None
+        self.minute_microseconds: int = 0
+
+    def parse(self, timestamp: str) -> int:
+        """
+        Parses a timestamp.
+
+        Args:
+            timestamp (str): The timestamp in the format "%Y-%m-%d %H:%M:%S.%f".
+
+        Returns:
+            int: The number of microseconds since the Unix epoch.
+
+        Raises:
+            ValueError: If the timestamp does not match the format.
+            TypeError: If the timestamp is not a string.
+        """
+        if isinstance(timestamp, str) and 21 <= len(timestamp) <= 26 and timestamp[19] == '.' \
+                and timestamp.isascii() and (timestamp[:17] == self.minute_prefix or self._parse_minute(timestamp)):
+            # the seconds and their fraction, as a single number
+            digits = timestamp[17:19] + timestamp[20:]
+            if digits.isdecimal() and timestamp[17] < '6':
+                return self.minute_microseconds + int(digits) * _FRACTION_SCALE[len(timestamp) - 20]
+        return self._parse_slow(timestamp)
+
+    def _parse_minute(self, timestamp: str) -> bool:
+        """
+        Parses the date, hours and minutes of a timestamp, and remembers them.
+
+        Args:
+            timestamp (str): The timestamp in the format "%Y-%m-%d %H:%M:%S.%f".
+
+        Returns:
+            bool: Whether they have the expected fixed-width shape.
+        """
+        if timestamp[10] != ' ' or timestamp[13] != ':' or timestamp[16] != ':':
+            return False
+
+        prefix = timestamp[:10]
+        if prefix != self.date_prefix:
+            if timestamp[4] != '-' or timestamp[7] != '-' \
+                    or not (prefix[:4] + prefix[5:7] + prefix[8:]).isdecimal():
+                return False
+            day = date(int(prefix[:4]), int(prefix[5:7]), int(prefix[8:]))
+            self.date_microseconds = (day.toordinal() - _EPOCH_ORDINAL) * MICROSECONDS_PER_DAY
+            self.date_prefix = prefix
+
+        hours = timestamp[11:13]
+        minutes = timestamp[14:16]
+        if not (hours + minutes).isdecimal():
+            return False
+        hours, minutes = int(hours), int(minutes)
+        if hours > 23 or minutes > 59:
+            return False
+
+        self.minute_microseconds = self.date_microseconds + (hours * 60 + minutes) * MICROSECONDS_PER_MINUTE
+        self.minute_prefix = timestamp[:17]
+        return True
+
+    @staticmethod
+    def _parse_slow(timestamp: str) -> int:
+        return to_epoch_microseconds(datetime.strptime(timestamp, TIMESTAMP_FORMAT))
+
+
+def format_minute(timestamp: int) -> str:
+    """
+    Formats the minute of a timestamp as "%Y-%m-%d %H:%M:00".
+
+    Args:
+        timestamp (int): The number of microseconds since the Unix epoch.
+
+    Returns:
+        str: The formatted minute.
+    """
+    return from_epoch_microseconds(timestamp).strftime('%Y-%m-%d %H:%M:00')
+
+
+class MinuteFormatter:
+    """
+    Formats minutes like format_minute, but only formats the date and the hour once per hour.
+
+    The results are written one minute after the other, so the formatted date and hour of the
+    previous minute can almost always be reused, with the minutes of the hour from a table.
+
+    Attributes:
+        hour (Optional[int]): The hour of the last formatted minute, in microseconds since the Unix epoch.
+        prefix (str): That hour, formatted as "%Y-%m-%d %H:".
+    """
+
+    # the minutes of an hour, formatted as "%M:00"
+    MINUTES = tuple(f"{minute:02d}:00" for minute in range(60))
+
+    __slots__ = ('hour', 'prefix')
+
+    def __init__(self):
+        self.hour: Optional[int] = None
+        self.prefix: str = ''
+
+    def format(self, timestamp: int) -> str:
+        """
+        Formats the minute of a timestamp as "%Y-%m-%d %H:%M:00".
+
+        Args:
+            timestamp (int): The number of microseconds since the Unix epoch.
+
+        Returns:
+            str: The formatted minute.
+        """
+        hour = timestamp - timestamp % MICROSECONDS_PER_HOUR
+        if hour != self.hour:
+            self.hour = hour
+            self.prefix = from_epoch_microseconds(hour).strftime('%Y-%m-%d %H:')
+        return self.prefix + self.MINUTES[(timestamp - hour) // MICROSECONDS_PER_MINUTE]
+
+
+class SecondFormatter(MinuteFormatter):
+    """
+    Formats the seconds of timestamps as "%Y-%m-%d %H:%M:%S", like MinuteFormatter does with the minutes,
+    for the steps shorter than a minute.
+    """
+
+    # the minutes and seconds of an hour, formatted as "%M:%S"
+    SECONDS = tuple(f"{second // 60:02d}:{second % 60:02d}" for second in range(3600))
+
+    __slots__ = ()
+
+    def format(self, timestamp: int) -> str:
+        """
+        Formats the second of a timestamp as "%Y-%m-%d %H:%M:%S".
+
+        Args:
+            timestamp (int): The number of microseconds since the Unix epoch.
+
+        Returns:
+            str: The formatted second.
+        """
+        hour = timestamp - timestamp % MICROSECONDS_PER_HOUR
+        if hour != self.hour:
+            self.hour = hour
+            self.prefix = from_epoch_microseconds(hour).strftime('%Y-%m-%d %H:')
+        return self.prefix + self.SECONDS[(timestamp - hour) // MICROSECONDS_PER_SECOND]
+
+
+def create_step_formatter(step: int) -> Union[MinuteFormatter, SecondFormatter]:
+    """
+    Creates the formatter of the times of a step: the steps of whole minutes are formatted like
+    "2018-12-26 18:11:00", and the shorter ones with their seconds, like "2018-12-26 18:11:10".
+
+    Args:
+        step (int): The step, in microseconds.
+
+    Returns:
+        Union[MinuteFormatter, SecondFormatter]: The formatter.
+    """
+    return MinuteFormatter() if step % MICROSECONDS_PER_MINUTE == 0 else SecondFormatter()
+
+
+def format_timestamp(timestamp: int) -> str:
+    """
+    Formats a timestamp with the TIMESTAMP_FORMAT of the input files.
+
+    Args:
+        timestamp (int): The number of microseconds since the Unix epoch.
+
+    Returns:
+        str: The formatted timestamp, like "2018-12-26 18:11:08.509654".
+    """
+    return from_epoch_microseconds(timestamp).strftime(TIMESTAMP_FORMAT)
@@ -1,31 +1,48 @@
 from collections import deque
-from datetime import timedelta
-from datetime import datetime
-from typing import Deque
+from typing import Any, Deque, Optional, Sequence
 
-from .interfaces.i_window import IWindow
+from .interfaces.i_checkpointable_window import ICheckpointableWindow
 from .event import Event
+from .snapshot import SnapshotReader, SnapshotWriter
+from .timestamp import MICROSECONDS_PER_MINUTE
+from .window_aggregates import WindowAggregates
 
 
-class Window(IWindow):
+class Window(ICheckpointableWindow):
     """
     Represents a window of events for calculating moving averages.
 
+    The window can also keep other aggregates of the durations, like the max or the 95th percentile,
+    which are updated as the events enter and leave it. Its result then has them along with the average:
+        {"average_delivery_time": 20.0, "max_delivery_time": 31, "p95_delivery_time": 31}
+
+    Args:
+        size (int): The size of the window, in units.
+        aggregates (Sequence[str]): The names of the other aggregates, like ["max", "p95"]. Defaults to none.
+        unit (int): The unit of the size, in microseconds. Defaults to a minute.
+
     Attributes:
-        size (int): The size of the window in minutes.
+        size (int): The size of the window in microseconds.
         events (Deque[Event]): A deque of events in the window.
         total_duration (int): The total duration of all events in the window.
+        aggregates (Optional[WindowAggregates]): Keeps the other aggregates, or None.
 
     Methods:
         add_event(event: Event) -> None: Adds an event to the window.
-        remove_old_events(current_time: datetime) -> None: Removes old events from the window.
+        remove_old_events(current_time: int) -> None: Removes old events from the window.
         get_average_duration() -> float: Calculates the average duration of events in the window.
+        get_result() -> Any: Calculates the average duration, along with the other aggregates, if any.
+        next_expiration_time() -> Optional[int]: Gets the first time at which an event leaves the window.
+        event_count() -> int: Gets the number of events in the window.
+        save_state(writer: SnapshotWriter) -> None: Writes the contents of the window to a snapshot.
+        load_state(reader: SnapshotReader) -> None: Reads the contents of the window from a snapshot.
     """
 
-    def __init__(self, size: int):
-        self.size: timedelta = timedelta(minutes=size)
+    def __init__(self, size: int, aggregates: Sequence[str] = (), unit: int = MICROSECONDS_PER_MINUTE):
+        self.size: int = size * unit
         self.events: Deque[Event] = deque()
         self.total_duration: int = 0
+        self.aggregates: Optional[WindowAggregates] = WindowAggregates(aggregates) if aggregates else None
 
     def add_event(self, event: Event) -> None:
         """
@@ -34,20 +51,28 @@ class Window(IWindow):
         Args:
             event (Event): The event to be added.
         """
+        # the event is only kept once the totals have taken it, so that a failure leaves the window as it was
+        total_duration = self.total_duration + event.duration
+        if self.aggregates is not None:
+            self.aggregates.add(event.duration)
+        self.total_duration = total_duration
         self.events.append(event)
-        self.total_duration += event.duration
 
-    def remove_old_events(self, current_time: datetime) -> None:
+    def remove_old_events(self, current_time: int) -> None:
         """
         Removes old events from the window.
 
         Args:
-            current_time (datetime): The current time.
+            current_time (int): The current time, in microseconds since the Unix epoch.
         """
         # Remove events that are outside the window
-        while self.events and self.events[0].timestamp < current_time - self.size:
+        oldest_time = current_time - self.size
+        aggregates = self.aggregates
+        while self.events and self.events[0].timestamp < oldest_time:
             event = self.events.popleft()
             self.total_duration -= event.duration
+            if aggregates is not None:
+                aggregates.remove(event.duration)
 
     def get_average_duration(self) -> float:
         """
@@ -58,4 +83,71 @@ class Window(IWindow):
         """
         if not self.events:
             return 0.0
-        return self.total_duration / len(self.events)
\ No newline at end of file
+        return self.total_duration / len(self.events)
+
+    def get_result(self) -> Any:
+        """
+        Calculates the average duration of events in the window, along with the other aggregates, if any.
+
+        Returns:
+            Any: The average duration or, with other aggregates, the value of each of them by output field.
+        """
+        if self.aggregates is None:
+            return self.get_average_duration()
+        return {"average_delivery_time": self.get_average_duration(), **self.aggregates.get_result()}
+
+    def next_expiration_time(self) -> Optional[int]:
+        """
+        Gets the first time at which the oldest event is no longer in the window.
+
+        Until then, and as long as no event is added, the contents of the window do not change.
+
+        Returns:
+            Optional[int]: The time, in microseconds since the Unix epoch, or None if the window is empty.
+        """
+        if not self.events:
+            return None
+        return self.events[0].timestamp + self.size + 1
+
+    def event_count(self) -> int:
+        """
+        Gets the number of events in the window.
+
+        Returns:
+            int: The number of events.
+        """
+        return len(self.events)
+
+    def save_state(self, writer: SnapshotWriter) -> None:
+        """
+        Writes the size, the total duration and the events of the window to a snapshot.
+
+        Args:
+            writer (SnapshotWriter): The snapshot.
+        """
+        writer.write_ints([self.size])
+        writer.write_str(','.join(self.aggregates.names) if self.aggregates is not None else '')
+        writer.write_number(self.total_duration)
+        writer.write_events(self.events)
+
+    def load_state(self, reader: SnapshotReader) -> None:
+        """
+        Reads the total duration and the events of the window from a snapshot.
+
+        Args:
+            reader (SnapshotReader): The snapshot.
+
+        Raises:
+            ValueError: If the snapshot is of a window of another size, or with other aggregates.
+        """
+        if reader.read_ints() != [self.size]:
+            raise ValueError("The snapshot is of a window of another size")
+        if reader.read_str() != (','.join(self.aggregates.names) if self.aggregates is not None else ''):
+            raise ValueError("The snapshot is of a window with other aggregates")
+        self.total_duration = reader.read_number()
+        self.events = deque(reader.read_events())
+        if self.aggregates is not None:
+            # the aggregates are not in the snapshot, since they can be built again from the events
+            self.aggregates = WindowAggregates(self.aggregates.names)
+            for event in self.events:
+                self.aggregates.add(event.duration)
@@ -0,0 +1,146 @@
+"""
+This module contains the WindowAggregates class, which keeps the max, the min and the
+percentiles of the durations of a window, updated as the events enter and leave it.
+"""
+
+import re
+from fractions import Fraction
+from typing import Any, Dict, List, Optional, Sequence
+
+from .order_statistics import MonotonicDeque, SortedMultiset
+
+# the names of the aggregates: max, min, or a percentile like p50, p95, p99 or p99.9
+_PERCENTILE = re.compile(r'p(100|[1-9]?[0-9](?:\.[0-9]+)?)')
+
+
+def parse_aggregate(name: str) -> str:
+    """
+    Checks the name of an aggregate.
+
+    Args:
+        name (str): Either "max", "min", or a percentile like "p95".
+
+    Returns:
+        str: The name.
+
+    Raises:
+        ValueError: If the name is not one of those.
+    """
+    if name in ('max', 'min') or _PERCENTILE.fullmatch(name):
+        return name
+    raise ValueError(f"Unknown aggregate: {name}. Expected max, min, or a percentile like p95")
+
+
+def aggregate_field(name: str) -> str:
+    """
+    Gets the output field of an aggregate, like "p95_delivery_time".
+
+    Args:
+        name (str): The name of the aggregate.
+
+    Returns:
+        str: The name of the field.
+    """
+    return f"{name}_delivery_time"
+
+
+class WindowAggregates:
+    """
+    Keeps the max, the min and the percentiles of the durations of a window.
+
+    The max and the min are kept by monotonic deques, in O(1) amortized per event. The percentiles
+    are read from a sorted multiset of the durations, which costs O(log W) per event that enters
+    or leaves a window of W events, and O(log W) per percentile of each minute. The multiset is
+    only kept when a percentile is asked for.
+
+    The percentiles use the nearest-rank method: the p-th percentile is the smallest duration
+    such that at least p% of the durations are not larger than it. The aggregates of an empty
+    window are 0.0, like its average.
+
+    Args:
+        names (Sequence[str]): The names of the aggregates, like ["max", "p50", "p99"].
+
+    Attributes:
+        names (List[str]): The names of the aggregates, in the order of the output fields.
+        fields (List[str]): The output fields of the aggregates.
+        maximum (Optional[MonotonicDeque]): Keeps the max, if asked for.
+        minimum (Optional[MonotonicDeque]): Keeps the min, if asked for.
+        durations (Optional[SortedMultiset]): The sorted durations, if a percentile is asked for.
+        percentiles (Dict[str, Fraction]): The percentiles, as exact fractions between 0 and 1, by name.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        if not names:
+            raise ValueError("At least one aggregate is required")
+        self.names: List[str] = [parse_aggregate(name) for name in dict.fromkeys(names)]
+        self.fields: List[str] = [aggregate_field(name) for name in self.names]
+        self.maximum: Optional[MonotonicDeque] = MonotonicDeque(largest=True) if 'max' in self.names else None
+        self.minimum: Optional[MonotonicDeque] = MonotonicDeque(largest=False) if 'min' in self.names else None
+        # exact fractions, since a float like 0.07 * 100 is not 7
+        self.percentiles: Dict[str, Fraction] = {
+            name: Fraction(name[1:]) / 100 for name in self.names if name.startswith('p')
+        }
+        self.durations: Optional[SortedMultiset] = SortedMultiset() if self.percentiles else None
+
+    def add(self, duration: Any) -> None:
+        """
+        Adds the duration of an event that entered the window.
+
+        Args:
+            duration (Any): The duration.
+        """
+        if self.maximum is not None:
+            self.maximum.add(duration)
+        if self.minimum is not None:
+            self.minimum.add(duration)
+        if self.durations is not None:
+            self.durations.add(duration)
+
+    def remove(self, duration: Any) -> None:
+        """
+        Removes the duration of the oldest event of the window, which left it.
+
+        Args:
+            duration (Any): The duration.
+        """
+        if self.maximum is not None:
+            self.maximum.remove_oldest()
+        if self.minimum is not None:
+            self.minimum.remove_oldest()
+        if self.durations is not None:
+            self.durations.remove(duration)
+
+    def get_result(self) -> Dict[str, Any]:
+        """
+        Gets the aggregates of the window.
+
+        Returns:
+            Dict[str, Any]: The value of each aggregate, by output field, in the order they were asked for.
+        """
+        result = {}
+        for name, field in zip(self.names, self.fields):
+            if name == 'max':
+                value = self.maximum.get()
+            elif name == 'min':
+                value = self.minimum.get()
+            else:
+                value = self._get_percentile(self.percentiles[name])
+            result[field] = 0.0 if value is None else value
+        return result
+
+    def _get_percentile(self, fraction: Fraction) -> Optional[Any]:
+        """
+        Gets a percentile of the durations, by the nearest-rank method.
+
+        Args:
+            fraction (Fraction): The percentile, as a fraction between 0 and 1.
+
+        Returns:
+            Optional[Any]: The duration, or None if the window is empty.
+        """
+        count = len(self.durations)
+        if not count:
+            return None
+        # the rank is ceil(fraction * count), counted from 1
+        rank = max(-(-fraction.numerator * count // fraction.denominator) - 1, 0)
+        return self.durations[rank]
@@ -0,0 +1,33 @@
+"""
+Helpers shared by the test cases.
+"""
+
+import json
+from typing import Any, Dict, List
+from unittest.mock import Mock
+
+
+def written_lines(output_sink: Mock) -> List[Any]:
+    """
+    Gets what was written to a mocked output sink.
+
+    Args:
+        output_sink (Mock): The mock of an IOutputSink.
+
+    Returns:
+        List[Any]: The argument of each call to write, in order.
+    """
+    return [record_call[0][0] for record_call in output_sink.write.call_args_list]
+
+
+def written_records(output_sink: Mock) -> List[Dict[str, Any]]:
+    """
+    Gets the JSON records written to a mocked output sink, decoded.
+
+    Args:
+        output_sink (Mock): The mock of an IOutputSink.
+
+    Returns:
+        List[Dict[str, Any]]: The records, in order.
+    """
+    return [json.loads(line) for line in written_lines(output_sink)]
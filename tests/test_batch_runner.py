@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from moving_average_calculator.models import batch_runner
+from moving_average_calculator.models.batch_runner import (
+    BatchOptions,
+    FileResult,
+    find_input_files,
+    process_file,
+    run_batch,
+)
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+def process_or_crash(input_file: str, output_file: str, options: BatchOptions) -> FileResult:
+    """
+    Stands in for process_file, killing its worker on the files named "crash".
+    """
+    if os.path.basename(input_file).startswith("crash"):
+        os._exit(1)
+    return process_file(input_file, output_file, options)
+
+class BatchRunnerTests(unittest.TestCase):
+    """
+    Test cases for the batch of input files.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, "input")
+        os.mkdir(self.input_dir)
+        for name in ("base.json", "one_event.json", "empty.json"):
+            shutil.copy(os.path.join(DATA_DIR, name), self.input_dir)
+        self.options = BatchOptions([10])
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def jobs(self, names):
+        return [(os.path.join(self.input_dir, name),
+                 os.path.join(self.temp_dir.name, name.replace(".json", "_result.json"))) for name in names]
+
+    def test_find_input_files(self):
+        """
+        Test case to verify that every file of a directory is an input, but the outputs and the sidecars,
+        and that globs are expanded.
+        """
+        for name in ("base_result.json", "base.json.index", "base_result.json.checkpoint"):
+            with open(os.path.join(self.input_dir, name), 'w', encoding='utf-8'):
+                pass
+
+        expected = [os.path.join(self.input_dir, name) for name in ("base.json", "empty.json", "one_event.json")]
+        self.assertEqual(find_input_files([self.input_dir]), expected)
+        self.assertEqual(find_input_files([os.path.join(self.input_dir, "*_event.json"), self.input_dir]), expected)
+        self.assertEqual(find_input_files([os.path.join(self.temp_dir.name, "missing", "*.json")]), [])
+
+    def test_batch_matches_single_runs(self):
+        """
+        Test case to verify that each output file is the same as the one of a single run,
+        and that the summary counts the files, the bytes and the minutes.
+        """
+        jobs = self.jobs(["base.json", "one_event.json", "empty.json"])
+        summary = run_batch(jobs, self.options, workers=2)
+
+        self.assertEqual(summary.failures, [])
+        self.assertEqual([result.input_file for result in summary.results], [job[0] for job in jobs])
+        with open(jobs[0][1], encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 14)
+        self.assertEqual(records[-1], {"date": "2018-12-26 18:24:00", "average_delivery_time": 42.5})
+        self.assertFalse(os.path.exists(jobs[2][1]))
+
+        report = summary.to_dict()
+        self.assertEqual((report["files"], report["succeeded"], report["failed"]), (3, 3, 0))
+        self.assertEqual(report["input_bytes"], sum(os.path.getsize(job[0]) for job in jobs))
+        self.assertEqual(report["minutes"], 14 + 2)
+
+    def test_failing_file_does_not_stop_the_others(self):
+        """
+        Test case to verify that a file that cannot be read fails alone, and is reported with its error.
+        """
+        jobs = self.jobs(["base.json", "missing.json", "one_event.json"])
+        summary = run_batch(jobs, self.options, workers=2)
+
+        self.assertEqual([result.input_file for result in summary.failures], [jobs[1][0]])
+        self.assertIn("FileNotFoundError", summary.failures[0].error)
+        self.assertEqual(summary.to_dict()["results"][1]["error"], summary.failures[0].error)
+        self.assertTrue(os.path.exists(jobs[0][1]))
+        self.assertTrue(os.path.exists(jobs[2][1]))
+
+    def test_crashed_worker_does_not_stop_the_others(self):
+        """
+        Test case to verify that a file that kills its worker fails, and that the files that were
+        running in the broken pool are processed again.
+        """
+        shutil.copy(os.path.join(self.input_dir, "base.json"), os.path.join(self.input_dir, "crash.json"))
+        jobs = self.jobs(["base.json", "crash.json", "one_event.json"])
+        with patch.object(batch_runner, 'process_file', process_or_crash):
+            summary = run_batch(jobs, self.options, workers=2)
+
+        self.assertEqual([result.input_file for result in summary.failures], [jobs[1][0]])
+        self.assertIn("died", summary.failures[0].error)
+        for input_file, output_file in (jobs[0], jobs[2]):
+            self.assertTrue(os.path.exists(output_file), input_file)
+
+    @unittest.skipUnless(batch_runner.resource is not None and os.path.exists('/proc/self/status'),
+                         "requires the resource module and the status of the process")
+    def test_memory_limit_with_a_larger_input(self):
+        """
+        Test case to verify that the memory limit applies to the memory used by a worker,
+        and not to the size of the memory-mapped input, which can be larger.
+        """
+        with open('/proc/self/status', encoding='utf-8') as f:
+            data_bytes = next(int(line.split()[1]) * 1024 for line in f if line.startswith('VmData:'))
+        # the workers are forked from this process, and start with its memory
+        max_memory = data_bytes + 64 * batch_runner.MEGABYTE
+        line = ('{"timestamp": "2018-12-26 18:11:08.509654", "padding": "' + 'x' * 100_000
+                + '", "duration": 20}\n').encode('ascii')
+        input_file = os.path.join(self.input_dir, "large.json")
+        with open(input_file, 'wb') as f:
+            f.write(line * (max_memory // len(line) + 100))
+        jobs = [(input_file, os.path.join(self.temp_dir.name, "large_result.json"))]
+        summary = run_batch(jobs, self.options, workers=1, max_memory=max_memory)
+
+        self.assertGreater(summary.results[0].input_bytes, max_memory)
+        self.assertEqual(summary.failures, [])
+
+    def test_rerun_replaces_output(self):
+        """
+        Test case to verify that processing a file again replaces its output, instead of appending to it.
+        """
+        input_file, output_file = self.jobs(["base.json"])[0]
+        process_file(input_file, output_file, self.options)
+        result = process_file(input_file, output_file, self.options)
+
+        self.assertIsNone(result.error)
+        with open(output_file, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 14)
+
+    def test_invalid_options(self):
+        """
+        Test case to verify that a window size or a half-life is required, and at least one worker.
+        """
+        with self.assertRaises(ValueError):
+            BatchOptions()
+        with self.assertRaises(ValueError):
+            BatchOptions([10], half_life=5)
+        with self.assertRaises(ValueError):
+            run_batch([], self.options, workers=0)
+
+if __name__ == '__main__':
+    unittest.main()
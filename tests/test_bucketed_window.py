@@ -0,0 +1,195 @@
+import glob
+import json
+import os
+import random
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, mock_open, patch
+from moving_average_calculator.models.bucketed_window import BucketedWindow
+from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.event_reader import read_events_mmap
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.multi_window import create_window
+from moving_average_calculator.models.snapshot import SnapshotReader, SnapshotWriter
+from moving_average_calculator.models.window import Window
+from tests.helpers import written_lines
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+class BucketedWindowTests(unittest.TestCase):
+    """
+    Test cases for the BucketedWindow class.
+    """
+
+    def setUp(self):
+        self.window = BucketedWindow(size=5)
+
+    def records(self, window, input_file, read_data=None, output_mode='dense'):
+        """
+        Runs a calculator with the window over an input file, or over the lines of read_data, and returns
+        what it wrote.
+        """
+        output_sink = Mock(spec=IOutputSink)
+        with patch('builtins.print'):
+            if read_data is None:
+                MovingAverageCalculator(window, output_sink, output_mode, reader=read_events_mmap) \
+                    .process_events(input_file)
+            else:
+                with patch('builtins.open', mock_open(read_data=read_data)):
+                    MovingAverageCalculator(window, output_sink, output_mode).process_events(input_file)
+        return written_lines(output_sink)
+
+    def test_matches_window_on_fixtures(self):
+        """
+        Test case to verify that a calculator writes the same records with a bucketed window
+        as with a Window, for every fixture and several window sizes.
+        """
+        input_files = [path for path in sorted(glob.glob(os.path.join(DATA_DIR, '*.json')))
+                       if not path.endswith('_result.json')]
+        for input_file in input_files:
+            for size in (0, 1, 2, 10):
+                for output_mode in ('dense', 'runs'):
+                    with self.subTest(input_file=os.path.basename(input_file), size=size, output_mode=output_mode):
+                        self.assertEqual(self.records(BucketedWindow(size), input_file, output_mode=output_mode),
+                                         self.records(Window(size), input_file, output_mode=output_mode))
+
+    def test_matches_window_with_sub_minute_timestamps(self):
+        """
+        Test case to verify the boundary semantics of the buckets against a Window, with timestamps
+        on and around the minutes, bursts, idle gaps, and integer and float durations.
+        """
+        random.seed(12)
+        timestamp = datetime(2022, 12, 26, 10, 0)
+        lines = []
+        for _ in range(1000):
+            timestamp += random.choice([timedelta(0), timedelta(microseconds=1), timedelta(seconds=1),
+                                        timedelta(seconds=59, microseconds=999999), timedelta(minutes=1),
+                                        timedelta(minutes=7), timedelta(minutes=90)])
+            lines.append(json.dumps({
+                "timestamp": timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                "duration": random.choice([random.randint(0, 100), random.random() * 100]),
+            }))
+        read_data = '\n'.join(lines) + '\n'
+
+        for size in (0, 1, 5, 60):
+            with self.subTest(size=size):
+                expected = [json.loads(record) for record in self.records(Window(size), "events.json", read_data)]
+                actual = [json.loads(record) for record in
+                          self.records(BucketedWindow(size), "events.json", read_data)]
+                self.assertEqual([record["date"] for record in actual], [record["date"] for record in expected])
+                for actual_record, expected_record in zip(actual, expected):
+                    self.assertAlmostEqual(actual_record["average_delivery_time"],
+                                           expected_record["average_delivery_time"], places=6)
+
+    def test_remove_old_events(self):
+        """
+        Test case to verify that the events of a minute leave the window together, one minute after
+        the size of the window, wherever they are within the minute.
+        """
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=60))
+        self.window.add_event(Event("2022-12-26 10:00:59.999", duration=120))
+        self.window.add_event(Event("2022-12-26 10:01:00.000", duration=30))
+
+        self.window.remove_old_events(Event("2022-12-26 10:05:00.000", duration=0).timestamp)
+        self.assertEqual(self.window.event_count(), 3)
+        self.window.remove_old_events(Event("2022-12-26 10:06:00.000", duration=0).timestamp)
+        self.assertEqual(self.window.event_count(), 1)
+        self.assertEqual(self.window.get_average_duration(), 30)
+        self.assertEqual(self.window.next_expiration_time(), Event("2022-12-26 10:07:00.000", duration=0).timestamp)
+        self.window.remove_old_events(Event("2022-12-26 10:07:00.000", duration=0).timestamp)
+        self.assertEqual(self.window.get_average_duration(), 0.0)
+        self.assertIsNone(self.window.next_expiration_time())
+
+    def test_grows_when_not_moved(self):
+        """
+        Test case to verify that events spanning more minutes than the ring are kept, when the window
+        is not moved along with them.
+        """
+        for minute in range(0, 60, 7):
+            self.window.add_event(Event(f"2022-12-26 10:{minute:02d}:30.000", duration=minute))
+
+        self.assertEqual(self.window.event_count(), 9)
+        self.assertEqual(self.window.get_average_duration(), 28)
+        self.window.remove_old_events(Event("2022-12-26 11:00:00.000", duration=0).timestamp)
+        self.assertEqual(self.window.event_count(), 1)
+        self.assertEqual(self.window.get_average_duration(), 56)
+
+    def test_memory_does_not_depend_on_the_events(self):
+        """
+        Test case to verify that the ring keeps its size, however many events there are per minute.
+        """
+        for second in range(600):
+            for _ in range(50):
+                self.window.add_event(Event.from_epoch(1_000_000 * second, 10))
+            self.window.remove_old_events(1_000_000 * second - 1_000_000 * second % 60_000_000)
+
+        self.assertEqual(len(self.window.counts), 7)
+        self.assertEqual(self.window.get_average_duration(), 10)
+
+    def test_matches_window_with_a_step(self):
+        """
+        Test case to verify that, with a step of 10 seconds and a window of 30 seconds, the buckets are of
+        10 seconds, and a calculator writes the same records as with a Window.
+        """
+        random.seed(13)
+        timestamp = datetime(2022, 12, 26, 10, 0)
+        lines = []
+        for _ in range(300):
+            timestamp += timedelta(seconds=random.choice([0, 1, 5, 10, 17, 60]))
+            lines.append(json.dumps({"timestamp": timestamp.strftime("%Y-%m-%d %H:%M:%S.%f"),
+                                     "duration": random.randint(1, 100)}) + "\n")
+        step = 10_000_000
+
+        def records(window):
+            """
+            Runs a calculator with the window and the step over the lines, and returns what it wrote.
+            """
+            output_sink = Mock(spec=IOutputSink)
+            with patch('builtins.open', mock_open(read_data=''.join(lines))):
+                MovingAverageCalculator(window, output_sink, step=step).process_events("/path/to/input/file.txt")
+            return written_lines(output_sink)
+
+        window = BucketedWindow(30, unit=1_000_000, step=step)
+        self.assertEqual(len(window.counts), 5)
+        self.assertEqual(records(window), records(Window(30, unit=1_000_000)))
+        with self.assertRaises(ValueError):
+            BucketedWindow(25, unit=1_000_000, step=step)
+
+    def test_create_window(self):
+        """
+        Test case to verify that create_window builds a bucketed window, only for a single size without aggregates.
+        """
+        self.assertIsInstance(create_window([5], bucketed=True), BucketedWindow)
+        with self.assertRaises(ValueError):
+            create_window([1, 5], bucketed=True)
+        with self.assertRaises(ValueError):
+            create_window([5], ['max'], bucketed=True)
+
+    def test_save_and_load_state(self):
+        """
+        Test case to verify that a window restored from a snapshot has the same contents and results,
+        and that a snapshot of a window of another size is rejected.
+        """
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=60))
+        self.window.add_event(Event("2022-12-26 10:03:10.000", duration=120.5))
+        self.window.add_event(Event("2022-12-26 10:03:20.000", duration=1))
+        writer = SnapshotWriter()
+        self.window.save_state(writer)
+
+        restored = BucketedWindow(5)
+        restored.load_state(SnapshotReader(writer.getvalue()))
+
+        self.assertEqual(restored.get_average_duration(), self.window.get_average_duration())
+        self.assertEqual(restored.next_expiration_time(), self.window.next_expiration_time())
+        for window in (restored, self.window):
+            window.add_event(Event("2022-12-26 10:04:00.000", duration=3))
+            window.remove_old_events(Event("2022-12-26 10:06:00.000", duration=0).timestamp)
+        self.assertEqual((restored.event_count(), restored.get_average_duration()),
+                         (self.window.event_count(), self.window.get_average_duration()))
+        with self.assertRaises(ValueError):
+            BucketedWindow(1).load_state(SnapshotReader(writer.getvalue()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from moving_average_calculator.models.checkpoint import Checkpoint, CheckpointError
+
+
+class CheckpointTests(unittest.TestCase):
+    """
+    Test cases for the Checkpoint class.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_file = os.path.join(self.temp_dir.name, "output.json.checkpoint")
+        self.checkpoint = Checkpoint(
+            settings='{"window": "Window"}', input_offset=100, output_offset=50, start_time=0,
+            current_time=60_000_000, last_event_time=None, run_start=None, run_end=None,
+            run_average='{"1": 20.5}', window_state=b'\x01\x02', finished=True,
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_save_and_load(self):
+        """
+        Test case to verify that a saved checkpoint is loaded with the same state.
+        """
+        self.checkpoint.save(self.checkpoint_file)
+
+        loaded = Checkpoint.load(self.checkpoint_file)
+
+        self.assertEqual(vars(loaded), vars(self.checkpoint))
+        self.assertEqual(os.listdir(self.temp_dir.name), ["output.json.checkpoint"])
+
+    def test_load_missing_file(self):
+        """
+        Test case to verify that there is no checkpoint when the file does not exist.
+        """
+        self.assertIsNone(Checkpoint.load(self.checkpoint_file))
+
+    def test_load_invalid_file(self):
+        """
+        Test case to verify that a file that is not a checkpoint, or a truncated one, is rejected.
+        """
+        data = self.checkpoint.to_bytes()
+        for invalid in (b'{"timestamp": 1}', data[:-3], data + b'\x00'):
+            with open(self.checkpoint_file, 'wb') as f:
+                f.write(invalid)
+
+            with self.subTest(invalid=invalid), self.assertRaises(CheckpointError):
+                Checkpoint.load(self.checkpoint_file)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import gzip
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from moving_average_calculator.models import compressed_input
+from moving_average_calculator.models.compressed_input import (
+    GZIP,
+    ZSTD,
+    detect_compression,
+    read_line_blocks,
+    strip_compressed_extension,
+)
+from moving_average_calculator.models.event_reader import read_events, read_events_mmap
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+class CompressedInputTests(unittest.TestCase):
+    """
+    Test cases for the compressed input files.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(DATA_DIR, 'badly_formatted_with_valid_events.json'), 'rb') as f:
+            self.contents = f.read()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, contents):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(contents)
+        return path
+
+    def test_detect_compression(self):
+        """
+        Test case to verify that the compression is detected by the extension or, without one, by the magic bytes.
+        """
+        self.assertEqual(detect_compression(self.write("events.json.gz", b'')), GZIP)
+        self.assertEqual(detect_compression(self.write("events.json.zst", b'')), ZSTD)
+        self.assertEqual(detect_compression(self.write("events", gzip.compress(self.contents))), GZIP)
+        self.assertEqual(detect_compression(self.write("events.bin", b'\x28\xb5\x2f\xfd\x00')), ZSTD)
+        self.assertIsNone(detect_compression(self.write("events.json", self.contents)))
+        self.assertIsNone(detect_compression(os.path.join(self.temp_dir.name, "missing.json")))
+
+    def test_strip_compressed_extension(self):
+        """
+        Test case to verify that only the extension of the compression is removed.
+        """
+        self.assertEqual(strip_compressed_extension("events.json.gz"), "events.json")
+        self.assertEqual(strip_compressed_extension("events.json.ZST"), "events.json")
+        self.assertEqual(strip_compressed_extension("events.json"), "events.json")
+
+    def test_read_line_blocks(self):
+        """
+        Test case to verify that the blocks hold whole lines, and add up to the decompressed contents,
+        with or without a newline at the end.
+        """
+        for contents in (self.contents, self.contents.rstrip(b'\n')):
+            input_file = self.write("events.json.gz", gzip.compress(contents))
+            with self.subTest(ends_with_newline=contents.endswith(b'\n')), \
+                    patch.object(compressed_input, 'DECOMPRESSED_BLOCK_SIZE', 7):
+                blocks = list(read_line_blocks(input_file, GZIP, queue_size=2))
+
+                self.assertEqual(b''.join(blocks), contents)
+                self.assertTrue(all(block.endswith(b'\n') for block in blocks[:-1]))
+
+    def test_stops_when_the_reader_stops(self):
+        """
+        Test case to verify that the background thread stops when the reader stops early.
+        """
+        input_file = self.write("events.json.gz", gzip.compress(self.contents * 100))
+        with patch.object(compressed_input, 'DECOMPRESSED_BLOCK_SIZE', 16):
+            blocks = read_line_blocks(input_file, GZIP, queue_size=1)
+            next(blocks)
+            blocks.close()
+
+        self.assertNotIn('decompression', [thread.name for thread in threading.enumerate()])
+
+    def test_corrupt_file(self):
+        """
+        Test case to verify that an error of the decompression is raised to the reader.
+        """
+        input_file = self.write("events.json.gz", gzip.compress(self.contents)[:-20])
+        with self.assertRaises(EOFError):
+            list(read_line_blocks(input_file, GZIP))
+
+    def test_read_events(self):
+        """
+        Test case to verify that both readers read the same events from a compressed file as from the plain one.
+        """
+        plain_file = self.write("events.json", self.contents)
+        compressed_files = [self.write("events.json.gz", gzip.compress(self.contents))]
+        if compressed_input.zstandard is not None:
+            compressed_files.append(self.write(
+                "events.json.zst", compressed_input.zstandard.ZstdCompressor().compress(self.contents)))
+
+        for reader in (read_events, read_events_mmap):
+            with patch('builtins.print'):
+                expected = [(event.timestamp, event.duration) for event in reader(plain_file)]
+            for input_file in compressed_files:
+                with self.subTest(reader=reader.__name__, input_file=input_file), patch('builtins.print'):
+                    self.assertEqual([(event.timestamp, event.duration) for event in reader(input_file)], expected)
+                    self.assertTrue(expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import json
+import random
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, mock_open, patch
+from moving_average_calculator.models.decaying_window import DecayingWindow
+from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.snapshot import SnapshotReader, SnapshotWriter
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE
+from tests.helpers import written_records
+
+class DecayingWindowTests(unittest.TestCase):
+    """
+    Test cases for the DecayingWindow class.
+    """
+
+    def setUp(self):
+        self.window = DecayingWindow(half_life=10)
+
+    def test_half_life(self):
+        """
+        Test case to verify that an event weighs half as much as one that is a half-life newer.
+        """
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=10))
+        self.window.add_event(Event("2022-12-26 10:10:00.000", duration=40))
+
+        # (10 * 0.5 + 40 * 1) / (0.5 + 1)
+        self.assertAlmostEqual(self.window.get_average_duration(), 30.0)
+
+    def test_matches_brute_force(self):
+        """
+        Test case to verify the weighted average of unevenly spaced events, some with the same
+        timestamp, against the weights computed from scratch.
+        """
+        random.seed(4)
+        timestamp = datetime(2022, 12, 26, 10, 0)
+        events = []
+        for _ in range(300):
+            timestamp += timedelta(seconds=random.choice([0, 0, 1, 13, 60, 600, 7200]))
+            event = Event(timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'), duration=random.randint(0, 100))
+            events.append(event)
+            self.window.add_event(event)
+
+            weights = [2 ** (-(event.timestamp - other.timestamp) / (10 * MICROSECONDS_PER_MINUTE))
+                       for other in events]
+            expected = sum(weight * other.duration for weight, other in zip(weights, events)) / sum(weights)
+            self.assertAlmostEqual(self.window.get_average_duration(), expected, places=6)
+
+    def test_older_event(self):
+        """
+        Test case to verify that an event older than the newest one is weighed as of the newest one.
+        """
+        self.window.add_event(Event("2022-12-26 10:10:00.000", duration=40))
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=10))
+
+        self.assertAlmostEqual(self.window.get_average_duration(), 30.0)
+        self.assertEqual(self.window.last_time, Event("2022-12-26 10:10:00.000", duration=40).timestamp)
+
+    def test_constant_between_events(self):
+        """
+        Test case to verify that the average does not change without new events, so the calculator
+        writes a single run until the next event.
+        """
+        self.assertEqual(self.window.get_average_duration(), 0.0)
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=30))
+        self.window.remove_old_events(Event("2022-12-27 10:00:00.000", duration=0).timestamp)
+
+        self.assertEqual(self.window.get_average_duration(), 30.0)
+        self.assertIsNone(self.window.next_expiration_time())
+        self.assertEqual(self.window.event_count(), 0)
+
+    def test_process_events(self):
+        """
+        Test case to verify the records written by a calculator with a decaying window.
+        """
+        read_data = '\n'.join([
+            json.dumps({"timestamp": "2022-12-26 10:00:30.000", "duration": 10}),
+            json.dumps({"timestamp": "2022-12-26 10:10:30.000", "duration": 40}),
+        ]) + '\n'
+        output_sink = Mock(spec=IOutputSink)
+        with patch('builtins.open', mock_open(read_data=read_data)):
+            MovingAverageCalculator(self.window, output_sink).process_events("/path/to/input/file.txt")
+
+        records = written_records(output_sink)
+        self.assertEqual([record["date"] for record in records],
+                         [f"2022-12-26 10:{minute:02d}:00" for minute in range(12)])
+        self.assertEqual([record["average_delivery_time"] for record in records[:11]], [0.0] + [10.0] * 10)
+        self.assertAlmostEqual(records[11]["average_delivery_time"], 30.0)
+
+    def test_invalid_half_life(self):
+        """
+        Test case to verify that a half-life that is not positive is rejected.
+        """
+        for half_life in (0, -1):
+            with self.assertRaises(ValueError):
+                DecayingWindow(half_life)
+
+    def test_save_and_load_state(self):
+        """
+        Test case to verify that a window restored from a snapshot has the same contents,
+        and that a snapshot of a window with another half-life is rejected.
+        """
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=60))
+        self.window.add_event(Event("2022-12-26 10:05:00.000", duration=120.5))
+        writer = SnapshotWriter()
+        self.window.save_state(writer)
+
+        restored = DecayingWindow(10)
+        restored.load_state(SnapshotReader(writer.getvalue()))
+
+        self.assertEqual((restored.weighted_sum, restored.weight, restored.last_time),
+                         (self.window.weighted_sum, self.window.weight, self.window.last_time))
+        with self.assertRaises(ValueError):
+            DecayingWindow(1).load_state(SnapshotReader(writer.getvalue()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+from moving_average_calculator.models.event_reader import (
+    parse_grouped_event,
+    read_events,
+    read_events_mmap,
+    read_lines_backwards,
+    read_lines_in_range,
+    scan_event_offsets,
+    scan_events,
+    scan_events_backwards,
+    split_file,
+)
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.window import Window
+from tests.helpers import written_records
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+class EventReaderTests(unittest.TestCase):
+    """
+    Test cases for the functions that read the input files.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.temp_dir.name, "events.json")
+        self.lines = [f'{{"line": {i}, "padding": "{"x" * (i % 7)}"}}' for i in range(50)]
+        with open(self.input_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.lines) + '\n')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_split_file(self):
+        """
+        Test case to verify that the ranges cover the whole file, and start at the beginning of lines.
+        """
+        ranges = split_file(self.input_file, 7)
+
+        self.assertEqual(len(ranges), 7)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], os.path.getsize(self.input_file))
+        with open(self.input_file, 'rb') as f:
+            lines = []
+            for start, end in ranges:
+                lines.extend(line.rstrip('\n') for line in read_lines_in_range(f, start, end))
+        self.assertEqual(lines, self.lines)
+
+    def test_split_file_more_chunks_than_lines(self):
+        """
+        Test case to verify that no empty ranges are returned for small files.
+        """
+        ranges = split_file(self.input_file, 1000)
+
+        self.assertEqual(len(ranges), len(self.lines))
+
+    def test_read_lines_backwards(self):
+        """
+        Test case for reading the lines before an offset, in reverse order,
+        with lines that span several blocks.
+        """
+        start, _ = split_file(self.input_file, 3)[1]
+
+        with open(self.input_file, 'rb') as f, \
+            patch('moving_average_calculator.models.event_reader.BLOCK_SIZE', 16):
+            lines = list(read_lines_backwards(f, start))
+
+        self.assertEqual(lines, self.lines[:len(lines)][::-1])
+        self.assertGreater(len(lines), 0)
+
+    def test_parse_grouped_event(self):
+        """
+        Test case to verify that the keys of every grouping are extracted, and that invalid keys are rejected.
+        """
+        line = json.dumps({"timestamp": "2022-12-26 10:00:00.000", "duration": 20,
+                           "client_name": "a", "source_language": "en", "target_language": "fr"})
+
+        event, keys = parse_grouped_event(line, [("client_name",), ("source_language", "target_language")])
+
+        self.assertEqual(event.duration, 20)
+        self.assertEqual(keys, [(("client_name",), ("a",)),
+                                (("source_language", "target_language"), ("en", "fr"))])
+        with self.assertRaises(KeyError):
+            parse_grouped_event(line, [("nr_words",)])
+        with self.assertRaises(TypeError):
+            parse_grouped_event(json.dumps({"timestamp": "2022-12-26 10:00:00.000", "duration": 20,
+                                            "client_name": ["a"]}), [("client_name",)])
+
+    def events_and_errors(self, reader, input_file):
+        """
+        Reads the events of a file, returning them as tuples along with the number of errors printed.
+        """
+        with patch('builtins.print') as mock_print:
+            events = [(event.timestamp, event.duration) for event in reader(input_file)]
+        return events, mock_print.call_count
+
+    def test_read_events_mmap_matches_read_events(self):
+        """
+        Test case to verify that scanning the memory-mapped file reads the same events,
+        and skips the same invalid lines, as parsing every line with json.loads.
+        """
+        for file_name in sorted(os.listdir(DATA_DIR)):
+            if file_name.endswith('_result.json'):
+                continue
+            input_file = os.path.join(DATA_DIR, file_name)
+            with self.subTest(file_name=file_name):
+                self.assertEqual(self.events_and_errors(read_events_mmap, input_file),
+                                 self.events_and_errors(read_events, input_file))
+
+    def test_scan_events_falls_back_to_json(self):
+        """
+        Test case to verify that the lines that do not have the expected shape are parsed with json.loads.
+        """
+        lines = [
+            '{"timestamp": "2018-12-26 18:11:08.509654", "nr_words": 30, "duration": 20}',
+            # the fields are in another order
+            '{"duration": 31, "timestamp": "2018-12-26 18:12:08.509654"}',
+            # the timestamp is repeated, and json.loads keeps the last one
+            '{"timestamp": "2018-12-26 18:13:08.509654", "timestamp": "2018-12-26 18:14:08.509654", "duration": 1}',
+            # the duration is a float, and there is a nested object
+            '{"timestamp": "2018-12-26 18:15:08.509654", "meta": {"a": 1}, "duration": 2.5}',
+            # an escaped character in the timestamp
+            '{"timestamp": "2018-12-26 18:16:08.50965\\u0034", "duration": 3}',
+            '{"timestamp": "2018-12-26 18:17:08.509654", "duration": ',
+            '["timestamp", "duration"]',
+            '',
+            '{"timestamp": "2018-12-26 18:18:08.509654", "duration": 4}',
+        ]
+        with open(self.input_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines))
+
+        events, errors = self.events_and_errors(read_events_mmap, self.input_file)
+
+        self.assertEqual((events, errors), self.events_and_errors(read_events, self.input_file))
+        self.assertEqual([duration for _, duration in events], [20, 31, 1, 2.5, 3, 4])
+        self.assertEqual(errors, 3)
+
+    def test_scan_events_skips_malformed_lines(self):
+        """
+        Test case to verify that the lines with the expected shape, but an invalid date or invalid JSON
+        between the two fields, are skipped with an error instead of stopping the run or being accepted,
+        like json.loads does, and that both readers give a calculator the same results.
+        """
+        lines = [
+            '{"timestamp": "2018-12-26 18:11:08.509654", "duration": 20}',
+            # the month is invalid
+            '{"timestamp": "2018-92-26 18:12:08.509654", "duration": 25}',
+            # a field without its colon
+            '{"timestamp": "2018-12-26 18:13:08.509654", "x" 5, "duration": 31}',
+            # a field without its value, and a field with an invalid number
+            '{"timestamp": "2018-12-26 18:14:08.509654", "x": , "duration": 32}',
+            '{"timestamp": "2018-12-26 18:14:09.509654", "x": 01, "duration": 33}',
+            # a field with an invalid UTF-8 string
+            '{"timestamp": "2018-12-26 18:14:10.509654", "x": "\udcff", "duration": 34}',
+            # the fields in between are well-formed, even with other characters
+            '{"timestamp": "2018-12-26 18:15:08.509654", "a": "caf\u00e9", "b": -1.5e3, "c": true, "d": null,'
+            ' "duration": 40}',
+            '{"timestamp": "2018-12-26 18:16:08.509654", "duration": 54}',
+        ]
+        with open(self.input_file, 'w', encoding='utf-8', errors='surrogateescape') as f:
+            f.write('\n'.join(lines) + '\n')
+
+        events, errors = self.events_and_errors(read_events_mmap, self.input_file)
+        self.assertEqual([duration for _, duration in events], [20, 40, 54])
+        self.assertEqual(errors, 5)
+        with open(self.input_file, 'rb') as f:
+            buffer = f.read()
+        with patch('builtins.print'):
+            self.assertEqual([event.duration for _, event in scan_event_offsets(buffer)], [20, 40, 54])
+
+        # the text reader cannot decode the line with invalid UTF-8 at all
+        del lines[5]
+        with open(self.input_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        self.assertEqual(self.events_and_errors(read_events_mmap, self.input_file),
+                         self.events_and_errors(read_events, self.input_file))
+        records = {}
+        for name, reader in [("mmap", read_events_mmap), ("text", read_events)]:
+            output_sink = Mock(spec=IOutputSink)
+            with patch('builtins.print'):
+                MovingAverageCalculator(Window(10), output_sink, reader=reader).process_events(self.input_file)
+            records[name] = written_records(output_sink)
+        self.assertEqual(records["mmap"], records["text"])
+        self.assertEqual(records["mmap"][-1], {"date": "2018-12-26 18:17:00", "average_delivery_time": 38.0})
+
+    def test_scan_events_in_range(self):
+        """
+        Test case to verify that only the lines of the range are scanned.
+        """
+        lines = [f'{{"timestamp": "2018-12-26 18:{i:02d}:00.000000", "duration": {i}}}' for i in range(10)]
+        buffer = ('\n'.join(lines) + '\n').encode('utf-8')
+        start, end = buffer.index(lines[3].encode('utf-8')), buffer.index(lines[7].encode('utf-8'))
+
+        events = list(scan_events(buffer, start, end))
+
+        self.assertEqual([event.duration for event in events], [3, 4, 5, 6])
+
+    def test_scan_events_backwards(self):
+        """
+        Test case to verify that the events before an offset are scanned from the last one to the first one,
+        and that the invalid lines are skipped without an error.
+        """
+        lines = [f'{{"timestamp": "2018-12-26 18:{i:02d}:00.000000", "duration": {i}}}' for i in range(6)]
+        lines[2] = '{"timestamp": "2018-92-26 18:02:00.000000", "duration": 2}'
+        lines[4] = ''
+        buffer = ('\n'.join(lines) + '\n').encode('utf-8')
+
+        with patch('builtins.print') as mock_print:
+            events = list(scan_events_backwards(buffer, buffer.index(lines[5].encode('utf-8'))))
+
+        self.assertEqual([event.duration for event in events], [3, 1, 0])
+        mock_print.assert_not_called()
+        self.assertEqual(list(scan_events_backwards(buffer, 0)), [])
+
+    def test_read_events_mmap_empty_file(self):
+        """
+        Test case to verify that an empty file has no events.
+        """
+        open(self.input_file, 'w', encoding='utf-8').close()
+
+        self.assertEqual(list(read_events_mmap(self.input_file)), [])
+
+if __name__ == '__main__':
+    unittest.main()
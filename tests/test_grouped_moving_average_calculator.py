@@ -0,0 +1,134 @@
+import json
+import random
+import sys
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, mock_open, patch
+from moving_average_calculator.models.grouped_moving_average_calculator import GroupedMovingAverageCalculator
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.window import Window
+from tests.helpers import written_records
+
+
+def event_line(timestamp: str, duration: int, client_name: str, source_language: str = "en") -> str:
+    return json.dumps({
+        "timestamp": timestamp,
+        "source_language": source_language,
+        "target_language": "fr",
+        "client_name": client_name,
+        "duration": duration
+    }) + "\n"
+
+
+class GroupedMovingAverageCalculatorTests(unittest.TestCase):
+    """
+    Unit tests for the GroupedMovingAverageCalculator class.
+    """
+
+    def setUp(self):
+        self.output_sink = Mock(spec=IOutputSink)
+        self.input_file = "/path/to/input/file.txt"
+
+    def process(self, calculator, lines):
+        """
+        Runs a calculator over the lines, and returns the records it wrote.
+        """
+        with patch('builtins.open', mock_open(read_data=''.join(lines))), \
+            patch('builtins.print'):
+            calculator.process_events(self.input_file)
+        return written_records(calculator.output_sink)
+
+    def test_keyed_output(self):
+        """
+        Test case to verify that each grouping writes its own keyed records,
+        and that a group is dropped once its window has drained.
+        """
+        calculator = GroupedMovingAverageCalculator(
+            lambda: Window(1), self.output_sink, [("client_name",), ("source_language", "target_language")]
+        )
+        records = self.process(calculator, [
+            event_line("2022-12-26 10:00:10.000", 10, "a"),
+            event_line("2022-12-26 10:00:20.000", 30, "b"),
+            event_line("2022-12-26 10:05:00.000", 50, "a"),
+        ])
+
+        self.assertEqual(records, [
+            {"date": "2022-12-26 10:01:00", "client_name": "a", "average_delivery_time": 10.0},
+            {"date": "2022-12-26 10:01:00", "client_name": "b", "average_delivery_time": 30.0},
+            {"date": "2022-12-26 10:01:00", "source_language": "en", "target_language": "fr", "average_delivery_time": 20.0},
+            {"date": "2022-12-26 10:05:00", "client_name": "a", "average_delivery_time": 50.0},
+            {"date": "2022-12-26 10:05:00", "source_language": "en", "target_language": "fr", "average_delivery_time": 50.0},
+            {"date": "2022-12-26 10:06:00", "client_name": "a", "average_delivery_time": 50.0},
+            {"date": "2022-12-26 10:06:00", "source_language": "en", "target_language": "fr", "average_delivery_time": 50.0},
+        ])
+        self.assertEqual(len(calculator.groups), 2)
+
+    def test_max_groups(self):
+        """
+        Test case to verify that the least recently updated group is dropped when the limit is reached,
+        and that the dropped groups are reported.
+        """
+        calculator = GroupedMovingAverageCalculator(
+            lambda: Window(10), self.output_sink, [("client_name",)], max_groups=2
+        )
+        lines = [
+            event_line("2022-12-26 10:00:10.000", 10, "a"),
+            event_line("2022-12-26 10:00:20.000", 30, "b"),
+            event_line("2022-12-26 10:00:30.000", 30, "a"),
+            event_line("2022-12-26 10:00:40.000", 30, "c"),
+        ]
+        with patch('builtins.open', mock_open(read_data=''.join(lines))), patch('builtins.print') as mock_print:
+            calculator.process_events(self.input_file)
+
+        self.assertEqual(calculator.evicted_groups, 1)
+        mock_print.assert_called_once_with("Error: 1 groups were dropped to stay within 2 groups, "
+                                           "so their windows restarted", file=sys.stderr)
+        self.assertEqual([key[1] for key in calculator.groups], [("a",), ("c",)])
+
+    def test_matches_calculator_per_group(self):
+        """
+        Test case to verify that the averages of each group are the same as running
+        the MovingAverageCalculator over the events of that group only.
+        """
+        random.seed(3)
+        timestamp = datetime(2022, 12, 26, 10, 0)
+        lines = []
+        for _ in range(300):
+            timestamp += timedelta(seconds=random.choice([0, 5, 30, 60, 90, 900]))
+            lines.append(event_line(timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                                    random.randint(0, 100), random.choice("abc")))
+
+        calculator = GroupedMovingAverageCalculator(lambda: Window(5), self.output_sink, [("client_name",)])
+        grouped = self.process(calculator, lines)
+
+        for client_name in "abc":
+            with self.subTest(client_name=client_name):
+                calculator = MovingAverageCalculator(Window(5), Mock(spec=IOutputSink))
+                expected = {
+                    record["date"]: record["average_delivery_time"]
+                    for record in self.process(calculator, [line for line in lines if json.loads(line)["client_name"] == client_name])
+                }
+                actual = {
+                    record["date"]: record["average_delivery_time"]
+                    for record in grouped if record["client_name"] == client_name and record["date"] in expected
+                }
+                self.assertTrue(actual)
+                for date, average in expected.items():
+                    # the minutes where the group was dropped are the ones with an empty window
+                    self.assertEqual(actual.get(date, 0.0), average, date)
+
+    def test_process_events_no_events(self):
+        """
+        Test case for the `process_events` method when no events are found in the input file.
+        """
+        calculator = GroupedMovingAverageCalculator(lambda: Window(5), self.output_sink, [("client_name",)])
+        with patch('builtins.open', mock_open(read_data='')), \
+            patch('builtins.print') as mock_print:
+            calculator.process_events(self.input_file)
+
+        mock_print.assert_called_once_with("Error: No events found in file")
+        self.output_sink.write.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
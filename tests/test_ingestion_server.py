@@ -0,0 +1,259 @@
+import asyncio
+import json
+import os
+import time
+import unittest
+from datetime import datetime
+from moving_average_calculator.models.ingestion_server import IngestionServer, MinuteHistory
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.output_sink import IOutputSink
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE, to_epoch_microseconds
+from moving_average_calculator.models.window import Window
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+class RecordingOutputSink(IOutputSink):
+    """
+    Keeps the records in memory.
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def write(self, record: str) -> None:
+        self.records.append(json.loads(record))
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+async def http_request(reader, writer, method, path, body=b'', headers=''):
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n{headers}\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    response_headers = {}
+    while True:
+        line = (await reader.readline()).strip()
+        if not line:
+            break
+        name, value = line.decode().split(':', 1)
+        response_headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(response_headers['content-length']))
+    return status, json.loads(body), response_headers
+
+class IngestionServerTests(unittest.TestCase):
+    """
+    Test cases for the ingestion and query server.
+    """
+
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, "base.json"), 'rb') as f:
+            self.events = f.read()
+        # the minutes a calculator writes for the same events, before the ones after the last event
+        sink = RecordingOutputSink()
+        MovingAverageCalculator(Window(10), sink).process_events(os.path.join(DATA_DIR, "base.json"))
+        self.expected = sink.records[:-1]
+
+    def run_with_server(self, client, **kwargs):
+        server = IngestionServer(Window(10), **kwargs)
+
+        async def run():
+            port = await server.start('127.0.0.1', 0)
+            try:
+                return await client(port)
+            finally:
+                await server.close()
+
+        return server, asyncio.run(run())
+
+    def test_minute_history(self):
+        """
+        Test case to verify that the history keeps the last minutes only, oldest first.
+        """
+        minute = to_epoch_microseconds(datetime(2018, 12, 26, 18, 11))
+        history = MinuteHistory(3)
+        history.write(minute, 1.0)
+        history.write(minute + MICROSECONDS_PER_MINUTE, 2.0, 1000)
+
+        self.assertEqual(history.latest(10), [(minute + offset * MICROSECONDS_PER_MINUTE, 2.0)
+                                              for offset in range(998, 1001)])
+        self.assertEqual(history.latest(1), [(minute + 1000 * MICROSECONDS_PER_MINUTE, 2.0)])
+        with self.assertRaises(ValueError):
+            MinuteHistory(0)
+
+    def test_ndjson_connection(self):
+        """
+        Test case to verify that the events streamed over a TCP connection, even split within a line,
+        give the same minutes as the calculator of a file.
+        """
+        async def client(port):
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            middle = len(self.events) // 2
+            writer.write(self.events[:middle])
+            await writer.drain()
+            await asyncio.sleep(0.05)
+            writer.write(self.events[middle:])
+            writer.close()
+            await writer.wait_closed()
+            await asyncio.sleep(0.05)
+
+        server, _ = self.run_with_server(client)
+        self.assertEqual(server.events_accepted, 3)
+        self.assertEqual(server.recent_minutes(100), self.expected)
+        self.assertEqual(server.recent_minutes(2), self.expected[-2:])
+
+    def test_http_requests(self):
+        """
+        Test case for the bulk POSTs and the queries, several of them over a single keep-alive connection.
+        """
+        async def client(port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            responses = [
+                await http_request(reader, writer, 'POST', '/events', self.events.rstrip(b'\n') + b'\nnot json\n'),
+                await http_request(reader, writer, 'GET', '/average'),
+                await http_request(reader, writer, 'GET', '/history?minutes=3'),
+                await http_request(reader, writer, 'GET', '/stats'),
+            ]
+            writer.close()
+            return responses
+
+        _, responses = self.run_with_server(client)
+        self.assertEqual([response[0] for response in responses], [200] * 4)
+        self.assertEqual(responses[0][1], {"accepted": 3, "late": 0, "invalid": 1})
+        self.assertEqual(responses[1][1], {"time": "2018-12-26 18:23:19.903159", "average_delivery_time": 42.5})
+        self.assertEqual(responses[2][1], self.expected[-3:])
+        self.assertEqual(responses[3][1]["events_accepted"], 3)
+        self.assertEqual(responses[3][1]["requests"], 3)
+        self.assertEqual(responses[3][2]["connection"], "keep-alive")
+
+    def test_malformed_lines(self):
+        """
+        Test case to verify that the malformed lines of a POST and of an NDJSON connection, like an invalid date
+        or invalid JSON, are skipped and counted one by one, without dropping the other events of the request
+        or closing the connection.
+        """
+        lines = self.events.splitlines(keepends=True)
+        malformed = [
+            lines[0],
+            b'{"timestamp": "2018-92-26 18:12:08.509654", "duration": 20}\n',
+            b'{"timestamp": "2018-12-26 18:13:08.509654", "x" 5, "duration": 31}\n',
+            *lines[1:],
+        ]
+
+        async def post(port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            responses = [
+                await http_request(reader, writer, 'POST', '/events', b''.join(malformed)),
+                await http_request(reader, writer, 'GET', '/stats'),
+            ]
+            writer.close()
+            return responses
+
+        server, responses = self.run_with_server(post)
+        self.assertEqual([response[0] for response in responses], [200] * 2)
+        self.assertEqual(responses[0][1], {"accepted": 3, "late": 0, "invalid": 2})
+        self.assertEqual(responses[1][1]["events_accepted"], 3)
+        self.assertEqual(responses[1][1]["invalid_lines"], 2)
+        self.assertEqual(server.recent_minutes(100), self.expected)
+
+        async def stream(port):
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+            for line in malformed:
+                writer.write(line)
+                await writer.drain()
+                await asyncio.sleep(0.01)
+            writer.close()
+            await writer.wait_closed()
+            await asyncio.sleep(0.05)
+
+        server, _ = self.run_with_server(stream)
+        self.assertEqual((server.events_accepted, server.invalid_lines), (3, 2))
+        self.assertEqual(server.recent_minutes(100), self.expected)
+
+    def test_non_numeric_durations(self):
+        """
+        Test case to verify that the events with a string or a boolean duration are skipped and counted
+        as invalid lines, without reaching the window.
+        """
+        lines = self.events.splitlines(keepends=True)
+        body = b''.join([
+            lines[0],
+            b'{"timestamp": "2018-12-26 18:12:08.509654", "duration": "5"}\n',
+            b'{"timestamp": "2018-12-26 18:12:09.509654", "duration": true}\n',
+            *lines[1:],
+        ])
+
+        async def post(port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            response = await http_request(reader, writer, 'POST', '/events', body)
+            writer.close()
+            return response
+
+        server, response = self.run_with_server(post)
+        self.assertEqual(response[0], 200)
+        self.assertEqual(response[1], {"accepted": 3, "late": 0, "invalid": 2})
+        self.assertEqual(server.recent_minutes(100), self.expected)
+
+    def test_http_errors(self):
+        """
+        Test case for the unknown paths, the wrong methods, the bodies without a Content-Length
+        and the invalid queries.
+        """
+        async def client(port):
+            responses = []
+            for method, path, headers in [('GET', '/nothing', ''), ('GET', '/events', ''),
+                                          ('POST', '/events', 'Transfer-Encoding: chunked\r\n'),
+                                          ('GET', '/history?minutes=ten', '')]:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                responses.append(await http_request(reader, writer, method, path, headers=headers))
+                writer.close()
+            return responses
+
+        _, responses = self.run_with_server(client)
+        self.assertEqual([response[0] for response in responses], [404, 405, 411, 400])
+        self.assertTrue(all(response[2]["connection"] == "close" for response in responses))
+
+    def test_late_events(self):
+        """
+        Test case to verify that the events older than the allowed lateness are dropped, and the others
+        are put back in order.
+        """
+        server = IngestionServer(Window(10), allowed_lateness=60)
+        lines = [b'{"timestamp": "2018-12-26 18:11:40.000000", "duration": 20}\n',
+                 b'{"timestamp": "2018-12-26 18:11:30.000000", "duration": 10}\n',
+                 b'{"timestamp": "2018-12-26 18:13:30.000000", "duration": 30}\n',
+                 b'{"timestamp": "2018-12-26 18:11:10.000000", "duration": 40}\n',
+                 b'{"timestamp": "2018-12-26 18:14:40.000000", "duration": 50}\n']
+        self.assertEqual(server.ingest(b''.join(lines[:3])), 3)
+        self.assertEqual(server.ingest(b''.join(lines[3:])), 2)
+
+        self.assertEqual(server.stats()["late_events"], 1)
+        self.assertEqual(server.recent_minutes(10), [
+            {"date": "2018-12-26 18:11:00", "average_delivery_time": 0.0},
+            {"date": "2018-12-26 18:12:00", "average_delivery_time": 15.0},
+            {"date": "2018-12-26 18:13:00", "average_delivery_time": 15.0},
+        ])
+
+    def test_idle_minutes(self):
+        """
+        Test case to verify that an idle feed releases the held events, and goes on with the wall clock.
+        """
+        server = IngestionServer(Window(10), allowed_lateness=3600, idle_timeout=1)
+        server.ingest(self.events)
+        self.assertEqual(server.recent_minutes(100), [])
+
+        server.process_idle_minutes()
+        self.assertEqual(server.recent_minutes(100), [])
+
+        server.last_arrival = time.monotonic() - 5 * 60
+        server.process_idle_minutes()
+        records = server.recent_minutes(100)
+        self.assertEqual(records[:len(self.expected) + 1], self.expected + [
+            {"date": "2018-12-26 18:24:00", "average_delivery_time": 42.5}
+        ])
+        self.assertEqual(records[-1]["date"], "2018-12-26 18:28:00")
+
+if __name__ == '__main__':
+    unittest.main()
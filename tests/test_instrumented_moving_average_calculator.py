@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+from moving_average_calculator.models.event_reader import read_events, read_events_mmap
+from moving_average_calculator.models.instrumented_moving_average_calculator import InstrumentedMovingAverageCalculator
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.multi_window import MultiWindow
+from moving_average_calculator.models.window import Window
+from tests.helpers import written_lines
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+class InstrumentedMovingAverageCalculatorTests(unittest.TestCase):
+    """
+    Test cases for the InstrumentedMovingAverageCalculator class.
+    """
+
+    def test_matches_moving_average_calculator(self):
+        """
+        Test case to verify that the instrumentation does not change the results.
+        """
+        for file_name, window_factory, output_mode in [
+            ('base.json', lambda: Window(10), 'dense'),
+            ('base.json', lambda: MultiWindow([1, 10]), 'runs'),
+            ('badly_formatted_with_valid_events.json', lambda: Window(3), 'dense'),
+        ]:
+            input_file = os.path.join(DATA_DIR, file_name)
+            expected_sink = Mock(spec=IOutputSink)
+            output_sink = Mock(spec=IOutputSink)
+            with self.subTest(file_name=file_name, output_mode=output_mode), patch('builtins.print'):
+                MovingAverageCalculator(window_factory(), expected_sink, output_mode).process_events(input_file)
+                InstrumentedMovingAverageCalculator(window_factory(), output_sink, output_mode) \
+                    .process_events(input_file)
+
+                self.assertEqual(written_lines(output_sink), written_lines(expected_sink))
+
+    def test_counters(self):
+        """
+        Test case to verify the counters of a run over an input with invalid lines, with both readers.
+        """
+        input_file = os.path.join(DATA_DIR, 'badly_formatted_with_valid_events.json')
+        for reader in (read_events, read_events_mmap):
+            output_sink = Mock(spec=IOutputSink)
+            calculator = InstrumentedMovingAverageCalculator(Window(0), output_sink, reader=reader)
+            with self.subTest(reader=reader.__name__), patch('builtins.print'):
+                calculator.process_events(input_file)
+
+                counters = calculator.stats.to_dict()["counters"]
+                records = written_lines(output_sink)
+                self.assertEqual(counters["lines_read"], 11)
+                self.assertEqual(counters["invalid_lines"], 10)
+                self.assertEqual(counters["events_read"], 1)
+                self.assertEqual(counters["events_added"], 1)
+                # with a window of 0 minutes, the event leaves the window on the minute after it
+                self.assertEqual(counters["events_evicted"], 1)
+                self.assertEqual(counters["max_window_events"], 1)
+                self.assertEqual(counters["steps_emitted"], 2)
+                self.assertEqual(counters["records_written"], len(records))
+                self.assertEqual(counters["bytes_written"], sum(len(record) + 1 for record in records))
+
+    def test_timers(self):
+        """
+        Test case to verify that the time of the stages adds up to the time of the run.
+        """
+        calculator = InstrumentedMovingAverageCalculator(Window(10), Mock(spec=IOutputSink))
+        calculator.process_events(os.path.join(DATA_DIR, 'base.json'))
+
+        seconds = calculator.stats.to_dict()["seconds"]
+        self.assertGreater(seconds["total"], 0)
+        self.assertAlmostEqual(seconds["read"] + seconds["window"] + seconds["output"] + seconds["other"],
+                               seconds["total"])
+
+    def test_lines_are_counted_as_they_are_read(self):
+        """
+        Test case to verify that the last line is counted, with or without a newline, by both readers.
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_file = os.path.join(temp_dir, "events.json")
+            for contents, lines in [('', 0), ('a\n', 1), ('a\nb', 2), ('a\n\n', 2)]:
+                with open(input_file, 'w', encoding='utf-8') as f:
+                    f.write(contents)
+                for reader in (read_events, read_events_mmap):
+                    calculator = InstrumentedMovingAverageCalculator(Window(10), Mock(spec=IOutputSink),
+                                                                     reader=reader)
+                    with self.subTest(contents=contents, reader=reader.__name__), patch('builtins.print'):
+                        calculator.process_events(input_file)
+                        self.assertEqual(calculator.stats.lines_read, lines)
+                        self.assertEqual(calculator.stats.invalid_lines, lines)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,15 @@
 
 import json
+import sys
 import unittest
-from datetime import datetime, timedelta
-from unittest.mock import call, mock_open, patch
+from datetime import datetime
+from unittest.mock import Mock, call, mock_open, patch
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
 from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.reorder_buffer import ReorderBuffer
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE, to_epoch_microseconds
 from moving_average_calculator.models.window import Window
+from tests.helpers import written_lines, written_records
 
 
 class MovingAverageCalculatorTests(unittest.TestCase):
@@ -14,8 +19,8 @@ class MovingAverageCalculatorTests(unittest.TestCase):
     """
     def setUp(self):
         self.window = Window(5)
-        self.output_file = "/path/to/output/file.txt"
-        self.calculator = MovingAverageCalculator(self.window, self.output_file)
+        self.output_sink = Mock(spec=IOutputSink)
+        self.calculator = MovingAverageCalculator(self.window, self.output_sink)
 
     def test_process_and_print_event(self):
         """
@@ -23,28 +28,23 @@ class MovingAverageCalculatorTests(unittest.TestCase):
 
         This test verifies that the process_and_print_event method correctly processes and prints an event.
         It checks if the remove_old_events method is called with the current time, if the get_average_duration
-        method is called, if the output file is opened in append mode, and if the expected result is written
-        to the file.
+        method is called, and if the expected result is written to the output sink.
 
         The expected result is a dictionary containing the date and average delivery time.
 
         """
         expected_result = {"date": "2022-12-26 10:00:00", "average_delivery_time": 0.0}
-        current_time = datetime(2022, 12, 26, 10, 0, 0)
+        current_time = to_epoch_microseconds(datetime(2022, 12, 26, 10, 0, 0))
         self.calculator.current_time = current_time
 
-        m = mock_open()
-        with patch('builtins.open', m), \
-            patch.object(self.window, 'remove_old_events') as mock_remove, \
+        with patch.object(self.window, 'remove_old_events') as mock_remove, \
             patch.object(self.window, 'get_average_duration', return_value=0.0) as mock_get_average_duration:
 
             self.calculator.process_and_print_event()
             mock_remove.assert_called_once_with(current_time)
             mock_get_average_duration.assert_called_once()
-            m.assert_called_once_with(self.calculator.output_file, 'a', encoding='utf-8')
-            handler = m()
-            handler.write.assert_called_once_with(f"{json.dumps(expected_result)}\n")
-            self.assertEqual(self.calculator.current_time, current_time + timedelta(minutes=1))
+            self.output_sink.write.assert_called_once_with(json.dumps(expected_result))
+            self.assertEqual(self.calculator.current_time, current_time + MICROSECONDS_PER_MINUTE)
 
     def test_process_events(self):
         """
@@ -55,7 +55,7 @@ class MovingAverageCalculatorTests(unittest.TestCase):
 
         The test checks that the `add_event` method is called the expected number of times, 
         with the correct arguments.
-        It also verifies that the `process_and_print_event` method is called, 
+        It also verifies that the `process_and_print_events_until` method is called, 
         and checks the values of various attributes of the `MovingAverageCalculator` instance.
 
         Note: This test assumes that the `MovingAverageCalculator` class has been properly 
@@ -76,12 +76,14 @@ class MovingAverageCalculatorTests(unittest.TestCase):
             patch.object(self.calculator.window, 'add_event') as mock_add_event, \
             patch('builtins.print') as mock_print:
 
-            # Whenever the mocked method - in this case, process_and_print_event - is called, the current_time is updated by 1 minute
-            # We need this, because current_time is used as a condition to stop the while loop in process_events
-            def update_current_time():
-                self.calculator.current_time += timedelta(minutes=1)
+            # Whenever the mocked method - in this case, process_and_print_events_until - is called,
+            # the current_time is moved to the first minute at or after the end time,
+            # like the real method does
+            def update_current_time(end_time):
+                while self.calculator.current_time < end_time:
+                    self.calculator.current_time += MICROSECONDS_PER_MINUTE
 
-            with patch.object(self.calculator, 'process_and_print_event', side_effect=update_current_time) as mock_process_and_print_event:
+            with patch.object(self.calculator, 'process_and_print_events_until', side_effect=update_current_time) as mock_process_and_print_event:
 
                 self.calculator.process_events(input_file)
 
@@ -90,9 +92,9 @@ class MovingAverageCalculatorTests(unittest.TestCase):
                 self.assertEqual(mock_add_event.call_count, 3)
 
                 expected_calls = [
-                    {"timestamp": datetime(2022, 12, 26, 10, 0), "duration": 60},
-                    {"timestamp": datetime(2022, 12, 26, 10, 5), "duration": 120},
-                    {"timestamp": datetime(2022, 12, 26, 10, 10), "duration": 180},
+                    {"timestamp": to_epoch_microseconds(datetime(2022, 12, 26, 10, 0)), "duration": 60},
+                    {"timestamp": to_epoch_microseconds(datetime(2022, 12, 26, 10, 5)), "duration": 120},
+                    {"timestamp": to_epoch_microseconds(datetime(2022, 12, 26, 10, 10)), "duration": 180},
                 ]
 
                 for i, call in enumerate(mock_add_event.call_args_list):
@@ -101,9 +103,9 @@ class MovingAverageCalculatorTests(unittest.TestCase):
 
                 mock_process_and_print_event.assert_called()
 
-                self.assertEqual(self.calculator.start_time, datetime(2022, 12, 26, 10, 0, 0))
+                self.assertEqual(self.calculator.start_time, to_epoch_microseconds(datetime(2022, 12, 26, 10, 0, 0)))
                 self.assertGreater(self.calculator.current_time, self.calculator.start_time)
-                self.assertEqual(self.calculator.last_event_time, datetime(2022, 12, 26, 10, 10))
+                self.assertEqual(self.calculator.last_event_time, to_epoch_microseconds(datetime(2022, 12, 26, 10, 10)))
                 mock_print.assert_not_called()
 
     def test_process_events_with_start_time(self):
@@ -126,7 +128,7 @@ class MovingAverageCalculatorTests(unittest.TestCase):
             "{\"timestamp\": \"2022-12-26 10:10:00.000\", \"duration\": 180}\n",
         ]
 
-        self.calculator.start_time = datetime(2022, 12, 26, 10, 0, 0)
+        self.calculator.start_time = to_epoch_microseconds(datetime(2022, 12, 26, 10, 0, 0))
         self.calculator.current_time = self.calculator.start_time
 
         m = mock_open(read_data=''.join(data_read))
@@ -134,25 +136,26 @@ class MovingAverageCalculatorTests(unittest.TestCase):
             patch.object(self.calculator.window, 'add_event') as mock_add_event, \
             patch('builtins.print') as mock_print:
 
-            def update_current_time():
-                self.calculator.current_time += timedelta(minutes=1)
+            def update_current_time(end_time):
+                while self.calculator.current_time < end_time:
+                    self.calculator.current_time += MICROSECONDS_PER_MINUTE
 
-            with patch.object(self.calculator, 'process_and_print_event', side_effect=update_current_time) as mock_process_and_print_event:
+            with patch.object(self.calculator, 'process_and_print_events_until', side_effect=update_current_time) as mock_process_and_print_event:
 
                 self.calculator.process_events(input_file)
 
                 self.assertEqual(mock_add_event.call_count, 3)
-                self.assertEqual(mock_add_event.call_args_list[0][0][0].timestamp, datetime(2022, 12, 26, 10, 0))
+                self.assertEqual(mock_add_event.call_args_list[0][0][0].timestamp, to_epoch_microseconds(datetime(2022, 12, 26, 10, 0)))
                 self.assertEqual(mock_add_event.call_args_list[0][0][0].duration, 60)
-                self.assertEqual(mock_add_event.call_args_list[1][0][0].timestamp, datetime(2022, 12, 26, 10, 5))
+                self.assertEqual(mock_add_event.call_args_list[1][0][0].timestamp, to_epoch_microseconds(datetime(2022, 12, 26, 10, 5)))
                 self.assertEqual(mock_add_event.call_args_list[1][0][0].duration, 120)
-                self.assertEqual(mock_add_event.call_args_list[2][0][0].timestamp, datetime(2022, 12, 26, 10, 10))
+                self.assertEqual(mock_add_event.call_args_list[2][0][0].timestamp, to_epoch_microseconds(datetime(2022, 12, 26, 10, 10)))
                 self.assertEqual(mock_add_event.call_args_list[2][0][0].duration, 180)
 
                 mock_process_and_print_event.assert_called()
 
                 self.assertGreater(self.calculator.current_time, self.calculator.start_time)
-                self.assertEqual(self.calculator.last_event_time, datetime(2022, 12, 26, 10, 10))
+                self.assertEqual(self.calculator.last_event_time, to_epoch_microseconds(datetime(2022, 12, 26, 10, 10)))
                 mock_print.assert_not_called()
 
 
@@ -165,7 +168,7 @@ class MovingAverageCalculatorTests(unittest.TestCase):
         m = mock_open(read_data=''.join([]))
         with patch('builtins.open', m), \
             patch.object(self.calculator.window, 'add_event') as mock_add_event, \
-            patch.object(self.calculator, 'process_and_print_event') as mock_process_and_print_event, \
+            patch.object(self.calculator, 'process_and_print_events_until') as mock_process_and_print_event, \
             patch('builtins.print') as mock_print:
 
             self.calculator.process_events(input_file)
@@ -183,7 +186,7 @@ class MovingAverageCalculatorTests(unittest.TestCase):
         It mocks the behavior of reading data from a file and simulates encountering invalid data.
         The method should skip the invalid data and print an error message for each invalid line.
 
-        The test checks that the `add_event` and `process_and_print_event` methods are not called,
+        The test checks that the `add_event` and `process_and_print_events_until` methods are not called,
         and that the `print` function is called with the expected error messages.
         Finally, it asserts that the `last_event_time` attribute of the calculator is set to `None`.
         """
@@ -197,15 +200,143 @@ class MovingAverageCalculatorTests(unittest.TestCase):
         m = mock_open(read_data=''.join(data_read))
         with patch('builtins.open', m), \
             patch.object(self.calculator.window, 'add_event') as mock_add_event, \
-            patch.object(self.calculator, 'process_and_print_event') as mock_process_and_print_event, \
+            patch.object(self.calculator, 'process_and_print_events_until') as mock_process_and_print_event, \
             patch('builtins.print') as mock_print:
 
             self.calculator.process_events(input_file)
 
             mock_add_event.assert_not_called()
             mock_process_and_print_event.assert_not_called()
-            mock_print.assert_has_calls([call("Error: Invalid data in line, skipping..."), call("Error: Invalid data in line, skipping...")])
+            mock_print.assert_has_calls([call("Error: Invalid data in line, skipping...", file=sys.stderr),
+                                         call("Error: Invalid data in line, skipping...", file=sys.stderr)])
             self.assertIsNone(self.calculator.last_event_time)
 
+    def test_process_events_skips_idle_minutes(self):
+        """
+        Test case to verify that the minutes where the window does not change are processed at once,
+        while still writing one result per minute.
+        """
+        input_file = "/path/to/input/file.txt"
+
+        data_read = [
+            "{\"timestamp\": \"2022-12-26 10:00:00.000\", \"duration\": 60}\n",
+            "{\"timestamp\": \"2022-12-28 10:00:00.000\", \"duration\": 120}\n",
+        ]
+
+        m = mock_open(read_data=''.join(data_read))
+        with patch('builtins.open', m), \
+            patch.object(self.window, 'get_average_duration', wraps=self.window.get_average_duration) as mock_average:
+
+            self.calculator.process_events(input_file)
+
+        # the minutes with the first event, the empty minutes, and the two minutes after the last event
+        self.assertEqual(mock_average.call_count, 3)
+        records = written_lines(self.output_sink)
+        self.assertEqual(len(records), 2 * 24 * 60 + 2)
+        self.assertEqual(records[0], json.dumps({"date": "2022-12-26 10:00:00", "average_delivery_time": 60.0}))
+        self.assertEqual(records[5], json.dumps({"date": "2022-12-26 10:05:00", "average_delivery_time": 60.0}))
+        self.assertEqual(records[6], json.dumps({"date": "2022-12-26 10:06:00", "average_delivery_time": 0.0}))
+        self.assertEqual(records[-1], json.dumps({"date": "2022-12-28 10:01:00", "average_delivery_time": 120.0}))
+
+    def test_process_events_runs_output_mode(self):
+        """
+        Test case to verify that the 'runs' output mode merges the consecutive minutes with the same average.
+        """
+        input_file = "/path/to/input/file.txt"
+        calculator = MovingAverageCalculator(self.window, self.output_sink, 'runs')
+
+        data_read = [
+            "{\"timestamp\": \"2022-12-26 10:00:00.000\", \"duration\": 60}\n",
+            "{\"timestamp\": \"2022-12-26 10:01:30.000\", \"duration\": 60}\n",
+            "{\"timestamp\": \"2023-06-26 10:00:00.000\", \"duration\": 120}\n",
+        ]
+
+        m = mock_open(read_data=''.join(data_read))
+        with patch('builtins.open', m):
+            calculator.process_events(input_file)
+
+        self.output_sink.write.assert_has_calls([
+            call(json.dumps({"from": "2022-12-26 10:00:00", "to": "2022-12-26 10:06:00", "average_delivery_time": 60.0})),
+            call(json.dumps({"from": "2022-12-26 10:07:00", "to": "2023-06-26 09:59:00", "average_delivery_time": 0.0})),
+            call(json.dumps({"from": "2023-06-26 10:00:00", "to": "2023-06-26 10:01:00", "average_delivery_time": 120.0})),
+        ])
+        self.assertEqual(self.output_sink.write.call_count, 3)
+
+    def test_process_events_with_a_step(self):
+        """
+        Test case to verify that a step of 10 seconds, with a window of 30 seconds, writes a result
+        every 10 seconds, with the seconds in the dates, and merges the idle steps in the 'runs' output mode.
+        """
+        input_file = "/path/to/input/file.txt"
+        step = 10 * 1_000_000
+
+        data_read = [
+            "{\"timestamp\": \"2022-12-26 10:00:05.000\", \"duration\": 60}\n",
+            "{\"timestamp\": \"2022-12-26 10:00:25.000\", \"duration\": 30}\n",
+            "{\"timestamp\": \"2022-12-26 10:02:00.000\", \"duration\": 90}\n",
+        ]
+        calculator = MovingAverageCalculator(Window(30, unit=1_000_000), self.output_sink, step=step)
+        with patch('builtins.open', mock_open(read_data=''.join(data_read))):
+            calculator.process_events(input_file)
+
+        records = written_records(self.output_sink)
+        self.assertEqual(records[:6], [
+            {"date": "2022-12-26 10:00:00", "average_delivery_time": 0.0},
+            {"date": "2022-12-26 10:00:10", "average_delivery_time": 60.0},
+            {"date": "2022-12-26 10:00:20", "average_delivery_time": 60.0},
+            {"date": "2022-12-26 10:00:30", "average_delivery_time": 45.0},
+            {"date": "2022-12-26 10:00:40", "average_delivery_time": 30.0},
+            {"date": "2022-12-26 10:00:50", "average_delivery_time": 30.0},
+        ])
+        self.assertEqual(records[-1], {"date": "2022-12-26 10:02:10", "average_delivery_time": 90.0})
+        self.assertEqual(len(records), 14)
+
+        runs_sink = Mock(spec=IOutputSink)
+        calculator = MovingAverageCalculator(Window(30, unit=1_000_000), runs_sink, 'runs', step=step)
+        with patch('builtins.open', mock_open(read_data=''.join(data_read))):
+            calculator.process_events(input_file)
+        self.assertEqual(json.loads(runs_sink.write.call_args_list[4][0][0]),
+                         {"from": "2022-12-26 10:01:00", "to": "2022-12-26 10:01:50", "average_delivery_time": 0.0})
+
+    def test_process_events_out_of_order(self):
+        """
+        Test case to verify that, with a reorder buffer, the events that arrive out of order
+        get the same results as if they were sorted.
+        """
+        input_file = "/path/to/input/file.txt"
+
+        data_read = [
+            "{\"timestamp\": \"2022-12-26 10:00:00.000\", \"duration\": 60}\n",
+            "{\"timestamp\": \"2022-12-26 10:03:00.000\", \"duration\": 30}\n",
+            "{\"timestamp\": \"2022-12-26 10:01:30.000\", \"duration\": 90}\n",
+            "{\"timestamp\": \"2022-12-26 10:02:00.000\", \"duration\": 0}\n",
+        ]
+        sorted_sink = Mock(spec=IOutputSink)
+        calculator = MovingAverageCalculator(Window(5), self.output_sink,
+                                             reorder_buffer=ReorderBuffer(2 * MICROSECONDS_PER_MINUTE))
+
+        with patch('builtins.open', mock_open(read_data=''.join(data_read))):
+            calculator.process_events(input_file)
+        with patch('builtins.open', mock_open(read_data=''.join(sorted(data_read)))):
+            MovingAverageCalculator(Window(5), sorted_sink).process_events(input_file)
+
+        self.assertEqual(self.output_sink.write.call_args_list, sorted_sink.write.call_args_list)
+        self.assertEqual(self.output_sink.write.call_count, 5)
+
+    def test_process_events_flushes_output_sink_on_error(self):
+        """
+        Test case to verify that the buffered results are flushed even when the processing fails.
+        """
+        input_file = "/path/to/input/file.txt"
+
+        m = mock_open(read_data="{\"timestamp\": \"2022-12-26 10:00:00.000\", \"duration\": 60}\n")
+        with patch('builtins.open', m), \
+            patch.object(self.calculator.window, 'add_event', side_effect=RuntimeError):
+
+            with self.assertRaises(RuntimeError):
+                self.calculator.process_events(input_file)
+
+            self.output_sink.flush.assert_called_once()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
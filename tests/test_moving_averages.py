@@ -0,0 +1,145 @@
+import io
+import itertools
+import json
+import os
+import unittest
+from contextlib import redirect_stderr
+from moving_average_calculator import moving_averages
+from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.moving_averages import minute_results, to_events
+from moving_average_calculator.models.output_sink import NullOutputSink
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE, format_timestamp
+from moving_average_calculator.models.window import Window
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+def read_records(name):
+    with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+class MovingAveragesTests(unittest.TestCase):
+    """
+    Test cases for the library API, which takes the events from any iterable.
+    """
+
+    def test_lines_give_the_records_of_the_file(self):
+        """
+        Test case to verify that the lines of an input file, as text or as bytes, give the records of its output file.
+        """
+        for name, window_size in [("base.json", 10), ("window_2_deal_with_older_events.json", 2)]:
+            with self.subTest(name=name):
+                with open(os.path.join(DATA_DIR, name), 'rb') as f:
+                    lines = f.read().splitlines()
+                expected = read_records(name.replace(".json", "_result.json"))
+                self.assertEqual(list(moving_averages(lines, window_size)), expected)
+                self.assertEqual(list(moving_averages([line.decode() for line in lines], window_size)), expected)
+
+    def test_parsed_events(self):
+        """
+        Test case to verify that the events and the decoded JSON objects are taken as they are,
+        and that the invalid items are skipped with an error.
+        """
+        items = [
+            Event("2018-12-26 18:11:08.509654", 20),
+            {"timestamp": "2018-12-26 18:15:19.903159", "duration": 31},
+            "not json",
+            {"duration": 10},
+            42,
+            '{"timestamp": "2018-12-26 18:23:19.903159", "duration": 54}',
+        ]
+        output = io.StringIO()
+        with redirect_stderr(output):
+            records = list(moving_averages(items, 10))
+
+        self.assertEqual(records, read_records("base_result.json"))
+        self.assertEqual(output.getvalue().count("Error: Invalid data in line, skipping..."), 3)
+
+    def test_results_are_lazy(self):
+        """
+        Test case to verify that the records are yielded while the events are still coming, so an endless
+        stream can be consumed, and that the window only keeps the events of its size.
+        """
+        start = Event("2018-12-26 18:11:00.000000", 0).timestamp
+        window = Window(5)
+
+        def endless_events():
+            for second in itertools.count():
+                yield Event.from_epoch(start + second * 30_000_000, second % 7)
+
+        records = list(itertools.islice(moving_averages(endless_events(), 5), 1000))
+        self.assertEqual(records[0], {"date": "2018-12-26 18:11:00", "average_delivery_time": 0})
+        self.assertEqual(len(records), 1000)
+
+        results = minute_results(endless_events(), window)
+        for _ in range(1000):
+            next(results)
+        self.assertLessEqual(window.event_count(), 12)
+
+    def test_idle_gap_is_expanded_lazily(self):
+        """
+        Test case to verify that the minutes of a long idle gap are yielded one by one, and that
+        minute_results gives them at once.
+        """
+        start = Event("2018-12-26 18:11:00.000000", 0).timestamp
+        year = 365 * 24 * 60
+        events = [Event("2018-12-26 18:11:30.000000", 10), Event("2019-12-26 18:11:30.000000", 20)]
+
+        self.assertEqual(list(minute_results(events, Window(1))), [
+            (start, 0.0, 1), (start + MICROSECONDS_PER_MINUTE, 10.0, 1),
+            (start + 2 * MICROSECONDS_PER_MINUTE, 0.0, year - 1),
+            (start + (year + 1) * MICROSECONDS_PER_MINUTE, 20.0, 1),
+        ])
+        records = moving_averages(events, 1)
+        self.assertEqual(next(itertools.islice(records, 3, None))["date"], "2018-12-26 18:14:00")
+
+    def test_iter_results_restores_the_result_writer(self):
+        """
+        Test case to verify that the result writer of the calculator is put back, even if the iteration stops early.
+        """
+        calculator = MovingAverageCalculator(Window(10), NullOutputSink())
+        result_writer = calculator.result_writer
+        results = calculator.iter_results(to_events([Event("2018-12-26 18:11:08.509654", 20)] * 3))
+        self.assertEqual(format_timestamp(next(results)[0]), "2018-12-26 18:11:00.000000")
+        results.close()
+        self.assertIs(calculator.result_writer, result_writer)
+
+    def test_options(self):
+        """
+        Test case for the several window sizes and the half-life, and for the invalid options.
+        """
+        lines = read_records("base.json")
+        self.assertEqual(list(moving_averages(lines, [1, 10]))[5]["average_delivery_time"], {"1": 31.0, "10": 25.5})
+        self.assertEqual(len(list(moving_averages(lines, half_life=5))), 14)
+        with self.assertRaises(ValueError):
+            moving_averages(lines)
+        with self.assertRaises(ValueError):
+            moving_averages(lines, 10, half_life=5)
+        with self.assertRaises(ValueError):
+            moving_averages(lines, [1, 10], bucketed=True)
+        with self.assertRaises(ValueError):
+            moving_averages(lines, 10, step='10x')
+        with self.assertRaises(ValueError):
+            moving_averages(lines, 10, window_unit='w')
+
+    def test_step_and_window_unit(self):
+        """
+        Test case to verify that the records are of the step, with the window size in the window unit,
+        for a window of events and for a bucketed one.
+        """
+        lines = read_records("base.json")
+        for bucketed in (False, True):
+            with self.subTest(bucketed=bucketed):
+                records = list(moving_averages(lines, 30, bucketed=bucketed, step='10s', window_unit='s'))
+                self.assertEqual(records[:3], [
+                    {"date": "2018-12-26 18:11:00", "average_delivery_time": 0.0},
+                    {"date": "2018-12-26 18:11:10", "average_delivery_time": 20.0},
+                    {"date": "2018-12-26 18:11:20", "average_delivery_time": 20.0},
+                ])
+                self.assertEqual(len(records), 75)
+        records = list(moving_averages(lines, 1, step='1h', window_unit='h'))
+        self.assertEqual(records, [{"date": "2018-12-26 18:00:00", "average_delivery_time": 0.0},
+                                   {"date": "2018-12-26 19:00:00", "average_delivery_time": 35.0}])
+
+if __name__ == '__main__':
+    unittest.main()
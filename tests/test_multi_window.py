@@ -0,0 +1,104 @@
+import json
+import random
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, mock_open, patch
+from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.multi_window import MultiWindow
+from moving_average_calculator.models.snapshot import SnapshotReader, SnapshotWriter
+from moving_average_calculator.models.timestamp import to_epoch_microseconds
+from moving_average_calculator.models.window import Window
+from tests.helpers import written_records
+
+class MultiWindowTests(unittest.TestCase):
+    """
+    Test cases for the MultiWindow class.
+    """
+
+    def setUp(self):
+        self.window = MultiWindow([5, 1])
+
+    def test_add_and_remove_events(self):
+        """
+        Test case to verify that each view only keeps the events of its own size,
+        and that the shared events are bounded by the largest window.
+        """
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=60))
+        self.window.add_event(Event("2022-12-26 10:03:00.000", duration=120))
+        self.window.add_event(Event("2022-12-26 10:05:00.000", duration=180))
+
+        self.window.remove_old_events(to_epoch_microseconds(datetime(2022, 12, 26, 10, 6)))
+
+        self.assertEqual(self.window.sizes, [1, 5])
+        self.assertEqual(self.window.get_result(), {"1": 180.0, "5": 150.0})
+        self.assertEqual(self.window.get_average_duration(), 150.0)
+        self.assertEqual(len(self.window.events), 2)
+        self.assertEqual(self.window.event_count(), 2)
+
+    def test_save_and_load_state(self):
+        """
+        Test case to verify that windows restored from a snapshot keep calculating the same averages.
+        """
+        for minute in range(8):
+            self.window.add_event(Event(f"2022-12-26 10:0{minute}:00.000", duration=minute * 10))
+        self.window.remove_old_events(to_epoch_microseconds(datetime(2022, 12, 26, 10, 8)))
+        writer = SnapshotWriter()
+        self.window.save_state(writer)
+
+        restored = MultiWindow([1, 5])
+        restored.load_state(SnapshotReader(writer.getvalue()))
+        for window in (self.window, restored):
+            window.remove_old_events(to_epoch_microseconds(datetime(2022, 12, 26, 10, 10)))
+
+        self.assertEqual(restored.get_result(), self.window.get_result())
+        self.assertEqual(restored.next_expiration_time(), self.window.next_expiration_time())
+        with self.assertRaises(ValueError):
+            MultiWindow([1, 10]).load_state(SnapshotReader(writer.getvalue()))
+
+    def test_get_result_empty_window(self):
+        """
+        Test case to verify the averages of an empty window.
+        """
+        self.assertEqual(self.window.get_result(), {"1": 0.0, "5": 0.0})
+        self.assertIsNone(self.window.next_expiration_time())
+
+    def test_matches_separate_windows(self):
+        """
+        Test case to verify that a single pass over a MultiWindow gives the same averages
+        as one pass per window size.
+        """
+        sizes = [0, 1, 5, 15, 60]
+        random.seed(5)
+        timestamp = datetime(2022, 12, 26, 10, 0)
+        lines = []
+        for _ in range(500):
+            timestamp += timedelta(seconds=random.choice([0, 1, 30, 59, 60, 61, 600, 3600]))
+            lines.append(json.dumps({
+                "timestamp": timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                "duration": random.randint(0, 100)
+            }))
+        read_data = '\n'.join(lines) + '\n'
+
+        def process(window):
+            """
+            Runs a calculator with the window over the lines, and returns the records it wrote.
+            """
+            output_sink = Mock(spec=IOutputSink)
+            with patch('builtins.open', mock_open(read_data=read_data)):
+                MovingAverageCalculator(window, output_sink).process_events("/path/to/input/file.txt")
+            return written_records(output_sink)
+
+        combined = process(MultiWindow(sizes))
+        for size in sizes:
+            with self.subTest(size=size):
+                separate = process(Window(size))
+                self.assertEqual(
+                    [{"date": record["date"], "average_delivery_time": record["average_delivery_time"][str(size)]}
+                     for record in combined],
+                    separate,
+                )
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import unittest
+from unittest.mock import Mock, patch
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.numpy_moving_average_calculator import NumpyMovingAverageCalculator, np
+from moving_average_calculator.models.window import Window
+from tests.helpers import written_lines
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+# the window size used to produce each of the expected results in the data folder
+FIXTURES = {
+    'base.json': 10,
+    'one_event.json': 1,
+    'same_time.json': 1,
+    'same_time_with_zero_duration.json': 1,
+    'window_2_deal_with_older_events.json': 2,
+    'badly_formatted_with_valid_events.json': 3,
+}
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class NumpyMovingAverageCalculatorTests(unittest.TestCase):
+    """
+    Unit tests for the NumpyMovingAverageCalculator class.
+    """
+
+    def process(self, calculator_class, window, input_file):
+        """
+        Runs a calculator of the given class over an input file, and returns what it wrote.
+        """
+        output_sink = Mock(spec=IOutputSink)
+        with patch('builtins.print'):
+            calculator_class(window, output_sink).process_events(input_file)
+        return written_lines(output_sink)
+
+    def test_matches_streaming_calculator(self):
+        """
+        Test case to verify that both engines write the same results, for every input in the data folder.
+        """
+        for file_name, window_size in FIXTURES.items():
+            input_file = os.path.join(DATA_DIR, file_name)
+            with self.subTest(file_name=file_name):
+                self.assertEqual(
+                    self.process(NumpyMovingAverageCalculator, window_size, input_file),
+                    self.process(MovingAverageCalculator, Window(window_size), input_file),
+                )
+
+    def test_matches_expected_results(self):
+        """
+        Test case to verify the results against the expected outputs in the data folder.
+        """
+        for file_name, window_size in FIXTURES.items():
+            result_file = os.path.join(DATA_DIR, file_name.replace('.json', '_result.json'))
+            if not os.path.isfile(result_file):
+                continue
+            with self.subTest(file_name=file_name), open(result_file, encoding='utf-8') as f:
+                expected = f.read().splitlines()
+                input_file = os.path.join(DATA_DIR, file_name)
+                self.assertEqual(
+                    self.process(NumpyMovingAverageCalculator, window_size, input_file),
+                    expected,
+                )
+
+    def test_calculate(self):
+        """
+        Test case for the calculate method, including the boundaries of the window
+        and the minute after the last event.
+        """
+        minute = 60_000_000
+        timestamps = np.array([0, minute, 5 * minute + 1], dtype=np.int64)
+        durations = np.array([10, 20, 30])
+
+        calculator = NumpyMovingAverageCalculator(2, Mock(spec=IOutputSink))
+        calculator.calculate(timestamps, durations)
+
+        self.assertEqual(calculator.minutes.tolist(), [i * minute for i in range(7)])
+        self.assertEqual(calculator.averages.tolist(), [10.0, 15.0, 15.0, 20.0, 0.0, 0.0, 30.0])
+
+    def test_process_events_no_events(self):
+        """
+        Test case for the `process_events` method when no events are found in the input file.
+        """
+        output_sink = Mock(spec=IOutputSink)
+        with patch('builtins.print') as mock_print:
+            NumpyMovingAverageCalculator(1, output_sink).process_events(os.path.join(DATA_DIR, 'empty.json'))
+
+        mock_print.assert_called_once_with("Error: No events found in file")
+        output_sink.write.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import random
+import unittest
+from bisect import insort
+from operator import getitem
+from moving_average_calculator.models.order_statistics import MonotonicDeque, SortedMultiset
+
+class MonotonicDequeTests(unittest.TestCase):
+    """
+    Test cases for the MonotonicDeque class.
+    """
+
+    def test_matches_brute_force(self):
+        """
+        Test case to verify that the max and the min of a sliding window match the ones of its values.
+        """
+        generator = random.Random(7)
+        maximum = MonotonicDeque(largest=True)
+        minimum = MonotonicDeque(largest=False)
+        values = []
+        for _ in range(2000):
+            if values and generator.random() < 0.45:
+                values.pop(0)
+                maximum.remove_oldest()
+                minimum.remove_oldest()
+            else:
+                value = generator.randint(0, 50)
+                values.append(value)
+                maximum.add(value)
+                minimum.add(value)
+            self.assertEqual(maximum.get(), max(values) if values else None)
+            self.assertEqual(minimum.get(), min(values) if values else None)
+
+class SortedMultisetTests(unittest.TestCase):
+    """
+    Test cases for the SortedMultiset class.
+    """
+
+    def test_matches_sorted_list(self):
+        """
+        Test case to verify that every rank matches a sorted list, with duplicates, through splits
+        and drops of the sublists.
+        """
+        generator = random.Random(11)
+        multiset = SortedMultiset()
+        expected = []
+        for step in range(6000):
+            if expected and generator.random() < 0.4:
+                value = generator.choice(expected)
+                expected.remove(value)
+                multiset.remove(value)
+            else:
+                value = generator.choice([generator.randint(0, 100), generator.random() * 100])
+                insort(expected, value)
+                multiset.add(value)
+            self.assertEqual(len(multiset), len(expected))
+            if step % 100 == 0:
+                self.assertEqual([multiset[rank] for rank in range(len(multiset))], expected)
+            if expected:
+                rank = generator.randrange(len(expected))
+                self.assertEqual(multiset[rank], expected[rank])
+                self.assertEqual(multiset[-1], expected[-1])
+
+    def test_remove_missing_value(self):
+        """
+        Test case to verify that removing a value that is not in the multiset raises a ValueError.
+        """
+        multiset = SortedMultiset()
+        with self.assertRaises(ValueError):
+            multiset.remove(1)
+        multiset.add(1)
+        multiset.add(3)
+        with self.assertRaises(ValueError):
+            multiset.remove(2)
+        with self.assertRaises(ValueError):
+            multiset.remove(4)
+
+    def test_rank_out_of_range(self):
+        """
+        Test case to verify that a rank out of range raises an IndexError.
+        """
+        multiset = SortedMultiset()
+        self.assertRaises(IndexError, getitem, multiset, 0)
+        multiset.add(5)
+        self.assertEqual(multiset[0], 5)
+        self.assertRaises(IndexError, getitem, multiset, 1)
+
+if __name__ == '__main__':
+    unittest.main()
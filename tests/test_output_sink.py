@@ -0,0 +1,148 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.output_sink import (
+    BinaryFileOutputSink,
+    FileOutputSink,
+    NullOutputSink,
+    StdoutOutputSink,
+    TeeOutputSink,
+    create_output_sink,
+)
+
+class OutputSinkTests(unittest.TestCase):
+    """
+    Test cases for the output sinks.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.temp_dir.name, "output.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_file_sink_writes_in_batches(self):
+        """
+        Test case to verify that the file sink only writes once a full batch is buffered,
+        and that the file is opened a single time for the whole run.
+        """
+        with patch('builtins.open', wraps=open) as mock_open_file:
+            sink = FileOutputSink(self.output_file, batch_size=2)
+            sink.write("a")
+            self.assertFalse(os.path.exists(self.output_file))
+
+            sink.write("b")
+            sink.write("c")
+            sink.close()
+
+            mock_open_file.assert_called_once_with(self.output_file, 'a', encoding='utf-8')
+
+        with open(self.output_file, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "a\nb\nc\n")
+
+    def test_file_sink_without_records_does_not_create_file(self):
+        """
+        Test case to verify that a run without results does not leave an empty output file behind.
+        """
+        with FileOutputSink(self.output_file):
+            pass
+
+        self.assertFalse(os.path.exists(self.output_file))
+
+    def test_file_sink_flushes_on_error(self):
+        """
+        Test case to verify that the buffered records are written when the run fails.
+        """
+        with self.assertRaises(RuntimeError):
+            with FileOutputSink(self.output_file) as sink:
+                sink.write("a")
+                raise RuntimeError
+
+        with open(self.output_file, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "a\n")
+
+    def test_file_sink_sync_and_truncate(self):
+        """
+        Test case to verify that the file sink reports the size of the output file once synced,
+        and drops the records written after a given size.
+        """
+        sink = FileOutputSink(self.output_file, batch_size=10)
+        sink.write("first")
+        size = sink.sync()
+        sink.write("second")
+        sink.flush()
+
+        sink.truncate(size)
+        sink.write("third")
+        sink.close()
+
+        self.assertEqual(size, len("first\n"))
+        with open(self.output_file, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "first\nthird\n")
+        with self.assertRaises(ValueError):
+            sink.truncate(1000)
+
+    def test_binary_file_sink(self):
+        """
+        Test case to verify that the binary file sink writes the records as they are, without newlines.
+        """
+        with BinaryFileOutputSink(self.output_file, batch_size=2) as sink:
+            sink.write(b"ab")
+            sink.write(b"\n")
+            sink.write(b"c")
+
+        with open(self.output_file, 'rb') as f:
+            self.assertEqual(f.read(), b"ab\nc")
+
+    def test_stdout_sink(self):
+        """
+        Test case for the stdout sink.
+        """
+        with patch('sys.stdout', new_callable=io.StringIO) as mock_stdout:
+            with StdoutOutputSink() as sink:
+                sink.write("a")
+                sink.write("b")
+            self.assertEqual(mock_stdout.getvalue(), "a\nb\n")
+
+    def test_tee_sink_forwards_to_every_sink(self):
+        """
+        Test case to verify that the tee sink forwards the records, flushes and closes to every sink.
+        """
+        first = Mock(spec=IOutputSink)
+        second = Mock(spec=IOutputSink)
+
+        with TeeOutputSink(first, second) as sink:
+            sink.write("a")
+
+        for mock_sink in (first, second):
+            mock_sink.write.assert_called_once_with("a")
+            mock_sink.close.assert_called_once()
+
+    def test_create_output_sink(self):
+        """
+        Test case for the factory used by the command line.
+        """
+        self.assertIsInstance(create_output_sink('file', self.output_file), FileOutputSink)
+        self.assertIsInstance(create_output_sink('stdout', self.output_file), StdoutOutputSink)
+        self.assertIsInstance(create_output_sink('both', self.output_file), TeeOutputSink)
+        self.assertIsInstance(create_output_sink('null', self.output_file), NullOutputSink)
+        self.assertIsInstance(create_output_sink('file', self.output_file, binary=True), BinaryFileOutputSink)
+        self.assertIsInstance(create_output_sink('null', self.output_file, binary=True), NullOutputSink)
+        with self.assertRaises(ValueError):
+            create_output_sink('queue', self.output_file)
+        with self.assertRaises(ValueError):
+            create_output_sink('stdout', self.output_file, binary=True)
+
+    def test_invalid_batch_size(self):
+        """
+        Test case to verify that the batch size must be positive.
+        """
+        with self.assertRaises(ValueError):
+            FileOutputSink(self.output_file, batch_size=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+from moving_average_calculator.models.event_reader import read_events_mmap
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.multi_window import create_window
+from moving_average_calculator.models.parallel_moving_average_calculator import (
+    ParallelMovingAverageCalculator,
+    process_chunk,
+)
+from tests.helpers import written_lines
+
+class ParallelMovingAverageCalculatorTests(unittest.TestCase):
+    """
+    Unit tests for the ParallelMovingAverageCalculator class.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        random.seed(11)
+        timestamp = datetime(2022, 12, 26, 10, 0)
+        lines = []
+        for _ in range(400):
+            timestamp += timedelta(seconds=random.choice([0, 0.5, 20, 59, 60, 61, 300, 7200]))
+            if random.random() < 0.05:
+                lines.append('{"duration": 1}')
+                continue
+            lines.append(json.dumps({"timestamp": timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                                     "duration": random.randint(0, 100)}))
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.input_file = os.path.join(cls.temp_dir.name, "events.json")
+        with open(cls.input_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.temp_dir.cleanup()
+
+    def process(self, calculator):
+        """
+        Runs a calculator over the input file, and returns what it wrote.
+        """
+        with patch('builtins.print'):
+            calculator.process_events(self.input_file)
+        return written_lines(calculator.output_sink)
+
+    def test_matches_sequential_calculator(self):
+        """
+        Test case to verify that the parallel run writes the same results as the sequential one,
+        with chunks much smaller than the windows and minutes that straddle the chunks.
+        """
+        for window_sizes, output_mode in [([0], 'dense'), ([1], 'dense'), ([10], 'runs'), ([2, 30, 180], 'dense')]:
+            with self.subTest(window_sizes=window_sizes, output_mode=output_mode):
+                sequential = MovingAverageCalculator(
+                    create_window(window_sizes), Mock(spec=IOutputSink), output_mode
+                )
+                parallel = ParallelMovingAverageCalculator(
+                    window_sizes, Mock(spec=IOutputSink), output_mode, workers=2, chunks_per_worker=10
+                )
+                self.assertEqual(self.process(parallel), self.process(sequential))
+
+    def test_matches_sequential_calculator_with_malformed_lines(self):
+        """
+        Test case to verify that the parallel run writes the same results as the sequential one with
+        either reader, when many lines are malformed, so that the halo of each chunk skips the same lines
+        as the chunks and the sequential run.
+        """
+        random.seed(12)
+        timestamp = datetime(2022, 12, 26, 10, 0)
+        lines = []
+        for _ in range(400):
+            timestamp += timedelta(seconds=random.choice([0, 20, 59, 61, 300]))
+            line = json.dumps({"timestamp": timestamp.strftime('%Y-%m-%d %H:%M:%S.%f'), "nr_words": 30,
+                               "duration": random.randint(0, 100)})
+            if random.random() < 0.3:
+                line = line.replace('"nr_words": 30', random.choice(['"x" 5', '"nr_words": 030', '"x": ']))
+            elif random.random() < 0.1:
+                line = line.replace('-12-', '-92-')
+            lines.append(line)
+        input_file = os.path.join(self.temp_dir.name, "malformed.json")
+        with open(input_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+        def process(calculator):
+            """
+            Runs a calculator over the malformed input file, and returns what it wrote.
+            """
+            with patch('builtins.print'):
+                calculator.process_events(input_file)
+            return written_lines(calculator.output_sink)
+
+        sequential = process(MovingAverageCalculator(create_window([30]), Mock(spec=IOutputSink),
+                                                     reader=read_events_mmap))
+        self.assertEqual(process(MovingAverageCalculator(create_window([30]), Mock(spec=IOutputSink))), sequential)
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                parallel = ParallelMovingAverageCalculator([30], Mock(spec=IOutputSink), workers=workers,
+                                                           chunks_per_worker=10)
+                self.assertEqual(process(parallel), sequential)
+
+    def test_process_chunk_single_chunk(self):
+        """
+        Test case to verify that a single chunk, covering the whole file, is the sequential calculation.
+        """
+        with patch('builtins.print'):
+            results = process_chunk(self.input_file, 0, os.path.getsize(self.input_file), [5], True)
+
+        self.assertEqual(sum(count for _, _, count in results),
+                         (results[-1][0] - results[0][0]) // 60_000_000 + results[-1][2])
+
+    def test_process_events_empty_file(self):
+        """
+        Test case for the `process_events` method when the input file is empty.
+        """
+        empty_file = os.path.join(self.temp_dir.name, "empty.json")
+        open(empty_file, 'w', encoding='utf-8').close()
+        calculator = ParallelMovingAverageCalculator([5], Mock(spec=IOutputSink))
+
+        with patch('builtins.print') as mock_print:
+            calculator.process_events(empty_file)
+
+        mock_print.assert_called_once_with("Error: No events found in file")
+        calculator.output_sink.write.assert_not_called()
+
+    def test_process_and_print_event_is_not_supported(self):
+        """
+        Test case to verify that the `process_and_print_event` method raises an error, since the minutes
+        are only processed a chunk at a time by `process_events`.
+        """
+        calculator = ParallelMovingAverageCalculator([5], Mock(spec=IOutputSink))
+
+        with self.assertRaises(NotImplementedError):
+            calculator.process_and_print_event()
+        calculator.output_sink.write.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.multi_window import MultiWindow
+from moving_average_calculator.models.output_sink import FileOutputSink
+from moving_average_calculator.models.range_moving_average_calculator import RangeMovingAverageCalculator
+from moving_average_calculator.models.time_index import TimeIndex
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE, to_epoch_microseconds
+from moving_average_calculator.models.window import Window
+
+
+class RangeMovingAverageCalculatorTests(unittest.TestCase):
+    """
+    Test cases for the RangeMovingAverageCalculator class.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.temp_dir.name, "events.json")
+        self.index_file = self.input_file + ".index"
+        self.output_file = os.path.join(self.temp_dir.name, "events_result.json")
+        with open(self.input_file, 'w', encoding='utf-8') as f:
+            for index in range(200):
+                # a gap of 40 minutes in the middle of the events
+                seconds = index * 37 + (2400 if index >= 100 else 0)
+                f.write(json.dumps({"timestamp": f"2022-12-26 {10 + seconds // 3600}:{seconds // 60 % 60:02d}:"
+                                                 f"{seconds % 60:02d}.000",
+                                    "duration": index % 13}) + '\n')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def minute(self, minutes):
+        return to_epoch_microseconds(datetime(2022, 12, 26, 10, 0)) + minutes * MICROSECONDS_PER_MINUTE
+
+    def run_calculator(self, calculator_factory):
+        if os.path.exists(self.output_file):
+            os.remove(self.output_file)
+        with FileOutputSink(self.output_file) as output_sink:
+            calculator_factory(output_sink).process_events(self.input_file)
+        if not os.path.exists(self.output_file):
+            return []
+        with open(self.output_file, encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def test_matches_moving_average_calculator(self):
+        """
+        Test case to verify that the minutes written are the ones of a run over the whole input within the range,
+        for ranges before, after, across and within the events and their gap.
+        """
+        for window_size in [0, 3, 50]:
+            expected = self.run_calculator(lambda output_sink, window_size=window_size: MovingAverageCalculator(
+                Window(window_size), output_sink
+            ))
+            dates = [json.loads(record)["date"] for record in expected]
+            for from_minutes, to_minutes in [(-60, -10), (-60, 5), (0, 300), (20, 21), (30, 110), (70, 90),
+                                             (100, 122), (155, 200), (300, 400)]:
+                with self.subTest(window_size=window_size, from_minutes=from_minutes, to_minutes=to_minutes):
+                    records = self.run_calculator(lambda output_sink, window_size=window_size, from_minutes=from_minutes,
+                                                  to_minutes=to_minutes: RangeMovingAverageCalculator(
+                        Window(window_size), output_sink, 'dense', self.minute(from_minutes),
+                        self.minute(to_minutes), window_size, self.index_file
+                    ))
+
+                    first_date = f"2022-12-26 {10 + from_minutes // 60:02d}:{from_minutes % 60:02d}:00"
+                    end_date = f"2022-12-26 {10 + to_minutes // 60:02d}:{to_minutes % 60:02d}:00"
+                    self.assertEqual(records, [record for record, date in zip(expected, dates)
+                                               if first_date <= date < end_date])
+
+    def test_reads_only_the_range(self):
+        """
+        Test case to verify that only the events from the range minus the largest window size are read.
+        """
+        processed = []
+        original_process_event = MovingAverageCalculator.process_event
+
+        def record_event(calculator, event):
+            processed.append(event)
+            original_process_event(calculator, event)
+
+        with patch.object(MovingAverageCalculator, 'process_event', record_event):
+            records = self.run_calculator(lambda output_sink: RangeMovingAverageCalculator(
+                MultiWindow([2, 5]), output_sink, 'dense', self.minute(30), self.minute(40), 5, self.index_file
+            ))
+
+        self.assertEqual(len(records), 10)
+        self.assertGreaterEqual(processed[0].timestamp, self.minute(24))
+        self.assertLess(processed[-1].timestamp, self.minute(40))
+        self.assertLess(len(processed), 30)
+        self.assertIsNotNone(TimeIndex.load(self.index_file, self.input_file))
+
+    def test_unsorted_input_reads_the_whole_file(self):
+        """
+        Test case to verify that, when the input cannot be indexed, the whole file is read and the range is written.
+        """
+        with open(self.input_file, 'a', encoding='utf-8') as f:
+            f.write('{"timestamp": "2022-12-26 10:00:00.000", "duration": 5}\n')
+
+        with patch('builtins.print') as mock_print:
+            records = self.run_calculator(lambda output_sink: RangeMovingAverageCalculator(
+                Window(5), output_sink, 'dense', self.minute(30), self.minute(40), 5, self.index_file
+            ))
+
+        mock_print.assert_any_call("Error: The events of the input file are not sorted, reading the whole file")
+        self.assertEqual(len(records), 10)
+        self.assertEqual(json.loads(records[0])["date"], "2022-12-26 10:30:00")
+
+    def test_invalid_range(self):
+        """
+        Test case to verify that a range that is empty, or that does not start at a minute, is rejected.
+        """
+        with self.assertRaises(ValueError):
+            RangeMovingAverageCalculator(Window(5), None, 'dense', self.minute(10), self.minute(10))
+        with self.assertRaises(ValueError):
+            RangeMovingAverageCalculator(Window(5), None, 'dense', self.minute(10) + 1, self.minute(20))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import json
+import sys
+import unittest
+from unittest.mock import Mock, patch
+from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.reorder_buffer import LateEventWriter, ReorderBuffer, grouped_event_timestamp
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE
+
+
+def minutes(*values):
+    """
+    Builds the events at the given minutes, with the minute as their duration.
+    """
+    return [Event.from_epoch(value * MICROSECONDS_PER_MINUTE, value) for value in values]
+
+
+class ReorderBufferTests(unittest.TestCase):
+    """
+    Unit tests for the ReorderBuffer class.
+    """
+
+    def test_reorder_within_allowed_lateness(self):
+        """
+        Test case to verify that the events that arrive out of order, but within the allowed lateness,
+        are released in order.
+        """
+        buffer = ReorderBuffer(3 * MICROSECONDS_PER_MINUTE)
+
+        events = list(buffer.reorder(minutes(2, 1, 4, 3, 7, 5, 6, 9, 8)))
+
+        self.assertEqual([event.duration for event in events], [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(buffer.late_events, 0)
+        self.assertEqual(buffer.heap, [])
+
+    def test_release_once_watermark_passes(self):
+        """
+        Test case to verify that the events are only released once the watermark passes them.
+        """
+        buffer = ReorderBuffer(2 * MICROSECONDS_PER_MINUTE)
+        first, second, third, fourth = minutes(1, 2, 3, 4)
+
+        self.assertEqual(list(buffer.push(second.timestamp, second)), [])
+        self.assertEqual(list(buffer.push(first.timestamp, first)), [])
+        self.assertEqual(list(buffer.push(third.timestamp, third)), [first])
+        self.assertEqual(list(buffer.push(fourth.timestamp, fourth)), [second])
+        self.assertEqual(list(buffer.drain()), [third, fourth])
+
+    def test_keeps_arrival_order_of_same_timestamps(self):
+        """
+        Test case to verify that the events with the same timestamp are released in the order they arrived.
+        """
+        buffer = ReorderBuffer(MICROSECONDS_PER_MINUTE)
+        events = [Event.from_epoch(MICROSECONDS_PER_MINUTE, duration) for duration in range(5)]
+
+        self.assertEqual(list(buffer.reorder(events)), events)
+
+    def test_late_events_are_counted_and_routed(self):
+        """
+        Test case to verify that the events older than one already released are not released,
+        but counted and handed to the on_late callback.
+        """
+        on_late = Mock()
+        buffer = ReorderBuffer(MICROSECONDS_PER_MINUTE, on_late)
+        events = minutes(5, 10, 3, 9, 10, 20)
+
+        with patch('builtins.print') as mock_print:
+            released = list(buffer.reorder(events))
+
+        self.assertEqual([event.duration for event in released], [5, 9, 10, 10, 20])
+        self.assertEqual(buffer.late_events, 1)
+        on_late.assert_called_once_with(events[2])
+        mock_print.assert_called_once_with("Error: 1 events arrived too late, skipped", file=sys.stderr)
+
+    def test_zero_lateness_releases_sorted_events_at_once(self):
+        """
+        Test case to verify that, without lateness, sorted events go straight through without being held.
+        """
+        buffer = ReorderBuffer(0)
+
+        for event in minutes(1, 2, 2, 3):
+            self.assertEqual(list(buffer.push(event.timestamp, event)), [event])
+            self.assertEqual(buffer.heap, [])
+
+    def test_negative_lateness(self):
+        """
+        Test case to verify that a negative allowed lateness is rejected.
+        """
+        with self.assertRaises(ValueError):
+            ReorderBuffer(-1)
+
+    def test_grouped_events(self):
+        """
+        Test case to verify that the events read along with their keys are reordered by their timestamp,
+        and that the late ones are written with their keys.
+        """
+        output_sink = Mock(spec=IOutputSink)
+        buffer = ReorderBuffer(0, LateEventWriter(output_sink))
+        keys = [(("client_name",), ("a",))]
+        items = [(event, keys) for event in minutes(2, 1, 3)]
+
+        with patch('builtins.print'):
+            released = list(buffer.reorder(items, grouped_event_timestamp))
+
+        self.assertEqual(released, [items[0], items[2]])
+        output_sink.write.assert_called_once_with(json.dumps(
+            {"timestamp": "1970-01-01 00:01:00.000000", "duration": 1, "client_name": "a"}
+        ))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+import json
+import os
+import struct
+import tempfile
+import unittest
+from datetime import datetime
+from moving_average_calculator.models.output_sink import BinaryFileOutputSink, create_output_sink
+from moving_average_calculator.models.result_encoders import (
+    BinaryEncoder,
+    CsvEncoder,
+    NdjsonEncoder,
+    create_encoder,
+    read_binary_results,
+    read_csv_results,
+    read_ndjson_results,
+)
+from moving_average_calculator.models.result_writer import MinuteResultWriter
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE, format_minute, to_epoch_microseconds
+
+class ResultEncodersTests(unittest.TestCase):
+    """
+    Test cases for the encoders of the output formats, and their readers.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        # the minutes cross an hour and a day
+        self.minute = to_epoch_microseconds(datetime(2018, 12, 26, 23, 58))
+        self.results = [(self.minute, 20.0, 3), (self.minute + 3 * MICROSECONDS_PER_MINUTE, 25.5, 1),
+                        (self.minute + 4 * MICROSECONDS_PER_MINUTE, 0.1 + 0.2, 2)]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_results(self, output_format: str, output_mode: str = 'dense', results=None) -> str:
+        path = os.path.join(self.temp_dir.name, f"{output_mode}.{output_format}")
+        with create_output_sink('file', path, binary=output_format == 'binary',
+                                append=output_format == 'ndjson') as sink:
+            writer = MinuteResultWriter(sink, output_mode, encoder=create_encoder(output_format))
+            for minute, average, count in results or self.results:
+                writer.write(minute, average, count)
+            writer.flush()
+        return path
+
+    def expected_minutes(self):
+        return [(minute + offset * MICROSECONDS_PER_MINUTE, average)
+                for minute, average, count in self.results for offset in range(count)]
+
+    def test_ndjson_matches_json_dumps(self):
+        """
+        Test case to verify that the NDJSON records are the same as json.dumps, for every kind of result.
+        """
+        encoder = NdjsonEncoder({"client_name": "café"})
+        aggregates = {"average_delivery_time": 20.0, "max_delivery_time": 31}
+        for result, fields in [(20.0, {"average_delivery_time": 20.0}), (0.1 + 0.2, {"average_delivery_time": 0.1 + 0.2}),
+                               (1e-7, {"average_delivery_time": 1e-7}), (31, {"average_delivery_time": 31}),
+                               (float('inf'), {"average_delivery_time": float('inf')}),
+                               ({"1": 20.0, "10": 25.5}, {"average_delivery_time": {"1": 20.0, "10": 25.5}}),
+                               (aggregates, aggregates)]:
+            expected = [json.dumps({"date": format_minute(self.minute + offset * MICROSECONDS_PER_MINUTE),
+                                    "client_name": "café", **fields}) for offset in range(3)]
+            self.assertEqual(encoder.encode_minutes(self.minute, result, 3), expected, result)
+
+        self.assertEqual(encoder.encode_run(self.minute, self.minute + MICROSECONDS_PER_MINUTE, 20.0), [json.dumps({
+            "from": "2018-12-26 23:58:00", "to": "2018-12-26 23:59:00",
+            "client_name": "café", "average_delivery_time": 20.0
+        })])
+
+    def test_ndjson_round_trip(self):
+        """
+        Test case to verify that the NDJSON results are read back as they were written.
+        """
+        path = self.write_results('ndjson')
+        self.assertEqual([(record["date"], record["average_delivery_time"]) for record in read_ndjson_results(path)],
+                         [(format_minute(minute), average) for minute, average in self.expected_minutes()])
+
+    def test_csv_round_trip(self):
+        """
+        Test case to verify that the CSV results have a single header, and are read back as they were written,
+        in both output modes.
+        """
+        path = self.write_results('csv')
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[:2], ["date,average_delivery_time", "2018-12-26 23:58:00,20.0"])
+        self.assertEqual(list(read_csv_results(path)),
+                         [{"date": format_minute(minute), "average_delivery_time": average}
+                          for minute, average in self.expected_minutes()])
+
+        path = self.write_results('csv', 'runs')
+        self.assertEqual(list(read_csv_results(path)), [
+            {"from": "2018-12-26 23:58:00", "to": "2018-12-27 00:00:00", "average_delivery_time": 20.0},
+            {"from": "2018-12-27 00:01:00", "to": "2018-12-27 00:01:00", "average_delivery_time": 25.5},
+            {"from": "2018-12-27 00:02:00", "to": "2018-12-27 00:03:00", "average_delivery_time": 0.1 + 0.2},
+        ])
+
+    def test_csv_columns(self):
+        """
+        Test case for the columns of the averages by window size, of the other aggregates,
+        and of the extra fields, which are quoted when needed.
+        """
+        encoder = CsvEncoder({"client_name": "air, \"liberty\""})
+        self.assertEqual(encoder.encode_minutes(self.minute, {1: 20.0, 10: 25.5}, 1), [
+            'date,client_name,average_delivery_time_1,average_delivery_time_10',
+            '2018-12-26 23:58:00,"air, ""liberty""",20.0,25.5',
+        ])
+        with self.assertRaises(ValueError):
+            encoder.encode_minutes(self.minute, {1: 20.0}, 1)
+
+        encoder = CsvEncoder()
+        self.assertEqual(encoder.encode_minutes(self.minute, {"average_delivery_time": 20.0,
+                                                               "max_delivery_time": 31,
+                                                               "p95_delivery_time": None}, 1), [
+            'date,average_delivery_time,max_delivery_time,p95_delivery_time',
+            '2018-12-26 23:58:00,20.0,31,',
+        ])
+
+        path = os.path.join(self.temp_dir.name, "aggregates.csv")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(CsvEncoder().encode_minutes(self.minute, {"average_delivery_time": 0.5,
+                                                                   "max_delivery_time": 1,
+                                                                   "p95_delivery_time": 1}, 1)) + '\n')
+        self.assertEqual(list(read_csv_results(path)), [{"date": "2018-12-26 23:58:00", "average_delivery_time": 0.5,
+                                                         "max_delivery_time": 1, "p95_delivery_time": 1}])
+
+    def test_binary_round_trip(self):
+        """
+        Test case to verify that the binary results are fixed-width little-endian records,
+        which are read back as they were written, in both output modes.
+        """
+        path = self.write_results('binary')
+        with open(path, 'rb') as f:
+            contents = f.read()
+        self.assertEqual(len(contents), 16 * 6)
+        self.assertEqual(contents[:16], struct.pack('<qd', self.minute // MICROSECONDS_PER_MINUTE, 20.0))
+        self.assertEqual(list(read_binary_results(path)), self.expected_minutes())
+
+        self.assertEqual(list(read_binary_results(self.write_results('binary', 'runs'))), self.expected_minutes())
+
+    def test_csv_and_binary_outputs_are_overwritten(self):
+        """
+        Test case to verify that writing the CSV or binary results twice to the same file
+        leaves a single header and a single copy of the records.
+        """
+        for output_format, read_results, expected in [
+                ('csv', read_csv_results, [{"date": format_minute(minute), "average_delivery_time": average}
+                                           for minute, average in self.expected_minutes()]),
+                ('binary', read_binary_results, self.expected_minutes())]:
+            with self.subTest(output_format=output_format):
+                self.write_results(output_format)
+                path = self.write_results(output_format)
+                self.assertEqual(list(read_results(path)), expected)
+
+    def test_step(self):
+        """
+        Test case to verify that the encoders step through the results by their step, with the seconds
+        in the dates when the step is not whole minutes, and that the binary format only takes whole minutes.
+        """
+        step = 10_000_000
+        self.assertEqual([json.loads(record)["date"] for record in NdjsonEncoder(step=step).encode_minutes(
+            self.minute, 20.0, 3)], ["2018-12-26 23:58:00", "2018-12-26 23:58:10", "2018-12-26 23:58:20"])
+        self.assertEqual(CsvEncoder(step=step).encode_minutes(self.minute, 20.0, 2), [
+            'date,average_delivery_time', '2018-12-26 23:58:00,20.0', '2018-12-26 23:58:10,20.0',
+        ])
+        self.assertEqual(NdjsonEncoder(step=60 * MICROSECONDS_PER_MINUTE).encode_minutes(self.minute, 20.0, 2)[1],
+                         json.dumps({"date": "2018-12-27 00:58:00", "average_delivery_time": 20.0}))
+
+        path = os.path.join(self.temp_dir.name, "hours.bin")
+        with BinaryFileOutputSink(path) as sink:
+            sink.write(b''.join(create_encoder('binary', step=60 * MICROSECONDS_PER_MINUTE)
+                                .encode_minutes(self.minute, 20.0, 2)))
+        self.assertEqual(list(read_binary_results(path)),
+                         [(self.minute, 20.0), (self.minute + 60 * MICROSECONDS_PER_MINUTE, 20.0)])
+        with self.assertRaises(ValueError):
+            create_encoder('binary', step=step)
+
+    def test_binary_errors(self):
+        """
+        Test case to verify that the binary format only takes a single average, without extra fields,
+        and that a truncated file is rejected.
+        """
+        with self.assertRaises(ValueError):
+            BinaryEncoder().encode_minutes(self.minute, {"1": 20.0}, 1)
+        with self.assertRaises(ValueError):
+            create_encoder('binary', {"client_name": "airliberty"})
+        with self.assertRaises(ValueError):
+            create_encoder('parquet')
+
+        path = os.path.join(self.temp_dir.name, "truncated.bin")
+        with open(path, 'wb') as f:
+            f.write(b'\0' * 17)
+        with self.assertRaises(ValueError):
+            list(read_binary_results(path))
+
+        with open(path, 'wb'):
+            pass
+        self.assertEqual(list(read_binary_results(path)), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import unittest
+from unittest.mock import Mock, call
+from datetime import datetime
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.result_writer import ClippedResultWriter, MinuteResultWriter
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE, to_epoch_microseconds
+
+class MinuteResultWriterTests(unittest.TestCase):
+    """
+    Test cases for the MinuteResultWriter class.
+    """
+
+    def setUp(self):
+        self.output_sink = Mock(spec=IOutputSink)
+        self.minute = to_epoch_microseconds(datetime(2022, 12, 26, 10, 0))
+
+    def test_dense_output(self):
+        """
+        Test case to verify that the dense mode writes one record per minute, like json.dumps does.
+        """
+        writer = MinuteResultWriter(self.output_sink)
+        writer.write(self.minute, 20.0, 2)
+
+        self.output_sink.write.assert_has_calls([
+            call(json.dumps({"date": "2022-12-26 10:00:00", "average_delivery_time": 20.0})),
+            call(json.dumps({"date": "2022-12-26 10:01:00", "average_delivery_time": 20.0})),
+        ])
+        self.assertEqual(self.output_sink.write.call_count, 2)
+
+    def test_runs_output(self):
+        """
+        Test case to verify that the runs mode merges consecutive minutes with the same average,
+        and that the pending run is written on flush.
+        """
+        writer = MinuteResultWriter(self.output_sink, 'runs')
+        writer.write(self.minute, 20.0, 2)
+        writer.write(self.minute + 2 * MICROSECONDS_PER_MINUTE, 20.0)
+        writer.write(self.minute + 3 * MICROSECONDS_PER_MINUTE, 0.0)
+        self.assertEqual(self.output_sink.write.call_count, 1)
+
+        writer.flush()
+
+        self.output_sink.write.assert_has_calls([
+            call(json.dumps({"from": "2022-12-26 10:00:00", "to": "2022-12-26 10:02:00", "average_delivery_time": 20.0})),
+            call(json.dumps({"from": "2022-12-26 10:03:00", "to": "2022-12-26 10:03:00", "average_delivery_time": 0.0})),
+        ])
+        self.output_sink.flush.assert_called_once()
+
+    def test_invalid_output_mode(self):
+        """
+        Test case to verify that unknown output modes are rejected.
+        """
+        with self.assertRaises(ValueError):
+            MinuteResultWriter(self.output_sink, 'sparse')
+
+    def test_clipped_output(self):
+        """
+        Test case to verify that the clipped writer only writes the minutes within its range.
+        """
+        writer = ClippedResultWriter(self.output_sink, 'dense', self.minute + MICROSECONDS_PER_MINUTE,
+                                     self.minute + 3 * MICROSECONDS_PER_MINUTE)
+        writer.write(self.minute, 20.0, 2)
+        writer.write(self.minute + 2 * MICROSECONDS_PER_MINUTE, 10.0, 5)
+        writer.write(self.minute + 5 * MICROSECONDS_PER_MINUTE, 30.0)
+
+        self.assertEqual(self.output_sink.write.call_args_list, [
+            call(json.dumps({"date": "2022-12-26 10:01:00", "average_delivery_time": 20.0})),
+            call(json.dumps({"date": "2022-12-26 10:02:00", "average_delivery_time": 10.0})),
+        ])
+
+    def test_aggregate_fields(self):
+        """
+        Test case to verify that the other aggregates of a window are written next to the average,
+        in both modes.
+        """
+        result = {"average_delivery_time": 20.0, "max_delivery_time": 31, "p95_delivery_time": 31}
+        writer = MinuteResultWriter(self.output_sink)
+        writer.write(self.minute, result)
+        runs_writer = MinuteResultWriter(self.output_sink, 'runs')
+        runs_writer.write(self.minute, result, 2)
+        runs_writer.flush()
+
+        self.assertEqual(self.output_sink.write.call_args_list, [
+            call(json.dumps({"date": "2022-12-26 10:00:00", **result})),
+            call(json.dumps({"from": "2022-12-26 10:00:00", "to": "2022-12-26 10:01:00", **result})),
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
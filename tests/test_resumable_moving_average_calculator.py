@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from moving_average_calculator.models.bucketed_window import BucketedWindow
+from moving_average_calculator.models.checkpoint import Checkpoint, CheckpointError
+from moving_average_calculator.models.decaying_window import DecayingWindow
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.multi_window import MultiWindow
+from moving_average_calculator.models.output_sink import FileOutputSink
+from moving_average_calculator.models.resumable_moving_average_calculator import ResumableMovingAverageCalculator
+from moving_average_calculator.models.window import Window
+
+
+def crash_after(events):
+    """
+    Builds a process_event method that crashes after processing some events.
+
+    Args:
+        events (int): The number of events processed before the crash.
+
+    Returns:
+        Callable[[MovingAverageCalculator, Event], None]: The method, which raises a RuntimeError
+            instead of processing any later event.
+    """
+    original_process_event = MovingAverageCalculator.process_event
+    processed = []
+
+    def process_event(calculator, event):
+        if len(processed) == events:
+            raise RuntimeError("Crash")
+        processed.append(event)
+        original_process_event(calculator, event)
+
+    return process_event
+
+
+class ResumableMovingAverageCalculatorTests(unittest.TestCase):
+    """
+    Test cases for the ResumableMovingAverageCalculator class.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.temp_dir.name, "events.json")
+        self.output_file = os.path.join(self.temp_dir.name, "events_result.json")
+        self.checkpoint_file = self.output_file + ".checkpoint"
+        with open(self.input_file, 'w', encoding='utf-8') as f:
+            for index in range(200):
+                minute, second = divmod(index * 37, 60)
+                f.write(json.dumps({"timestamp": f"2022-12-26 1{minute // 60}:{minute % 60:02d}:{second:02d}.000",
+                                    "duration": index % 13 if index % 5 else index / 4}) + '\n')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_calculator(self, window_factory, output_mode, output_file, **kwargs):
+        """
+        Runs a ResumableMovingAverageCalculator over the input file, with a checkpoint every 500 events.
+        """
+        with FileOutputSink(output_file) as output_sink:
+            ResumableMovingAverageCalculator(window_factory(), output_sink, output_mode, self.checkpoint_file,
+                                             checkpoint_interval=500, **kwargs).process_events(self.input_file)
+
+    def expected_output(self, window_factory, output_mode):
+        """
+        Gets the output of an uninterrupted run of a MovingAverageCalculator over the input file.
+        """
+        expected_file = os.path.join(self.temp_dir.name, "expected.json")
+        with FileOutputSink(expected_file, mode='w') as output_sink:
+            MovingAverageCalculator(window_factory(), output_sink, output_mode).process_events(self.input_file)
+        with open(expected_file, encoding='utf-8') as f:
+            return f.read()
+
+    def test_resume_after_crash(self):
+        """
+        Test case to verify that a run that crashes, and is then resumed, writes the same output
+        as an uninterrupted run, without the records written after the last checkpoint.
+        """
+        for window_factory, output_mode in [(lambda: Window(7), 'dense'), (lambda: MultiWindow([2, 30]), 'runs'),
+                                            (lambda: Window(7, ['max', 'p90']), 'runs'),
+                                            (lambda: DecayingWindow(30), 'dense'),
+                                            (lambda: BucketedWindow(7), 'runs')]:
+            with self.subTest(output_mode=output_mode):
+                if os.path.exists(self.output_file):
+                    os.remove(self.output_file)
+                with patch.object(ResumableMovingAverageCalculator, 'process_event', crash_after(150)), \
+                        self.assertRaises(RuntimeError):
+                    self.run_calculator(window_factory, output_mode, self.output_file)
+                checkpoint = Checkpoint.load(self.checkpoint_file)
+                self.assertGreater(checkpoint.input_offset, 0)
+                self.assertFalse(checkpoint.finished)
+
+                self.run_calculator(window_factory, output_mode, self.output_file, resume=True)
+
+                with open(self.output_file, encoding='utf-8') as f:
+                    self.assertEqual(f.read(), self.expected_output(window_factory, output_mode))
+                self.assertTrue(Checkpoint.load(self.checkpoint_file).finished)
+
+    def test_resume_finished_run(self):
+        """
+        Test case to verify that resuming a run that already finished does not write anything.
+        """
+        self.run_calculator(lambda: Window(7), 'dense', self.output_file)
+        with open(self.output_file, encoding='utf-8') as f:
+            output = f.read()
+
+        with patch('builtins.print') as mock_print:
+            self.run_calculator(lambda: Window(7), 'dense', self.output_file, resume=True)
+
+        mock_print.assert_called_once_with("The run has already finished, there is nothing to resume")
+        with open(self.output_file, encoding='utf-8') as f:
+            self.assertEqual(f.read(), output)
+
+    def test_resume_with_other_settings(self):
+        """
+        Test case to verify that a run can not be resumed with other window sizes, other aggregates,
+        or another output mode.
+        """
+        self.run_calculator(lambda: Window(7), 'dense', self.output_file)
+        saved = Checkpoint.load(self.checkpoint_file)
+        saved.finished = False
+        saved.save(self.checkpoint_file)
+
+        for window_factory, output_mode in [(lambda: Window(8), 'dense'), (lambda: Window(7), 'runs'),
+                                            (lambda: MultiWindow([7, 8]), 'dense'), (lambda: Window(7, ['max']), 'dense')]:
+            with self.subTest(output_mode=output_mode), self.assertRaises(CheckpointError):
+                self.run_calculator(window_factory, output_mode, self.output_file, resume=True)
+
+if __name__ == '__main__':
+    unittest.main()
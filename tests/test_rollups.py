@@ -0,0 +1,116 @@
+import json
+import os
+import unittest
+from unittest.mock import Mock
+from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.output_sink import FileOutputSink
+from moving_average_calculator.models.resumable_moving_average_calculator import ResumableMovingAverageCalculator
+from moving_average_calculator.models.rollups import RollupWindow, Rollups
+from moving_average_calculator.models.timestamp import MICROSECONDS_PER_MINUTE, parse_duration
+from moving_average_calculator.models.window import Window
+from tests.helpers import written_records
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+class RollupsTests(unittest.TestCase):
+    """
+    Test cases for the Rollups and RollupWindow classes.
+    """
+
+    def setUp(self):
+        self.output_sink = Mock(spec=IOutputSink)
+
+    def test_rollups_of_the_fixture(self):
+        """
+        Test case to verify that a calculator with a RollupWindow writes its results as without it,
+        and the rollups of every resolution, each period once it has ended.
+        """
+        input_file = os.path.join(DATA_DIR, "base.json")
+        rollups = Rollups(MICROSECONDS_PER_MINUTE, [parse_duration(period) for period in ("1d", "10m", "1h")],
+                          self.output_sink)
+        result_sink = Mock(spec=IOutputSink)
+        MovingAverageCalculator(RollupWindow(Window(10), rollups), result_sink).process_events(input_file)
+        rollups.finish()
+
+        with open(os.path.join(DATA_DIR, "base_result.json"), encoding='utf-8') as f:
+            self.assertEqual(written_records(result_sink),
+                             [json.loads(line) for line in f])
+        self.assertEqual(written_records(self.output_sink), [
+            {"date": "2018-12-26 18:10:00", "resolution": "10m", "events": 2, "average_delivery_time": 25.5},
+            {"date": "2018-12-26 18:20:00", "resolution": "10m", "events": 1, "average_delivery_time": 54.0},
+            {"date": "2018-12-26 18:00:00", "resolution": "1h", "events": 3, "average_delivery_time": 35.0},
+            {"date": "2018-12-26 00:00:00", "resolution": "1d", "events": 3, "average_delivery_time": 35.0},
+        ])
+        self.output_sink.flush.assert_called_once()
+
+    def test_gaps_are_written_as_empty_periods(self):
+        """
+        Test case to verify that the periods without events are written with an average of 0, in order,
+        and that a coarser period is written as soon as the finer ones show it has ended.
+        """
+        rollups = Rollups(10_000_000, [parse_duration("1m"), parse_duration("1h")], self.output_sink)
+        rollups.add_event(Event("2018-12-26 18:11:08.509654", 20))
+        rollups.add_event(Event("2018-12-26 18:11:09.000000", 40))
+        rollups.add_event(Event("2018-12-26 18:14:30.000000", 30))
+        rollups.add_event(Event("2018-12-26 19:00:01.000000", 10))
+        # the hour has ended once the step of the last event has
+        self.assertEqual(written_records(self.output_sink)[-1]["resolution"], "1m")
+        rollups.add_event(Event("2018-12-26 19:00:11.000000", 30))
+        self.assertEqual(written_records(self.output_sink)[-1], {"date": "2018-12-26 18:00:00", "resolution": "1h", "events": 3,
+                                              "average_delivery_time": 30.0})
+        rollups.finish()
+
+        records = written_records(self.output_sink)
+        minutes = [record for record in records if record["resolution"] == "1m"]
+        self.assertEqual(len(minutes), 50)
+        self.assertEqual(minutes[:4], [
+            {"date": "2018-12-26 18:11:00", "resolution": "1m", "events": 2, "average_delivery_time": 30.0},
+            {"date": "2018-12-26 18:12:00", "resolution": "1m", "events": 0, "average_delivery_time": 0.0},
+            {"date": "2018-12-26 18:13:00", "resolution": "1m", "events": 0, "average_delivery_time": 0.0},
+            {"date": "2018-12-26 18:14:00", "resolution": "1m", "events": 1, "average_delivery_time": 30.0},
+        ])
+        self.assertEqual(records[-2:], [
+            {"date": "2018-12-26 19:00:00", "resolution": "1m", "events": 2, "average_delivery_time": 20.0},
+            {"date": "2018-12-26 19:00:00", "resolution": "1h", "events": 2, "average_delivery_time": 20.0},
+        ])
+
+    def test_no_events(self):
+        """
+        Test case to verify that there are no records without events.
+        """
+        Rollups(MICROSECONDS_PER_MINUTE, [parse_duration("1h")], self.output_sink).finish()
+        self.output_sink.write.assert_not_called()
+        self.output_sink.flush.assert_called_once()
+
+    def test_invalid_periods(self):
+        """
+        Test case to verify that the periods must be multiples of the step and of the shorter periods.
+        """
+        for periods in ([], ["90s"], ["1h", "25m"]):
+            with self.subTest(periods=periods):
+                with self.assertRaises(ValueError):
+                    Rollups(MICROSECONDS_PER_MINUTE, [parse_duration(period) for period in periods],
+                            self.output_sink)
+
+    def test_rollup_window_delegates(self):
+        """
+        Test case to verify that a RollupWindow gives the results of its window, and does not support checkpoints.
+        """
+        window = Window(10)
+        rollup_window = RollupWindow(window, Rollups(MICROSECONDS_PER_MINUTE, [parse_duration("1h")],
+                                                     self.output_sink))
+        event = Event("2018-12-26 18:11:08.509654", 20)
+        rollup_window.add_event(event)
+        self.assertEqual(rollup_window.event_count(), 1)
+        self.assertEqual(rollup_window.get_average_duration(), 20.0)
+        self.assertEqual(rollup_window.next_expiration_time(), window.next_expiration_time())
+        rollup_window.remove_old_events(event.timestamp + 11 * MICROSECONDS_PER_MINUTE)
+        self.assertEqual(rollup_window.get_result(), 0.0)
+        with self.assertRaises(TypeError):
+            ResumableMovingAverageCalculator(rollup_window, FileOutputSink(os.devnull))
+
+if __name__ == '__main__':
+    unittest.main()
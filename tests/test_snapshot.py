@@ -0,0 +1,70 @@
+import unittest
+from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.snapshot import SnapshotReader, SnapshotWriter
+
+
+class SnapshotTests(unittest.TestCase):
+    """
+    Test cases for the SnapshotWriter and SnapshotReader classes.
+    """
+
+    def test_round_trip(self):
+        """
+        Test case to verify that the values are read back in the order they were written, with their types.
+        """
+        writer = SnapshotWriter()
+        writer.write_int(-5)
+        writer.write_optional_int(None)
+        writer.write_optional_int(1 << 60)
+        writer.write_number(7)
+        writer.write_number(7.25)
+        writer.write_number(1 << 70)
+        writer.write_str("déjà")
+        writer.write_ints([1, 2, 3])
+
+        reader = SnapshotReader(writer.getvalue())
+
+        self.assertEqual(reader.read_int(), -5)
+        self.assertIsNone(reader.read_optional_int())
+        self.assertEqual(reader.read_optional_int(), 1 << 60)
+        number = reader.read_number()
+        self.assertEqual((number, type(number)), (7, int))
+        self.assertEqual(reader.read_number(), 7.25)
+        self.assertEqual(reader.read_number(), float(1 << 70))
+        self.assertEqual(reader.read_str(), "déjà")
+        self.assertEqual(reader.read_ints(), [1, 2, 3])
+        reader.read_end()
+
+    def test_events(self):
+        """
+        Test case to verify that the durations of the events keep being integers when they all are,
+        and become floats otherwise.
+        """
+        for durations in ([1, 2, 3], [1, 2.5, 3], []):
+            events = [Event.from_epoch(index * 1000, duration) for index, duration in enumerate(durations)]
+            writer = SnapshotWriter()
+            writer.write_events(events)
+
+            restored = SnapshotReader(writer.getvalue()).read_events()
+
+            with self.subTest(durations=durations):
+                self.assertEqual([(event.timestamp, event.duration) for event in restored],
+                                 [(event.timestamp, event.duration) for event in events])
+                self.assertEqual([type(event.duration) for event in restored],
+                                 [float if 2.5 in durations else int] * len(durations))
+
+    def test_truncated_snapshot(self):
+        """
+        Test case to verify that reading past the end, or leaving data unread, is an error.
+        """
+        writer = SnapshotWriter()
+        writer.write_int(1)
+        data = writer.getvalue()
+
+        with self.assertRaises(ValueError):
+            SnapshotReader(data[:-1]).read_int()
+        with self.assertRaises(ValueError):
+            SnapshotReader(data + b'\x00').read_end()
+
+if __name__ == '__main__':
+    unittest.main()
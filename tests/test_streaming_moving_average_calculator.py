@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
+from moving_average_calculator.models.streaming_moving_average_calculator import StreamingMovingAverageCalculator
+from moving_average_calculator.models.window import Window
+from tests.helpers import written_lines
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+class StreamingMovingAverageCalculatorTests(unittest.TestCase):
+    """
+    Unit tests for the StreamingMovingAverageCalculator class.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.temp_dir.name, "events.json")
+        open(self.input_file, 'w', encoding='utf-8').close()
+        self.output_sink = Mock(spec=IOutputSink)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def append(self, *lines):
+        with open(self.input_file, 'a', encoding='utf-8') as f:
+            f.write(''.join(lines))
+
+    def test_matches_moving_average_calculator(self):
+        """
+        Test case to verify that, without following the file, the results are the same as the ones
+        of the MovingAverageCalculator, for every input in the data folder.
+        """
+        for file_name, window_size in [('base.json', 10), ('window_2_deal_with_older_events.json', 2),
+                                       ('badly_formatted_with_valid_events.json', 3)]:
+            input_file = os.path.join(DATA_DIR, file_name)
+            expected_sink = Mock(spec=IOutputSink)
+            output_sink = Mock(spec=IOutputSink)
+            with self.subTest(file_name=file_name), patch('builtins.print'):
+                MovingAverageCalculator(Window(window_size), expected_sink).process_events(input_file)
+                StreamingMovingAverageCalculator(Window(window_size), output_sink, follow=False) \
+                    .process_events(input_file)
+
+                self.assertEqual(written_lines(output_sink), written_lines(expected_sink))
+
+    def test_follow_writes_complete_minutes_until_stopped(self):
+        """
+        Test case to verify that the minutes are written as soon as they are complete, including
+        the ones that pass while the feed is idle, and that the remaining minutes are written on shutdown.
+        """
+        calculator = StreamingMovingAverageCalculator(Window(5), self.output_sink, idle_timeout=0.05,
+                                                      poll_interval=0.01)
+
+        async def feed():
+            running = asyncio.ensure_future(calculator.run(self.input_file))
+            self.append('{"timestamp": "2022-12-26 10:00:00.000", "duration": 60}\n')
+            await asyncio.sleep(0.2)
+            # the feed has been idle: the minute of the event is complete, going by the wall clock
+            written_while_idle = written_lines(self.output_sink)
+
+            # a line written in two parts is only read once it is complete
+            self.append('{"timestamp": "2022-12-26 10:02:00.000", ')
+            await asyncio.sleep(0.05)
+            self.append('"duration": 30}\n')
+            await asyncio.sleep(0.2)
+            written_before_stop = written_lines(self.output_sink)
+
+            calculator.stop()
+            await running
+            return written_while_idle, written_before_stop
+
+        written_while_idle, written_before_stop = asyncio.run(feed())
+
+        self.assertEqual(written_while_idle,
+                         [json.dumps({"date": "2022-12-26 10:00:00", "average_delivery_time": 60.0})])
+        # the event completes the minute before it, and the idle feed completes the minute of the event
+        self.assertEqual(written_before_stop[1:], [
+            json.dumps({"date": "2022-12-26 10:01:00", "average_delivery_time": 60.0}),
+            json.dumps({"date": "2022-12-26 10:02:00", "average_delivery_time": 45.0}),
+        ])
+        # the minute after the last event is written on shutdown
+        self.assertEqual(written_lines(self.output_sink)[3:], [
+            json.dumps({"date": "2022-12-26 10:03:00", "average_delivery_time": 45.0}),
+        ])
+        self.output_sink.flush.assert_called()
+
+    def test_skips_older_events(self):
+        """
+        Test case to verify that the events older than the previous one are skipped, so that the window stays sorted.
+        """
+        self.append('{"timestamp": "2022-12-26 10:01:00.000", "duration": 60}\n',
+                    '{"timestamp": "2022-12-26 10:00:00.000", "duration": 10}\n')
+        calculator = StreamingMovingAverageCalculator(Window(5), self.output_sink, follow=False)
+
+        with patch('builtins.print') as mock_print:
+            calculator.process_events(self.input_file)
+
+        mock_print.assert_called_once_with("Error: Event older than the previous one, skipping...", file=sys.stderr)
+        self.assertEqual(written_lines(self.output_sink), [
+            json.dumps({"date": "2022-12-26 10:01:00", "average_delivery_time": 60.0}),
+            json.dumps({"date": "2022-12-26 10:02:00", "average_delivery_time": 60.0}),
+        ])
+
+    def test_slow_output_does_not_lose_records(self):
+        """
+        Test case to verify that, with a single pending batch, the calculator waits for a slow output
+        instead of dropping or piling up the records.
+        """
+        self.append(*[f'{{"timestamp": "2022-12-26 10:{minute:02d}:00.000", "duration": {minute}}}\n'
+                      for minute in range(30)])
+        self.output_sink.write.side_effect = lambda record: time.sleep(0.001)
+        calculator = StreamingMovingAverageCalculator(Window(5), self.output_sink, max_pending_batches=1,
+                                                      follow=False)
+
+        calculator.process_events(self.input_file)
+
+        self.assertEqual(len(written_lines(self.output_sink)), 31)
+
+    def test_output_error_is_raised(self):
+        """
+        Test case to verify that an error of the output stops the calculator, instead of leaving it waiting.
+        """
+        self.append(*[f'{{"timestamp": "2022-12-26 10:{minute:02d}:00.000", "duration": {minute}}}\n'
+                      for minute in range(30)])
+        self.output_sink.write.side_effect = OSError("No space left on device")
+        calculator = StreamingMovingAverageCalculator(Window(5), self.output_sink, max_pending_batches=1,
+                                                      follow=False)
+
+        with self.assertRaises(OSError):
+            calculator.process_events(self.input_file)
+
+if __name__ == '__main__':
+    unittest.main()
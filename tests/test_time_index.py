@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from datetime import datetime
+from moving_average_calculator.models.time_index import TimeIndex
+from moving_average_calculator.models.timestamp import to_epoch_microseconds
+
+
+class TimeIndexTests(unittest.TestCase):
+    """
+    Test cases for the TimeIndex class.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_file = os.path.join(self.temp_dir.name, "events.json")
+        self.index_file = self.input_file + ".index"
+        self.lines = [
+            '{"timestamp": "2022-12-26 10:00:10.000", "duration": 10}\n',
+            '{"timestamp": "2022-12-26 10:00:50.000", "duration": 20}\n',
+            'not json\n',
+            '{"timestamp": "2022-12-26 10:02:00.000", "duration": 30}\n',
+            '{"timestamp": "2022-12-26 10:05:30.000", "duration": 40}\n',
+        ]
+        self.write_input(self.lines)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_input(self, lines):
+        with open(self.input_file, 'w', encoding='utf-8') as f:
+            f.write(''.join(lines))
+
+    def minute(self, minute):
+        return to_epoch_microseconds(datetime(2022, 12, 26, 10, minute))
+
+    def offset(self, line):
+        return sum(len(previous_line) for previous_line in self.lines[:line])
+
+    def test_find(self):
+        """
+        Test case to verify that the index finds the first event of the minute of a time, or of the next minute
+        with events, and the end of the file after the last event.
+        """
+        with patch('builtins.print'):
+            index = TimeIndex.build(self.input_file)
+
+        self.assertEqual(index.minutes, [self.minute(0), self.minute(2), self.minute(5)])
+        self.assertEqual(index.find(self.minute(0) - 1), self.offset(0))
+        self.assertEqual(index.find(self.minute(0) + 30), self.offset(0))
+        self.assertEqual(index.find(self.minute(1)), self.offset(3))
+        self.assertEqual(index.find(self.minute(5)), self.offset(4))
+        self.assertEqual(index.find(self.minute(6)), os.path.getsize(self.input_file))
+
+    def test_unsorted_input_is_not_indexed(self):
+        """
+        Test case to verify that an input with events older than the ones before them cannot be indexed.
+        """
+        self.write_input(list(reversed(self.lines)))
+
+        with patch('builtins.print'):
+            self.assertIsNone(TimeIndex.build(self.input_file))
+
+    def test_save_and_load(self):
+        """
+        Test case to verify that a saved index is loaded back as it was.
+        """
+        with patch('builtins.print'):
+            index = TimeIndex.load_or_build(self.index_file, self.input_file)
+        loaded = TimeIndex.load(self.index_file, self.input_file)
+
+        self.assertEqual(loaded.minutes, index.minutes)
+        self.assertEqual(loaded.offsets, index.offsets)
+        self.assertEqual((loaded.input_size, loaded.input_mtime), (index.input_size, index.input_mtime))
+
+    def test_stale_index_is_built_again(self):
+        """
+        Test case to verify that the index is ignored, and built again, once the input file changes.
+        """
+        with patch('builtins.print'):
+            TimeIndex.load_or_build(self.index_file, self.input_file)
+        self.lines.append('{"timestamp": "2022-12-26 10:09:00.000", "duration": 50}\n')
+        self.write_input(self.lines)
+
+        self.assertIsNone(TimeIndex.load(self.index_file, self.input_file))
+        with patch('builtins.print'):
+            index = TimeIndex.load_or_build(self.index_file, self.input_file)
+        self.assertEqual(index.minutes[-1], self.minute(9))
+        self.assertIsNotNone(TimeIndex.load(self.index_file, self.input_file))
+
+    def test_invalid_index_file_is_ignored(self):
+        """
+        Test case to verify that a missing or corrupted index file is not loaded.
+        """
+        self.assertIsNone(TimeIndex.load(self.index_file, self.input_file))
+        with open(self.index_file, 'wb') as f:
+            f.write(b'MAIDX\x01')
+
+        self.assertIsNone(TimeIndex.load(self.index_file, self.input_file))
+
+if __name__ == '__main__':
+    unittest.main()
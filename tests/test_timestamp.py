@@ -0,0 +1,147 @@
+import unittest
+from datetime import datetime
+from moving_average_calculator.models.timestamp import (
+    MICROSECONDS_PER_HOUR,
+    MICROSECONDS_PER_MINUTE,
+    MICROSECONDS_PER_SECOND,
+    TIMESTAMP_FORMAT,
+    MinuteFormatter,
+    TimestampParser,
+    create_step_formatter,
+    floor_to_minute,
+    floor_to_step,
+    format_duration,
+    format_minute,
+    from_epoch_microseconds,
+    parse_duration,
+    to_epoch_microseconds,
+)
+
+class TimestampTests(unittest.TestCase):
+    """
+    Test cases for the timestamp helpers and the TimestampParser class.
+    """
+
+    def setUp(self):
+        self.parser = TimestampParser()
+
+    def assert_same_as_strptime(self, timestamp: str):
+        expected = to_epoch_microseconds(datetime.strptime(timestamp, TIMESTAMP_FORMAT))
+        self.assertEqual(self.parser.parse(timestamp), expected, timestamp)
+
+    def test_parse_matches_strptime(self):
+        """
+        Test case to verify that the fast path gives the same result as datetime.strptime,
+        for every number of fractional digits and across date changes.
+        """
+        for timestamp in [
+            "2018-12-26 18:11:08.509654",
+            "2018-12-26 18:11:08.5",
+            "2018-12-26 18:11:08.50",
+            "2018-12-26 18:11:08.509",
+            "2018-12-26 23:59:59.999999",
+            "2018-12-27 00:00:00.000000",
+            "2020-02-29 12:00:00.000001",
+            "1969-12-31 23:59:59.999999",
+            "2018-12-26 00:00:00.0",
+        ]:
+            self.assert_same_as_strptime(timestamp)
+
+    def test_parse_reuses_date_prefix(self):
+        """
+        Test case to verify that the date and the minute of the last timestamp are remembered.
+        """
+        self.parser.parse("2018-12-26 18:11:08.509654")
+        self.assertEqual(self.parser.date_prefix, "2018-12-26")
+        self.assertEqual(self.parser.date_microseconds,
+                         to_epoch_microseconds(datetime(2018, 12, 26)))
+        self.assertEqual(self.parser.minute_prefix, "2018-12-26 18:11:")
+        self.assertEqual(self.parser.minute_microseconds,
+                         to_epoch_microseconds(datetime(2018, 12, 26, 18, 11)))
+        self.assert_same_as_strptime("2018-12-26 18:11:59.9")
+
+    def test_parse_falls_back_to_strptime(self):
+        """
+        Test case to verify that timestamps without fixed-width fields are still accepted,
+        like datetime.strptime does.
+        """
+        self.assert_same_as_strptime("2018-1-6 8:1:8.509654")
+        self.assert_same_as_strptime("2018-12-26 18:11:0\u0663.509654")
+        self.assert_same_as_strptime("2018-12-26 18:11:8.5")
+
+    def test_parse_invalid_timestamps(self):
+        """
+        Test case to verify that invalid timestamps raise the same errors as datetime.strptime.
+        """
+        for timestamp in [
+            "2018-12-26 18:11:08",
+            "2018-13-26 18:11:08.509654",
+            "2018-02-30 18:11:08.509654",
+            "2018-12-26 24:11:08.509654",
+            "2018-12-26 18:11:+8.509654",
+            "2018-12-26T18:11:08.509654",
+            "2018-12-26 18:11:08.5096541",
+            "2018-12-26 18:11:08.50965\u0663",
+        ]:
+            with self.assertRaises(ValueError, msg=timestamp):
+                self.parser.parse(timestamp)
+
+        with self.assertRaises(TypeError):
+            self.parser.parse(1545847868)
+
+    def test_conversions(self):
+        """
+        Test case for the conversions between datetimes and microseconds since the Unix epoch.
+        """
+        timestamp = datetime(2018, 12, 26, 18, 11, 8, 509654)
+        microseconds = to_epoch_microseconds(timestamp)
+
+        self.assertEqual(from_epoch_microseconds(microseconds), timestamp)
+        self.assertEqual(from_epoch_microseconds(floor_to_minute(microseconds)),
+                         datetime(2018, 12, 26, 18, 11))
+        self.assertEqual(format_minute(microseconds), "2018-12-26 18:11:00")
+
+    def test_minute_formatter_matches_format_minute(self):
+        """
+        Test case to verify that the MinuteFormatter gives the same dates as format_minute,
+        across hours, days and years, and when the minutes go back.
+        """
+        formatter = MinuteFormatter()
+        start = to_epoch_microseconds(datetime(2018, 12, 31, 22, 58, 30))
+        minutes = [start + offset * MICROSECONDS_PER_MINUTE for offset in range(200)]
+        minutes += [start, to_epoch_microseconds(datetime(1969, 12, 31, 23, 59))]
+        for minute in minutes:
+            self.assertEqual(formatter.format(minute), format_minute(minute), minute)
+
+    def test_step_formatter(self):
+        """
+        Test case to verify that the steps shorter than a minute are formatted with their seconds,
+        and the others like the minutes.
+        """
+        start = to_epoch_microseconds(datetime(2018, 12, 31, 23, 59, 50))
+        formatter = create_step_formatter(10 * MICROSECONDS_PER_SECOND)
+        self.assertEqual([formatter.format(start + offset * 10 * MICROSECONDS_PER_SECOND) for offset in range(3)],
+                         ["2018-12-31 23:59:50", "2019-01-01 00:00:00", "2019-01-01 00:00:10"])
+        self.assertEqual(create_step_formatter(MICROSECONDS_PER_HOUR).format(start), "2018-12-31 23:59:00")
+
+    def test_durations(self):
+        """
+        Test case for the parsing and the formatting of the durations, and the truncation to a step.
+        """
+        self.assertEqual(parse_duration("10s"), 10 * MICROSECONDS_PER_SECOND)
+        self.assertEqual(parse_duration("5m"), 5 * MICROSECONDS_PER_MINUTE)
+        self.assertEqual(parse_duration("1d"), 24 * MICROSECONDS_PER_HOUR)
+        for value in ("", "0s", "1.5h", "10", "1w", "-1m"):
+            with self.assertRaises(ValueError, msg=value):
+                parse_duration(value)
+
+        self.assertEqual([format_duration(parse_duration(value)) for value in ("90s", "60m", "48h", "1d")],
+                         ["90s", "1h", "2d", "1d"])
+        timestamp = to_epoch_microseconds(datetime(2018, 12, 26, 18, 11, 8, 509654))
+        self.assertEqual(floor_to_step(timestamp, 10 * MICROSECONDS_PER_SECOND),
+                         to_epoch_microseconds(datetime(2018, 12, 26, 18, 11)))
+        self.assertEqual(floor_to_step(timestamp, MICROSECONDS_PER_HOUR),
+                         to_epoch_microseconds(datetime(2018, 12, 26, 18)))
+
+if __name__ == '__main__':
+    unittest.main()
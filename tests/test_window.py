@@ -1,7 +1,15 @@
+import json
+import math
+import random
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
+from unittest.mock import Mock, mock_open, patch
+from moving_average_calculator.models.interfaces.i_output_sink import IOutputSink
+from moving_average_calculator.models.moving_average_calculator import MovingAverageCalculator
 from moving_average_calculator.models.window import Window
 from moving_average_calculator.models.event import Event
+from moving_average_calculator.models.snapshot import SnapshotReader, SnapshotWriter
+from moving_average_calculator.models.timestamp import to_epoch_microseconds
 
 class WindowTests(unittest.TestCase):
     """
@@ -39,6 +47,16 @@ class WindowTests(unittest.TestCase):
         self.assertEqual(len(self.window.events), 3)
         self.assertEqual(self.window.total_duration, 360)
 
+    def test_add_event_that_fails(self):
+        """
+        Test case to verify that an event whose duration cannot be added leaves the window as it was.
+        """
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=60))
+        with self.assertRaises(TypeError):
+            self.window.add_event(Event("2022-12-26 10:01:00.000", duration="5"))
+        self.assertEqual(len(self.window.events), 1)
+        self.assertEqual(self.window.get_average_duration(), 60.0)
+
     def test_remove_old_events(self):
         """
         Test case for the remove_old_events method of the Window class.
@@ -56,10 +74,11 @@ class WindowTests(unittest.TestCase):
         self.window.add_event(event3)
         self.window.add_event(event4)
 
-        current_time = datetime(2022, 12, 26, 10, 12, 0)
+        current_time = to_epoch_microseconds(datetime(2022, 12, 26, 10, 12, 0))
         self.window.remove_old_events(current_time)
 
         self.assertEqual(len(self.window.events), 2)
+        self.assertEqual(self.window.event_count(), 2)
         self.assertEqual(self.window.total_duration, 420)
 
     def test_get_average_duration(self):
@@ -88,6 +107,96 @@ class WindowTests(unittest.TestCase):
         average_duration = self.window.get_average_duration()
         self.assertEqual(average_duration, 0.0)
 
+    def test_next_expiration_time(self):
+        """
+        Test case for the next_expiration_time method of the Window class.
+
+        The oldest event must still be in the window right before the returned time, and removed at that time.
+
+        """
+        self.assertIsNone(self.window.next_expiration_time())
+
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=60))
+        self.window.add_event(Event("2022-12-26 10:05:00.000", duration=120))
+        expiration_time = self.window.next_expiration_time()
+
+        self.window.remove_old_events(expiration_time - 1)
+        self.assertEqual(len(self.window.events), 2)
+        self.window.remove_old_events(expiration_time)
+        self.assertEqual(len(self.window.events), 1)
+
+    def test_save_and_load_state(self):
+        """
+        Test case to verify that a window restored from a snapshot has the same contents,
+        and that a snapshot of a window of another size is rejected.
+        """
+        self.window.add_event(Event("2022-12-26 10:00:00.000", duration=60))
+        self.window.add_event(Event("2022-12-26 10:05:00.000", duration=120.5))
+        writer = SnapshotWriter()
+        self.window.save_state(writer)
+
+        restored = Window(self.window.size // 60_000_000)
+        restored.load_state(SnapshotReader(writer.getvalue()))
+
+        self.assertEqual(restored.total_duration, self.window.total_duration)
+        self.assertEqual([(event.timestamp, event.duration) for event in restored.events],
+                         [(event.timestamp, event.duration) for event in self.window.events])
+        with self.assertRaises(ValueError):
+            Window(1).load_state(SnapshotReader(writer.getvalue()))
+
+    def test_save_and_load_state_with_aggregates(self):
+        """
+        Test case to verify that the aggregates are rebuilt from the events of a snapshot,
+        and that a snapshot of a window with other aggregates is rejected.
+        """
+        window = Window(5, ['max', 'p50'])
+        for minute, duration in enumerate([40, 10, 30]):
+            window.add_event(Event(f"2022-12-26 10:0{minute}:00.000", duration=duration))
+        writer = SnapshotWriter()
+        window.save_state(writer)
+
+        restored = Window(5, ['max', 'p50'])
+        restored.load_state(SnapshotReader(writer.getvalue()))
+        restored.remove_old_events(window.next_expiration_time())
+
+        self.assertEqual(restored.get_result(),
+                         {"average_delivery_time": 20.0, "max_delivery_time": 30, "p50_delivery_time": 10})
+        for other in (Window(5), Window(5, ['max'])):
+            with self.assertRaises(ValueError):
+                other.load_state(SnapshotReader(writer.getvalue()))
+
+    def test_aggregates_match_brute_force(self):
+        """
+        Test case to verify the max, the min and the percentiles written by a calculator against
+        the ones computed from the events of each window.
+        """
+        random.seed(9)
+        timestamp = datetime(2022, 12, 26, 10, 0)
+        events = []
+        for _ in range(400):
+            timestamp += timedelta(seconds=random.choice([0, 1, 20, 59, 60, 61, 300]))
+            events.append((timestamp, random.randint(0, 100)))
+        read_data = '\n'.join(json.dumps({"timestamp": event_time.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                                          "duration": duration}) for event_time, duration in events) + '\n'
+
+        output_sink = Mock(spec=IOutputSink)
+        with patch('builtins.open', mock_open(read_data=read_data)):
+            MovingAverageCalculator(Window(10, ['max', 'min', 'p50', 'p90']), output_sink) \
+                .process_events("/path/to/input/file.txt")
+
+        for record_call in output_sink.write.call_args_list:
+            record = json.loads(record_call[0][0])
+            minute = datetime.strptime(record["date"], '%Y-%m-%d %H:%M:%S')
+            durations = sorted(duration for event_time, duration in events
+                               if minute - timedelta(minutes=10) <= event_time <= minute)
+            if not durations:
+                self.assertEqual(record["max_delivery_time"], 0.0)
+                continue
+            self.assertEqual(record["max_delivery_time"], durations[-1])
+            self.assertEqual(record["min_delivery_time"], durations[0])
+            self.assertEqual(record["p50_delivery_time"], durations[math.ceil(len(durations) * 50 / 100) - 1])
+            self.assertEqual(record["p90_delivery_time"], durations[math.ceil(len(durations) * 90 / 100) - 1])
+
 if __name__ == '__main__':
     unittest.main()
     
\ No newline at end of file
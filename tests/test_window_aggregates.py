@@ -0,0 +1,60 @@
+import math
+import random
+import unittest
+from fractions import Fraction
+from moving_average_calculator.models.window_aggregates import WindowAggregates, parse_aggregate
+
+def nearest_rank(durations, percentile):
+    ordered = sorted(durations)
+    return ordered[max(math.ceil(Fraction(str(percentile)) / 100 * len(ordered)) - 1, 0)]
+
+class WindowAggregatesTests(unittest.TestCase):
+    """
+    Test cases for the WindowAggregates class.
+    """
+
+    def test_parse_aggregate(self):
+        """
+        Test case to verify the names of the aggregates that are accepted.
+        """
+        for name in ('max', 'min', 'p0', 'p50', 'p95', 'p99.9', 'p100'):
+            self.assertEqual(parse_aggregate(name), name)
+        for name in ('avg', 'p', 'p101', 'p-1', 'P95', 'p95.'):
+            with self.subTest(name=name), self.assertRaises(ValueError):
+                parse_aggregate(name)
+
+    def test_matches_brute_force(self):
+        """
+        Test case to verify the max, the min and the percentiles of a sliding window against
+        the ones computed from its durations.
+        """
+        generator = random.Random(3)
+        aggregates = WindowAggregates(['max', 'min', 'p50', 'p7', 'p99.9', 'p100'])
+        durations = []
+        for _ in range(3000):
+            if durations and generator.random() < 0.45:
+                aggregates.remove(durations.pop(0))
+            else:
+                duration = generator.randint(1, 200)
+                durations.append(duration)
+                aggregates.add(duration)
+
+            result = aggregates.get_result()
+            if not durations:
+                self.assertEqual(set(result.values()), {0.0})
+                continue
+            self.assertEqual(result["max_delivery_time"], max(durations))
+            self.assertEqual(result["min_delivery_time"], min(durations))
+            for percentile in (50, 7, 99.9, 100):
+                self.assertEqual(result[f"p{percentile}_delivery_time"], nearest_rank(durations, percentile))
+
+    def test_field_order(self):
+        """
+        Test case to verify that the fields follow the order of the names, without duplicates.
+        """
+        aggregates = WindowAggregates(['p95', 'max', 'p95'])
+        aggregates.add(10)
+        self.assertEqual(list(aggregates.get_result()), ["p95_delivery_time", "max_delivery_time"])
+
+if __name__ == '__main__':
+    unittest.main()